@@ -21,6 +21,7 @@ from account.models import User
 from account.models import UserAssignedBusiness
 from account.models import UserPreference
 from account.models import WebhookCall
+from account.models import WebhookEvent
 from sooq_althahab_admin.models import AppVersion
 from sooq_althahab_admin.models import Notification
 
@@ -210,6 +211,21 @@ class WebhookCallAdminModel(admin.ModelAdmin):
     ]
 
 
+@admin.register(WebhookEvent)
+class WebhookEventAdminModel(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "provider",
+        "event_id",
+        "status",
+        "attempts",
+        "created_at",
+        "processed_at",
+    ]
+    list_filter = ["provider", "status"]
+    search_fields = ["event_id"]
+
+
 @admin.register(BankAccount)
 class BankAccountAdminModel(admin.ModelAdmin):
     list_display = ["user", "bank_name", "account_name", "account_number"]
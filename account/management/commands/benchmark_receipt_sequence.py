@@ -0,0 +1,90 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+
+from account.models import ReceiptSequence
+from account.sequences import _known_sequences
+from account.sequences import _next_locked_sequence
+from account.sequences import get_receipt_sequence_name
+from account.sequences import next_receipt_sequence
+
+# Month "00" never occurs, so benchmark counters cannot collide with real ones.
+BENCHMARK_MM_YY = "0000"
+BENCHMARK_CODE = "BMK"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark receipt number allocation under parallel writers and report "
+        "receipts per second for the locked-row and sequence allocators."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--per-worker", type=int, default=250)
+        parser.add_argument(
+            "--hold-ms",
+            type=int,
+            default=5,
+            help="Time each writer keeps its transaction open after allocating "
+            "(simulates the Transaction/PurchaseRequest insert).",
+        )
+        parser.add_argument(
+            "--strategy",
+            choices=["locked", "sequence", "both"],
+            default="both",
+        )
+
+    def handle(self, *args, **options):
+        strategies = (
+            ["locked", "sequence"]
+            if options["strategy"] == "both"
+            else [options["strategy"]]
+        )
+        for strategy in strategies:
+            self._cleanup()
+            allocate = (
+                _next_locked_sequence if strategy == "locked" else next_receipt_sequence
+            )
+            elapsed, numbers = self._run(allocate, options)
+            duplicates = len(numbers) - len(set(numbers))
+            self.stdout.write(
+                f"{strategy:>8}: {len(numbers)} receipts in {elapsed:.2f}s "
+                f"({len(numbers) / elapsed:.1f}/s) with {options['workers']} "
+                f"writers, duplicates={duplicates}"
+            )
+        self._cleanup()
+
+    def _run(self, allocate, options):
+        hold = options["hold_ms"] / 1000
+
+        def writer(_):
+            issued = []
+            try:
+                for _ in range(options["per_worker"]):
+                    with transaction.atomic():
+                        issued.append(allocate(BENCHMARK_MM_YY, BENCHMARK_CODE))
+                        time.sleep(hold)
+            finally:
+                connection.close()
+            return issued
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            results = list(executor.map(writer, range(options["workers"])))
+        elapsed = time.perf_counter() - started
+
+        return elapsed, [number for issued in results for number in issued]
+
+    def _cleanup(self):
+        ReceiptSequence.objects.filter(
+            mm_yy=BENCHMARK_MM_YY, transaction_code=BENCHMARK_CODE
+        ).delete()
+        if connection.vendor == "postgresql":
+            sequence_name = get_receipt_sequence_name(BENCHMARK_MM_YY, BENCHMARK_CODE)
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SEQUENCE IF EXISTS {sequence_name}")
+            _known_sequences.discard(sequence_name)
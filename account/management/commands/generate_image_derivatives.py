@@ -0,0 +1,64 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from sooq_althahab.image_derivatives import IMAGE_MODELS
+from sooq_althahab.image_derivatives import generate_derivatives
+from sooq_althahab.image_derivatives import is_image_key
+from sooq_althahab.tasks import generate_image_derivatives
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized derivatives of product and marketplace images "
+        "that have none, e.g. images uploaded before derivatives existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", choices=list(IMAGE_MODELS), help="Only this image model."
+        )
+        parser.add_argument("--limit", type=int, default=1000)
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue the images on the default queue instead of resizing "
+            "them in this process.",
+        )
+
+    def handle(self, *args, **options):
+        labels = [options["model"]] if options["model"] else list(IMAGE_MODELS)
+        queued = generated = failed = 0
+        for label in labels:
+            field = IMAGE_MODELS[label]
+            pks = []
+            for pk, key in (
+                apps.get_model(label)
+                .objects.filter(derivatives={})
+                .exclude(**{f"{field}__isnull": True})
+                .order_by("pk")
+                .values_list("pk", field)
+                .iterator()
+            ):
+                if is_image_key(key):
+                    pks.append(pk)
+                if len(pks) == options["limit"]:
+                    break
+
+            for pk in pks:
+                if options["enqueue"]:
+                    generate_image_derivatives.delay(label, pk)
+                    queued += 1
+                    continue
+                try:
+                    if generate_derivatives(label, pk):
+                        generated += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{label} {pk}: {e}")
+
+        if options["enqueue"]:
+            self.stdout.write(f"Queued {queued} images.")
+        else:
+            self.stdout.write(
+                f"Generated derivatives of {generated} images, {failed} failed."
+            )
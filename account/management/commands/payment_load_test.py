@@ -0,0 +1,318 @@
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.test import Client
+from requests.adapters import HTTPAdapter
+
+from account.models import User
+from account.models import UserAssignedBusiness
+from account.utils import generate_tokens
+from sooq_althahab.idempotency import IDEMPOTENCY_HEADER
+from sooq_althahab.payment_gateway_services.benefit.benefit_client import (
+    BenefitPayClient,
+)
+from sooq_althahab.payment_gateway_services.credimax.reconciliation import percentile
+from sooq_althahab.payment_gateway_services.simulator import GatewaySimulator
+from sooq_althahab.payment_gateway_services.simulator import SimulatorConfig
+from sooq_althahab.payment_gateway_services.simulator import install_in_process
+
+CREDIMAX_TOPUP_PATH = "/api/v1/wallet/top-up/credimax/create-session/"
+BENEFIT_TOPUP_PATH = "/api/v1/wallet/top-up/benefit/create-session/"
+SUBSCRIPTION_SESSION_PATH = "/api/v1/subscription/create-session/"
+SUBSCRIPTION_TOKENIZE_PATH = "/api/v1/subscription/tokenize-card/"
+SUBSCRIPTION_PAYMENT_PATH = "/api/v1/subscription/make-payment/"
+CREDIMAX_WEBHOOK_PATH = "/api/v1/wallet/webhook/credimax/"
+BENEFIT_NOTIFICATION_PATH = "/api/v1/wallet/webhook/benefit/notification/"
+
+# Scenarios calling authenticated endpoints need a business user
+AUTHENTICATED_SCENARIOS = ["topup", "subscription"]
+
+
+def is_error(result):
+    """Whether a flow step failed (HTTP error status or no response)."""
+    return result is None or result.status_code >= 400
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the top-up, subscription and webhook payment endpoints, with "
+        "the gateways served by the payment gateway simulator, and report "
+        "throughput and tail latency. Requests go through Django's test client "
+        "in this process, or to a running API server with --app-url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            choices=["topup", "subscription", "webhook", "all"],
+            default="all",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--external",
+            action="store_true",
+            help="Call the simulator CREDIMAX_BASE_URL/BENEFIT_PAYMENT_URL point "
+            "to (e.g. the ASGI app) instead of running it in-process.",
+        )
+        parser.add_argument("--latency-ms", type=float, default=50)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--decline-rate", type=float, default=0.0)
+        parser.add_argument(
+            "--app-url",
+            help="Base URL of a running API server, e.g. http://localhost:8000, "
+            "instead of calling the views in this process. Its gateway URLs must "
+            "point to the simulator (see --external). Hosted checkout webhooks "
+            "from the in-process simulator are also sent there.",
+        )
+        parser.add_argument(
+            "--user-email",
+            help="Business user the top-up and subscription requests are made as.",
+        )
+        parser.add_argument(
+            "--subscription-plan",
+            help="ID of the subscription plan the subscription scenario subscribes to.",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = (
+            ["topup", "subscription", "webhook"]
+            if options["scenario"] == "all"
+            else [options["scenario"]]
+        )
+        if any(scenario in AUTHENTICATED_SCENARIOS for scenario in scenarios):
+            if not options["user_email"]:
+                raise CommandError(
+                    "--user-email is required for the topup and subscription scenarios."
+                )
+            self.access_token = self.get_access_token(options["user_email"])
+        if "subscription" in scenarios and not options["subscription_plan"]:
+            raise CommandError(
+                "--subscription-plan is required for the subscription scenario."
+            )
+        self.subscription_plan_id = options["subscription_plan"]
+
+        self.app_url = (options["app_url"] or "").rstrip("/")
+        self.simulator = None
+        if not options["external"]:
+            self.simulator = install_in_process(
+                GatewaySimulator(
+                    SimulatorConfig(
+                        latency_ms=options["latency_ms"],
+                        error_rate=options["error_rate"],
+                        decline_rate=options["decline_rate"],
+                        credimax_webhook_url=(
+                            f"{self.app_url}{CREDIMAX_WEBHOOK_PATH}"
+                            if self.app_url
+                            else None
+                        ),
+                    )
+                )
+            )
+
+        if self.app_url:
+            self.app_session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=options["concurrency"])
+            self.app_session.mount("http://", adapter)
+            self.app_session.mount("https://", adapter)
+        # Test clients keep cookies, so every worker thread gets its own
+        self.test_clients = threading.local()
+
+        for scenario in scenarios:
+            self.run_scenario(
+                scenario,
+                getattr(self, f"run_{scenario}"),
+                options["requests"],
+                options["concurrency"],
+            )
+
+        if self.simulator:
+            self.stdout.write(
+                f"Simulator callbacks: {self.simulator.callbacks_sent} sent, "
+                f"{self.simulator.callback_errors} failed"
+            )
+
+    def run_scenario(self, name, flow, total, concurrency):
+        """Run ``flow`` ``total`` times and print per-operation statistics."""
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        errors_lock = threading.Lock()
+
+        def timed(operation, function, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+                failed = is_error(result)
+            except Exception as e:
+                self.stderr.write(f"{operation}: {e}")
+                result, failed = None, True
+            samples[operation].append(time.perf_counter() - started)
+            if failed:
+                with errors_lock:
+                    errors[operation] += 1
+            return result
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda index: flow(timed, index), range(total)))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"\n{name}: {total} flows in {elapsed:.2f}s "
+            f"({total / elapsed:.1f} flows/s, concurrency {concurrency})"
+        )
+        for operation, latencies in samples.items():
+            self.stdout.write(
+                f"  {operation:<24} n={len(latencies):<6} "
+                f"errors={errors[operation]:<5} "
+                f"rps={len(latencies) / elapsed:<8.1f} "
+                f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+                f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+                f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+                f"max={max(latencies) * 1000:.1f}ms"
+            )
+
+    def get_access_token(self, email):
+        """Access token of ``email`` for its first business, as login issues it."""
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            raise CommandError(f"User {email} does not exist.")
+        assigned_business = (
+            UserAssignedBusiness.objects.filter(user=user)
+            .select_related("business")
+            .first()
+        )
+        if assigned_business is None:
+            raise CommandError(f"User {email} has no business.")
+        return generate_tokens(
+            user=user,
+            email=email,
+            role=assigned_business.business.business_account_type,
+            assigned_business=assigned_business.pk,
+            organization_code=(
+                user.organization_id.code if user.organization_id else None
+            ),
+        )["access_token"]
+
+    def post(self, path, json=None, data=None, headers=None, authenticated=False):
+        """POST to an API endpoint, in this process or on the --app-url server."""
+        headers = dict(headers or {})
+        if authenticated:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        if self.app_url:
+            return self.app_session.post(
+                f"{self.app_url}{path}",
+                json=json,
+                data=data,
+                headers=headers,
+                timeout=30,
+            )
+
+        client = getattr(self.test_clients, "client", None)
+        if client is None:
+            client = self.test_clients.client = Client(raise_request_exception=False)
+        if json is not None:
+            return client.post(
+                path, json, content_type="application/json", headers=headers
+            )
+        return client.post(path, data, headers=headers)
+
+    def run_topup(self, timed, index):
+        """Wallet top-up: Credimax hosted checkout and Benefit Pay sessions."""
+        timed(
+            "topup.credimax",
+            self.post,
+            CREDIMAX_TOPUP_PATH,
+            json={"amount": "10.000"},
+            headers={IDEMPOTENCY_HEADER: uuid.uuid4().hex},
+            authenticated=True,
+        )
+        if BenefitPayClient.PAYMENT_URL:
+            timed(
+                "topup.benefit",
+                self.post,
+                BENEFIT_TOPUP_PATH,
+                json={"amount": "10.000"},
+                headers={IDEMPOTENCY_HEADER: uuid.uuid4().hex},
+                authenticated=True,
+            )
+
+    def run_subscription(self, timed, index):
+        """Subscription checkout: session, card tokenization and first payment."""
+        response = timed(
+            "subscription.session",
+            self.post,
+            SUBSCRIPTION_SESSION_PATH,
+            json={
+                "subscription_plan_id": self.subscription_plan_id,
+                "is_auto_renew": True,
+            },
+            authenticated=True,
+        )
+        if is_error(response):
+            return
+        session = response.json()
+        response = timed(
+            "subscription.tokenize",
+            self.post,
+            SUBSCRIPTION_TOKENIZE_PATH,
+            json={"session_id": session.get("session_id")},
+            authenticated=True,
+        )
+        if is_error(response):
+            return
+        timed(
+            "subscription.payment",
+            self.post,
+            SUBSCRIPTION_PAYMENT_PATH,
+            json={
+                "session_id": session.get("session_id"),
+                "order_id": session.get("order_id"),
+            },
+            authenticated=True,
+        )
+
+    def run_webhook(self, timed, index):
+        """Gateway notifications against the webhook endpoints."""
+        order_id = f"loadtest-{uuid.uuid4().hex[:16]}"
+        timed(
+            "webhook.credimax",
+            self.post,
+            CREDIMAX_WEBHOOK_PATH,
+            json={
+                "result": "SUCCESS",
+                "order": {"id": order_id, "amount": "10.000", "status": "CAPTURED"},
+                "transaction": {"id": uuid.uuid4().hex[:12], "type": "PAYMENT"},
+                "response": {"gatewayCode": "APPROVED"},
+            },
+            headers={
+                "X-Notification-Id": uuid.uuid4().hex,
+                "X-Notification-Secret": settings.CREDIMAX_WEBHOOK_SECRET or "",
+            },
+        )
+        trandata = BenefitPayClient.encrypt(
+            json.dumps(
+                [
+                    {
+                        "paymentId": uuid.uuid4().hex[:18],
+                        "trackId": order_id,
+                        "amt": "10.000",
+                        "result": "CAPTURED",
+                    }
+                ]
+            )
+        )
+        timed(
+            "webhook.benefit",
+            self.post,
+            BENEFIT_NOTIFICATION_PATH,
+            data={"trandata": trandata},
+        )
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from sooq_althahab.billing import pdf_pool
+from sooq_althahab.billing.rendering import render_template
+from sooq_althahab.billing.subscription.helpers import get_file_url
+from sooq_althahab.payment_gateway_services.credimax.reconciliation import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure receipt PDF generation latency through the WeasyPrint "
+        "render pool, or inline with --workers 0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--renders", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--workers", type=int, help="PDF_RENDER_WORKERS")
+        parser.add_argument("--template", default="invoice/top-up-receipt.html")
+
+    def handle(self, *args, **options):
+        context = {
+            "is_pdf": True,
+            "organization_details": {
+                "name": "Benchmark",
+                "watermark_url": get_file_url("static/images/invoice_bg.png"),
+            },
+            "organization_logo_url": get_file_url("static/images/sqa_golden_logo.png"),
+            "transaction_number": "BENCH-0001",
+            "amount": 100,
+            "total_amount": 100,
+        }
+        html = render_template(options["template"], context)
+
+        overrides = {}
+        if options["workers"] is not None:
+            overrides["PDF_RENDER_WORKERS"] = options["workers"]
+        with override_settings(**overrides):
+            # The first render starts the pool; it is reported separately.
+            started = time.perf_counter()
+            pdf_pool.render_pdf(html)
+            self.stdout.write(f"first render: {time.perf_counter() - started:.2f}s")
+
+            latencies = []
+
+            def render(_):
+                started = time.perf_counter()
+                pdf_pool.render_pdf(html)
+                latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                list(executor.map(render, range(options["renders"])))
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{options['renders']} renders in {elapsed:.2f}s: "
+            f"{options['renders'] / elapsed:.1f} PDFs/s "
+            f"(concurrency {options['concurrency']})"
+        )
+        self.stdout.write(
+            f"  p50={percentile(latencies, 50) * 1000:.1f}ms "
+            f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+            f"max={max(latencies) * 1000:.1f}ms"
+        )
+        self.stdout.write(f"  metrics: {pdf_pool.get_metrics()}")
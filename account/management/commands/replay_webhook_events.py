@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from account.models import WebhookEvent
+from sooq_althahab.enums.account import WebhookEventStatus
+from sooq_althahab.enums.account import WebhookProvider
+from sooq_althahab.webhook_events import enqueue_webhook_event
+from sooq_althahab.webhook_events import process_stored_webhook_event
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run stored gateway/KYC webhook events. By default replays FAILED "
+        "events inline; pass event ids to replay specific events. PROCESSED "
+        "events are skipped unless --include-processed is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_ids", nargs="*", help="WebhookEvent ids.")
+        parser.add_argument("--provider", choices=WebhookProvider.values)
+        parser.add_argument(
+            "--status",
+            choices=WebhookEventStatus.values,
+            default=WebhookEventStatus.FAILED,
+            help="Status of the events to replay when no ids are given.",
+        )
+        parser.add_argument(
+            "--since", help="Only events received at or after this ISO datetime."
+        )
+        parser.add_argument("--limit", type=int, default=1000)
+        parser.add_argument(
+            "--include-processed",
+            action="store_true",
+            help="Also replay events that were already PROCESSED. Payment "
+            "handlers skip transactions that are no longer pending, so a replay "
+            "never credits twice.",
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue the events on the webhooks queue instead of running "
+            "them in this process.",
+        )
+
+    def handle(self, *args, **options):
+        events = WebhookEvent.objects.order_by("created_at")
+        if options["event_ids"]:
+            events = events.filter(id__in=options["event_ids"])
+        else:
+            events = events.filter(status=options["status"])
+        if options["provider"]:
+            events = events.filter(provider=options["provider"])
+        if not options["include_processed"]:
+            skipped = events.filter(status=WebhookEventStatus.PROCESSED).count()
+            if skipped:
+                self.stdout.write(
+                    f"Skipping {skipped} PROCESSED events (see --include-processed)."
+                )
+            events = events.exclude(status=WebhookEventStatus.PROCESSED)
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError("--since must be an ISO datetime.")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            events = events.filter(created_at__gte=since)
+
+        event_ids = list(events.values_list("id", flat=True)[: options["limit"]])
+        # The Credimax handler locks the transaction and skips events for
+        # settled ones, so replaying its processed events does not repeat them.
+        WebhookEvent.objects.filter(id__in=event_ids).update(
+            status=WebhookEventStatus.RECEIVED, updated_at=timezone.now()
+        )
+
+        processed = failed = 0
+        for event_id in event_ids:
+            if options["enqueue"]:
+                enqueue_webhook_event(event_id)
+                continue
+            try:
+                if process_stored_webhook_event(event_id):
+                    processed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{event_id}: {e}")
+
+        if options["enqueue"]:
+            self.stdout.write(f"Queued {len(event_ids)} webhook events.")
+        else:
+            self.stdout.write(
+                f"Replayed {len(event_ids)} webhook events: {processed} processed, "
+                f"{failed} failed."
+            )
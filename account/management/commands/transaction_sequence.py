@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 
 from account.models import ReceiptSequence
 from account.models import Transaction
+from account.sequences import sync_receipt_sequence
 from investor.models import PurchaseRequest
 
 
@@ -57,6 +58,10 @@ class Command(BaseCommand):
                 obj.last_sequence = sequence_number
                 obj.save()
 
+        # Keep the PostgreSQL sequences ahead of the recomputed counters
+        for obj in ReceiptSequence.objects.all():
+            sync_receipt_sequence(obj.mm_yy, obj.transaction_code, obj.last_sequence)
+
         self.stdout.write(
             self.style.SUCCESS("Receipt sequence data synced successfully.")
         )
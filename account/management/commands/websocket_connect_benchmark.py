@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+import uuid
+
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from sooq_althahab.consumers.admin_notifications import NotificationConsumer
+from sooq_althahab.middleware import JwtAuthMiddleware
+from sooq_althahab.notification_counters import reset_unread_count
+from sooq_althahab.payment_gateway_services.credimax.reconciliation import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure notification WebSocket connects per second in this process "
+        "(one ASGI worker): token check, group join, replay and unread count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--organization-code", default="benchmark")
+        parser.add_argument(
+            "--memory-layer",
+            action="store_true",
+            help="Use the in-memory channel layer instead of CHANNEL_LAYERS.",
+        )
+        parser.add_argument(
+            "--cold-counters",
+            action="store_true",
+            help="Do not seed the unread counters, so connects fall back to "
+            "the database.",
+        )
+        parser.add_argument(
+            "--resume-token",
+            help="Reconnect with this resume token to include replay cost.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = [f"bench-{uuid.uuid4().hex[:10]}" for _ in range(options["users"])]
+        if not options["cold_counters"]:
+            for user_id in user_ids:
+                reset_unread_count(user_id)
+
+        tokens = []
+        for user_id in user_ids:
+            token = AccessToken()
+            token["user_id"] = user_id
+            token["organization_code"] = options["organization_code"]
+            tokens.append(str(token))
+
+        if options["memory_layer"]:
+            with override_settings(
+                CHANNEL_LAYERS={
+                    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+                }
+            ):
+                results = asyncio.run(self.run_benchmark(tokens, options))
+        else:
+            results = asyncio.run(self.run_benchmark(tokens, options))
+
+        latencies, failures, elapsed = results
+        total = options["connections"]
+        self.stdout.write(
+            f"{total} connects in {elapsed:.2f}s: "
+            f"{len(latencies) / elapsed:.1f} connects/s, {failures} failed "
+            f"(concurrency {options['concurrency']})"
+        )
+        if latencies:
+            self.stdout.write(
+                f"  connect+count p50={percentile(latencies, 50) * 1000:.1f}ms "
+                f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+                f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+                f"max={max(latencies) * 1000:.1f}ms"
+            )
+
+    async def run_benchmark(self, tokens, options):
+        application = JwtAuthMiddleware(
+            URLRouter([path("ws/notifications/", NotificationConsumer.as_asgi())])
+        )
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        resume = f"&resume={options['resume_token']}" if options["resume_token"] else ""
+        latencies = []
+        failures = 0
+
+        async def connect(index):
+            nonlocal failures
+            token = tokens[index % len(tokens)]
+            async with semaphore:
+                communicator = ApplicationCommunicator(
+                    application,
+                    {
+                        "type": "websocket",
+                        "path": "/ws/notifications/",
+                        "query_string": f"token={token}{resume}".encode(),
+                        "headers": [],
+                        "subprotocols": [],
+                    },
+                )
+                started = time.perf_counter()
+                try:
+                    await communicator.send_input({"type": "websocket.connect"})
+                    response = await communicator.receive_output(10)
+                    if response["type"] != "websocket.accept":
+                        failures += 1
+                        return
+                    # The unread count is the last message sent on connect.
+                    while True:
+                        response = await communicator.receive_output(10)
+                        if "count" in json.loads(response.get("text") or "{}"):
+                            break
+                    latencies.append(time.perf_counter() - started)
+                    await communicator.send_input(
+                        {"type": "websocket.disconnect", "code": 1000}
+                    )
+                    await communicator.wait(10)
+                except Exception as e:
+                    failures += 1
+                    self.stderr.write(f"connect {index}: {e!r}")
+                    await communicator.stop()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(connect(i) for i in range(options["connections"])))
+        return latencies, failures, time.perf_counter() - started
@@ -161,6 +161,8 @@ MESSAGES = {
     "notification_read_unread_status_updated": _(
         "Notification read/unread status updated successfully."
     ),
+    "notifications_marked_read": _("Notifications marked as read successfully."),
+    "invalid_notification_type": _("Invalid notification type."),
     "session_expired": _("Your session has expired. Please log in again to proceed."),
     "email_already_verified": _("Email is already verified."),
     "phone_number_already_verified": _("Phone number already verified."),
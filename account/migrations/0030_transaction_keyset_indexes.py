@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("account", "0029_transaction_profit_distribution_and_more"),
+        ("investor", "0015_purchaserequest_deduction_amount_and_more"),
+        ("jeweler", "0039_remove_musharakahcontractrequest_design_and_more"),
+        (
+            "sooq_althahab_admin",
+            "0036_remove_businesssubscriptionplan_cancel_at_end_of_billing_cycle",
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="txn_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["from_business", "-created_at", "-id"],
+                name="txn_from_biz_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["to_business", "-created_at", "-id"],
+                name="txn_to_biz_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["status", "transaction_type", "-created_at"],
+                name="txn_status_type_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["transfer_via", "status", "-created_at"],
+                name="txn_via_status_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:56
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("account", "0030_transaction_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.CharField(
+                        editable=False,
+                        max_length=25,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("request_path", models.CharField(max_length=255)),
+                ("request_hash", models.CharField(max_length=64)),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                (
+                    "response_status_code",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                (
+                    "response_body",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="idempotency_keys",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Idempotency Key",
+                "verbose_name_plural": "Idempotency Keys",
+                "db_table": "idempotency_keys",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(fields=["created_at"], name="idk_created_idx")
+                ],
+                "unique_together": {("user", "key", "request_path")},
+            },
+        ),
+    ]
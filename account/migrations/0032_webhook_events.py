@@ -0,0 +1,72 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:06
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("account", "0031_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookEvent",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.CharField(
+                        editable=False,
+                        max_length=25,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "provider",
+                    models.CharField(
+                        choices=[
+                            ("CREDIMAX", "Credimax"),
+                            ("BENEFIT_PAY", "Benefit Pay"),
+                            ("SHUFTI", "Shufti Pro"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("event_id", models.CharField(max_length=255)),
+                ("payload", models.JSONField()),
+                ("headers", models.JSONField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RECEIVED", "Received"),
+                            ("PROCESSING", "Processing"),
+                            ("PROCESSED", "Processed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="RECEIVED",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, null=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Webhook Event",
+                "verbose_name_plural": "Webhook Events",
+                "db_table": "webhook_events",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"], name="whe_status_created_idx"
+                    )
+                ],
+                "unique_together": {("provider", "event_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:01
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("account", "0032_webhook_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="last_checked_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When reconciliation last retrieved the gateway order.",
+                null=True,
+            ),
+        ),
+    ]
@@ -28,12 +28,11 @@ class ReceiptNumberMixin:
         subscription_code=None,
     ):
         """Generate a unique receipt number for a given model type."""
-        from django.db import transaction
         from django.utils.timezone import now
 
-        from account.models import ReceiptSequence
         from account.models import Transaction
         from account.models import UserAssignedBusiness
+        from account.sequences import next_receipt_sequence
         from investor.models import PurchaseRequest
         from sooq_althahab_admin.models import BillingDetails
 
@@ -78,13 +77,15 @@ class ReceiptNumberMixin:
             if not subscription_code:
                 subscription_code = "SUB"
 
-            # Use daily count per month as a simple sequence (you can also migrate this to ReceiptSequence if needed)
-            monthly_count = (
-                BillingDetails.objects.filter(
+            # One monthly counter shared by all subscription codes. The first
+            # allocation of a month continues from the rows created so far.
+            monthly_count = next_receipt_sequence(
+                mm_yy,
+                "SCP",
+                seed=lambda: BillingDetails.objects.filter(
                     created_at__year=current_time.year,
                     created_at__month=current_time.month,
-                ).count()
-                + 1
+                ).count(),
             )
             return f"{business_initials}SCP{subscription_code.upper()}{mm_yy}{monthly_count:03d}"
 
@@ -93,18 +94,11 @@ class ReceiptNumberMixin:
         else:
             raise ValueError("Unsupported model type for receipt number generation.")
 
-        # Shared atomic logic for sequence tracking
-        with transaction.atomic():
-            sequence_obj, _ = ReceiptSequence.objects.select_for_update().get_or_create(
-                mm_yy=mm_yy,
-                transaction_code=transaction_code,
-                defaults={"last_sequence": 0},
-            )
-            sequence_obj.last_sequence += 1
-            sequence_obj.save()
+        # Shared sequence allocation (see account.sequences)
+        sequence = next_receipt_sequence(mm_yy, transaction_code)
 
         return (
-            f"{transaction_code}{business_initials}{mm_yy}{sequence_obj.last_sequence:03d}"
+            f"{transaction_code}{business_initials}{mm_yy}{sequence:03d}"
             if model_cls == PurchaseRequest
-            else f"{business_initials}{mm_yy}{transaction_code}{sequence_obj.last_sequence:03d}"
+            else f"{business_initials}{mm_yy}{transaction_code}{sequence:03d}"
         )
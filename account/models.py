@@ -7,6 +7,7 @@ from decimal import Decimal
 
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import BaseUserManager
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MaxValueValidator
 from django.core.validators import MinValueValidator
 from django.db import models
@@ -41,7 +42,9 @@ from sooq_althahab.enums.account import UserRoleChoices
 from sooq_althahab.enums.account import UserStatus
 from sooq_althahab.enums.account import UserType
 from sooq_althahab.enums.account import WebhookCallStatus
+from sooq_althahab.enums.account import WebhookEventStatus
 from sooq_althahab.enums.account import WebhookEventType
+from sooq_althahab.enums.account import WebhookProvider
 from sooq_althahab.mixins import CustomIDMixin
 
 logger = logging.getLogger(__name__)
@@ -1250,6 +1253,11 @@ class Transaction(SoftDeleteModel, CustomIDMixin, ReceiptNumberMixin):
         blank=True,
         help_text="Timestamp indicating when the payment was successfully completed.",
     )
+    last_checked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When reconciliation last retrieved the gateway order.",
+    )
 
     def __str__(self):
         return f"Transaction {self.reference_number} - From: {self.from_business} To: {self.to_business}"
@@ -1258,6 +1266,27 @@ class Transaction(SoftDeleteModel, CustomIDMixin, ReceiptNumberMixin):
         db_table = "transactions"
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        # Composite indexes matching the keyset ordering (created_at, id) used
+        # by the wallet and admin transaction history endpoints.
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="txn_created_id_idx"),
+            models.Index(
+                fields=["from_business", "-created_at", "-id"],
+                name="txn_from_biz_created_idx",
+            ),
+            models.Index(
+                fields=["to_business", "-created_at", "-id"],
+                name="txn_to_biz_created_idx",
+            ),
+            models.Index(
+                fields=["status", "transaction_type", "-created_at"],
+                name="txn_status_type_created_idx",
+            ),
+            models.Index(
+                fields=["transfer_via", "status", "-created_at"],
+                name="txn_via_status_created_idx",
+            ),
+        ]
         constraints = [
             CheckConstraint(
                 check=Q(amount__gt=0) | Q(business_subscription__isnull=False),
@@ -1369,3 +1398,60 @@ class ReceiptSequence(CustomIDMixin, TimeStampedModelMixin):
         verbose_name_plural = "Receipt Sequences"
         unique_together = ("mm_yy", "transaction_code")
         ordering = ["-created_at"]
+
+
+class WebhookEvent(CustomIDMixin, TimeStampedModelMixin):
+    """
+    Raw gateway/KYC notification stored by the webhook endpoints before they
+    acknowledge it. Processing happens on the ``webhooks`` Celery queue; the
+    unique (provider, event_id) pair drops redeliveries of the same event.
+    """
+
+    provider = models.CharField(max_length=20, choices=WebhookProvider.choices)
+    event_id = models.CharField(max_length=255)
+    payload = models.JSONField()
+    headers = models.JSONField(blank=True, null=True)
+    status = models.CharField(
+        max_length=20,
+        choices=WebhookEventStatus.choices,
+        default=WebhookEventStatus.RECEIVED,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "webhook_events"
+        verbose_name = "Webhook Event"
+        verbose_name_plural = "Webhook Events"
+        unique_together = ("provider", "event_id")
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="whe_status_created_idx")
+        ]
+        ordering = ["-created_at"]
+
+
+class IdempotencyKey(CustomIDMixin, TimeStampedModelMixin):
+    """
+    Database fallback for ``Idempotency-Key`` request deduplication, used when
+    Redis is unavailable. ``response_status_code`` stays empty while the first
+    request is still in flight.
+    """
+
+    user = models.ForeignKey(
+        User, related_name="idempotency_keys", on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=255)
+    request_path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    response_status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        db_table = "idempotency_keys"
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        unique_together = ("user", "key", "request_path")
+        indexes = [models.Index(fields=["created_at"], name="idk_created_idx")]
+        ordering = ["-created_at"]
@@ -0,0 +1,158 @@
+"""
+Receipt sequence allocation.
+
+Receipt and invoice numbers carry a per-month running counter for every
+transaction code (TUP, WDR, TRF, INV, SCP ...). Historically the counter was
+incremented with ``select_for_update().get_or_create()`` on a single
+``ReceiptSequence`` row, which serialized every insert platform-wide on one
+hot row for as long as the surrounding transaction stayed open.
+
+On PostgreSQL every (mm_yy, transaction_code) pair is now backed by a native
+sequence. ``nextval`` is non-transactional and takes no row lock, so writers
+no longer wait on each other even without caching. Sequences use
+``CACHE <RECEIPT_SEQUENCE_CACHE_SIZE>``, 1 by default: a larger cache leases
+a block of numbers to each database session, and the unused part of the block
+is lost whenever the session closes (every ``CONN_MAX_AGE``), which leaves
+gaps and interleaves numbers across processes. Monthly reset semantics are
+preserved because the sequence name contains ``mm_yy``. Other database
+backends keep the original row-locked counter.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db import connection
+from django.db import transaction
+
+# Sequences this process has already created (or seen), so the
+# ``CREATE SEQUENCE IF NOT EXISTS`` round trip runs once per month and code.
+_known_sequences = set()
+
+
+def get_receipt_sequence_name(mm_yy, transaction_code):
+    """Return the PostgreSQL sequence name for a (mm_yy, code) counter."""
+    code = re.sub(r"[^a-z0-9]", "", transaction_code.lower())
+    return f"receipt_seq_{code}_{mm_yy}"
+
+
+def _get_cache_size():
+    return max(int(getattr(settings, "RECEIPT_SEQUENCE_CACHE_SIZE", 1)), 1)
+
+
+def _ensure_sequence(sequence_name, mm_yy, transaction_code, seed=None):
+    """
+    Create the sequence for this month and code if it does not exist yet.
+
+    The start value continues from the ``ReceiptSequence`` row (populated by
+    the legacy allocator and the ``transaction_sequence`` backfill command) so
+    numbers stay unique when switching over in the middle of a month.
+    """
+    from account.models import ReceiptSequence
+
+    if sequence_name in _known_sequences:
+        return
+
+    last_sequence = (
+        ReceiptSequence.objects.filter(mm_yy=mm_yy, transaction_code=transaction_code)
+        .values_list("last_sequence", flat=True)
+        .first()
+        or 0
+    )
+    if seed is not None:
+        last_sequence = max(last_sequence, seed())
+
+    try:
+        # Savepoint so a concurrent creator does not break an outer atomic block.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE SEQUENCE IF NOT EXISTS {sequence_name} "
+                    f"START WITH {last_sequence + 1} CACHE {_get_cache_size()}"
+                )
+    except DatabaseError:
+        # Another process created it between our check and our CREATE.
+        pass
+
+    # Sequences created before the cache size changed keep their old cache
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER SEQUENCE {sequence_name} CACHE {_get_cache_size()}"
+                )
+    except DatabaseError:
+        pass
+
+    # DDL is transactional in PostgreSQL: only remember the sequence once the
+    # surrounding transaction (if any) has committed it.
+    transaction.on_commit(lambda: _known_sequences.add(sequence_name))
+
+
+def _next_locked_sequence(mm_yy, transaction_code, seed=None):
+    """Fallback allocator for non-PostgreSQL backends (row lock per counter)."""
+    from account.models import ReceiptSequence
+
+    with transaction.atomic():
+        (
+            sequence_obj,
+            created,
+        ) = ReceiptSequence.objects.select_for_update().get_or_create(
+            mm_yy=mm_yy,
+            transaction_code=transaction_code,
+            defaults={"last_sequence": 0},
+        )
+        if created and seed is not None:
+            sequence_obj.last_sequence = seed()
+        sequence_obj.last_sequence += 1
+        sequence_obj.save()
+
+    return sequence_obj.last_sequence
+
+
+def next_receipt_sequence(mm_yy, transaction_code, seed=None):
+    """
+    Return the next running number for ``transaction_code`` in month ``mm_yy``.
+
+    Args:
+        mm_yy (str): Month key, e.g. ``"0625"``.
+        transaction_code (str): Receipt code, e.g. ``"TUP"`` or ``"INV"``.
+        seed (callable, optional): Returns the last number already issued for
+            this month when the counter is first created (used for counters
+            that were not previously tracked in ``ReceiptSequence``).
+
+    Note:
+        With the default cache size of 1 numbers are issued in order, without
+        gaps other than those of rolled back transactions. With a larger
+        cache they are unique and increasing per database session but may
+        interleave across processes, and numbers leased by a session that
+        closes are skipped.
+    """
+    if connection.vendor != "postgresql":
+        return _next_locked_sequence(mm_yy, transaction_code, seed=seed)
+
+    sequence_name = get_receipt_sequence_name(mm_yy, transaction_code)
+    _ensure_sequence(sequence_name, mm_yy, transaction_code, seed=seed)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s)", [sequence_name])
+        return cursor.fetchone()[0]
+
+
+def sync_receipt_sequence(mm_yy, transaction_code, last_sequence):
+    """
+    Move the PostgreSQL sequence forward so it never re-issues ``last_sequence``.
+
+    Used by the backfill command after it has recomputed ``ReceiptSequence``.
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    sequence_name = get_receipt_sequence_name(mm_yy, transaction_code)
+    _ensure_sequence(sequence_name, mm_yy, transaction_code)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT setval(%s, GREATEST(%s, (SELECT last_value FROM {sequence_name})))",
+            [sequence_name, last_sequence],
+        )
@@ -135,6 +135,11 @@ urlpatterns = [
         views.AllNotificationRead.as_view(),
         name="notification-read-all-update",
     ),
+    path(
+        "user/notifications/mark-read/",
+        views.NotificationBulkMarkReadAPIView.as_view(),
+        name="notifications-bulk-mark-read",
+    ),
     path(
         "sub-user/",
         views.SubUserCreateAPIView.as_view(),
@@ -3,10 +3,12 @@ import logging
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.db import transaction
+from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics
@@ -92,14 +94,19 @@ from sooq_althahab.enums.account import UserRoleChoices
 from sooq_althahab.enums.account import UserStatus
 from sooq_althahab.enums.account import UserType
 from sooq_althahab.enums.investor import PurchaseRequestStatus
+from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.helper import PermissionManager
+from sooq_althahab.notification_counters import decrement_unread_count
+from sooq_althahab.notification_counters import reset_unread_count
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
 from sooq_althahab.tasks import send_mail
 from sooq_althahab.utils import CommonPagination
 from sooq_althahab.utils import CustomModelViewSet
+from sooq_althahab.utils import KeysetPagination
 from sooq_althahab.utils import generic_response
 from sooq_althahab.utils import handle_serializer_errors
 from sooq_althahab.utils import send_notification_count_to_users
+from sooq_althahab_admin.filters import NotificationFilter
 from sooq_althahab_admin.models import AppVersion
 from sooq_althahab_admin.models import BusinessSavedCardToken
 from sooq_althahab_admin.models import Notification
@@ -1271,10 +1278,18 @@ class UserPreferenceViewSet(generics.RetrieveUpdateAPIView):
 
 
 class NotificationListAPIView(generics.ListAPIView):
+    """
+    List the user's notifications, newest first. Send ``?cursor=`` and then
+    the returned ``next_cursor`` for keyset pagination; ``is_read`` and
+    ``notification_type`` filters use the inbox indexes.
+    """
+
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CommonPagination
+    pagination_class = KeysetPagination
+    filterset_class = NotificationFilter
+    filter_backends = (DjangoFilterBackend,)
 
     def get_queryset(self):
         """Restrict the queryset to the logged-in user."""
@@ -1282,13 +1297,17 @@ class NotificationListAPIView(generics.ListAPIView):
         user = self.request.user
         if not user.is_authenticated:
             return self.queryset.none()
-        return self.queryset.filter(user=self.request.user)
+        return (
+            self.queryset.filter(user=self.request.user)
+            .order_by("-created_at")
+            .prefetch_related("content_object")
+        )
 
     @PermissionManager(NOTIFICATION_VIEW_PERMISSION)
     def list(self, request, *args, **kwargs):
         """Handles the GET request to list"""
 
-        queryset = self.get_queryset()
+        queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True)
         response_data = self.get_paginated_response(serializer.data).data
@@ -1788,8 +1807,11 @@ class NotificationReadUnreadStatusUpdateAPIView(APIView):
                 status_code=status.HTTP_404_NOT_FOUND,
             )
 
+        was_unread = not instance.is_read
         instance.is_read = True
         instance.save()
+        if was_unread:
+            decrement_unread_count(request.user.pk)
 
         serializer = self.serializer_class(instance)
         send_notification_count_to_users([request.user])
@@ -1941,11 +1963,60 @@ class AllNotificationRead(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        Notification.objects.filter(user=self.request.user).update(is_read=True)
+        Notification.objects.filter(user=self.request.user, is_read=False).update(
+            is_read=True
+        )
+        reset_unread_count(request.user.pk)
         send_notification_count_to_users([request.user])
         return generic_response(status_code=status.HTTP_200_OK)
 
 
+class NotificationBulkMarkReadAPIView(APIView):
+    """
+    Mark the user's unread notifications as read with a single UPDATE.
+
+    Without a body every unread notification is marked. ``cursor`` (from the
+    notification list) limits it to the notification the cursor points at
+    and everything older, so notifications that arrived after the inbox was
+    loaded stay unread. ``notification_type`` limits it to one type.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @PermissionManager(NOTIFICATION_VIEW_PERMISSION)
+    def post(self, request, *args, **kwargs):
+        notifications = Notification.objects.filter(user=request.user, is_read=False)
+
+        position = KeysetPagination().decode_cursor(request.data.get("cursor"))
+        if position:
+            created_at, pk = position
+            notifications = notifications.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lte=pk)
+            )
+
+        notification_type = request.data.get("notification_type")
+        if notification_type:
+            if notification_type not in NotificationTypes.values:
+                return generic_response(
+                    error_message=MESSAGES["invalid_notification_type"],
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            notifications = notifications.filter(notification_type=notification_type)
+
+        updated = notifications.update(is_read=True, updated_at=timezone.now())
+        if position or notification_type:
+            decrement_unread_count(request.user.pk, updated)
+        else:
+            reset_unread_count(request.user.pk)
+        send_notification_count_to_users([request.user])
+
+        return generic_response(
+            message=MESSAGES["notifications_marked_read"],
+            status_code=status.HTTP_200_OK,
+            data={"updated": updated},
+        )
+
+
 class UserRolesAPIView(generics.CreateAPIView):
     serializer_class = UserRolesSerializer
 
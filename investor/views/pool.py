@@ -17,17 +17,14 @@ from rest_framework.status import HTTP_404_NOT_FOUND
 from rest_framework.validators import ValidationError
 from rest_framework.views import APIView
 
-from account.models import Organization
-from account.models import UserAssignedBusiness
 from account.utils import get_user_or_business_name
 from investor.message import MESSAGES
 from investor.models import AssetContribution
 from investor.serializers import PoolContributionSerializer
 from investor.serializers import PoolSerializer
 from investor.serializers import PoolSummarySerializer
+from sooq_althahab.billing.pdf_jobs import pdf_job_response
 from sooq_althahab.billing.subscription.helpers import check_subscription_feature_access
-from sooq_althahab.billing.subscription.helpers import prepare_organization_details
-from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
 from sooq_althahab.constants import POOL_CONTRIBUTION_CREATE_PERMISSION
 from sooq_althahab.constants import POOL_VIEW_PERMISSION
 from sooq_althahab.enums.account import SubscriptionFeatureChoices
@@ -39,10 +36,8 @@ from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import PoolStatus
 from sooq_althahab.helper import PermissionManager
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
-from sooq_althahab.tasks import generate_pdf_response
 from sooq_althahab.utils import CommonPagination
 from sooq_althahab.utils import generic_response
-from sooq_althahab.utils import get_presigned_url_from_s3
 from sooq_althahab.utils import handle_serializer_errors
 from sooq_althahab.utils import send_notifications_to_organization_admins
 from sooq_althahab_admin.filters import PoolFilter
@@ -257,77 +252,24 @@ class PoolDownloadAPIView(APIView):
     def get(self, request, pk):
         """Handle GET request to download Pool details as a PDF."""
 
-        pool = (
-            Pool.objects.select_related("material_item", "carat_type")
-            .filter(pk=pk)
-            .first()
-        )
-
-        if not pool:
+        if not Pool.objects.filter(pk=pk).exists():
             return generic_response(
                 message=ADMIN_MESSAGES["pool_not_found"],
                 status_code=status.HTTP_404_NOT_FOUND,
             )
 
-        organization_code = request.auth.get("organization_code")
-        organization = Organization.objects.get(code=organization_code)
-        organization_details = prepare_organization_details(organization)
-        organization_logo_url = get_organization_logo_url(organization)
-
         # Get the business of the user requesting the download
         business = get_business_from_user_token(request, "business")
 
-        # Get only the contribution from the requesting user's business
-        user_contribution = None
-        signature_url = None
-        contributor_name = None
-
-        if business:
-            # Get the contribution for this specific business that has a signature
-            user_contribution = (
-                pool.pool_contributions.filter(
-                    participant=business, signature__isnull=False
-                )
-                .exclude(signature="")
-                .select_related("participant")
-                .first()
-            )
-
-            if user_contribution and user_contribution.signature:
-                # Convert signature URL to presigned URL for template
-                presigned = get_presigned_url_from_s3(user_contribution.signature)
-                signature_url = presigned.get("url") if presigned else None
-
-                # Get the owner name from the business
-                owner_assignment = (
-                    UserAssignedBusiness.objects.filter(
-                        business=business, is_owner=True
-                    )
-                    .select_related("user")
-                    .first()
-                )
-
-                if owner_assignment and owner_assignment.user:
-                    contributor_name = owner_assignment.user.get_full_name()
-                elif business.name:
-                    contributor_name = business.name
-
-        context = {
-            "terms_and_condition_en": pool.terms_and_conditions["en"],
-            "terms_and_condition_ar": pool.terms_and_conditions["ar"],
-            "organization_details": organization_details,
-            "organization_logo_url": organization_logo_url,
-            "pool": pool,
-            "pool_contribution": user_contribution,
-            "signature_url": signature_url,
-            "contributor_name": contributor_name,
-        }
-
-        # Generate and return the PDF response directly
-        return generate_pdf_response(
+        # Rendered on the pdf queue; the client polls the job or is notified
+        return pdf_job_response(
+            request,
+            "pool-details",
             "pool/pool-details.html",
-            context,
-            filename="pool_details.pdf",
+            "pool_details.pdf",
+            pool_id=pk,
+            organization_code=request.auth.get("organization_code"),
+            business_id=business.pk if business else None,
         )
 
 
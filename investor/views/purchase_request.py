@@ -74,6 +74,7 @@ from sooq_althahab.enums.jeweler import RequestStatus
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import Status
 from sooq_althahab.helper import PermissionManager
+from sooq_althahab.idempotency import IdempotencyManager
 from sooq_althahab.querysets.purchase_request import base_purchase_request_queryset
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
 from sooq_althahab.tasks import send_mail
@@ -603,6 +604,7 @@ class PurchaseRequestCreateView(BasePurchaseRequestView, CreateAPIView):
     serializer_class = PurchaseRequestSerializer
 
     @PermissionManager(PURCHASE_REQUEST_CREATE_PERMISSION)
+    @IdempotencyManager()
     def post(self, request, *args, **kwargs):
         """Create a new asset purchase request."""
         user = request.user
@@ -719,6 +721,7 @@ class PurchaseRequestCreateViewV2(BasePurchaseRequestView, CreateAPIView):
     serializer_class = PurchaseRequestSerializerV2
 
     @PermissionManager(PURCHASE_REQUEST_CREATE_PERMISSION)
+    @IdempotencyManager()
     def post(self, request, *args, **kwargs):
         """Create a new asset purchase request."""
         user = request.user
@@ -1311,6 +1314,7 @@ class SaleRequestCreateView(BasePurchaseRequestView, CreateAPIView):
     serializer_class = SaleRequestSerializer
     response_serializer_class = PurchaseRequestResponseSerializer
 
+    @IdempotencyManager()
     def post(self, request, *args, **kwargs):
         """Create a new asset sale request from a completed purchase request."""
 
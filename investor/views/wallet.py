@@ -7,7 +7,7 @@ from django.db.models import Q
 from django.db.models import Value
 from django.db.models import When
 from django.http import Http404
-from django.http import HttpResponse
+from django.http import HttpResponseRedirect
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import CreateAPIView
 from rest_framework.generics import ListAPIView
@@ -29,7 +29,8 @@ from investor.serializers import TransactionDetailResponseSerializer
 from investor.serializers import TransactionResponseSerializer
 from investor.serializers import WithdrawTransactionSerializer
 from investor.utils import get_transaction_object
-from sooq_althahab.billing.subscription.pdf_utils import render_subscription_invoice_pdf
+from sooq_althahab.billing.pdf_cache import get_download_url
+from sooq_althahab.billing.pdf_jobs import pdf_job_response
 from sooq_althahab.billing.transaction.helpers import (
     get_transaction_receipt_context_and_template,
 )
@@ -39,9 +40,10 @@ from sooq_althahab.enums.account import UserRoleChoices
 from sooq_althahab.enums.account import UserType
 from sooq_althahab.enums.investor import RequestType
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
+from sooq_althahab.idempotency import IdempotencyManager
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
 from sooq_althahab.tasks import send_receipt_to_mail
-from sooq_althahab.utils import CommonPagination
+from sooq_althahab.utils import KeysetPagination
 from sooq_althahab.utils import generic_response
 from sooq_althahab.utils import handle_serializer_errors
 from sooq_althahab.utils import send_notifications_to_organization_admins
@@ -130,6 +132,7 @@ class WalletWithdrawAPIView(CreateAPIView):
     serializer_class = WithdrawTransactionSerializer
     response_serializer_class = TransactionResponseSerializer
 
+    @IdempotencyManager()
     def post(self, request):
         user = request.user
         organization_code = request.auth.get("organization_code")
@@ -175,7 +178,7 @@ class TransactionListAPIView(ListAPIView):
     queryset = Transaction.global_objects.exclude(
         transfer_via=TransferVia.BENEFIT_PAY, status=TransactionStatus.PENDING
     ).select_related("from_business", "to_business", "purchase_request", "created_by")
-    pagination_class = CommonPagination
+    pagination_class = KeysetPagination
     filterset_class = TransactionFilter
     filter_backends = (DjangoFilterBackend,)
 
@@ -292,12 +295,21 @@ class TransactionReceiptDownloadView(APIView):
                 status_code=HTTP_400_BAD_REQUEST,
             )
 
-        pdf_file = render_subscription_invoice_pdf(template_name, context)
-
-        return HttpResponse(
-            pdf_file,
-            content_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        # Finished transactions never change, so a stored receipt is served
+        if transaction.status != TransactionStatus.PENDING:
+            context["is_pdf"] = True
+            download_url = get_download_url(template_name, context, filename)
+            if download_url:
+                return HttpResponseRedirect(download_url)
+
+        # Rendered on the pdf queue; the client polls the job or is notified
+        return pdf_job_response(
+            request,
+            "transaction-receipt",
+            template_name,
+            filename,
+            transaction_id=transaction.pk,
+            organization_id=organization.pk,
         )
 
 
@@ -344,7 +356,12 @@ class TransactionReceiptEmailView(APIView):
         }
 
         send_receipt_to_mail.delay(
-            user.email, email_context, context, template_name, filename
+            user.email,
+            email_context,
+            context,
+            template_name,
+            filename,
+            cache_pdf=transaction.status != TransactionStatus.PENDING,
         )
         return generic_response(
             status_code=HTTP_200_OK,
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jeweler", "0039_remove_musharakahcontractrequest_design_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jewelryproductattachment",
+            name="derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="jewelryproductmarketplaceimage",
+            name="derivatives",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Object keys of the resized copies, by size and format.",
+            ),
+        ),
+    ]
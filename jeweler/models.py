@@ -192,6 +192,8 @@ class JewelryProductAttachment(SoftDeleteModel, CustomIDMixin, TimeStampedModelM
         on_delete=models.CASCADE,
     )
     file = models.CharField(max_length=500, blank=True, null=True)
+    # Object keys of the resized copies of an image file, by size and format
+    derivatives = models.JSONField(default=dict, blank=True)
 
     class Meta:
         db_table = "jewelry_product_attachments"
@@ -1240,6 +1242,11 @@ class JewelryProductMarketplaceImage(
         null=True,
         help_text="Path or URL to the image file.",
     )
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Object keys of the resized copies, by size and format.",
+    )
 
     class Meta:
         db_table = "jewelry_product_marketplace_images"
@@ -49,6 +49,9 @@ from sooq_althahab.enums.jeweler import Ownership
 from sooq_althahab.enums.jeweler import RequestStatus
 from sooq_althahab.enums.manufacturer import ManufactureRequestStatus
 from sooq_althahab.enums.sooq_althahab_admin import MaterialType
+from sooq_althahab.image_derivatives import get_derivative_urls
+from sooq_althahab.image_derivatives import queue_image_derivatives
+from sooq_althahab.presigned_urls import PresignedUrlListSerializer
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
 from sooq_althahab.utils import get_presigned_url_from_s3
 from sooq_althahab_admin.message import MESSAGES as ADMIN_MESSAGES
@@ -281,27 +284,34 @@ class JewelryDesignCreateSerializer(serializers.ModelSerializer):
                 ]
             )
 
-            JewelryProductAttachment.objects.bulk_create(
+            product_attachments = JewelryProductAttachment.objects.bulk_create(
                 [
                     JewelryProductAttachment(jewelry_product=product, file=file)
                     for file in attachments
                 ]
             )
+            queue_image_derivatives(product_attachments)
 
 
 class ProductAttachmentSerializer(serializers.ModelSerializer):
     """Serializer for retrieving product attachment URL and ID."""
 
     url = serializers.SerializerMethodField()
+    derivatives = serializers.SerializerMethodField()
 
     class Meta:
         model = JewelryProductAttachment
-        fields = ["id", "url"]
+        fields = ["id", "url", "derivatives"]
 
     def get_url(self, obj):
         """Generate a pre-signed URL for the given image"""
 
-        return get_presigned_url_from_s3(obj.file)
+        return get_presigned_url_from_s3(obj.file, self.context)
+
+    def get_derivatives(self, obj):
+        """Pre-signed URLs of the resized copies of an image, by size and format."""
+
+        return get_derivative_urls(obj.derivatives, self.context)
 
 
 class JewelryProductMaterialResponseSerializer(serializers.ModelSerializer):
@@ -551,12 +561,13 @@ class JewelryProductUpdateSerializer(serializers.ModelSerializer):
 
         # Add new attachments
         if jewelry_product_attachments:
-            JewelryProductAttachment.objects.bulk_create(
+            product_attachments = JewelryProductAttachment.objects.bulk_create(
                 [
                     JewelryProductAttachment(jewelry_product=instance, file=file)
                     for file in jewelry_product_attachments
                 ]
             )
+            queue_image_derivatives(product_attachments)
 
         # Delete materials if requested
         if delete_product_material_ids:
@@ -835,7 +846,7 @@ class MusharakahContractRequestAttachmentResponseSerializer(
     def get_url(self, obj):
         """Generate a pre-signed URL for the given image"""
 
-        return get_presigned_url_from_s3(obj.image)
+        return get_presigned_url_from_s3(obj.image, self.context)
 
 
 class MusharakahContractDesignResponseSerializer(serializers.ModelSerializer):
@@ -876,6 +887,15 @@ class BaseMusharakahContractRequestResponseSerializer(
             "transaction_id",
             "duration_in_days",
         ]
+        # Signed for the whole page at once
+        list_serializer_class = PresignedUrlListSerializer
+        presigned_url_fields = [
+            "musharakah_contract_request_attachments.image",
+            "jeweler.logo",
+            "investor.logo",
+            "investor_signature",
+            "jeweler_signature",
+        ]
 
     def get_jeweler(self, obj):
         return self.serialize_business(obj, "jeweler")
@@ -885,11 +905,11 @@ class BaseMusharakahContractRequestResponseSerializer(
 
     def get_investor_signature(self, obj):
         """Generate a presigned URL for accessing the signature."""
-        return get_presigned_url_from_s3(obj.investor_signature)
+        return get_presigned_url_from_s3(obj.investor_signature, self.context)
 
     def get_jeweler_signature(self, obj):
         """Generate a presigned URL for accessing the signature."""
-        return get_presigned_url_from_s3(obj.jeweler_signature)
+        return get_presigned_url_from_s3(obj.jeweler_signature, self.context)
 
 
 class BaseMusharakahContractTerminationRequestDetailSerializer(
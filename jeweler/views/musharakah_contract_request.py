@@ -24,7 +24,6 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
 from account.message import MESSAGES as ACCOUNT_MESSAGE
-from account.models import Organization
 from account.models import Transaction
 from account.models import User
 from account.models import Wallet
@@ -49,9 +48,7 @@ from jeweler.serializers import MusharakahContractRequestRetrieveSerializer
 from jeweler.serializers import MusharakahContractRequestStatisticsSerializer
 from jeweler.serializers import MusharakahContractTerminationRequestSerializer
 from jeweler.serializers import SettlementSummaryPaymentSerializer
-from jeweler.utils import generate_musharaka_contract_context
-from sooq_althahab.billing.subscription.helpers import prepare_organization_details
-from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
+from sooq_althahab.billing.pdf_jobs import pdf_job_response
 from sooq_althahab.constants import MUSHARAKAH_CONTRACT_REQUEST_CREATE_PERMISSION
 from sooq_althahab.constants import (
     MUSHARAKAH_CONTRACT_REQUEST_QUANTITY_CHANGE_PERMISSION,
@@ -81,7 +78,6 @@ from sooq_althahab.payment_gateway_services.credimax.subscription.free_trial_uti
     validate_business_action_limits,
 )
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
-from sooq_althahab.tasks import generate_pdf_response
 from sooq_althahab.tasks import send_termination_reciept_mail
 from sooq_althahab.utils import CommonPagination
 from sooq_althahab.utils import generic_response
@@ -329,7 +325,6 @@ class MusharakahContractRequestRetrieveAPIView(
 
 class MusharakahContractDownloadAPIView(APIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = MusharakahContractRequestResponseSerializer
 
     def get(self, request, pk):
         """Handle GET request to download Musharakah Contract Request details as a PDF."""
@@ -360,26 +355,14 @@ class MusharakahContractDownloadAPIView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
-        organization_code = request.auth.get("organization_code")
-        organization = Organization.objects.get(code=organization_code)
-        organization_details = prepare_organization_details(organization)
-        organization_logo_url = get_organization_logo_url(organization)
-
-        serialized_musharakah_contract = self.serializer_class(
-            musharakah_contract_request
-        ).data
-        context = {
-            "musharakah_contract": generate_musharaka_contract_context(
-                musharakah_contract_request, serialized_musharakah_contract
-            ),
-            "organization_details": organization_details,
-            "organization_logo_url": organization_logo_url,
-        }
-
-        return generate_pdf_response(
+        # Rendered on the pdf queue; the client polls the job or is notified
+        return pdf_job_response(
+            request,
+            "musharakah-contract-details",
             "musharakah_contract/musharakah-contract-details.html",
-            context,
-            filename="musharakah_contract_details.pdf",
+            "musharakah_contract_details.pdf",
+            musharakah_contract_request_id=musharakah_contract_request.pk,
+            organization_code=request.auth.get("organization_code"),
         )
 
 
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("seller", "0008_remove_preciousitem_serial_number"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="preciousitemimage",
+            name="derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
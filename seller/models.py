@@ -116,6 +116,8 @@ class PreciousItemImage(SoftDeleteModel, CustomIDMixin, models.Model):
         PreciousItem, on_delete=models.CASCADE, related_name="images"
     )
     image = models.CharField(max_length=500, blank=True, null=True)
+    # Object keys of the resized copies, by size and format
+    derivatives = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Image for {self.precious_item}"
@@ -28,6 +28,9 @@ from sooq_althahab.enums.investor import RequestType
 from sooq_althahab.enums.seller import CertificateType
 from sooq_althahab.enums.seller import PremiumValueType
 from sooq_althahab.enums.sooq_althahab_admin import MaterialType
+from sooq_althahab.image_derivatives import get_derivative_urls
+from sooq_althahab.image_derivatives import queue_image_derivatives
+from sooq_althahab.presigned_urls import PresignedUrlListSerializer
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
 from sooq_althahab.utils import get_presigned_url_from_s3
 from sooq_althahab_admin.serializers import MaterialItemDetailSerializer
@@ -191,12 +194,13 @@ class CreatePreciousItemSerializer(ModelSerializer):
             )
 
             if images_data:
-                PreciousItemImage.objects.bulk_create(
+                images = PreciousItemImage.objects.bulk_create(
                     [
                         PreciousItemImage(precious_item=precious_item, image=image_url)
                         for image_url in images_data
                     ]
                 )
+                queue_image_derivatives(images)
 
             if precious_metal_data:
                 PreciousMetal.objects.create(
@@ -264,12 +268,13 @@ class UpdatePreciousItemSerializer(CreatePreciousItemSerializer):
             ).delete()
 
         if images_data:
-            PreciousItemImage.objects.bulk_create(
+            images = PreciousItemImage.objects.bulk_create(
                 [
                     PreciousItemImage(precious_item=instance, image=image_url)
                     for image_url in images_data
                 ]
             )
+            queue_image_derivatives(images)
 
         return instance
 
@@ -278,15 +283,21 @@ class PreciousItemImageSerializer(ModelSerializer):
     """Serializer for the PreciousItemImage model to return image ID and URL."""
 
     url = SerializerMethodField()
+    derivatives = SerializerMethodField()
 
     class Meta:
         model = PreciousItemImage
-        fields = ["id", "url"]
+        fields = ["id", "url", "derivatives"]
 
     def get_url(self, obj):
         """Generate a pre-signed URL for the given image"""
 
-        return get_presigned_url_from_s3(obj.image)
+        return get_presigned_url_from_s3(obj.image, self.context)
+
+    def get_derivatives(self, obj):
+        """Pre-signed URLs of the resized copies, by size and format."""
+
+        return get_derivative_urls(obj.derivatives, self.context)
 
 
 class PreciousStoneResponseSerializer(ModelSerializer):
@@ -327,6 +338,14 @@ class PreciousItemBaseSerializer(BusinessDetailsMixin, ModelSerializer):
             "restored_at",
             "transaction_id",
         ]
+        # Signed for the whole page at once
+        list_serializer_class = PresignedUrlListSerializer
+        presigned_url_fields = [
+            "images.image",
+            "images.derivatives",
+            "material_item.image",
+            "business.logo",
+        ]
 
     def get_created_by(self, obj):
         return getattr(obj.created_by, "fullname", None)
@@ -2,7 +2,6 @@
 
 import os
 
-from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter
 from channels.routing import URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
@@ -10,6 +9,7 @@ from django.core.asgi import get_asgi_application
 from django.urls import path
 
 from sooq_althahab.consumers.admin_notifications import NotificationConsumer
+from sooq_althahab.middleware import JwtAuthMiddleware
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sooq_althahab.settings")
 
@@ -23,21 +23,23 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 # PRODUCTION SECURE WebSocket configuration
+# Sockets authenticate with the JWT in ?token= (decoded once, no session or
+# database lookup).
 if CORS_ALLOW_ALL_ORIGINS:
     # WARNING: Only use in development/testing
-    websocket_middleware = AuthMiddlewareStack(
+    websocket_middleware = JwtAuthMiddleware(
         URLRouter([path("ws/notifications/", NotificationConsumer.as_asgi())])
     )
 elif CORS_ALLOWED_ORIGINS:
     # PRODUCTION: Strict origin validation
     websocket_middleware = AllowedHostsOriginValidator(
-        AuthMiddlewareStack(
+        JwtAuthMiddleware(
             URLRouter([path("ws/notifications/", NotificationConsumer.as_asgi())])
         )
     )
 else:
     # FALLBACK: No origins allowed (most secure)
-    websocket_middleware = AuthMiddlewareStack(
+    websocket_middleware = JwtAuthMiddleware(
         URLRouter([path("ws/notifications/", NotificationConsumer.as_asgi())])
     )
 
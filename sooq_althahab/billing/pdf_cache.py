@@ -0,0 +1,212 @@
+"""
+Content-addressed storage of rendered receipt and invoice PDFs.
+
+Receipts of finished transactions and finalized billing invoices never
+change, yet every download or "email me the receipt" rendered them again.
+A cacheable PDF is now stored under a hash of:
+
+- the template version: the sources of the template and of everything it
+  extends or includes, ``pdf_style.css`` and ``PDF_CACHE_VERSION``. Editing
+  a template therefore invalidates its PDFs; old objects are simply no
+  longer read, so give the prefix a storage lifecycle rule;
+- the context: model instances count as their label, pk and
+  ``updated_at``, and presigned URLs without their signature, so a fresh
+  logo URL does not change the key.
+
+PDFs are kept in S3 under ``PDF_CACHE_PREFIX``, or in ``MEDIA_ROOT`` when
+``PDF_CACHE_STORAGE`` is ``local`` (the default without a bucket). Storage
+errors are logged and the PDF is rendered as before.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db.models import Model
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_REFERENCE_RE = re.compile(r"{%\s*(?:extends|include)\s+[\"']([^\"']+)[\"']")
+
+_template_versions = {}
+
+
+def _collect_template_sources(template_name, seen):
+    if template_name in seen:
+        return
+    seen.add(template_name)
+    source = get_template(template_name).template.source
+    yield template_name, source
+    for referenced in TEMPLATE_REFERENCE_RE.findall(source):
+        yield from _collect_template_sources(referenced, seen)
+
+
+def get_template_version(template_name):
+    """Hash of the template, its parents and includes, and the PDF stylesheet."""
+    version = None if settings.DEBUG else _template_versions.get(template_name)
+    if version is None:
+        digest = hashlib.sha256(settings.PDF_CACHE_VERSION.encode())
+        for name, source in _collect_template_sources(template_name, set()):
+            digest.update(name.encode())
+            digest.update(source.encode())
+        stylesheet = Path(settings.BASE_DIR) / "static" / "css" / "pdf_style.css"
+        if stylesheet.exists():
+            digest.update(stylesheet.read_bytes())
+        version = _template_versions[template_name] = digest.hexdigest()
+    return version
+
+
+def _normalize(value):
+    """A JSON-able form of ``value`` that only changes when the PDF would."""
+    if isinstance(value, Model):
+        return f"{value._meta.label}:{value.pk}:{getattr(value, 'updated_at', '')}"
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        # Presigned URLs change on every call; the object they point to does not
+        return value.split("?", 1)[0] if "X-Amz-" in value else value
+    if isinstance(value, (datetime, date, Decimal)):
+        return str(value)
+    return value
+
+
+def get_cache_key(template_name, context):
+    """Storage key of the PDF rendered from ``template_name`` and ``context``."""
+    digest = hashlib.sha256(get_template_version(template_name).encode())
+    digest.update(json.dumps(_normalize(context), sort_keys=True, default=str).encode())
+    slug = Path(template_name).stem
+    return f"{settings.PDF_CACHE_PREFIX}/{slug}/{digest.hexdigest()}.pdf"
+
+
+def _uses_s3():
+    return settings.PDF_CACHE_STORAGE == "s3"
+
+
+def _local_path(key):
+    return Path(settings.MEDIA_ROOT) / key
+
+
+def load_pdf(key):
+    """The stored PDF bytes, or None."""
+    try:
+        if _uses_s3():
+            from sooq_althahab.utils import s3
+
+            return s3.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)[
+                "Body"
+            ].read()
+        path = _local_path(key)
+        return path.read_bytes() if path.exists() else None
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+            logger.warning(f"[PDF cache] Could not read {key}: {e}")
+    except Exception as e:
+        logger.warning(f"[PDF cache] Could not read {key}: {e}")
+    return None
+
+
+def store_pdf(key, pdf):
+    """Store ``pdf`` under ``key``. Returns whether it was stored."""
+    try:
+        if _uses_s3():
+            from sooq_althahab.utils import s3
+
+            s3.put_object(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=key,
+                Body=pdf,
+                ContentType="application/pdf",
+            )
+            return True
+        path = _local_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as temp_file:
+            temp_file.write(pdf)
+        os.replace(temp_file.name, path)
+        return True
+    except Exception as e:
+        logger.warning(f"[PDF cache] Could not store {key}: {e}")
+        return False
+
+
+def pdf_exists(key):
+    """Whether a PDF is stored under ``key``."""
+    try:
+        if _uses_s3():
+            from sooq_althahab.utils import s3
+
+            s3.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+            return True
+        return _local_path(key).exists()
+    except ClientError:
+        return False
+    except Exception as e:
+        logger.warning(f"[PDF cache] Could not check {key}: {e}")
+        return False
+
+
+def get_presigned_pdf_url(key, filename):
+    """
+    A presigned URL downloading the stored PDF as ``filename``, or None when
+    storage is local.
+    """
+    if not _uses_s3():
+        return None
+    from sooq_althahab.utils import s3
+
+    try:
+        return s3.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=settings.S3_FILE_EXPIRATION_DURATION,
+        )
+    except Exception as e:
+        logger.warning(f"[PDF cache] Could not presign {key}: {e}")
+        return None
+
+
+def get_pdf(template_name, context, render):
+    """
+    The PDF for ``template_name`` and ``context`` from storage, or from
+    ``render()`` (which returns bytes) and then stored.
+    """
+    if not settings.PDF_CACHE_ENABLED:
+        return render()
+    key = get_cache_key(template_name, context)
+    pdf = load_pdf(key)
+    if pdf is not None:
+        logger.info(f"[PDF cache] Hit {key}")
+        return pdf
+    pdf = render()
+    store_pdf(key, pdf)
+    return pdf
+
+
+def get_download_url(template_name, context, filename):
+    """
+    A presigned URL of the stored PDF, for redirecting downloads, or None
+    when redirects are off, storage is local or the PDF is not stored yet.
+    """
+    if not (settings.PDF_CACHE_ENABLED and settings.PDF_CACHE_REDIRECT and _uses_s3()):
+        return None
+    key = get_cache_key(template_name, context)
+    if not pdf_exists(key):
+        return None
+    return get_presigned_pdf_url(key, filename)
@@ -0,0 +1,370 @@
+"""
+Background PDF generation for downloads.
+
+Download views used to render the PDF inside the request, holding a web
+worker for as long as WeasyPrint took. They now submit a job and return its
+id (``202``); the ``render_pdf_job`` task renders the document on the
+``pdf`` queue, whose workers bound how many PDFs render at once, and stores
+it next to the cached receipts (``pdf_cache``). The client polls
+``documents/jobs/<job_id>/`` or waits for the ``pdf_job_ready`` WebSocket
+message and then downloads the file.
+
+- a job is a Redis hash ``pdf:job:<job_id>`` (status, owner, document,
+  parameters, filename, storage key, error) kept for ``PDF_JOB_TTL``
+  seconds;
+- a user may have ``PDF_JOB_MAX_ACTIVE_PER_USER`` unfinished jobs, so
+  repeated clicks do not fill the queue;
+- ``DOCUMENTS`` maps each document name to the function building its
+  template context from JSON parameters, run in the worker.
+
+The PDF is stored under the hash of its template and context, so a document
+requested again is served from storage without rendering.
+"""
+
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from sooq_althahab.billing import pdf_cache
+from sooq_althahab.billing.pdf_pool import render_pdf
+from sooq_althahab.billing.rendering import render_template
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY_PREFIX = "pdf:job:"
+ACTIVE_JOBS_KEY_PREFIX = "pdf:jobs:active:"
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+READY = "READY"
+FAILED = "FAILED"
+
+
+class TooManyPdfJobs(Exception):
+    """The user already has ``PDF_JOB_MAX_ACTIVE_PER_USER`` unfinished jobs."""
+
+
+def build_pool_details(pool_id, organization_code, business_id=None):
+    """Pool terms with the contribution and signature of ``business_id``."""
+    from account.models import BusinessAccount
+    from account.models import Organization
+    from account.models import UserAssignedBusiness
+    from sooq_althahab.billing.rendering import get_organization_fragments
+    from sooq_althahab.utils import get_presigned_url_from_s3
+    from sooq_althahab_admin.models import Pool
+
+    pool = Pool.objects.select_related("material_item", "carat_type").get(pk=pool_id)
+    organization = Organization.objects.get(code=organization_code)
+    fragments = get_organization_fragments(organization)
+    business = (
+        BusinessAccount.objects.filter(pk=business_id).first() if business_id else None
+    )
+
+    # Get only the contribution from the requesting user's business
+    user_contribution = None
+    signature_url = None
+    contributor_name = None
+
+    if business:
+        # Get the contribution for this specific business that has a signature
+        user_contribution = (
+            pool.pool_contributions.filter(
+                participant=business, signature__isnull=False
+            )
+            .exclude(signature="")
+            .select_related("participant")
+            .first()
+        )
+
+        if user_contribution and user_contribution.signature:
+            # Convert signature URL to presigned URL for template
+            presigned = get_presigned_url_from_s3(user_contribution.signature)
+            signature_url = presigned.get("url") if presigned else None
+
+            # Get the owner name from the business
+            owner_assignment = (
+                UserAssignedBusiness.objects.filter(business=business, is_owner=True)
+                .select_related("user")
+                .first()
+            )
+
+            if owner_assignment and owner_assignment.user:
+                contributor_name = owner_assignment.user.get_full_name()
+            elif business.name:
+                contributor_name = business.name
+
+    return {
+        "terms_and_condition_en": pool.terms_and_conditions["en"],
+        "terms_and_condition_ar": pool.terms_and_conditions["ar"],
+        "organization_details": fragments["organization_details"],
+        "organization_logo_url": fragments["organization_logo_url"],
+        "pool": pool,
+        "pool_contribution": user_contribution,
+        "signature_url": signature_url,
+        "contributor_name": contributor_name,
+    }
+
+
+def build_musharakah_contract_details(
+    musharakah_contract_request_id, organization_code
+):
+    """Details of an approved Musharakah contract."""
+    from account.models import Organization
+    from jeweler.models import MusharakahContractRequest
+    from jeweler.serializers import MusharakahContractRequestResponseSerializer
+    from jeweler.utils import generate_musharaka_contract_context
+    from sooq_althahab.billing.rendering import get_organization_fragments
+
+    musharakah_contract_request = MusharakahContractRequest.objects.select_related(
+        "jeweler", "investor", "duration_in_days"
+    ).get(pk=musharakah_contract_request_id)
+    organization = Organization.objects.get(code=organization_code)
+    fragments = get_organization_fragments(organization)
+
+    serialized_musharakah_contract = MusharakahContractRequestResponseSerializer(
+        musharakah_contract_request
+    ).data
+    return {
+        "musharakah_contract": generate_musharaka_contract_context(
+            musharakah_contract_request, serialized_musharakah_contract
+        ),
+        "organization_details": fragments["organization_details"],
+        "organization_logo_url": fragments["organization_logo_url"],
+    }
+
+
+def build_transaction_receipt(transaction_id, organization_id):
+    """Receipt or tax invoice of a wallet transaction."""
+    from account.models import Organization
+    from investor.utils import get_transaction_object
+    from sooq_althahab.billing.transaction.helpers import (
+        get_transaction_receipt_context_and_template,
+    )
+
+    context, _, _ = get_transaction_receipt_context_and_template(
+        get_transaction_object(transaction_id),
+        Organization.objects.get(pk=organization_id),
+    )
+    context["is_pdf"] = True
+    return context
+
+
+# Document name -> context builder and whether pdf_style.css applies. The
+# template is part of the job, since receipts choose it per transaction type.
+DOCUMENTS = {
+    "pool-details": {"builder": build_pool_details, "use_stylesheet": False},
+    "musharakah-contract-details": {
+        "builder": build_musharakah_contract_details,
+        "use_stylesheet": False,
+    },
+    "transaction-receipt": {
+        "builder": build_transaction_receipt,
+        "use_stylesheet": True,
+    },
+}
+
+
+def _job_key(job_id):
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def _active_jobs_key(user_id):
+    return f"{ACTIVE_JOBS_KEY_PREFIX}{user_id}"
+
+
+def _decode(job):
+    return {key.decode(): value.decode() for key, value in job.items()}
+
+
+def submit_pdf_job(user_id, document, template_name, filename, **params):
+    """
+    Queue ``document`` for rendering on the ``pdf`` queue.
+
+    Args:
+        user_id: The user who may read the job and download the PDF.
+        document: A ``DOCUMENTS`` name.
+        template_name: Template to render.
+        filename: Download filename.
+        **params: JSON-able arguments of the document's context builder.
+
+    Returns:
+        str: The job id.
+
+    Raises:
+        TooManyPdfJobs: The user has too many unfinished jobs.
+    """
+    from sooq_althahab.tasks import render_pdf_job
+
+    if document not in DOCUMENTS:
+        raise ValueError(f"Unknown PDF document {document}")
+
+    redis_client = get_redis_connection()
+    active_key = _active_jobs_key(user_id)
+    pipeline = redis_client.pipeline()
+    pipeline.incr(active_key)
+    # Expires on its own should a worker die without releasing its slot
+    pipeline.expire(active_key, settings.PDF_JOB_TIME_LIMIT * 2)
+    active_jobs, _ = pipeline.execute()
+    if active_jobs > settings.PDF_JOB_MAX_ACTIVE_PER_USER:
+        redis_client.decr(active_key)
+        raise TooManyPdfJobs()
+
+    job_id = uuid.uuid4().hex
+    pipeline = redis_client.pipeline()
+    pipeline.hset(
+        _job_key(job_id),
+        mapping={
+            "status": PENDING,
+            "user_id": str(user_id),
+            "document": document,
+            "template_name": template_name,
+            "params": json.dumps(params),
+            "filename": filename,
+            "created_at": timezone.now().isoformat(),
+        },
+    )
+    pipeline.expire(_job_key(job_id), settings.PDF_JOB_TTL)
+    pipeline.execute()
+
+    render_pdf_job.delay(job_id)
+    return job_id
+
+
+def get_pdf_job(job_id):
+    """The job as a dict of strings, or None when unknown or expired."""
+    job = get_redis_connection().hgetall(_job_key(job_id))
+    return _decode(job) if job else None
+
+
+def _update_job(job_id, **fields):
+    get_redis_connection().hset(_job_key(job_id), mapping=fields)
+
+
+def _release_slot(user_id):
+    redis_client = get_redis_connection()
+    if redis_client.decr(_active_jobs_key(user_id)) < 0:
+        redis_client.delete(_active_jobs_key(user_id))
+
+
+def _notify(job_id, job, status):
+    from sooq_althahab.utils import send_notification_to_group
+
+    try:
+        send_notification_to_group(
+            job["user_id"],
+            data={"job_id": job_id, "status": status, "filename": job["filename"]},
+            message="pdf_job_ready" if status == READY else "pdf_job_failed",
+        )
+    except Exception as e:
+        logger.warning(f"[PDF jobs] Could not notify job {job_id}: {e}")
+
+
+def run_pdf_job(job_id):
+    """Render and store the job's PDF, then mark it READY or FAILED."""
+    job = get_pdf_job(job_id)
+    if not job or job["status"] != PENDING:
+        return
+
+    _update_job(job_id, status=RUNNING)
+    document = DOCUMENTS[job["document"]]
+    try:
+        # A soft time limit raises in here too, so the job is marked FAILED
+        try:
+            context = document["builder"](**json.loads(job["params"]))
+        finally:
+            close_old_connections()
+        template_name = job["template_name"]
+        storage_key = pdf_cache.get_cache_key(template_name, context)
+
+        if settings.PDF_CACHE_ENABLED and pdf_cache.pdf_exists(storage_key):
+            logger.info(f"[PDF jobs] Job {job_id} reuses {storage_key}")
+        else:
+            pdf = render_pdf(
+                render_template(template_name, context),
+                use_stylesheet=document["use_stylesheet"],
+            )
+            if not pdf_cache.store_pdf(storage_key, pdf):
+                raise RuntimeError(f"Could not store {storage_key}")
+    except Exception as e:
+        logger.exception(f"[PDF jobs] Job {job_id} ({job['document']}) failed: {e}")
+        _update_job(job_id, status=FAILED, error=str(e)[:500])
+        _notify(job_id, job, FAILED)
+        return
+    finally:
+        _release_slot(job["user_id"])
+
+    _update_job(job_id, status=READY, storage_key=storage_key)
+    _notify(job_id, job, READY)
+
+
+def get_job_download_url(job):
+    """
+    Where the finished job's PDF is downloaded: a presigned S3 URL, or None
+    when it is served by the job download endpoint (local storage).
+    """
+    return pdf_cache.get_presigned_pdf_url(job["storage_key"], job["filename"])
+
+
+def load_job_pdf(job):
+    """The finished job's PDF bytes, or None."""
+    return pdf_cache.load_pdf(job["storage_key"])
+
+
+def serialize_pdf_job(request, job_id, job):
+    """Job status for API responses, with its download URL once READY."""
+    from django.urls import reverse
+
+    data = {
+        "job_id": job_id,
+        "status": job["status"],
+        "filename": job["filename"],
+        "status_url": request.build_absolute_uri(
+            reverse("pdf-job-detail", args=[job_id])
+        ),
+    }
+    if job["status"] == READY:
+        data["download_url"] = get_job_download_url(job) or (
+            request.build_absolute_uri(reverse("pdf-job-download", args=[job_id]))
+        )
+    elif job["status"] == FAILED:
+        data["error"] = job.get("error", "")
+    return data
+
+
+def pdf_job_response(request, document, template_name, filename, **params):
+    """
+    Submit a PDF job for the requesting user and return the ``202`` response
+    download views answer with (``429`` over the per-user limit, ``503``
+    without Redis).
+    """
+    from redis import RedisError
+    from rest_framework import status
+
+    from sooq_althahab.messages import MESSAGES
+    from sooq_althahab.utils import generic_response
+
+    try:
+        job_id = submit_pdf_job(
+            request.user.pk, document, template_name, filename, **params
+        )
+    except TooManyPdfJobs:
+        return generic_response(
+            error_message=MESSAGES["pdf_job_limit_reached"],
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+    except RedisError as e:
+        logger.error(f"[PDF jobs] Could not submit {document}: {e}")
+        return generic_response(
+            error_message=MESSAGES["pdf_job_unavailable"],
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return generic_response(
+        data=serialize_pdf_job(request, job_id, get_pdf_job(job_id)),
+        message=MESSAGES["pdf_job_queued"],
+        status_code=status.HTTP_202_ACCEPTED,
+    )
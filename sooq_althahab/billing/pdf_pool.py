@@ -0,0 +1,203 @@
+"""
+Warm WeasyPrint rendering for invoices, receipts and other PDFs.
+
+Every PDF used to build a new ``HTML`` document and parse
+``static/css/pdf_style.css`` from disk, with fresh font configuration. Render
+jobs now go to a pool of long-lived processes (``PDF_RENDER_WORKERS``) over
+the executor's queue. Each process parses the stylesheet and sets up fonts
+once, and reuses an image cache for the logo and watermark.
+
+Celery prefork children cannot start processes, so tasks (and any process
+with ``PDF_RENDER_WORKERS=0``) render inline with the same per-process
+stylesheet and fonts. Queue wait and render times are logged and available
+through ``get_metrics()``.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Renders kept for the percentile snapshot.
+METRICS_SAMPLE_SIZE = 500
+# Images (logo, watermark, signatures) cached per rendering process.
+IMAGE_CACHE_SIZE = 64
+
+_worker_state = {}
+_inline_lock = threading.Lock()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_renders = 0
+_errors = 0
+_render_times = deque(maxlen=METRICS_SAMPLE_SIZE)
+_total_times = deque(maxlen=METRICS_SAMPLE_SIZE)
+
+
+def get_static_dir():
+    return Path(settings.BASE_DIR) / "static"
+
+
+def get_base_url():
+    return get_static_dir().resolve().as_uri()
+
+
+def _init_worker(stylesheet_path):
+    """Parse the stylesheet and set up fonts once per rendering process."""
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()
+    _worker_state.update(
+        font_config=font_config,
+        stylesheet=CSS(filename=stylesheet_path, font_config=font_config),
+        image_cache={},
+    )
+
+
+def _render(html, base_url, use_stylesheet):
+    """Render one document in this process. Returns (pdf bytes, seconds)."""
+    from weasyprint import HTML
+
+    started = time.perf_counter()
+    image_cache = _worker_state["image_cache"]
+    # Presigned URLs differ per render, so keep the cache bounded
+    if len(image_cache) > IMAGE_CACHE_SIZE:
+        image_cache.clear()
+    pdf = HTML(string=html, base_url=base_url).write_pdf(
+        stylesheets=[_worker_state["stylesheet"]] if use_stylesheet else None,
+        font_config=_worker_state["font_config"],
+        cache=image_cache,
+    )
+    return pdf, time.perf_counter() - started
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _get_executor():
+    """The process pool, or None when this process must render inline."""
+    global _executor, _executor_pid
+
+    if settings.PDF_RENDER_WORKERS <= 0 or multiprocessing.current_process().daemon:
+        return None
+    if _executor is not None and _executor_pid == os.getpid():
+        return _executor
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Spawned, not forked: the web server process may have threads
+            # and open sockets that must not be copied into the workers.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(str(get_static_dir() / "css/pdf_style.css"),),
+            )
+            _executor_pid = os.getpid()
+            # Start every worker now so the first downloads do not pay for it
+            for _ in range(settings.PDF_RENDER_WORKERS):
+                _executor.submit(_warm_up)
+    return _executor
+
+
+def _reset_executor(executor):
+    global _executor
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_inline(html, base_url, use_stylesheet):
+    with _inline_lock:
+        if not _worker_state:
+            _init_worker(str(get_static_dir() / "css/pdf_style.css"))
+        return _render(html, base_url, use_stylesheet)
+
+
+def _record(started, render_seconds, mode):
+    global _renders, _errors
+
+    total_ms = (time.perf_counter() - started) * 1000
+    with _metrics_lock:
+        _renders += 1
+        if render_seconds is None:
+            _errors += 1
+        else:
+            _render_times.append(render_seconds * 1000)
+            _total_times.append(total_ms)
+    if render_seconds is not None:
+        logger.info(
+            f"[PDF] Rendered {mode} in {total_ms:.1f}ms "
+            f"(render {render_seconds * 1000:.1f}ms)"
+        )
+
+
+def render_pdf(html, base_url=None, use_stylesheet=True):
+    """
+    Render ``html`` to PDF bytes.
+
+    Args:
+        html: The rendered template.
+        base_url: Base for relative URLs, defaults to the static directory.
+        use_stylesheet: Apply ``static/css/pdf_style.css``.
+    """
+    started = time.perf_counter()
+    base_url = get_base_url() if base_url is None else base_url
+    executor = _get_executor()
+    try:
+        if executor is not None:
+            try:
+                future = executor.submit(_render, html, base_url, use_stylesheet)
+                pdf, render_seconds = future.result(timeout=settings.PDF_RENDER_TIMEOUT)
+                _record(started, render_seconds, "in pool")
+                return pdf
+            except BrokenProcessPool as e:
+                logger.error(f"[PDF] Render pool broke, rendering inline: {e}")
+                _reset_executor(executor)
+
+        pdf, render_seconds = _render_inline(html, base_url, use_stylesheet)
+        _record(started, render_seconds, "inline")
+        return pdf
+    except Exception:
+        _record(started, None, "failed")
+        raise
+
+
+def get_metrics():
+    """Render/error counts and latency percentiles for recent renders."""
+    with _metrics_lock:
+        render_times = sorted(_render_times)
+        total_times = sorted(_total_times)
+        renders, errors = _renders, _errors
+
+    def percentile(values, percent):
+        if not values:
+            return 0
+        index = max(int(len(values) * percent / 100 + 0.5) - 1, 0)
+        return round(values[min(index, len(values) - 1)], 1)
+
+    return {
+        "renders": renders,
+        "errors": errors,
+        "workers": settings.PDF_RENDER_WORKERS if _executor is not None else 0,
+        "p50_ms": percentile(total_times, 50),
+        "p95_ms": percentile(total_times, 95),
+        "render_p95_ms": percentile(render_times, 95),
+        "max_ms": round(total_times[-1], 1) if total_times else 0,
+    }
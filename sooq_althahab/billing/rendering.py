@@ -0,0 +1,132 @@
+"""
+Template rendering for emails and invoice PDFs.
+
+``render_to_string`` looks the template up through every loader and, with
+the callers' ``translation.activate``, switched the active language on each
+send. This module keeps:
+
+- compiled templates per process (not in DEBUG, so edits still reload).
+  A compiled template does not depend on the language, ``{% trans %}`` is
+  resolved at render time, so one copy serves every language;
+- the language switch only when the requested language is not already
+  active;
+- ``render_template_batch`` for many recipients of one template: the shared
+  context is built once and each recipient's fields are pushed on top of it;
+- the organization fragments shared by every invoice of an organization
+  (details used by the header and footer, logo URL) for
+  ``BILLING_FRAGMENT_CACHE_TTL`` seconds, so a bulk invoice run does not
+  presign the logo once per recipient. The bank IBAN lives on a related
+  record and is read on every call, so an edited bank account shows up on
+  the next invoice.
+"""
+
+import copy
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.utils import translation
+
+_templates = {}
+_organization_fragments = {}
+_organization_fragments_lock = threading.Lock()
+
+
+def get_compiled_template(template_name):
+    """The compiled template, reused across renders in this process."""
+    if settings.DEBUG:
+        return get_template(template_name)
+    template = _templates.get(template_name)
+    if template is None:
+        template = _templates[template_name] = get_template(template_name)
+    return template
+
+
+def _language_override(language_code):
+    if not language_code or language_code == translation.get_language():
+        return nullcontext()
+    return translation.override(language_code)
+
+
+def render_template(template_name, context, language_code=None):
+    """Render ``template_name``, in ``language_code`` when given."""
+    with _language_override(language_code):
+        return get_compiled_template(template_name).render(context)
+
+
+def render_template_batch(
+    template_name, contexts, shared_context=None, language_code=None
+):
+    """
+    Render one template for many recipients.
+
+    Args:
+        template_name: Template to render.
+        contexts: Per-recipient context dicts.
+        shared_context: Fields common to every recipient.
+        language_code: Language to render in, defaults to the active one.
+
+    Returns:
+        list: Rendered strings, in the order of ``contexts``.
+    """
+    template = get_compiled_template(template_name)
+    context = make_context(
+        shared_context or {}, autoescape=template.backend.engine.autoescape
+    )
+    rendered = []
+    with _language_override(language_code):
+        for recipient_context in contexts:
+            with context.push(recipient_context):
+                rendered.append(template.template.render(context))
+    return rendered
+
+
+def get_organization_fragments(organization):
+    """
+    Context shared by all invoices of ``organization``: ``organization_details``,
+    ``organization_logo_url`` and ``organization_iban_code``.
+
+    The details and logo URL only depend on the organization row and are
+    cached per organization version (``updated_at``) for
+    ``BILLING_FRAGMENT_CACHE_TTL`` seconds, kept below the presigned logo
+    URL's lifetime. The IBAN is queried each time. Callers get a copy they
+    may modify.
+    """
+    from sooq_althahab.billing.subscription.helpers import prepare_organization_details
+    from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
+
+    key = (organization.pk, organization.updated_at)
+    now = time.monotonic()
+    with _organization_fragments_lock:
+        cached = _organization_fragments.get(key)
+    if cached is None or cached[0] <= now:
+        fragments = {
+            "organization_details": prepare_organization_details(organization),
+            "organization_logo_url": get_organization_logo_url(organization),
+        }
+        ttl = min(
+            settings.BILLING_FRAGMENT_CACHE_TTL,
+            settings.S3_FILE_EXPIRATION_DURATION // 2,
+        )
+        cached = (now + ttl, fragments)
+        with _organization_fragments_lock:
+            # Drop expired entries so the cache stays bounded by live organizations
+            for stale_key in [
+                k
+                for k, (expires_at, _) in _organization_fragments.items()
+                if expires_at <= now
+            ]:
+                _organization_fragments.pop(stale_key, None)
+            _organization_fragments[key] = cached
+
+    fragments = copy.deepcopy(cached[1])
+    fragments["organization_iban_code"] = (
+        organization.organization_bank_accounts.filter(deleted_at__isnull=True)
+        .values_list("iban_code", flat=True)
+        .first()
+        or ""
+    )
+    return fragments
@@ -3,12 +3,11 @@ from decimal import Decimal
 
 from django.conf import settings
 
-from sooq_althahab.billing.subscription.helpers import prepare_organization_details
+from sooq_althahab.billing.rendering import get_organization_fragments
 from sooq_althahab.billing.subscription.helpers import (
     resolve_subscription_transaction_identifier,
 )
 from sooq_althahab.billing.subscription.pdf_utils import render_subscription_invoice_pdf
-from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
 
 logger = logging.getLogger(__name__)
 
@@ -92,7 +91,9 @@ def send_mail_to_business_owner(
     billing_details=None,
     failure_reason=None,
 ):
-    organization_details = prepare_organization_details(organization)
+    fragments = get_organization_fragments(organization)
+    organization_details = fragments["organization_details"]
+    organization_logo_url = fragments["organization_logo_url"]
 
     # Ensure we have a proper name for the email greeting
     business_name = business.name or ""
@@ -122,7 +123,7 @@ def send_mail_to_business_owner(
         "subscription_plan_duration": business_subscription_plan.subscription_plan.duration
         or "N/A",
         "subscription_amount": subscription_amount,
-        "organization_logo_url": get_organization_logo_url(organization),
+        "organization_logo_url": organization_logo_url,
         "status": transaction.status,
         "failure_reason": effective_failure_reason,
         "is_debit_card_failure": (
@@ -163,10 +164,10 @@ def send_mail_to_business_owner(
             "transaction_date": transaction.created_at,
             "payment_card_number": payment_card_number,
             "invoice_number": billing_details.invoice_number,
-            "organization_logo_url": get_organization_logo_url(organization),
+            "organization_logo_url": organization_logo_url,
         }
         template_name = "invoice/subscription-receipt.html"
-        pdf_io = render_subscription_invoice_pdf(template_name, pdf_context)
+        pdf_io = render_subscription_invoice_pdf(template_name, pdf_context, cache=True)
         send_subscription_invoice_email(
             [user.email],
             email_context,
@@ -1,26 +1,26 @@
 from io import BytesIO
-from pathlib import Path
 
-from django.conf import settings
-from django.template.loader import render_to_string
-from weasyprint import CSS
-from weasyprint import HTML
+from sooq_althahab.billing import pdf_cache
+from sooq_althahab.billing.pdf_pool import render_pdf
+from sooq_althahab.billing.rendering import render_template
 
 
-def render_subscription_invoice_pdf(template_name, context):
+def render_subscription_invoice_pdf(template_name, context, cache=False):
+    """
+    Render ``template_name`` to a PDF. With ``cache``, for documents that
+    never change (finished receipts, finalized invoices), a stored copy is
+    returned when there is one.
+    """
     context["is_pdf"] = True
-    html = render_to_string(template_name, context)
 
-    pdf_io = BytesIO()
-
-    static_dir = Path(settings.BASE_DIR) / "static"
-    base_url = static_dir.resolve().as_uri()
-    css_path = static_dir / "css/pdf_style.css"
-
-    HTML(string=html, base_url=base_url).write_pdf(
-        pdf_io,
-        stylesheets=[CSS(filename=css_path)],
-    )
+    def render():
+        # Rendered by a warm worker with the parsed pdf_style.css and fonts
+        return render_pdf(render_template(template_name, context))
 
+    if cache:
+        pdf = pdf_cache.get_pdf(template_name, context, render)
+    else:
+        pdf = render()
+    pdf_io = BytesIO(pdf)
     pdf_io.seek(0)
     return pdf_io
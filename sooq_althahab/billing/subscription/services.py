@@ -6,6 +6,7 @@ from django.utils import formats
 from django.utils.translation import gettext_lazy as _
 
 from account.models import User
+from sooq_althahab.billing.rendering import get_organization_fragments
 from sooq_althahab.billing.subscription.email_utils import (
     send_subscription_invoice_email,
 )
@@ -14,12 +15,10 @@ from sooq_althahab.billing.subscription.email_utils import (
 )
 from sooq_althahab.billing.subscription.helpers import calculate_base_amount
 from sooq_althahab.billing.subscription.helpers import calculate_tax_and_total
-from sooq_althahab.billing.subscription.helpers import prepare_organization_details
 from sooq_althahab.billing.subscription.helpers import (
     resolve_subscription_transaction_identifier,
 )
 from sooq_althahab.billing.subscription.pdf_utils import render_subscription_invoice_pdf
-from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
 from sooq_althahab.billing.transaction.helpers import get_user_contact_details
 from sooq_althahab.enums.sooq_althahab_admin import PaymentStatus
 from sooq_althahab_admin.models import BillingDetails
@@ -130,8 +129,9 @@ def send_subscription_invoice(
         "phone": str(owner_user.phone_number) if owner_user.phone_number else None,
     }
 
-    organization_details = prepare_organization_details(organization)
-    organization_logo_url = get_organization_logo_url(organization)
+    fragments = get_organization_fragments(organization)
+    organization_details = fragments["organization_details"]
+    organization_logo_url = fragments["organization_logo_url"]
 
     # Ensure we have proper names for the PDF
     business_name = business.name or ""
@@ -182,7 +182,8 @@ def send_subscription_invoice(
     }
 
     template_name = "invoice/subscription-invoice.html"
-    pdf_io = render_subscription_invoice_pdf(template_name, pdf_context)
+    # Retried billing runs resend the same invoice
+    pdf_io = render_subscription_invoice_pdf(template_name, pdf_context, cache=True)
 
     recipient_list = list(
         User.objects.filter(
@@ -260,8 +261,9 @@ def send_subscription_receipt_after_payment(
     if not owner_user:
         return
 
-    organization_details = prepare_organization_details(organization)
-    organization_logo_url = get_organization_logo_url(organization)
+    fragments = get_organization_fragments(organization)
+    organization_details = fragments["organization_details"]
+    organization_logo_url = fragments["organization_logo_url"]
     try:
         card_token = transaction.from_business.business_saved_card_tokens.filter(
             is_used_for_subscription=True
@@ -320,7 +322,7 @@ def send_subscription_receipt_after_payment(
     }
 
     template_name = "invoice/subscription-receipt.html"
-    pdf_io = render_subscription_invoice_pdf(template_name, pdf_context)
+    pdf_io = render_subscription_invoice_pdf(template_name, pdf_context, cache=True)
 
     recipient_list = list(
         User.objects.filter(
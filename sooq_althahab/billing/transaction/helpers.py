@@ -6,8 +6,8 @@ from django.utils.timezone import localtime
 from account.models import Address
 from account.models import BankAccount
 from investor.serializers import TransactionResponseSerializer
+from sooq_althahab.billing.rendering import get_organization_fragments
 from sooq_althahab.billing.subscription.helpers import get_file_url
-from sooq_althahab.billing.subscription.helpers import prepare_organization_details
 from sooq_althahab.enums.account import TransactionType
 from sooq_althahab.enums.account import UserType
 from sooq_althahab.utils import get_presigned_url_from_s3
@@ -56,7 +56,9 @@ def get_transaction_receipt_context_and_template(transaction, organization):
     if context is None or transaction_type not in INVOICE_TEMPLATES:
         return None, None, None
 
-    context["organization_logo_url"] = get_organization_logo_url(organization)
+    context["organization_logo_url"] = get_organization_fragments(organization)[
+        "organization_logo_url"
+    ]
     template_name, filename = INVOICE_TEMPLATES[transaction_type]
     return context, template_name, filename
 
@@ -135,7 +137,9 @@ def format_datetime(dt):
 
 
 def generate_tax_invoice_context(transaction, organization):
-    organization_details = prepare_organization_details(organization)
+    organization_details = get_organization_fragments(organization)[
+        "organization_details"
+    ]
 
     from_user = transaction["from_business"]["owner"]
     from_user_address = get_user_contact_details(from_user["id"])
@@ -183,7 +187,9 @@ def generate_tax_invoice_context(transaction, organization):
 
 
 def generate_deposit_receipt_context(transaction, serialized_transaction, organization):
-    organization_details = prepare_organization_details(organization)
+    organization_details = get_organization_fragments(organization)[
+        "organization_details"
+    ]
 
     from_business = serialized_transaction["from_business"]
     from_user = from_business["owner"]
@@ -232,12 +238,9 @@ def generate_deposit_receipt_context(transaction, serialized_transaction, organi
 def generate_withdrawal_receipt_context(
     transaction, serialized_transaction, organization
 ):
-    organization_details = prepare_organization_details(organization)
-
-    bank_account = organization.organization_bank_accounts.filter(
-        deleted_at__isnull=True
-    ).first()
-    organization_details["iban_code"] = getattr(bank_account, "iban_code", "")
+    fragments = get_organization_fragments(organization)
+    organization_details = fragments["organization_details"]
+    organization_details["iban_code"] = fragments["organization_iban_code"]
 
     from_business = serialized_transaction["from_business"]
     from_user = from_business.get("owner", {})
@@ -284,7 +287,8 @@ def generate_withdrawal_receipt_context(
 def generate_transfer_receipt_context(
     transaction, serialized_transaction, organization
 ):
-    organization_details = prepare_organization_details(organization)
+    fragments = get_organization_fragments(organization)
+    organization_details = fragments["organization_details"]
 
     purchase_request = serialized_transaction["purchase_request"]
     from_user = serialized_transaction["from_business"]["owner"]
@@ -294,7 +298,7 @@ def generate_transfer_receipt_context(
     to_user_address = get_user_contact_details(to_user["id"])
 
     date, time = format_datetime(transaction.created_at)
-    organization_logo_url = get_organization_logo_url(organization)
+    organization_logo_url = fragments["organization_logo_url"]
 
     investor_iban_number = (
         BankAccount.objects.filter(user_id=from_user["id"])
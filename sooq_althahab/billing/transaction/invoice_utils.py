@@ -4,11 +4,11 @@ from decimal import Decimal
 from django.conf import settings
 
 from account.models import OrganizationCurrency
+from sooq_althahab.billing.rendering import get_organization_fragments
 from sooq_althahab.billing.transaction.helpers import generate_deposit_receipt_context
 from sooq_althahab.billing.transaction.helpers import (
     generate_withdrawal_receipt_context,
 )
-from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
 from sooq_althahab.tasks import send_mail
 
 logger = logging.getLogger(__name__)
@@ -114,7 +114,10 @@ def send_topup_invoice_to_accounts(transaction, organization):
         pdf_context = generate_deposit_receipt_context(
             transaction, transaction_data, organization
         )
-        pdf_context["organization_logo_url"] = get_organization_logo_url(organization)
+        organization_logo_url = get_organization_fragments(organization)[
+            "organization_logo_url"
+        ]
+        pdf_context["organization_logo_url"] = organization_logo_url
 
         currency_code = get_currency_code(organization)
         pdf_context["billing"] = {"currency": currency_code}
@@ -133,7 +136,7 @@ def send_topup_invoice_to_accounts(transaction, organization):
             + Decimal(transaction.additional_fee or 0),
             "currency": currency_code,
             "status": format_status(transaction.status),
-            "organization_logo_url": get_organization_logo_url(organization),
+            "organization_logo_url": organization_logo_url,
         }
 
         combined_context = {**pdf_context, **email_context}
@@ -187,7 +190,10 @@ def send_withdrawal_invoice_to_accounts(transaction, organization):
         pdf_context = generate_withdrawal_receipt_context(
             transaction, transaction_data, organization
         )
-        pdf_context["organization_logo_url"] = get_organization_logo_url(organization)
+        organization_logo_url = get_organization_fragments(organization)[
+            "organization_logo_url"
+        ]
+        pdf_context["organization_logo_url"] = organization_logo_url
 
         currency_code = get_currency_code(organization)
 
@@ -205,7 +211,7 @@ def send_withdrawal_invoice_to_accounts(transaction, organization):
             + Decimal(transaction.additional_fee or 0),
             "currency": currency_code,
             "status": format_status(transaction.status),
-            "organization_logo_url": get_organization_logo_url(organization),
+            "organization_logo_url": organization_logo_url,
         }
 
         combined_context = {**pdf_context, **email_context}
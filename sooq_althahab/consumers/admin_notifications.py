@@ -1,67 +1,48 @@
 import json
 import logging
-from urllib.parse import parse_qs
 
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.db import close_old_connections
-from rest_framework_simplejwt.exceptions import TokenError
 
 from sooq_althahab.enums.account import UserRoleChoices
+from sooq_althahab.notification_counters import get_cached_unread_count
+from sooq_althahab.notification_counters import get_unread_count
+from sooq_althahab.notification_stream import get_missed_messages
 
 logger = logging.getLogger(__name__)
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        # Close any stale database connections before starting
-        close_old_connections()
-
-        # Retrieve token from the query string
-        token = self.scope["query_string"]
-        token = parse_qs(token.decode()).get("token", [None])[0]
-
-        logger.debug("Received connection request with token: %s", token)
+    """
+    Notification socket. ``JwtAuthMiddleware`` has already decoded the
+    token, the unread count comes from its Redis counter and missed
+    broadcasts from the group's stream, so connecting does not touch the
+    database unless the counter has expired.
+    """
 
-        if not token:
-            logger.warning("No token provided, closing connection.")
+    async def connect(self):
+        payload = self.scope.get("token_payload")
+        if not payload:
+            logger.debug("Missing or invalid token, closing connection.")
             await self.close(code=4000)
             return
 
-        try:
-            from rest_framework_simplejwt.tokens import AccessToken
-
-            # Here, validate the token and retrieve user info
-            decoded_token = AccessToken(token)
-            logger.debug("Token successfully decoded: %s", decoded_token.payload)
-
-            # Get the organization code from the token payload
-            self.organization_code = decoded_token.payload.get("organization_code")
-            if not self.organization_code:
-                logger.warning("Organization code not found in the token payload.")
-                await self.close(code=4000)
-                return
-
-            # Get the user role from the token payload and check user is ADMIN, TAQABETH_ENFORCER, JEWELLERY_INSPECTOR, or JEWELLERY_BUYER
-            self.role = decoded_token.payload.get("role")
-            self.user_id = decoded_token.payload.get("user_id")
-
-            if self.role not in UserRoleChoices:
-                group_name = f"notifications_{self.user_id}"
-            else:
-                group_name = f"notifications_{self.organization_code}"
-
-            logger.debug("Organization code: %s", self.organization_code)
-
-        except TokenError as e:
-            logger.warning("Invalid or expired token: %s", str(e))
+        # Get the organization code from the token payload
+        self.organization_code = payload.get("organization_code")
+        if not self.organization_code:
+            logger.warning("Organization code not found in the token payload.")
             await self.close(code=4000)
             return
 
-        except Exception as e:
-            logger.error("Error decoding token or fetching organization code: %s", e)
-            await self.close(code=4000)
-            return
+        # Get the user role from the token payload and check user is ADMIN, TAQABETH_ENFORCER, JEWELLERY_INSPECTOR, or JEWELLERY_BUYER
+        self.role = payload.get("role")
+        self.user_id = payload.get("user_id")
+
+        if self.role not in UserRoleChoices:
+            group_name = f"notifications_{self.user_id}"
+        else:
+            group_name = f"notifications_{self.organization_code}"
 
         # Construct the room group name based on the organization code
         self.room_group_name = group_name
@@ -70,21 +51,21 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         # Join the group
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
-        logger.info("User connected and accepted.")
+        logger.debug("User connected and accepted.")
 
-        try:
-            count = await self.get_notification_count()
-            await self.notification_count(
-                {"type": "notification_count", "count": count}
+        # Replay broadcasts missed since the client's last resume token
+        resume_token = self.scope.get("resume_token")
+        if resume_token:
+            missed = await sync_to_async(get_missed_messages, thread_sensitive=False)(
+                self.room_group_name, resume_token
             )
-        finally:
-            # Always close connections after database operations
-            close_old_connections()
+            for event in missed:
+                await self.notification_message(event)
 
-    async def disconnect(self, close_code):
-        # Close database connections on disconnect
-        close_old_connections()
+        count = await self.get_notification_count()
+        await self.notification_count({"type": "notification_count", "count": count})
 
+    async def disconnect(self, close_code):
         # Ensure room_group_name is defined before attempting to leave the group
         if hasattr(self, "room_group_name"):
             logger.debug("Leaving group: %s", self.room_group_name)
@@ -92,11 +73,9 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_discard(
                 self.room_group_name, self.channel_name
             )
-        else:
-            logger.warning("No room_group_name defined, skipping group discard.")
 
         # Handle connection closing or clean-up if necessary
-        logger.info(f"Connection closed with code {close_code}")
+        logger.debug(f"Connection closed with code {close_code}")
 
     async def receive(self, text_data):
         # Handle received messages (you might not need this for notifications)
@@ -108,7 +87,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         data = event["data"]
         logger.debug("Sending notification data: %s", data)
         logger.debug("Sending notification message: %s", message)
-        await self.send(text_data=json.dumps({"message": message, "data": data}))
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "message": message,
+                    "data": data,
+                    "resume_token": event.get("resume_token"),
+                }
+            )
+        )
 
     async def notification_count(self, event):
         # Send message to WebSocket
@@ -116,20 +103,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         logger.debug("Sending notification count: %s", count)
         await self.send(text_data=json.dumps({"count": count}))
 
-    @database_sync_to_async
-    def get_notification_count(self):
-        from sooq_althahab_admin.models import Notification
-
+    async def get_notification_count(self):
         try:
-            # Close old connections before query
-            close_old_connections()
-            count = Notification.objects.filter(
-                user_id=self.user_id, is_read=False
-            ).count()
-            # Close connections after query
-            close_old_connections()
+            count = await sync_to_async(
+                get_cached_unread_count, thread_sensitive=False
+            )(self.user_id)
+            if count is None:
+                # Counter expired: compute it once from the database and seed it.
+                count = await database_sync_to_async(get_unread_count)(self.user_id)
             return count
         except Exception as e:
             logger.error(f"Error getting notification count: {e}")
-            close_old_connections()
             return 0
@@ -0,0 +1,337 @@
+"""
+Email dispatch over a reused SMTP connection.
+
+``send_mail`` used to open a new SMTP connection per email (``email.send()``)
+and, for organization emails, look up the organization, presign its logo and
+download it from S3 every time. This module keeps:
+
+- one SMTP connection per worker process, reused across tasks and reopened
+  when the server drops it or after ``EMAIL_CONNECTION_MAX_AGE`` seconds;
+- the inline logo of each organization as bytes in Redis for
+  ``EMAIL_LOGO_CACHE_TTL`` seconds (the static logo is read once per
+  process);
+- ``send_mail_batch``/``queue_mail_batch`` so campaigns (expiry notices,
+  receipts) send many messages per task over the one connection.
+"""
+
+import logging
+import mimetypes
+import os
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from email.mime.image import MIMEImage
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail import get_connection
+from django.db import close_old_connections
+from django.utils.html import strip_tags
+
+from account.models import Organization
+from sooq_althahab.billing.rendering import render_template
+from sooq_althahab.billing.rendering import render_template_batch
+from sooq_althahab.http_transport import get_transport
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+LOGO_CONTENT_ID = "<sqagoldenlogo>"
+LOGO_CACHE_KEY_PREFIX = "email:logo:"
+
+_connection = None
+_connection_pid = None
+_connection_opened_at = 0
+_connection_lock = threading.RLock()
+_static_logo = None
+
+
+def _get_smtp_connection():
+    """Return this process's open SMTP connection, reopening it when stale."""
+    global _connection, _connection_pid, _connection_opened_at
+
+    # A forked worker must not share its parent's socket.
+    if _connection is not None and _connection_pid != os.getpid():
+        _connection = None
+    if (
+        _connection is not None
+        and time.monotonic() - _connection_opened_at > settings.EMAIL_CONNECTION_MAX_AGE
+    ):
+        _close_smtp_connection()
+
+    if _connection is None:
+        _connection = get_connection(fail_silently=False)
+        _connection.open()
+        _connection_pid = os.getpid()
+        _connection_opened_at = time.monotonic()
+    return _connection
+
+
+def _close_smtp_connection():
+    global _connection
+
+    if _connection is not None:
+        try:
+            _connection.close()
+        except Exception:
+            pass
+    _connection = None
+
+
+def _send_message(message):
+    """Send one message, reopening a dropped connection and retrying it once."""
+    try:
+        return _get_smtp_connection().send_messages([message]) or 0
+    except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+        logger.warning(f"[Email] SMTP connection lost, reconnecting: {e}")
+        _close_smtp_connection()
+        return _get_smtp_connection().send_messages([message]) or 0
+
+
+def send_messages(messages):
+    """
+    Send ``messages`` one by one over the pooled SMTP connection.
+
+    A dropped connection is reopened and only the message being sent is
+    retried, so no message is sent twice. A message the server rejects
+    (refused recipients, bad data) is logged and skipped, and the rest are
+    still sent. When the server cannot be reached again the remaining
+    messages are logged as not sent.
+
+    Returns:
+        int: Number of messages sent.
+    """
+    sent = 0
+    with _connection_lock:
+        for index, message in enumerate(messages):
+            try:
+                sent += _send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                _close_smtp_connection()
+                logger.error(
+                    f"[Email] SMTP server unavailable, {len(messages) - index} "
+                    f"emails not sent: {e}"
+                )
+                break
+            except smtplib.SMTPException as e:
+                # smtplib resets the session, so the connection stays usable
+                logger.error(f"[Email] Email to {message.to} rejected: {e}")
+            except OSError as e:
+                # E.g. a timeout mid-message: whether it was delivered is
+                # unknown, so it is not resent
+                _close_smtp_connection()
+                logger.error(f"[Email] Email to {message.to} failed: {e}")
+    return sent
+
+
+def _make_logo_image(content, subtype):
+    image = MIMEImage(content, _subtype=subtype)
+    image.add_header("Content-ID", LOGO_CONTENT_ID)
+    image.add_header("Content-Disposition", "inline")
+    image.add_header("Content-Transfer-Encoding", "base64")
+    return image
+
+
+def _download_organization_logo(organization_code):
+    """Fetch the organization's logo from S3, or (None, None)."""
+    from sooq_althahab.utils import get_presigned_url_from_s3
+
+    try:
+        org = Organization.objects.filter(code=organization_code).first()
+    finally:
+        close_old_connections()
+    if not org or not org.logo:
+        return None, None
+
+    logo_url_data = get_presigned_url_from_s3(org.logo)
+    if not logo_url_data or not logo_url_data.get("url"):
+        return None, None
+    response = get_transport("s3").get(logo_url_data["url"])
+    if response.status_code != 200:
+        return None, None
+    mime_type, _ = mimetypes.guess_type(org.logo)
+    return response.content, mime_type.split("/")[1] if mime_type else "png"
+
+
+def get_organization_logo(organization_code):
+    """
+    The organization's logo as ``(bytes, subtype)``, or (None, None) when it
+    has none. Both outcomes are cached in Redis for ``EMAIL_LOGO_CACHE_TTL``.
+    """
+    key = f"{LOGO_CACHE_KEY_PREFIX}{organization_code}"
+    try:
+        cached = get_redis_connection().hmget(key, "content", "subtype")
+        if cached[1] is not None:
+            return (cached[0], cached[1].decode()) if cached[0] else (None, None)
+    except Exception as e:
+        logger.warning(f"[Email] Logo cache unavailable: {e}")
+
+    try:
+        content, subtype = _download_organization_logo(organization_code)
+    except Exception as e:
+        logger.warning(f"[Email] Could not fetch logo of {organization_code}: {e}")
+        # Not cached, so the next email retries the download.
+        return None, None
+
+    try:
+        pipeline = get_redis_connection().pipeline()
+        pipeline.hset(
+            key, mapping={"content": content or b"", "subtype": subtype or ""}
+        )
+        pipeline.expire(key, settings.EMAIL_LOGO_CACHE_TTL)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"[Email] Could not cache logo of {organization_code}: {e}")
+    return content, subtype
+
+
+def invalidate_organization_logo(organization_code):
+    """Drop the cached logo, e.g. after the organization changes it."""
+    try:
+        get_redis_connection().delete(f"{LOGO_CACHE_KEY_PREFIX}{organization_code}")
+    except Exception as e:
+        logger.warning(f"[Email] Could not invalidate logo of {organization_code}: {e}")
+
+
+def get_static_logo():
+    """Bytes of the default logo, read once per process."""
+    global _static_logo
+
+    if _static_logo is None:
+        static_logo_path = os.path.join(
+            settings.BASE_DIR, "static", "images", "sqa_golden_logo.png"
+        )
+        _static_logo = b""
+        if os.path.exists(static_logo_path):
+            with open(static_logo_path, "rb") as img_file:
+                _static_logo = img_file.read()
+    return _static_logo
+
+
+def build_email(
+    subject,
+    template_name,
+    context,
+    to_emails,
+    language_code="en",
+    attachments=None,
+    organization_code=None,
+    from_email=None,
+    bcc_emails=None,
+    html_message=None,
+):
+    """
+    Render a template email with its inline logo and attachments.
+    ``html_message`` skips rendering when the template was already rendered.
+    """
+    # Ensure to_emails is a list
+    to_emails = to_emails if isinstance(to_emails, list) else [to_emails]
+    # Use custom from_email if provided, otherwise use default
+    from_email = from_email or settings.EMAIL_HOST_USER
+    # Ensure bcc_emails is a list if provided
+    bcc_emails = (
+        bcc_emails
+        if isinstance(bcc_emails, list)
+        else ([bcc_emails] if bcc_emails else None)
+    )
+
+    # Render the HTML email template with context
+    if html_message is None:
+        html_message = render_template(template_name, context, language_code)
+    # Strip HTML tags to create a plain text version
+    plain_message = strip_tags(html_message)
+
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=from_email,
+        to=to_emails,
+        bcc=bcc_emails,
+    )
+
+    # Attach the organization logo, falling back to the static one
+    logo, subtype = (
+        get_organization_logo(organization_code) if organization_code else (None, None)
+    )
+    if logo:
+        email.attach(_make_logo_image(logo, subtype))
+    elif get_static_logo():
+        email.attach(_make_logo_image(get_static_logo(), "png"))
+
+    # Attach HTML alternative
+    email.attach_alternative(html_message, "text/html")
+
+    # Optional attachments
+    if attachments:
+        for filename, file_content, mime_type in attachments:
+            email.attach(filename, file_content, mime_type)
+    return email
+
+
+def send_mail_now(**mail):
+    """Build and send one email (``send_mail`` arguments) in this process."""
+    return send_messages([build_email(**mail)])
+
+
+def send_mail_batch_now(mails):
+    """
+    Build and send a list of emails (each a dict of ``send_mail`` arguments)
+    in chunks of ``EMAIL_BATCH_SIZE`` over the pooled connection. A message
+    that fails to render or is rejected is skipped and the rest still sent.
+
+    Returns:
+        int: Number of messages sent.
+    """
+    # Render each template once per language for all of its recipients
+    groups = defaultdict(list)
+    for mail in mails:
+        groups[(mail["template_name"], mail.get("language_code", "en"))].append(mail)
+    html_messages = {}
+    for (template_name, language_code), group in groups.items():
+        try:
+            rendered = render_template_batch(
+                template_name,
+                [mail["context"] for mail in group],
+                language_code=language_code,
+            )
+        except Exception as e:
+            # build_email renders them one by one and skips the broken one
+            logger.warning(f"[Email] Batch render of {template_name} failed: {e}")
+            continue
+        for mail, html_message in zip(group, rendered):
+            html_messages[id(mail)] = html_message
+
+    messages = []
+    for mail in mails:
+        try:
+            messages.append(
+                build_email(**mail, html_message=html_messages.get(id(mail)))
+            )
+        except Exception as e:
+            logger.exception(
+                f"[Email] Could not build email to {mail.get('to_emails')}: {e}"
+            )
+
+    sent = 0
+    batch_size = settings.EMAIL_BATCH_SIZE
+    for start in range(0, len(messages), batch_size):
+        chunk = messages[start : start + batch_size]
+        try:
+            sent += send_messages(chunk)
+        except Exception as e:
+            logger.exception(
+                f"[Email] Batch of {len(chunk)} emails failed "
+                f"(first recipient {chunk[0].to}): {e}"
+            )
+    logger.info(f"[Email] Sent {sent}/{len(mails)} emails")
+    return sent
+
+
+def queue_mail_batch(mails):
+    """Queue ``send_mail_batch`` tasks of ``EMAIL_BATCH_SIZE`` emails each."""
+    from sooq_althahab.tasks import send_mail_batch
+
+    batch_size = settings.EMAIL_BATCH_SIZE
+    for start in range(0, len(mails), batch_size):
+        send_mail_batch.delay(mails[start : start + batch_size])
@@ -166,6 +166,19 @@ class WebhookCallStatus(TextChoices):
     RECEIVED = "RECEIVED", "Received"
 
 
+class WebhookProvider(TextChoices):
+    CREDIMAX = "CREDIMAX", "Credimax"
+    BENEFIT_PAY = "BENEFIT_PAY", "Benefit Pay"
+    SHUFTI = "SHUFTI", "Shufti Pro"
+
+
+class WebhookEventStatus(TextChoices):
+    RECEIVED = "RECEIVED", "Received"
+    PROCESSING = "PROCESSING", "Processing"
+    PROCESSED = "PROCESSED", "Processed"
+    FAILED = "FAILED", "Failed"
+
+
 class RiskLevel(TextChoices):
     LOW = "LOW", "Low"
     MEDIUM = "MEDIUM", "Medium"
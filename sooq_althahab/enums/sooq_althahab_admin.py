@@ -190,3 +190,23 @@ class FundStatus(TextChoices):
     OPEN = "OPEN", "Open"
     CLOSED = "CLOSED", "Closed"
     SUSPEND = "SUSPEND", "Suspend"
+
+
+class BillingRunType(TextChoices):
+    SUBSCRIPTION_FEE = "SUBSCRIPTION_FEE", "Subscription Fee"
+    PRO_RATA = "PRO_RATA", "Pro Rata"
+
+
+class BillingRunStatus(TextChoices):
+    RUNNING = "RUNNING", "Running"
+    COMPLETED = "COMPLETED", "Completed"
+    COMPLETED_WITH_FAILURES = "COMPLETED_WITH_FAILURES", "Completed With Failures"
+
+
+class BillingRunItemStatus(TextChoices):
+    PENDING = "PENDING", "Pending"
+    PROCESSING = "PROCESSING", "Processing"
+    COMPLETED = "COMPLETED", "Completed"
+    SKIPPED = "SKIPPED", "Skipped"
+    FAILED = "FAILED", "Failed"
+    NEEDS_RECONCILIATION = "NEEDS_RECONCILIATION", "Needs Reconciliation"
@@ -0,0 +1,322 @@
+"""
+Shared HTTP transport for outbound gateway and API calls.
+
+Every named transport ("credimax", "benefit", "goldapi", ...) owns one
+``requests.Session`` per process. The session keeps a keep-alive connection
+pool per host, so repeated calls skip the TCP and TLS handshake. On top of
+that the transport adds:
+
+- default connect/read timeouts, so a hung gateway cannot block a worker;
+- retries with full jitter for idempotent methods (GET, PUT, DELETE, HEAD,
+  OPTIONS) on connection errors, timeouts and 429/502/503/504. POSTs
+  (charges, session creation) are never retried unless the caller passes
+  ``retry=True``;
+- a Redis circuit breaker per transport, host and operation (the Gold API
+  breaker that used to live in ``sooq_althahab/tasks.py``, generalized).
+  Reads and writes trip separate breakers, and callers may name their own
+  operation (``operation="reconcile"``), so failing background polls do not
+  block user-facing payment POSTs. An open breaker lets one probe through
+  after ``CIRCUIT_BREAKER_OPEN_DURATION`` seconds (half-open) and closes
+  again when it succeeds;
+- per-call latency metrics, logged and available through ``get_metrics()``.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+# Latencies kept per transport for the percentile snapshot.
+METRICS_SAMPLE_SIZE = 500
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Redis-backed breaker: after ``failure_threshold`` failures within
+    ``failure_window`` seconds the circuit opens for ``open_duration``
+    seconds. It is then half-open: one request at a time goes through as a
+    probe; a success closes the circuit, a failure opens it again. Redis
+    errors never block a request.
+    """
+
+    def __init__(
+        self, name, failure_threshold=None, failure_window=None, open_duration=None
+    ):
+        self.name = name
+        self.failure_threshold = (
+            failure_threshold or settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        )
+        self.failure_window = failure_window or settings.CIRCUIT_BREAKER_WINDOW
+        self.open_duration = open_duration or settings.CIRCUIT_BREAKER_OPEN_DURATION
+
+    def _key(self, key, state=None):
+        base = f"circuit_breaker:{self.name}:{key}"
+        return f"{base}:{state}" if state else base
+
+    def get_failure_count(self, key):
+        try:
+            return int(get_redis_connection().get(self._key(key)) or 0)
+        except Exception as e:
+            logger.debug(f"Error checking circuit breaker: {e}")
+            return 0
+
+    def allow_request(self, key, failure_count=None):
+        """
+        Whether a request may go through: always while closed, never while
+        open, and for a single probe at a time while half-open.
+        """
+        if failure_count is None:
+            failure_count = self.get_failure_count(key)
+        if failure_count < self.failure_threshold:
+            return True
+        try:
+            redis_client = get_redis_connection()
+            if redis_client.exists(self._key(key, "open")):
+                return False
+            # The probe slot frees itself should the prober die
+            return bool(
+                redis_client.set(
+                    self._key(key, "probe"), 1, nx=True, ex=self.open_duration
+                )
+            )
+        except Exception as e:
+            logger.debug(f"Error checking circuit breaker: {e}")
+            return True
+
+    def is_open(self, key):
+        return not self.allow_request(key)
+
+    def record_failure(self, key):
+        try:
+            redis_client = get_redis_connection()
+            pipeline = redis_client.pipeline()
+            pipeline.incr(self._key(key))
+            pipeline.expire(self._key(key), self.failure_window)
+            failure_count, _ = pipeline.execute()
+            if failure_count >= self.failure_threshold:
+                # Open, then stay half-open until a probe succeeds or the
+                # failures expire
+                pipeline = redis_client.pipeline()
+                pipeline.set(self._key(key, "open"), 1, ex=self.open_duration)
+                pipeline.expire(
+                    self._key(key), self.open_duration + self.failure_window
+                )
+                pipeline.delete(self._key(key, "probe"))
+                pipeline.execute()
+        except Exception as e:
+            logger.debug(f"Error recording circuit breaker failure: {e}")
+
+    def reset(self, key):
+        try:
+            get_redis_connection().delete(
+                self._key(key), self._key(key, "open"), self._key(key, "probe")
+            )
+        except Exception as e:
+            logger.debug(f"Error resetting circuit breaker: {e}")
+
+
+class HttpTransport:
+    def __init__(
+        self,
+        name,
+        connect_timeout=None,
+        read_timeout=None,
+        max_retries=None,
+        backoff=None,
+        pool_maxsize=None,
+        circuit_breaker=True,
+    ):
+        self.name = name
+        self.timeout = (
+            connect_timeout or settings.HTTP_CONNECT_TIMEOUT,
+            read_timeout or settings.HTTP_READ_TIMEOUT,
+        )
+        self.max_retries = (
+            settings.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.backoff = backoff or settings.HTTP_RETRY_BACKOFF
+        self.circuit_breaker = CircuitBreaker(name) if circuit_breaker else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or settings.HTTP_POOL_MAXSIZE,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=METRICS_SAMPLE_SIZE)
+        self._calls = 0
+        self._errors = 0
+
+    def request(self, method, url, retry=None, operation=None, **kwargs):
+        """
+        Send a request through the pooled session.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Absolute URL.
+            retry (bool, optional): Override the retry policy. Defaults to
+                retrying idempotent methods only.
+            operation (str, optional): Circuit breaker of the call. Defaults
+                to "read" for idempotent methods and "write" otherwise.
+            **kwargs: Passed to ``requests.Session.request`` (``timeout``
+                defaults to the transport timeouts).
+
+        Raises:
+            CircuitOpenError: The operation's circuit breaker is open.
+            requests.RequestException: The last attempt failed.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", self.timeout)
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if retry else 1
+        if operation is None:
+            operation = "read" if method in IDEMPOTENT_METHODS else "write"
+        breaker_key = f"{host}:{operation}"
+
+        failure_count = 0
+        if self.circuit_breaker:
+            failure_count = self.circuit_breaker.get_failure_count(breaker_key)
+            if not self.circuit_breaker.allow_request(breaker_key, failure_count):
+                logger.warning(
+                    f"Circuit breaker OPEN: Skipping {self.name} {operation} "
+                    f"call to {host}"
+                )
+                raise CircuitOpenError(f"Circuit breaker open for {breaker_key}")
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._record(method, host, None, started)
+                if last_attempt:
+                    self._record_failure(breaker_key)
+                    raise
+                logger.warning(f"{self.name} {method} {host} failed ({e}), retrying")
+                self._sleep(attempt)
+                continue
+
+            self._record(method, host, response.status_code, started)
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                self._sleep(attempt)
+                continue
+
+            if response.status_code >= 500 or response.status_code == 429:
+                self._record_failure(breaker_key)
+            elif failure_count:
+                self.circuit_breaker.reset(breaker_key)
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def _sleep(self, attempt):
+        # Full jitter: spreads retries from many workers instead of syncing them.
+        time.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+    def _record_failure(self, breaker_key):
+        if self.circuit_breaker:
+            self.circuit_breaker.record_failure(breaker_key)
+
+    def _record(self, method, host, status_code, started):
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._metrics_lock:
+            self._calls += 1
+            if status_code is None or status_code >= 500:
+                self._errors += 1
+            self._latencies.append(latency_ms)
+        logger.info(
+            f"[HTTP] {self.name} {method} {host} -> {status_code or 'error'} "
+            f"in {latency_ms:.1f}ms",
+            extra={
+                "http_transport": self.name,
+                "http_method": method,
+                "http_host": host,
+                "http_status": status_code,
+                "http_latency_ms": round(latency_ms, 1),
+            },
+        )
+
+    def get_metrics(self):
+        """Call/error counts and latency percentiles for recent calls."""
+        with self._metrics_lock:
+            latencies = sorted(self._latencies)
+            calls, errors = self._calls, self._errors
+
+        def percentile(percent):
+            if not latencies:
+                return 0
+            index = max(int(len(latencies) * percent / 100 + 0.5) - 1, 0)
+            return round(latencies[min(index, len(latencies) - 1)], 1)
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "max_ms": round(latencies[-1], 1) if latencies else 0,
+        }
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport_options(name):
+    """Per-transport overrides of the ``HTTP_*`` defaults."""
+    return {
+        "credimax": {
+            # The reconciliation engine shares this pool across its threads.
+            "pool_maxsize": max(
+                settings.HTTP_POOL_MAXSIZE, settings.CREDIMAX_RECONCILE_CONCURRENCY
+            ),
+        },
+        "benefit": {"read_timeout": 30},
+        "goldapi": {"read_timeout": 10, "max_retries": 2, "backoff": 1},
+    }.get(name, {})
+
+
+def get_transport(name):
+    """Return the process-wide transport called ``name``."""
+    transport = _transports.get(name)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(name)
+            if transport is None:
+                transport = _transports[name] = HttpTransport(
+                    name, **get_transport_options(name)
+                )
+    return transport
+
+
+def get_metrics():
+    """Metrics for every transport created in this process."""
+    return {name: transport.get_metrics() for name, transport in _transports.items()}
@@ -0,0 +1,253 @@
+"""
+``Idempotency-Key`` support for payment and wallet mutation endpoints.
+
+Mobile clients retry writes on flaky networks. When a request carries an
+``Idempotency-Key`` header, the first response is stored for
+``IDEMPOTENCY_KEY_TTL`` seconds and replayed for retries with the same key,
+so a retry costs one cache read instead of a second payment session or
+transaction. While the first request is running, a short in-flight lock
+(``IDEMPOTENCY_LOCK_TTL``) makes concurrent retries fail fast with 409.
+
+Redis is the primary store; if it is unreachable the ``IdempotencyKey`` table
+is used instead. Requests without the header behave exactly as before.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from redis import RedisError
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from sooq_althahab.messages import MESSAGES
+from sooq_althahab.redis_utils import get_redis_connection
+from sooq_althahab.utils import generic_response
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Responses that depend on who/when rather than on the payload are not stored.
+NON_REPLAYABLE_STATUS_CODES = {
+    status.HTTP_401_UNAUTHORIZED,
+    status.HTTP_403_FORBIDDEN,
+    status.HTTP_409_CONFLICT,
+    status.HTTP_429_TOO_MANY_REQUESTS,
+}
+
+
+def get_request_fingerprint(request):
+    """Hash of the request payload, used to reject a key reused for other data."""
+    payload = json.dumps(
+        request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RedisIdempotencyStore:
+    def __init__(self, user_id, request_path, key):
+        digest = hashlib.sha256(f"{request_path}:{key}".encode()).hexdigest()
+        self.response_key = f"idempotency:{user_id}:{digest}"
+        self.lock_key = f"{self.response_key}:lock"
+        self.redis = get_redis_connection()
+
+    def get(self):
+        cached = self.redis.get(self.response_key)
+        return json.loads(cached) if cached else None
+
+    def acquire(self, fingerprint):
+        return bool(
+            self.redis.set(
+                self.lock_key, fingerprint, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL
+            )
+        )
+
+    def save(self, fingerprint, status_code, data):
+        self.redis.set(
+            self.response_key,
+            json.dumps(
+                {"fingerprint": fingerprint, "status": status_code, "data": data},
+                cls=DjangoJSONEncoder,
+            ),
+            ex=settings.IDEMPOTENCY_KEY_TTL,
+        )
+
+    def release(self):
+        self.redis.delete(self.lock_key)
+
+
+class DatabaseIdempotencyStore:
+    def __init__(self, user_id, request_path, key):
+        self.lookup = {"user_id": user_id, "request_path": request_path, "key": key}
+
+    def _queryset(self):
+        from account.models import IdempotencyKey
+
+        return IdempotencyKey.objects.filter(**self.lookup)
+
+    def get(self):
+        record = (
+            self._queryset()
+            .filter(
+                response_status_code__isnull=False,
+                created_at__gte=timezone.now()
+                - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+            .first()
+        )
+        if not record:
+            return None
+        return {
+            "fingerprint": record.request_hash,
+            "status": record.response_status_code,
+            "data": record.response_body,
+        }
+
+    def acquire(self, fingerprint):
+        from account.models import IdempotencyKey
+
+        now = timezone.now()
+        locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TTL)
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    **self.lookup, request_hash=fingerprint, locked_until=locked_until
+                )
+            return True
+        except IntegrityError:
+            pass
+
+        # Take over a record whose owner crashed (lock expired, no response)
+        # or whose stored response is older than the replay window.
+        expired = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        stale = self._queryset().filter(
+            (Q(response_status_code__isnull=True) & Q(locked_until__lt=now))
+            | Q(created_at__lt=expired)
+        )
+        return bool(
+            stale.update(
+                request_hash=fingerprint,
+                locked_until=locked_until,
+                response_status_code=None,
+                response_body=None,
+                created_at=now,
+            )
+        )
+
+    def save(self, fingerprint, status_code, data):
+        self._queryset().update(
+            request_hash=fingerprint,
+            response_status_code=status_code,
+            response_body=json.loads(json.dumps(data, cls=DjangoJSONEncoder)),
+            locked_until=None,
+        )
+
+    def release(self):
+        # A request that produced no stored response may be retried.
+        self._queryset().filter(response_status_code__isnull=True).delete()
+
+
+class IdempotencyManager:
+    """
+    Decorator for ``post`` methods of views that create payments or
+    transactions. Apply it below ``PermissionManager`` so permission
+    failures are never stored.
+
+    Example:
+        @PermissionManager(PURCHASE_REQUEST_CREATE_PERMISSION)
+        @IdempotencyManager()
+        def post(self, request, *args, **kwargs):
+            ...
+    """
+
+    def __call__(self, function):
+        @wraps(function)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if (
+                not key
+                or not isinstance(request, Request)
+                or not request.user.is_authenticated
+            ):
+                return function(view, request, *args, **kwargs)
+            if len(key) > 255:
+                return generic_response(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    error_message=MESSAGES["invalid_idempotency_key"],
+                )
+
+            fingerprint = get_request_fingerprint(request)
+            store_args = (request.user.pk, request.path, key)
+            try:
+                store = RedisIdempotencyStore(*store_args)
+                cached = store.get()
+            except RedisError:
+                logger.warning(
+                    "Redis unavailable for idempotency key, using database fallback."
+                )
+                store = DatabaseIdempotencyStore(*store_args)
+                cached = store.get()
+
+            if cached:
+                return self.replay(cached, fingerprint)
+
+            if not self.call_store(store, "acquire", fingerprint):
+                # The first request may have finished between get() and acquire().
+                cached = self.call_store(store, "get")
+                if cached:
+                    return self.replay(cached, fingerprint)
+                return generic_response(
+                    status_code=status.HTTP_409_CONFLICT,
+                    error_message=MESSAGES["idempotency_key_in_progress"],
+                )
+
+            try:
+                response = function(view, request, *args, **kwargs)
+                if (
+                    isinstance(response, Response)
+                    and response.status_code < 500
+                    and response.status_code not in NON_REPLAYABLE_STATUS_CODES
+                ):
+                    self.call_store(
+                        store, "save", fingerprint, response.status_code, response.data
+                    )
+                return response
+            finally:
+                self.call_store(store, "release")
+
+        return wrapper
+
+    @staticmethod
+    def call_store(store, method, *args):
+        """
+        Run a store operation after the first lookup. A Redis failure here
+        must not fail the payment itself, so it is logged and treated as
+        "nothing stored / lock acquired".
+        """
+        try:
+            return getattr(store, method)(*args)
+        except RedisError:
+            logger.exception(f"Idempotency store {method} failed.")
+            return True if method == "acquire" else None
+
+    @staticmethod
+    def replay(cached, fingerprint):
+        if cached["fingerprint"] != fingerprint:
+            return generic_response(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                error_message=MESSAGES["idempotency_key_reused"],
+            )
+        response = Response(cached["data"], status=cached["status"])
+        response[REPLAYED_HEADER] = "true"
+        return response
@@ -0,0 +1,203 @@
+"""
+Resized derivatives of product and marketplace images.
+
+Inventory and marketplace lists presented every image as a presigned URL of
+the uploaded original, so mobile clients downloaded multi-megabyte photos to
+draw thumbnails. When an image row is created, ``generate_image_derivatives``
+now resizes the original in the background to each of ``DERIVATIVE_SIZES``
+(longest edge, never upscaled) and in each of ``DERIVATIVE_FORMATS``, and
+stores them next to the original:
+
+    <key without extension>_<size>.<format>
+
+The keys are kept in the row's ``derivatives`` field
+(``{"thumb": {"webp": key, "jpeg": key}, ...}``) and serializers expose
+their presigned URLs by size and format. Rows without derivatives (still
+being processed, a PDF attachment, an undecodable file) expose none, and
+clients keep using the original URL.
+
+``IMAGE_MODELS`` maps each model label to the field holding the original.
+"""
+
+import io
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+# Size name -> longest edge in pixels
+DERIVATIVE_SIZES = {"thumb": 200, "card": 600, "full": 1600}
+
+# Format name -> Pillow format and save options, content type and extension.
+# WebP is listed first; JPEG is for clients that cannot decode it.
+DERIVATIVE_FORMATS = {
+    "webp": {
+        "format": "WEBP",
+        "options": {"method": 4},
+        "content_type": "image/webp",
+        "extension": "webp",
+    },
+    "jpeg": {
+        "format": "JPEG",
+        "options": {"optimize": True, "progressive": True},
+        "content_type": "image/jpeg",
+        "extension": "jpg",
+    },
+}
+
+# Originals Pillow decodes; other attachments (PDFs) get no derivatives
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Model label -> field holding the original's object key
+IMAGE_MODELS = {
+    "seller.PreciousItemImage": "image",
+    "jeweler.JewelryProductAttachment": "file",
+    "jeweler.JewelryProductMarketplaceImage": "image",
+}
+
+# Derivative keys never point at other content, so clients may cache them
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def is_image_key(key):
+    return bool(key) and os.path.splitext(key)[1].lower() in IMAGE_EXTENSIONS
+
+
+def get_derivative_key(key, size, format_name):
+    base, _ = os.path.splitext(key)
+    return f"{base}_{size}.{DERIVATIVE_FORMATS[format_name]['extension']}"
+
+
+def queue_image_derivatives(instances):
+    """
+    Generate the derivatives of ``instances`` (rows of an ``IMAGE_MODELS``
+    model) once the current transaction commits.
+    """
+    from sooq_althahab.tasks import generate_image_derivatives
+
+    jobs = []
+    for instance in instances:
+        field = IMAGE_MODELS[instance._meta.label]
+        if is_image_key(getattr(instance, field)):
+            jobs.append((instance._meta.label, instance.pk))
+    if not jobs:
+        return
+
+    def enqueue():
+        for model_label, pk in jobs:
+            generate_image_derivatives.delay(model_label, pk)
+
+    transaction.on_commit(enqueue)
+
+
+def _open_image(data):
+    from PIL import Image
+    from PIL import ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    if width * height > settings.IMAGE_DERIVATIVE_MAX_PIXELS:
+        raise ValueError(f"Image of {width}x{height} pixels is too large")
+    # JPEGs decode straight at a reduced scale, much faster than full size
+    largest = max(DERIVATIVE_SIZES.values())
+    image.draft("RGB", (largest, largest))
+    # Phone photos are stored sideways with an EXIF orientation
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def _encode(image, format_name):
+    from PIL import Image
+
+    options = DERIVATIVE_FORMATS[format_name]
+    if options["format"] == "JPEG" and image.mode == "RGBA":
+        # JPEG has no alpha channel: flatten transparent areas onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+
+    output = io.BytesIO()
+    image.save(
+        output,
+        options["format"],
+        quality=settings.IMAGE_DERIVATIVE_QUALITY,
+        **options["options"],
+    )
+    return output.getvalue()
+
+
+def build_derivatives(key):
+    """
+    Resize the original stored under ``key`` and upload its derivatives.
+
+    Returns:
+        dict: ``{size: {format: key}}`` of the uploaded derivatives.
+    """
+    from PIL import Image
+
+    from sooq_althahab.utils import s3
+
+    original = s3.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+    image = _open_image(original["Body"].read())
+
+    derivatives = {}
+    # Largest first, each resized from the previous one instead of the original
+    for size, edge in sorted(
+        DERIVATIVE_SIZES.items(), key=lambda item: item[1], reverse=True
+    ):
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        derivatives[size] = {}
+        for format_name, options in DERIVATIVE_FORMATS.items():
+            derivative_key = get_derivative_key(key, size, format_name)
+            s3.put_object(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=derivative_key,
+                Body=_encode(image, format_name),
+                ContentType=options["content_type"],
+                CacheControl=CACHE_CONTROL,
+            )
+            derivatives[size][format_name] = derivative_key
+    return {size: derivatives[size] for size in DERIVATIVE_SIZES}
+
+
+def generate_derivatives(model_label, pk):
+    """
+    Build the derivatives of one image row and save their keys on it.
+
+    Returns:
+        bool: Whether derivatives were saved; False when the row is gone,
+        its original is not an image or changed while it was processed.
+    """
+    field = IMAGE_MODELS[model_label]
+    model = apps.get_model(model_label)
+    key = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+    if not is_image_key(key):
+        return False
+
+    derivatives = build_derivatives(key)
+    # The original may have been replaced while this one was resized
+    return bool(
+        model.objects.filter(pk=pk, **{field: key}).update(derivatives=derivatives)
+    )
+
+
+def get_derivative_urls(derivatives, context=None):
+    """
+    Presigned URLs of ``derivatives`` as ``{size: {format: url}}``, or None
+    when the row has none. Pass the serializer context to use the URLs its
+    list serializer signed in one batch.
+    """
+    from sooq_althahab.utils import get_presigned_url_from_s3
+
+    if not derivatives:
+        return None
+    urls = {}
+    for size, formats in derivatives.items():
+        urls[size] = {}
+        for format_name, key in formats.items():
+            url_data = get_presigned_url_from_s3(key, context)
+            urls[size][format_name] = url_data["url"] if url_data else None
+    return urls
@@ -2,7 +2,46 @@ from django.utils.translation import gettext_lazy as _
 
 MESSAGES = {
     "not_found_error": _("Not found."),
+    "invalid_cursor": _("Invalid cursor."),
+    "invalid_idempotency_key": _(
+        "Idempotency-Key must be at most 255 characters long."
+    ),
+    "idempotency_key_in_progress": _(
+        "A request with this Idempotency-Key is still being processed."
+    ),
+    "idempotency_key_reused": _(
+        "This Idempotency-Key was already used with a different request payload."
+    ),
     "precious_metal_price_history_retrieved": _(
         "Precious metal price history retrieved successfully."
     ),
+    "pdf_job_queued": _(
+        "Your document is being generated. You will be notified when it is ready."
+    ),
+    "pdf_job_limit_reached": _(
+        "You already have documents being generated. Please wait for them to finish."
+    ),
+    "pdf_job_unavailable": _(
+        "Documents cannot be generated right now. Please try again later."
+    ),
+    "pdf_job_retrieved": _("Document status retrieved successfully."),
+    "pdf_job_not_found": _("Document not found or expired."),
+    "pdf_job_not_ready": _("Document is not ready yet."),
+    "upload_created": _("Upload started successfully."),
+    "upload_completed": _("File uploaded successfully."),
+    "upload_aborted": _("Upload cancelled successfully."),
+    "upload_not_found": _("Upload not found or expired."),
+    "upload_target_invalid": _("Invalid upload target."),
+    "upload_content_type_invalid": _("This file type is not allowed."),
+    "upload_size_invalid": _("The file is empty or too large."),
+    "upload_doc_type_required": _("A valid document type is required."),
+    "upload_parent_not_found": _("The record to attach the file to was not found."),
+    "upload_parts_incomplete": _("Some parts of the file were not uploaded."),
+    "upload_size_mismatch": _("The uploaded file does not match the declared size."),
+    "upload_content_type_mismatch": _(
+        "The uploaded file does not match the declared file type."
+    ),
+    "upload_unavailable": _(
+        "Uploads are unavailable right now. Please try again later."
+    ),
 }
@@ -1,64 +1,43 @@
 import logging
 from urllib.parse import parse_qs
 
-from channels.auth import BaseMiddleware
-from rest_framework.exceptions import AuthenticationFailed
+from channels.middleware import BaseMiddleware
 
 logger = logging.getLogger(__name__)
 
 
 class JwtAuthMiddleware(BaseMiddleware):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    """
+    Authenticate WebSocket connections from the ``token`` query parameter.
 
-    def decode_token(self, token):
-        try:
-            from rest_framework_simplejwt.tokens import AccessToken
-
-            access_token = AccessToken(token)
-            return access_token
-        except Exception:
-            raise AuthenticationFailed("Invalid token")
-
-    async def connect(self, scope, receive, send):
-        token = self.get_token_from_headers(scope)
+    The access token is decoded once, without database access, and its
+    payload is stored in ``scope["token_payload"]`` (None when the token is
+    missing or invalid). The ``resume`` query parameter is passed on as
+    ``scope["resume_token"]``.
+    """
 
-        if not token:
-            await send({"type": "websocket.close", "code": 4000})
-            return
+    def decode_token(self, token):
+        from rest_framework_simplejwt.exceptions import TokenError
+        from rest_framework_simplejwt.tokens import AccessToken
 
         try:
-            access_token = self.decode_token(token)
-            scope["user"] = access_token.user  # Add the user object to the scope
-        except AuthenticationFailed:
-            await send({"type": "websocket.close", "code": 4000})
-            return
-
-        await super().connect(scope, receive, send)
+            return AccessToken(token).payload
+        except TokenError as e:
+            logger.debug("Invalid or expired websocket token: %s", e)
+            return None
 
-    def get_token_from_headers(self, scope):
-        """Get token from the WebSocket query string."""
+    def get_query_params(self, scope):
+        """Parse the WebSocket query string."""
         try:
-            logger.info("Extracting query string from scope...")
-            query_string = scope.get("query_string", b"")
-
-            if not query_string:
-                logger.info("No query string found in scope.")
-                return None
-
-            logger.info(f"Raw query string: {query_string}")
-
-            # Parse the query string using parse_qs
-            parsed_query = parse_qs(query_string.decode())
-            logger.info(f"Parsed query string: {parsed_query}")
-
-            token = parsed_query.get("token", [None])[0]
-            if token:
-                logger.info("Token successfully retrieved from query string.")
-            else:
-                logger.info("Token not found in parsed query string.")
-
-            return token
+            return parse_qs(scope.get("query_string", b"").decode())
         except Exception as e:
-            logger.error(f"Exception occurred while retrieving token from headers. {e}")
-            return None
+            logger.error(f"Exception occurred while parsing the query string. {e}")
+            return {}
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        query_params = self.get_query_params(scope)
+        token = query_params.get("token", [None])[0]
+        scope["token_payload"] = self.decode_token(token) if token else None
+        scope["resume_token"] = query_params.get("resume", [None])[0]
+        return await super().__call__(scope, receive, send)
@@ -15,12 +15,14 @@ MODEL_ALIASES = {
     "FCMToken": "fcm",
     "Shareholder": "shr",
     "WebhookCall": "wbc",
+    "WebhookEvent": "whe",
     "Transaction": "txn",
     "OrganizationRiskLevel": "orl",
     "TransactionAttachment": "txa",
     "Notification": "ntf",
     "Organization": "org",
     "ReceiptSequence": "rsq",
+    "IdempotencyKey": "idk",
     "BusinessAccount": "bus",
     "UserPreference": "upr",
     "CountryToContinent": "ctc",
@@ -87,6 +89,8 @@ MODEL_ALIASES = {
     "OrganizationBankAccount": "oba",
     "BusinessSavedCardToken": "bst",
     "SubscriptionBillingHistory": "sbh",
+    "BillingRun": "brn",
+    "BillingRunItem": "bri",
     "MusharakahDurationChoices": "mdc",
     "StoneClarity": "scl",
 }
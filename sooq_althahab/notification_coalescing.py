@@ -0,0 +1,287 @@
+"""
+Coalescing of organization admin notifications.
+
+Batch operations (approving many requests, nightly loops over pools) used
+to create one ``Notification`` per admin and one WebSocket broadcast per
+event. Events are now grouped per (organization, notification type,
+sub-admin role):
+
+- the first event of a group is delivered at once and opens a window of
+  ``ADMIN_NOTIFICATION_COALESCE_WINDOW`` seconds;
+- events arriving inside the window are buffered in Redis and delivered as
+  one aggregated notification and broadcast when the window closes
+  (``flush_admin_notifications``);
+- notification types listed in ``ADMIN_NOTIFICATION_DIGEST_TYPES`` are only
+  buffered and delivered once a day by ``send_admin_notification_digests``.
+
+A window of 0, or a Redis error, delivers every event immediately as
+before.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from account.models import Organization
+from account.models import User
+from sooq_althahab.enums.account import UserRoleChoices
+from sooq_althahab.redis_utils import get_redis_connection
+from sooq_althahab_admin.models import Notification
+
+logger = logging.getLogger(__name__)
+
+WINDOW_KEY_PREFIX = "notifications:coalesce:window:"
+BUFFER_KEY_PREFIX = "notifications:coalesce:buffer:"
+DIGEST_KEY_PREFIX = "notifications:digest:"
+DIGEST_GROUPS_KEY = "notifications:digest:groups"
+
+# Buffered events are dropped after this long if their flush never ran.
+BUFFER_TTL = 60 * 60 * 48
+
+# KEYS: window, buffer. ARGV: event, window TTL, buffer TTL.
+# Opens the window and returns 1, or buffers the event and returns 0.
+ADD_EVENT_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 then
+    redis.call('rpush', KEYS[2], ARGV[1])
+    redis.call('expire', KEYS[2], ARGV[3])
+    return 0
+end
+redis.call('set', KEYS[1], 1, 'EX', ARGV[2])
+return 1
+"""
+
+_add_event_script = None
+
+
+def _get_add_event_script(redis_client):
+    global _add_event_script
+
+    if _add_event_script is None:
+        _add_event_script = redis_client.register_script(ADD_EVENT_SCRIPT)
+    return _add_event_script
+
+
+def get_group_key(organization_id, notification_type, sub_admin):
+    return f"{organization_id}|{notification_type}|{sub_admin or ''}"
+
+
+def parse_group_key(group_key):
+    organization_id, notification_type, sub_admin = group_key.split("|")
+    return organization_id, notification_type, sub_admin or None
+
+
+def get_organization_admin_users(organization, sub_admin):
+    """Admins of ``organization``, plus users with the given sub-admin role."""
+    # Start with the base role: ADMIN
+    role = [UserRoleChoices.ADMIN]
+
+    # If sub_admin is provided, extend the roles list accordingly
+    if sub_admin in (
+        UserRoleChoices.TAQABETH_ENFORCER,
+        UserRoleChoices.JEWELLERY_INSPECTOR,
+        UserRoleChoices.JEWELLERY_BUYER,
+    ):
+        role.append(sub_admin)
+
+    # Fetch users who belong to the given organization
+    # and match any of the specified roles (ADMIN + optional sub-admin roles)
+    return User.objects.filter(
+        organization_id=organization,
+        user_roles__role__in=role,
+    )
+
+
+def deliver_admin_notification(
+    organization,
+    title,
+    body,
+    notification_type,
+    content_type_id,
+    object_id,
+    sub_admin,
+    count=1,
+):
+    """Create the admins' notifications and broadcast once to the organization."""
+    from sooq_althahab.utils import send_notification_to_group
+
+    admin_users = get_organization_admin_users(organization, sub_admin)
+
+    # Bulk insert all notifications into the database for efficiency
+    # Use ignore_conflicts=True to handle potential duplicate IDs from concurrent operations
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                user=user,
+                title=title,
+                message=body,
+                notification_type=notification_type,
+                content_type_id=content_type_id,
+                object_id=object_id,
+            )
+            for user in admin_users
+        ],
+        ignore_conflicts=True,
+    )
+
+    data = {
+        "title": title,
+        "body": body,
+        "object_id": object_id,
+        "notification_type": notification_type,
+    }
+    if count > 1:
+        data["count"] = count
+    send_notification_to_group(organization.code, data=data, message="Success")
+    return admin_users
+
+
+def deliver_admin_notification_events(organization, group_key, events):
+    """Deliver buffered events of one group as a single notification."""
+    if not events:
+        return
+    _, notification_type, sub_admin = parse_group_key(group_key)
+    latest = events[-1]
+    body = latest["body"]
+    if len(events) > 1:
+        body = f"{body} (+{len(events) - 1} more)"
+    deliver_admin_notification(
+        organization,
+        latest["title"],
+        body,
+        notification_type,
+        latest["content_type_id"],
+        latest["object_id"],
+        sub_admin,
+        count=len(events),
+    )
+
+
+def notify_organization_admins(
+    organization,
+    title,
+    body,
+    notification_type,
+    content_type_id,
+    object_id,
+    sub_admin,
+):
+    """Deliver, buffer or digest one admin notification event."""
+    from sooq_althahab.tasks import flush_admin_notifications
+
+    window = settings.ADMIN_NOTIFICATION_COALESCE_WINDOW
+    is_digest = notification_type in settings.ADMIN_NOTIFICATION_DIGEST_TYPES
+    if not window and not is_digest:
+        deliver_admin_notification(
+            organization,
+            title,
+            body,
+            notification_type,
+            content_type_id,
+            object_id,
+            sub_admin,
+        )
+        return
+
+    group_key = get_group_key(organization.pk, notification_type, sub_admin)
+    event = json.dumps(
+        {
+            "title": title,
+            "body": body,
+            "content_type_id": content_type_id,
+            "object_id": None if object_id is None else str(object_id),
+        }
+    )
+    try:
+        redis_client = get_redis_connection()
+        if is_digest:
+            pipeline = redis_client.pipeline()
+            pipeline.rpush(f"{DIGEST_KEY_PREFIX}{group_key}", event)
+            pipeline.expire(f"{DIGEST_KEY_PREFIX}{group_key}", BUFFER_TTL)
+            pipeline.sadd(DIGEST_GROUPS_KEY, group_key)
+            pipeline.execute()
+            return
+
+        opened_window = _get_add_event_script(redis_client)(
+            keys=[f"{WINDOW_KEY_PREFIX}{group_key}", f"{BUFFER_KEY_PREFIX}{group_key}"],
+            args=[event, window * 2, BUFFER_TTL],
+        )
+    except Exception as e:
+        logger.warning(f"[Notifications] Coalescing unavailable, sending now: {e}")
+        opened_window = None
+
+    if opened_window == 0:
+        return
+
+    deliver_admin_notification(
+        organization,
+        title,
+        body,
+        notification_type,
+        content_type_id,
+        object_id,
+        sub_admin,
+    )
+    if opened_window == 1:
+        transaction.on_commit(
+            lambda: flush_admin_notifications.apply_async(
+                (group_key,), countdown=window
+            )
+        )
+
+
+def pop_events(redis_client, buffer_key, *extra_deletes):
+    """Read and clear a buffer atomically."""
+    pipeline = redis_client.pipeline()
+    pipeline.lrange(buffer_key, 0, -1)
+    pipeline.delete(buffer_key, *extra_deletes)
+    events, _ = pipeline.execute()
+    return [json.loads(event) for event in events]
+
+
+def flush_coalesced_group(group_key):
+    """
+    Deliver the events buffered during a group's window and close it.
+
+    Returns:
+        int: Number of buffered events delivered.
+    """
+    events = pop_events(
+        get_redis_connection(),
+        f"{BUFFER_KEY_PREFIX}{group_key}",
+        f"{WINDOW_KEY_PREFIX}{group_key}",
+    )
+    if events:
+        organization_id, _, _ = parse_group_key(group_key)
+        organization = Organization.objects.filter(pk=organization_id).first()
+        if organization:
+            deliver_admin_notification_events(organization, group_key, events)
+    return len(events)
+
+
+def send_digests():
+    """
+    Deliver one notification per group buffered for the daily digest.
+
+    Returns:
+        int: Number of digests delivered.
+    """
+    redis_client = get_redis_connection()
+    delivered = 0
+    for group_key in redis_client.smembers(DIGEST_GROUPS_KEY):
+        group_key = group_key.decode()
+        redis_client.srem(DIGEST_GROUPS_KEY, group_key)
+        events = pop_events(redis_client, f"{DIGEST_KEY_PREFIX}{group_key}")
+        if not events:
+            continue
+        organization_id, _, _ = parse_group_key(group_key)
+        organization = Organization.objects.filter(pk=organization_id).first()
+        if not organization:
+            continue
+        try:
+            deliver_admin_notification_events(organization, group_key, events)
+            delivered += 1
+        except Exception as e:
+            logger.error(f"[Notifications] Digest {group_key} failed: {e}")
+    return delivered
@@ -0,0 +1,197 @@
+"""
+Per-user unread notification counters kept in Redis.
+
+Badge updates and WebSocket connects read ``notifications:unread:<user_id>``
+instead of counting rows:
+
+- ``Notification.objects.bulk_create`` increments the counters of the
+  recipients once the insert commits;
+- marking one notification read decrements it, marking all read resets it;
+- a missing counter is computed from the database (one GROUP BY for all
+  misses) and stored with ``NOTIFICATION_UNREAD_COUNT_TTL``, so counters of
+  inactive users expire;
+- ``reconcile_unread_notification_counts`` periodically rewrites the live
+  counters from the database to correct any drift.
+
+Counters are only adjusted while they exist, so an increment never turns a
+missing counter into a wrong one. Redis errors fall back to the database.
+"""
+
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count
+
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+UNREAD_COUNT_KEY_PREFIX = "notifications:unread:"
+
+# Adjust an existing counter by ARGV[1], never below zero; returns nil when
+# the counter is not set.
+ADJUST_UNREAD_COUNT_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return nil
+end
+local count = redis.call('incrby', KEYS[1], ARGV[1])
+if count < 0 then
+    redis.call('set', KEYS[1], 0, 'EX', ARGV[2])
+    count = 0
+end
+return count
+"""
+
+_adjust_script = None
+
+
+def unread_count_key(user_id):
+    return f"{UNREAD_COUNT_KEY_PREFIX}{user_id}"
+
+
+def _get_adjust_script(redis_client):
+    global _adjust_script
+
+    if _adjust_script is None:
+        _adjust_script = redis_client.register_script(ADJUST_UNREAD_COUNT_SCRIPT)
+    return _adjust_script
+
+
+def count_unread_in_db(user_ids):
+    """Unread notification count per user id, computed in one query."""
+    from sooq_althahab_admin.models import Notification
+
+    counts = dict.fromkeys(user_ids, 0)
+    rows = (
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .order_by()
+        .values("user_id")
+        .annotate(count=Count("id"))
+    )
+    for row in rows:
+        counts[row["user_id"]] = row["count"]
+    return counts
+
+
+def adjust_unread_counts(deltas):
+    """Apply ``{user_id: delta}`` to the counters that are currently set."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        redis_client = get_redis_connection()
+        script = _get_adjust_script(redis_client)
+        pipeline = redis_client.pipeline(transaction=False)
+        for user_id, delta in deltas.items():
+            script(
+                keys=[unread_count_key(user_id)],
+                args=[delta, settings.NOTIFICATION_UNREAD_COUNT_TTL],
+                client=pipeline,
+            )
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"[Notifications] Could not adjust unread counters: {e}")
+
+
+def increment_unread_counts(user_ids):
+    """Count one new unread notification per occurrence of a user id."""
+    adjust_unread_counts(Counter(user_ids))
+
+
+def decrement_unread_count(user_id, amount=1):
+    adjust_unread_counts({user_id: -amount})
+
+
+def reset_unread_count(user_id):
+    """Set a user's counter to zero after all notifications were read."""
+    try:
+        get_redis_connection().set(
+            unread_count_key(user_id), 0, ex=settings.NOTIFICATION_UNREAD_COUNT_TTL
+        )
+    except Exception as e:
+        logger.warning(f"[Notifications] Could not reset unread counter: {e}")
+
+
+def get_unread_counts(user_ids):
+    """
+    Unread notification count per user id. Counters missing from Redis are
+    computed from the database in one query and stored.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    try:
+        redis_client = get_redis_connection()
+        values = redis_client.mget([unread_count_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning(f"[Notifications] Could not read unread counters: {e}")
+        return count_unread_in_db(user_ids)
+
+    counts = {
+        user_id: int(value)
+        for user_id, value in zip(user_ids, values)
+        if value is not None
+    }
+    missing = [user_id for user_id in user_ids if user_id not in counts]
+    if missing:
+        db_counts = count_unread_in_db(missing)
+        counts.update(db_counts)
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for user_id, count in db_counts.items():
+                # nx: keep a counter another process seeded in the meantime.
+                pipeline.set(
+                    unread_count_key(user_id),
+                    count,
+                    ex=settings.NOTIFICATION_UNREAD_COUNT_TTL,
+                    nx=True,
+                )
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"[Notifications] Could not seed unread counters: {e}")
+    return counts
+
+
+def get_cached_unread_count(user_id):
+    """The user's Redis counter, or None when it is not set (never queries)."""
+    try:
+        value = get_redis_connection().get(unread_count_key(user_id))
+    except Exception as e:
+        logger.warning(f"[Notifications] Could not read unread counter: {e}")
+        return None
+    return None if value is None else int(value)
+
+
+def get_unread_count(user_id):
+    return get_unread_counts([user_id]).get(user_id, 0)
+
+
+def reconcile_unread_counts(batch_size=500):
+    """
+    Rewrite every live counter from the database.
+
+    Returns:
+        int: Number of counters that were corrected.
+    """
+    redis_client = get_redis_connection()
+    keys = list(redis_client.scan_iter(match=f"{UNREAD_COUNT_KEY_PREFIX}*"))
+    corrected = 0
+    for start in range(0, len(keys), batch_size):
+        batch_keys = keys[start : start + batch_size]
+        user_ids = [key.decode()[len(UNREAD_COUNT_KEY_PREFIX) :] for key in batch_keys]
+        cached = redis_client.mget(batch_keys)
+        db_counts = count_unread_in_db(user_ids)
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for user_id, value in zip(user_ids, cached):
+            if value is not None and int(value) != db_counts[user_id]:
+                pipeline.set(
+                    unread_count_key(user_id),
+                    db_counts[user_id],
+                    ex=settings.NOTIFICATION_UNREAD_COUNT_TTL,
+                    xx=True,
+                )
+                corrected += 1
+        pipeline.execute()
+    return corrected
@@ -0,0 +1,138 @@
+"""
+Batched notification fan-out.
+
+Sending a notification to many users costs a fixed number of queries per
+chunk of users instead of a few per user:
+
+- in-app ``Notification`` rows are bulk inserted;
+- unread counts for the whole chunk come from the Redis counters
+  (see ``notification_counters``);
+- the per-user ``notification_count`` WebSocket messages are sent
+  concurrently on a single event loop instead of one blocking
+  ``group_send`` round trip each;
+- FCM tokens for the chunk are fetched in one query and pushed by
+  ``send_notification``.
+
+Fan-outs larger than ``NOTIFICATION_FANOUT_CHUNK_SIZE`` users are split into
+``fan_out_notification_chunk`` tasks, queued once the caller's transaction
+commits, so an org-wide broadcast does not run inside the HTTP request.
+"""
+
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+
+from seller.utils import get_fcm_tokens_for_users
+from sooq_althahab.notification_counters import get_unread_counts
+from sooq_althahab_admin.models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def get_user_ids(users):
+    """Primary keys of ``users`` (a queryset, users or ids), de-duplicated."""
+    if isinstance(users, QuerySet):
+        user_ids = users.values_list("pk", flat=True)
+    else:
+        user_ids = (getattr(user, "pk", user) for user in users)
+    return list(dict.fromkeys(user_ids))
+
+
+async def _group_send_many(channel_layer, messages):
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, message) for group, message in messages),
+        return_exceptions=True,
+    )
+    for (group, _), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.error(f"[Notifications] group_send to {group} failed: {result}")
+
+
+def _send_unread_counts(user_ids):
+    channel_layer = get_channel_layer()
+    messages = [
+        (f"notifications_{user_id}", {"type": "notification_count", "count": count})
+        for user_id, count in get_unread_counts(user_ids).items()
+    ]
+    async_to_sync(_group_send_many)(channel_layer, messages)
+
+
+def send_unread_counts(user_ids):
+    """
+    Push the current unread count to each user's notification group, after
+    the surrounding transaction commits (and the counters are updated).
+    """
+    if not user_ids:
+        return
+    transaction.on_commit(lambda: _send_unread_counts(user_ids))
+
+
+def deliver_notification_chunk(
+    user_ids, title, message, notification_type, content_type_id, object_id
+):
+    """Create, count and push one notification for a chunk of users."""
+    from sooq_althahab.tasks import send_notification
+
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                user_id=user_id,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                content_type_id=content_type_id,
+                object_id=object_id,
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+    send_unread_counts(user_ids)
+
+    tokens = get_fcm_tokens_for_users(user_ids)
+    if tokens:
+        send_notification.delay(
+            tokens,
+            title,
+            message,
+            {"notification_type": notification_type, "id": str(object_id)},
+        )
+
+
+def fan_out_notification(
+    user_ids, title, message, notification_type, content_type_id, object_id
+):
+    """
+    Deliver a notification to ``user_ids``: inline for a single chunk,
+    otherwise as one ``fan_out_notification_chunk`` task per chunk.
+    """
+    from sooq_althahab.tasks import fan_out_notification_chunk
+
+    chunk_size = settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    if len(user_ids) <= chunk_size:
+        deliver_notification_chunk(
+            user_ids, title, message, notification_type, content_type_id, object_id
+        )
+        return
+
+    chunks = [
+        user_ids[start : start + chunk_size]
+        for start in range(0, len(user_ids), chunk_size)
+    ]
+
+    def enqueue_chunks():
+        for chunk in chunks:
+            fan_out_notification_chunk.delay(
+                chunk, title, message, notification_type, content_type_id, object_id
+            )
+
+    logger.info(
+        f"[Notifications] Fanning out {notification_type} to {len(user_ids)} "
+        f"users in {len(chunks)} chunks."
+    )
+    transaction.on_commit(enqueue_chunks)
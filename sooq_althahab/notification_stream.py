@@ -0,0 +1,76 @@
+"""
+Replay buffer for WebSocket notification broadcasts.
+
+Each ``notification_message`` sent to a notification group is also appended
+to a capped Redis stream for that group, and its stream id is sent to the
+client as ``resume_token``. A client reconnecting with ``?resume=<token>``
+is sent only the messages it missed instead of refetching its inbox.
+"""
+
+import json
+import logging
+import re
+
+from django.conf import settings
+
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY_PREFIX = "notifications:stream:"
+RESUME_TOKEN_RE = re.compile(r"^\d+-\d+$")
+
+
+def stream_key(group_name):
+    return f"{STREAM_KEY_PREFIX}{group_name}"
+
+
+def record_group_message(group_name, event):
+    """
+    Append a broadcast to the group's stream.
+
+    Returns:
+        str: The resume token of the message, or None if Redis failed.
+    """
+    try:
+        pipeline = get_redis_connection().pipeline()
+        pipeline.xadd(
+            stream_key(group_name),
+            {"event": json.dumps(event, default=str)},
+            maxlen=settings.NOTIFICATION_STREAM_MAXLEN,
+            approximate=True,
+        )
+        pipeline.expire(stream_key(group_name), settings.NOTIFICATION_STREAM_TTL)
+        message_id, _ = pipeline.execute()
+        return message_id.decode()
+    except Exception as e:
+        logger.warning(f"[Notifications] Could not record {group_name} message: {e}")
+        return None
+
+
+def get_missed_messages(group_name, resume_token):
+    """
+    Events broadcast to the group after ``resume_token``, oldest first, each
+    with its own ``resume_token``. Unknown or malformed tokens replay nothing.
+    """
+    if not resume_token or not RESUME_TOKEN_RE.match(resume_token):
+        return []
+    try:
+        entries = get_redis_connection().xrange(
+            stream_key(group_name),
+            min=resume_token,
+            count=settings.NOTIFICATION_STREAM_MAXLEN,
+        )
+    except Exception as e:
+        logger.warning(f"[Notifications] Could not replay {group_name}: {e}")
+        return []
+
+    events = []
+    for message_id, fields in entries:
+        message_id = message_id.decode()
+        if message_id == resume_token:
+            continue
+        event = json.loads(fields[b"event"])
+        event["resume_token"] = message_id
+        events.append(event)
+    return events
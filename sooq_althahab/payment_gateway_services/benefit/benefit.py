@@ -4,6 +4,7 @@ import time
 from decimal import Decimal
 
 from django.conf import settings
+from django.db import transaction as db_transaction
 from django.db.models import Prefetch
 from django.http import HttpResponse
 from django.http import HttpResponseBadRequest
@@ -26,15 +27,19 @@ from sooq_althahab.enums.account import TransactionType
 from sooq_althahab.enums.account import TransferVia
 from sooq_althahab.enums.account import WebhookCallStatus
 from sooq_althahab.enums.account import WebhookEventType
+from sooq_althahab.enums.account import WebhookProvider
+from sooq_althahab.idempotency import IdempotencyManager
 from sooq_althahab.payment_gateway_services.benefit.benefit_client import (
     BenefitPayClient,
 )
 from sooq_althahab.payment_gateway_services.payment_logger import get_benefit_pay_logger
+from sooq_althahab.webhook_events import record_webhook_event
 
 logger = logging.getLogger(__name__)
 
 
 class BenefitPaymentInitView(APIView):
+    @IdempotencyManager()
     def post(self, request):
         """Create a payment session via Benefit Pay for adding money to the wallet."""
 
@@ -323,168 +328,187 @@ class BenefitSuccessView(APIView):
                 if not track_id:
                     raise ValueError("Missing trackId in decrypted trandata")
 
-                transaction_obj = Transaction.objects.select_related(
-                    "from_business"
-                ).get(id=track_id)
-
-                payment_logger = get_benefit_pay_logger(
-                    str(track_id), business_id=str(transaction_obj.from_business.id)
-                )
-                payment_logger.log_webhook_received(webhook_data, "BenefitPay-Success")
-                payment_logger.log_webhook_processing(
-                    "DECRYPT_TRANDATA", {"decrypted_data": decrypted_data}
-                )
-                payment_logger.log_webhook_processing(
-                    "FETCH_TRANSACTION", {"track_id": track_id, "result": result}
-                )
+                # The row stays locked until the update is committed, so this
+                # redirect and the server-to-server notification never both
+                # credit the wallet
+                with db_transaction.atomic():
+                    transaction_obj = (
+                        Transaction.objects.select_for_update(of=("self",))
+                        .select_related("from_business")
+                        .get(id=track_id)
+                    )
 
-                payment_logger.log_webhook_processing(
-                    "TRANSACTION_FOUND",
-                    {
-                        "transaction_id": str(transaction_obj.id),
-                        "status": transaction_obj.status,
-                        "amount": float(transaction_obj.amount),
-                        "business_id": str(transaction_obj.from_business.id),
-                    },
-                )
+                    payment_logger = get_benefit_pay_logger(
+                        str(track_id), business_id=str(transaction_obj.from_business.id)
+                    )
+                    payment_logger.log_webhook_received(
+                        webhook_data, "BenefitPay-Success"
+                    )
+                    payment_logger.log_webhook_processing(
+                        "DECRYPT_TRANDATA", {"decrypted_data": decrypted_data}
+                    )
+                    payment_logger.log_webhook_processing(
+                        "FETCH_TRANSACTION", {"track_id": track_id, "result": result}
+                    )
 
-                # Skip if already success
-                if transaction_obj.status == TransactionStatus.SUCCESS:
-                    if payment_logger:
-                        payment_logger.log_webhook_processing(
-                            "TRANSACTION_ALREADY_SUCCESS",
-                            {"transaction_id": str(transaction_obj.id)},
-                        )
-                    logger.info("[BenefitPay] Transaction already marked SUCCESS.")
-                    redirect_url = settings.BENEFIT_SUCCESS_RETURN_URL
-                else:
-                    business_wallet = Wallet.objects.filter(
-                        business=transaction_obj.from_business
-                    ).first()
-                    transaction_obj.previous_balance = (
-                        business_wallet.balance if business_wallet else 0
+                    payment_logger.log_webhook_processing(
+                        "TRANSACTION_FOUND",
+                        {
+                            "transaction_id": str(transaction_obj.id),
+                            "status": transaction_obj.status,
+                            "amount": float(transaction_obj.amount),
+                            "business_id": str(transaction_obj.from_business.id),
+                        },
                     )
 
-                    old_status = transaction_obj.status
+                    # Skip if already success
+                    if transaction_obj.status == TransactionStatus.SUCCESS:
+                        if payment_logger:
+                            payment_logger.log_webhook_processing(
+                                "TRANSACTION_ALREADY_SUCCESS",
+                                {"transaction_id": str(transaction_obj.id)},
+                            )
+                        logger.info("[BenefitPay] Transaction already marked SUCCESS.")
+                        redirect_url = settings.BENEFIT_SUCCESS_RETURN_URL
+                    elif transaction_obj.status != TransactionStatus.PENDING and (
+                        result != "CAPTURED"
+                    ):
+                        # Settled by the notification; only a capture after a
+                        # failed attempt on the same order changes it again
+                        logger.info(
+                            "[BenefitPay] Transaction already marked %s.",
+                            transaction_obj.status,
+                        )
+                        redirect_url = f"{settings.BENEFIT_FAILURE_RETURN_URL}?transaction_id={track_id}"
+                    else:
+                        business_wallet = (
+                            Wallet.objects.select_for_update()
+                            .filter(business=transaction_obj.from_business)
+                            .first()
+                        )
+                        transaction_obj.previous_balance = (
+                            business_wallet.balance if business_wallet else 0
+                        )
 
-                    if result == "CAPTURED":
-                        # Transaction successful
-                        webhook_log += "Transaction status is SUCCESS (CAPTURED)\n\n"
-                        transaction_obj.status = TransactionStatus.SUCCESS
+                        old_status = transaction_obj.status
 
-                        if payment_logger:
-                            payment_logger.log_transaction_update(
-                                old_status=old_status,
-                                new_status=TransactionStatus.SUCCESS,
-                                reason="Payment successful - captured",
-                                additional_data={"result": result},
+                        if result == "CAPTURED":
+                            # Transaction successful
+                            webhook_log += (
+                                "Transaction status is SUCCESS (CAPTURED)\n\n"
                             )
+                            transaction_obj.status = TransactionStatus.SUCCESS
 
-                        self.update_wallet_balance(
-                            transaction_obj, webhook_log, payment_logger
-                        )
-                        # Send invoice email to accounts for successful top-up transactions
-                        if transaction_obj.transaction_type == TransactionType.DEPOSIT:
-                            try:
-                                from sooq_althahab.billing.transaction.invoice_utils import (
-                                    send_topup_invoice_to_accounts,
+                            if payment_logger:
+                                payment_logger.log_transaction_update(
+                                    old_status=old_status,
+                                    new_status=TransactionStatus.SUCCESS,
+                                    reason="Payment successful - captured",
+                                    additional_data={"result": result},
                                 )
 
-                                organization = (
-                                    transaction_obj.from_business.organization_id
+                            self.update_wallet_balance(
+                                transaction_obj, webhook_log, payment_logger
+                            )
+                            # Send invoice email to accounts for successful top-up transactions
+                            if (
+                                transaction_obj.transaction_type
+                                == TransactionType.DEPOSIT
+                            ):
+                                db_transaction.on_commit(
+                                    lambda: BenefitNotificationView().send_topup_invoice(
+                                        transaction_obj
+                                    ),
+                                    robust=True,
                                 )
-                                if organization:
-                                    send_topup_invoice_to_accounts(
-                                        transaction_obj, organization
-                                    )
-                            except Exception as invoice_error:
-                                logger.error(
-                                    f"Failed to send top-up invoice email for transaction {transaction_obj.id}: {str(invoice_error)}"
+                            redirect_url = f"{settings.BENEFIT_SUCCESS_RETURN_URL}?transaction_id={track_id}"
+                            webhook_status = WebhookCallStatus.SUCCESS
+                        elif result in [
+                            "CANCELED",
+                            "FAILED",
+                            "NOT CAPTURED",
+                            "DENIED BY RISK",
+                            "HOST TIMEOUT",
+                        ]:
+                            webhook_log += (
+                                f"Transaction status is FAILED ({result})\n\n"
+                            )
+                            transaction_obj.status = TransactionStatus.FAILED
+
+                            if payment_logger:
+                                payment_logger.log_transaction_update(
+                                    old_status=old_status,
+                                    new_status=TransactionStatus.FAILED,
+                                    reason="Payment failed",
+                                    additional_data={"result": result},
                                 )
-                        redirect_url = f"{settings.BENEFIT_SUCCESS_RETURN_URL}?transaction_id={track_id}"
-                        webhook_status = WebhookCallStatus.SUCCESS
-                    elif result in [
-                        "CANCELED",
-                        "FAILED",
-                        "NOT CAPTURED",
-                        "DENIED BY RISK",
-                        "HOST TIMEOUT",
-                    ]:
-                        webhook_log += f"Transaction status is FAILED ({result})\n\n"
-                        transaction_obj.status = TransactionStatus.FAILED
 
-                        if payment_logger:
-                            payment_logger.log_transaction_update(
-                                old_status=old_status,
-                                new_status=TransactionStatus.FAILED,
-                                reason="Payment failed",
-                                additional_data={"result": result},
+                            redirect_url = f"{settings.BENEFIT_FAILURE_RETURN_URL}?transaction_id={track_id}"
+                            webhook_status = WebhookCallStatus.FAILURE
+                        else:
+                            webhook_log += (
+                                f"Transaction status is PENDING ({result})\n\n"
                             )
+                            transaction_obj.status = TransactionStatus.PENDING
 
-                        redirect_url = f"{settings.BENEFIT_FAILURE_RETURN_URL}?transaction_id={track_id}"
-                        webhook_status = WebhookCallStatus.FAILURE
-                    else:
-                        webhook_log += f"Transaction status is PENDING ({result})\n\n"
-                        transaction_obj.status = TransactionStatus.PENDING
+                            if payment_logger:
+                                payment_logger.log_transaction_update(
+                                    old_status=old_status,
+                                    new_status=TransactionStatus.PENDING,
+                                    reason="Payment status pending",
+                                    additional_data={"result": result},
+                                )
 
-                        if payment_logger:
-                            payment_logger.log_transaction_update(
-                                old_status=old_status,
-                                new_status=TransactionStatus.PENDING,
-                                reason="Payment status pending",
-                                additional_data={"result": result},
-                            )
+                            redirect_url = f"{settings.BENEFIT_ERROR_RETURN_URL}?transaction_id={track_id}&status=pending"
+                            webhook_status = WebhookCallStatus.RECEIVED
 
-                        redirect_url = f"{settings.BENEFIT_ERROR_RETURN_URL}?transaction_id={track_id}&status=pending"
-                        webhook_status = WebhookCallStatus.RECEIVED
+                        # Update log details and balances
+                        existing_notes = transaction_obj.log_details or ""
+                        transaction_obj.log_details = f"{existing_notes}\n\n--- Benefit Pay Success Webhook Log ---\n{webhook_log}"
+                        transaction_obj.current_balance = (
+                            business_wallet.balance if business_wallet else 0
+                        )
+                        transaction_obj.save()
 
-                    # Update log details and balances
-                    existing_notes = transaction_obj.log_details or ""
-                    transaction_obj.log_details = f"{existing_notes}\n\n--- Benefit Pay Success Webhook Log ---\n{webhook_log}"
-                    transaction_obj.current_balance = (
-                        business_wallet.balance if business_wallet else 0
-                    )
-                    transaction_obj.save()
+                        webhook_log += f"Updated transaction status to {transaction_obj.status}\n\n"
 
-                    webhook_log += (
-                        f"Updated transaction status to {transaction_obj.status}\n\n"
-                    )
+                        # Log the webhook call in the WebhookCall model (separate from core logic)
+                        try:
+                            with db_transaction.atomic():
+                                WebhookCall.objects.create(
+                                    transaction=transaction_obj,
+                                    transfer_via=TransferVia.BENEFIT_PAY,
+                                    event_type=WebhookEventType.PAYMENT,
+                                    status=webhook_status,
+                                    request_body=webhook_data,
+                                    response_body=decrypted_data,
+                                    response_status_code=status.HTTP_200_OK,
+                                )
 
-                    # Log the webhook call in the WebhookCall model (separate from core logic)
-                    try:
-                        WebhookCall.objects.create(
-                            transaction=transaction_obj,
-                            transfer_via=TransferVia.BENEFIT_PAY,
-                            event_type=WebhookEventType.PAYMENT,
-                            status=webhook_status,
-                            request_body=webhook_data,
-                            response_body=decrypted_data,
-                            response_status_code=status.HTTP_200_OK,
-                        )
+                            if payment_logger:
+                                payment_logger.log_webhook_processing(
+                                    "WEBHOOK_CALL_LOGGED",
+                                    {
+                                        "webhook_event_type": WebhookEventType.PAYMENT,
+                                        "webhook_status": webhook_status,
+                                    },
+                                )
 
-                        if payment_logger:
-                            payment_logger.log_webhook_processing(
-                                "WEBHOOK_CALL_LOGGED",
-                                {
-                                    "webhook_event_type": WebhookEventType.PAYMENT,
-                                    "webhook_status": webhook_status,
-                                },
+                            webhook_log += "Webhook call logged successfully.\n\n"
+                        except Exception as log_error:
+                            if payment_logger:
+                                payment_logger.log_error(
+                                    error_type="WEBHOOK_CALL_LOGGING_ERROR",
+                                    error_message=str(log_error),
+                                    context={"transaction_id": str(transaction_obj.id)},
+                                )
+                            logger.warning(
+                                "[BenefitPay] Failed to log WebhookCall: %s",
+                                str(log_error),
                             )
-
-                        webhook_log += "Webhook call logged successfully.\n\n"
-                    except Exception as log_error:
-                        if payment_logger:
-                            payment_logger.log_error(
-                                error_type="WEBHOOK_CALL_LOGGING_ERROR",
-                                error_message=str(log_error),
-                                context={"transaction_id": str(transaction_obj.id)},
+                            webhook_log += (
+                                f"Warning: Webhook logging failed: {str(log_error)}\n\n"
                             )
-                        logger.warning(
-                            "[BenefitPay] Failed to log WebhookCall: %s", str(log_error)
-                        )
-                        webhook_log += (
-                            f"Warning: Webhook logging failed: {str(log_error)}\n\n"
-                        )
 
             elif error_text:
                 if payment_logger:
@@ -525,11 +549,16 @@ class BenefitSuccessView(APIView):
             if track_id:
                 try:
                     transaction_obj = Transaction.objects.get(id=track_id)
-                    transaction_obj.status = TransactionStatus.FAILED
+                    # Only a pending transaction is failed; a settled one keeps
+                    # its status
+                    Transaction.objects.filter(
+                        id=track_id, status=TransactionStatus.PENDING
+                    ).update(status=TransactionStatus.FAILED)
 
                     existing_notes = transaction_obj.log_details or ""
-                    transaction_obj.log_details = f"{existing_notes}\n\n--- Benefit Pay Error Log ---\n{webhook_log}"
-                    transaction_obj.save()
+                    Transaction.objects.filter(id=track_id).update(
+                        log_details=f"{existing_notes}\n\n--- Benefit Pay Error Log ---\n{webhook_log}"
+                    )
 
                     try:
                         WebhookCall.objects.create(
@@ -562,7 +591,9 @@ class BenefitSuccessView(APIView):
 
     def update_wallet_balance(self, transaction_obj, webhook_log, payment_logger=None):
         if transaction_obj.transaction_type == TransactionType.DEPOSIT:
-            wallet = Wallet.objects.get(business=transaction_obj.from_business)
+            wallet = Wallet.objects.select_for_update().get(
+                business=transaction_obj.from_business
+            )
 
             if payment_logger:
                 payment_logger.log_webhook_processing(
@@ -743,18 +774,49 @@ class BenefitNotificationView(APIView):
     """
 
     def post(self, request):
-        """Handle server-to-server notification from Benefit Pay."""
+        """
+        Verify (decrypt) and store a Benefit Pay notification, then acknowledge
+        it. The transaction update runs on the webhooks queue
+        (``process_webhook``).
+        """
+
+        webhook_data = request.POST.dict()
+        logger.info("[BenefitPay] Notification webhook: %s", webhook_data)
+
+        event_id = None
+        trandata = webhook_data.get("trandata")
+        try:
+            if trandata:
+                decrypted_data = json.loads(BenefitPayClient.decrypt(trandata))[0]
+                event_id = (
+                    f"{decrypted_data.get('trackId')}:{decrypted_data.get('paymentId')}:"
+                    f"{decrypted_data.get('result')}"
+                )
+            elif webhook_data.get("ErrorText"):
+                event_id = (
+                    f"{webhook_data.get('trackid')}:error:{webhook_data['ErrorText']}"
+                )
+        except Exception as e:
+            logger.exception("[BenefitPay] Notification could not be verified: %s", e)
+
+        if event_id:
+            record_webhook_event(WebhookProvider.BENEFIT_PAY, event_id, webhook_data)
+
+        return Response(
+            {"status": "OK", "message": "Notification received"},
+            status=status.HTTP_200_OK,
+        )
+
+    def process_webhook(self, webhook_data):
+        """Update the transaction and wallet from a stored Benefit Pay notification."""
 
         webhook_log = ""
         start = time.time()
-        transaction_obj = None
 
         try:
-            trandata = request.POST.get("trandata")
-            error_text = request.POST.get("ErrorText")
-            webhook_data = request.POST.dict()
+            trandata = webhook_data.get("trandata")
+            error_text = webhook_data.get("ErrorText")
             webhook_log += f"[Notify] Raw POST: {webhook_data}\n"
-            logger.info("[BenefitPay] Notification webhook: %s", webhook_data)
 
             if trandata:
                 decrypted = BenefitPayClient.decrypt(trandata)
@@ -767,121 +829,137 @@ class BenefitNotificationView(APIView):
 
                 track_id = decrypted_data.get("trackId")
                 result = decrypted_data.get("result")
-
-                if track_id:
-                    try:
-                        transaction_obj = Transaction.objects.get(id=track_id)
-
-                        if result == "CAPTURED":
-                            transaction_obj.status = TransactionStatus.SUCCESS
-                            self.update_wallet_balance(transaction_obj, webhook_log)
-                            # Send invoice email to accounts for successful top-up transactions
-                            if (
-                                transaction_obj.transaction_type
-                                == TransactionType.DEPOSIT
-                            ):
-                                try:
-                                    from sooq_althahab.billing.transaction.invoice_utils import (
-                                        send_topup_invoice_to_accounts,
-                                    )
-
-                                    organization = (
-                                        transaction_obj.from_business.organization_id
-                                    )
-                                    if organization:
-                                        send_topup_invoice_to_accounts(
-                                            transaction_obj, organization
-                                        )
-                                except Exception as invoice_error:
-                                    logger.error(
-                                        f"Failed to send top-up invoice email for transaction {transaction_obj.id}: {str(invoice_error)}"
-                                    )
-                            webhook_status = WebhookCallStatus.SUCCESS
-                        elif result in [
-                            "CANCELED",
-                            "FAILED",
-                            "NOT CAPTURED",
-                            "DENIED BY RISK",
-                            "HOST TIMEOUT",
-                        ]:
-                            transaction_obj.status = TransactionStatus.FAILED
-                            webhook_status = WebhookCallStatus.FAILURE
-                        else:
-                            transaction_obj.status = TransactionStatus.PENDING
-                            webhook_status = WebhookCallStatus.RECEIVED
-
-                        transaction_obj.log_details = f"{transaction_obj.log_details or ''}\n\n--- Benefit Pay Notify Webhook Log ---\n{webhook_log}"
-                        transaction_obj.save()
-
-                        # Log the webhook call
-                        try:
-                            WebhookCall.objects.create(
-                                transaction=transaction_obj,
-                                transfer_via=TransferVia.BENEFIT_PAY,
-                                event_type=WebhookEventType.PAYMENT,
-                                status=webhook_status,
-                                request_body=webhook_data,
-                                response_body=decrypted_data,
-                                response_status_code=status.HTTP_200_OK,
-                            )
-                            webhook_log += (
-                                "Notification webhook call logged successfully.\n\n"
-                            )
-                        except Exception as webhook_log_error:
-                            webhook_log += f"Warning: Failed to log notification webhook call: {str(webhook_log_error)}\n\n"
-
-                    except Transaction.DoesNotExist:
-                        webhook_log += f"Transaction not found with ID {track_id}\n\n"
-                        logger.error(
-                            "[BenefitPay] No transaction found with ID = %s",
-                            track_id,
-                        )
+                response_body = decrypted_data
+
+                if result == "CAPTURED":
+                    new_status = TransactionStatus.SUCCESS
+                    webhook_status = WebhookCallStatus.SUCCESS
+                elif result in [
+                    "CANCELED",
+                    "FAILED",
+                    "NOT CAPTURED",
+                    "DENIED BY RISK",
+                    "HOST TIMEOUT",
+                ]:
+                    new_status = TransactionStatus.FAILED
+                    webhook_status = WebhookCallStatus.FAILURE
+                else:
+                    # Not final yet: the status is left unchanged
+                    new_status = None
+                    webhook_status = WebhookCallStatus.RECEIVED
             elif error_text:
                 webhook_log += f"Received ErrorText in notification: {error_text}\n\n"
                 track_id = webhook_data.get("trackid")
+                response_body = {"error_text": error_text}
+                new_status = TransactionStatus.FAILED
+                webhook_status = WebhookCallStatus.FAILURE
+            else:
+                return
 
-                if track_id:
-                    try:
-                        transaction_obj = Transaction.objects.get(id=track_id)
-                        transaction_obj.status = TransactionStatus.FAILED
-
-                        existing_notes = transaction_obj.log_details or ""
-                        transaction_obj.log_details = f"{existing_notes}\n\n--- Benefit Pay Notification Error Log ---\n{webhook_log}"
-                        transaction_obj.save()
-
-                        try:
-                            WebhookCall.objects.create(
-                                transaction=transaction_obj,
-                                transfer_via=TransferVia.BENEFIT_PAY,
-                                event_type=WebhookEventType.PAYMENT,
-                                status=WebhookCallStatus.FAILURE,
-                                request_body=webhook_data,
-                                response_body={"error_text": error_text},
-                                response_status_code=status.HTTP_200_OK,
-                            )
-                        except Exception as webhook_log_error:
-                            webhook_log += f"Warning: Failed to log notification webhook call: {str(webhook_log_error)}\n\n"
-                    except Transaction.DoesNotExist:
-                        webhook_log += f"Transaction not found with ID {track_id}\n\n"
-                        logger.error(
-                            "[BenefitPay] No transaction found with ID = %s",
-                            track_id,
-                        )
+            if track_id:
+                self.apply_notification(
+                    track_id,
+                    new_status,
+                    webhook_status,
+                    webhook_data,
+                    response_body,
+                    webhook_log,
+                )
 
         except Exception as e:
             logger.exception("[BenefitPay] Notification processing failed: %s", str(e))
+            # Fail the stored event so it is retried and can be replayed
+            raise
+        finally:
+            logger.info(
+                f"[BenefitPay] Webhook execution time: {time.time() - start:.2f} sec"
+            )
 
-        logger.info(
-            f"[BenefitPay] Webhook execution time: {time.time() - start:.2f} sec"
-        )
-        return Response(
-            {"status": "OK", "message": "Notification received"},
-            status=status.HTTP_200_OK,
+    def apply_notification(
+        self,
+        track_id,
+        new_status,
+        webhook_status,
+        webhook_data,
+        response_body,
+        webhook_log,
+    ):
+        """
+        Apply a notification to its transaction. The row stays locked until the
+        update is committed, so retried, replayed and concurrent notifications
+        for one order apply one at a time, and a settled transaction is never
+        changed. The one exception is a capture after a failed attempt on the
+        same order: the money was taken, so it is credited.
+        """
+        with db_transaction.atomic():
+            try:
+                transaction_obj = (
+                    Transaction.objects.select_for_update(of=("self",))
+                    .select_related("from_business")
+                    .get(id=track_id)
+                )
+            except Transaction.DoesNotExist:
+                logger.error("[BenefitPay] No transaction found with ID = %s", track_id)
+                return
+
+            is_capture = new_status == TransactionStatus.SUCCESS
+            if transaction_obj.status != TransactionStatus.PENDING and not (
+                is_capture and transaction_obj.status == TransactionStatus.FAILED
+            ):
+                logger.info(
+                    "[BenefitPay] Transaction %s already %s, notification skipped",
+                    track_id,
+                    transaction_obj.status,
+                )
+                return
+
+            if new_status:
+                transaction_obj.status = new_status
+            if is_capture:
+                webhook_log += self.update_wallet_balance(transaction_obj)
+                # Send invoice email to accounts for successful top-up transactions
+                if transaction_obj.transaction_type == TransactionType.DEPOSIT:
+                    db_transaction.on_commit(
+                        lambda: self.send_topup_invoice(transaction_obj), robust=True
+                    )
+
+            transaction_obj.log_details = f"{transaction_obj.log_details or ''}\n\n--- Benefit Pay Notify Webhook Log ---\n{webhook_log}"
+            transaction_obj.save()
+
+            # Log the webhook call
+            try:
+                with db_transaction.atomic():
+                    WebhookCall.objects.create(
+                        transaction=transaction_obj,
+                        transfer_via=TransferVia.BENEFIT_PAY,
+                        event_type=WebhookEventType.PAYMENT,
+                        status=webhook_status,
+                        request_body=webhook_data,
+                        response_body=response_body,
+                        response_status_code=status.HTTP_200_OK,
+                    )
+            except Exception as webhook_log_error:
+                logger.warning(
+                    "[BenefitPay] Failed to log notification webhook call: %s",
+                    str(webhook_log_error),
+                )
+
+    def send_topup_invoice(self, transaction_obj):
+        from sooq_althahab.billing.transaction.invoice_utils import (
+            send_topup_invoice_to_accounts,
         )
 
-    def update_wallet_balance(self, transaction_obj, webhook_log):
+        organization = transaction_obj.from_business.organization_id
+        if organization:
+            send_topup_invoice_to_accounts(transaction_obj, organization)
+
+    def update_wallet_balance(self, transaction_obj):
+        """Credit a DEPOSIT to the locked wallet. Returns the log lines."""
+        webhook_log = ""
         if transaction_obj.transaction_type == TransactionType.DEPOSIT:
-            wallet = Wallet.objects.get(business=transaction_obj.from_business)
+            wallet = Wallet.objects.select_for_update().get(
+                business=transaction_obj.from_business
+            )
             webhook_log += (
                 f"Wallet balance before updated: {wallet.balance} (DEPOSIT)\n\n"
             )
@@ -889,6 +967,7 @@ class BenefitNotificationView(APIView):
                 "[BenefitPay] Notification processing: Wallet balance before updated (DEPOSIT): %s",
                 str(wallet.balance),
             )
+            transaction_obj.previous_balance = wallet.balance
             wallet.balance += Decimal(transaction_obj.amount or 0)
             wallet.save()
 
@@ -900,7 +979,7 @@ class BenefitNotificationView(APIView):
                 str(wallet.balance),
             )
             transaction_obj.current_balance = wallet.balance
-            transaction_obj.save()
+        return webhook_log
 
 
 @method_decorator(csrf_exempt, name="dispatch")
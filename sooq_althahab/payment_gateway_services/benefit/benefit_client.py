@@ -8,6 +8,8 @@ import requests
 from Crypto.Cipher import AES
 from django.conf import settings
 
+from sooq_althahab.http_transport import get_transport
+
 logger = logging.getLogger(__name__)
 
 
@@ -90,7 +92,9 @@ class BenefitPayClient:
         body = json.dumps([{"id": cls.TRANPORTAL_ID, "trandata": trandata}])
 
         try:
-            res = requests.post(cls.PAYMENT_URL, headers=headers, data=body, timeout=30)
+            res = get_transport("benefit").post(
+                cls.PAYMENT_URL, headers=headers, data=body
+            )
             res.raise_for_status()  # Raise an exception for bad status codes
             return res.json()
         except requests.exceptions.Timeout:
@@ -1,9 +1,11 @@
+import hmac
 import logging
 import time
 from decimal import Decimal
 
 import requests
 from django.conf import settings
+from django.db import transaction as db_transaction
 from django.db.models import Prefetch
 from rest_framework import status
 from rest_framework.response import Response
@@ -21,12 +23,17 @@ from sooq_althahab.enums.account import TransactionType
 from sooq_althahab.enums.account import TransferVia
 from sooq_althahab.enums.account import WebhookCallStatus
 from sooq_althahab.enums.account import WebhookEventType
+from sooq_althahab.enums.account import WebhookProvider
+from sooq_althahab.http_transport import get_transport
+from sooq_althahab.idempotency import IdempotencyManager
 from sooq_althahab.payment_gateway_services.payment_logger import get_credimax_logger
+from sooq_althahab.webhook_events import record_webhook_event
 
 logger = logging.getLogger(__name__)
 
 
 class CreatePaymentSessionAPIView(APIView):
+    @IdempotencyManager()
     def post(self, request):
         """Create a payment session via Credimax for adding money to the wallet."""
 
@@ -255,7 +262,9 @@ class CreatePaymentSessionAPIView(APIView):
             )
 
             api_start_time = time.time()
-            response = requests.post(credimax_session_url, json=payload, auth=AUTH)
+            response = get_transport("credimax").post(
+                credimax_session_url, json=payload, auth=AUTH
+            )
             api_response_time = (time.time() - api_start_time) * 1000
 
             payment_logger.log_api_response(
@@ -360,7 +369,51 @@ class CreatePaymentSessionAPIView(APIView):
 
 class CredimaxWebhookAPIView(APIView):
     def post(self, request, *args, **kwargs):
-        """Handle webhook notifications from Credimax and update the transaction status and wallet balance."""
+        """
+        Verify and store a Credimax notification, then acknowledge it. The
+        transaction update runs on the webhooks queue (``process_webhook``).
+        """
+        secret = settings.CREDIMAX_WEBHOOK_SECRET
+        if secret and not hmac.compare_digest(
+            request.headers.get("X-Notification-Secret", ""), secret
+        ):
+            logger.warning("[Credimax-Webhook] Rejected notification: invalid secret")
+            return Response(
+                {"message": "Invalid notification secret"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        data = request.data
+        order = data.get("order", {})
+        transaction = data.get("transaction", {})
+        if not order.get("id"):
+            logger.warning(f"[Credimax-Webhook] Notification without order id: {data}")
+            return Response(
+                {"message": "Invalid webhook data"},
+                status=status.HTTP_200_OK,  # Always return 200 for webhooks
+            )
+
+        # Credimax sends a unique X-Notification-Id (kept across its retries).
+        event_id = request.headers.get("X-Notification-Id") or (
+            f"{order.get('id')}:{transaction.get('id')}:{transaction.get('type')}:"
+            f"{data.get('result')}"
+        )
+        record_webhook_event(
+            WebhookProvider.CREDIMAX,
+            event_id,
+            data,
+            headers={
+                "X-Notification-Id": request.headers.get("X-Notification-Id"),
+                "X-Notification-Attempt": request.headers.get("X-Notification-Attempt"),
+            },
+        )
+        return Response({"message": "Webhook received"}, status=status.HTTP_200_OK)
+
+    def process_webhook(self, data):
+        """
+        Update the transaction status and wallet balance from a stored Credimax
+        notification. Returns a short result message.
+        """
 
         webhook_log = ""  # String to accumulate webhook processing logs
         transaction_obj = None
@@ -369,8 +422,6 @@ class CredimaxWebhookAPIView(APIView):
 
         try:
             # Extract necessary fields from the webhook data
-            data = request.data
-
             order = data.get("order", {})
             transaction = data.get("transaction", {})
             response = data.get("response", {})
@@ -423,13 +474,10 @@ class CredimaxWebhookAPIView(APIView):
                             "note": "Card addition webhooks are handled via 3DS callback endpoint",
                         },
                     )
-                return Response(
-                    {
-                        "message": "Card addition webhook received (handled via 3DS callback endpoint)",
-                        "log": webhook_log,
-                    },
-                    status=status.HTTP_200_OK,
-                )
+                return {
+                    "message": "Card addition webhook received (handled via 3DS callback endpoint)",
+                    "log": webhook_log,
+                }
 
             if is_agreement_update_webhook:
                 if payment_logger:
@@ -443,12 +491,9 @@ class CredimaxWebhookAPIView(APIView):
                             "note": "Agreement update webhooks are informational only for card updates during agreement modification",
                         },
                     )
-                return Response(
-                    {
-                        "message": "Agreement update webhook received (informational only)"
-                    },
-                    status=status.HTTP_200_OK,
-                )
+                return {
+                    "message": "Agreement update webhook received (informational only)"
+                }
 
             # Validate the required fields for regular payment webhooks
             # Note: For payment webhooks, amount must be present and > 0 (0.0 is not valid for payments)
@@ -465,10 +510,7 @@ class CredimaxWebhookAPIView(APIView):
                             "webhook_data": data,
                         },
                     )
-                return Response(
-                    {"message": "Invalid webhook data"},
-                    status=status.HTTP_200_OK,  # Always return 200 for webhooks
-                )
+                return {"message": "Invalid webhook data"}
 
             if payment_logger:
                 payment_logger.log_webhook_processing(
@@ -481,328 +523,367 @@ class CredimaxWebhookAPIView(APIView):
                     },
                 )
 
-            # Try to find the transaction by the order_id first (which should be our Django transaction ID)
-            # If that fails, try to find it by the Credimax transaction ID
-            transaction_obj = None
-            try:
-                transaction_obj = (
-                    Transaction.objects.select_related(
-                        "from_business", "business_subscription"
-                    )
-                    .prefetch_related(
-                        Prefetch(
-                            "from_business__wallets",
-                            queryset=Wallet.objects.all(),
-                            to_attr="prefetched_wallets",
+            # The row stays locked until the update is committed, so queued,
+            # retried and replayed events for one order apply one at a time
+            with db_transaction.atomic():
+                # Try to find the transaction by the order_id first (which should be our Django transaction ID)
+                # If that fails, try to find it by the Credimax transaction ID
+                transaction_obj = None
+                try:
+                    transaction_obj = (
+                        Transaction.objects.select_for_update(of=("self",))
+                        .select_related("from_business", "business_subscription")
+                        .prefetch_related(
+                            Prefetch(
+                                "from_business__wallets",
+                                queryset=Wallet.objects.all(),
+                                to_attr="prefetched_wallets",
+                            )
                         )
+                        .get(id=order_id)
                     )
-                    .get(id=order_id)
-                )
 
-                payment_logger = get_credimax_logger(
-                    str(order_id), business_id=str(transaction_obj.from_business.id)
-                )
-                payment_logger.log_webhook_received(data, "Credimax")
-                payment_logger.log_webhook_processing(
-                    "FETCH_TRANSACTION", {"order_id": order_id}
-                )
+                    payment_logger = get_credimax_logger(
+                        str(order_id), business_id=str(transaction_obj.from_business.id)
+                    )
+                    payment_logger.log_webhook_received(data, "Credimax")
+                    payment_logger.log_webhook_processing(
+                        "FETCH_TRANSACTION", {"order_id": order_id}
+                    )
+                    if payment_logger:
+                        payment_logger.log_webhook_processing(
+                            "TRANSACTION_FOUND",
+                            {
+                                "transaction_id": str(transaction_obj.id),
+                                "status": transaction_obj.status,
+                                "amount": float(transaction_obj.amount),
+                                "business_id": str(transaction_obj.from_business.id),
+                                "has_subscription": transaction_obj.business_subscription
+                                is not None,
+                            },
+                        )
+
+                except Transaction.DoesNotExist:
+                    if payment_logger:
+                        payment_logger.log_error(
+                            error_type="TRANSACTION_NOT_FOUND",
+                            error_message=f"Transaction with ID {order_id} not found",
+                            context={"order_id": order_id},
+                        )
+                    webhook_log += f"Transaction not found by order_id {order_id}\n\n"
+                    return {"message": "Transaction not found", "log": webhook_log}
+                # A settled transaction is never changed by a late or duplicate
+                # event. The one exception is a capture after a failed attempt
+                # on the same order: the money was taken, so it is credited.
+                is_capture = result == "SUCCESS" and status_code == "CAPTURED"
+                if transaction_obj.status != TransactionStatus.PENDING and not (
+                    is_capture and transaction_obj.status == TransactionStatus.FAILED
+                ):
+                    if payment_logger:
+                        payment_logger.log_webhook_processing(
+                            "SETTLED_TRANSACTION_SKIPPED",
+                            {
+                                "transaction_id": str(transaction_obj.id),
+                                "status": transaction_obj.status,
+                                "webhook_result": result,
+                                "webhook_status": status_code,
+                                "transaction_type": transaction_type,
+                            },
+                        )
+                    return {
+                        "message": f"Transaction already {transaction_obj.status}, "
+                        "event skipped"
+                    }
+
+                # Fetch business wallet
+                business_wallet = transaction_obj.from_business.wallets.first()
+                if not business_wallet:
+                    if payment_logger:
+                        payment_logger.log_error(
+                            error_type="WALLET_NOT_FOUND",
+                            error_message=f"Wallet not found for business ID {transaction_obj.from_business.id}",
+                            context={
+                                "business_id": str(transaction_obj.from_business.id)
+                            },
+                        )
+                    webhook_log += f"Wallet not found for business ID {transaction_obj.from_business.id}.\n\n"
+                    return {"message": "Wallet not found", "log": webhook_log}
+                transaction_obj.previous_balance = business_wallet.balance
+
                 if payment_logger:
                     payment_logger.log_webhook_processing(
-                        "TRANSACTION_FOUND",
+                        "WALLET_FETCHED",
                         {
-                            "transaction_id": str(transaction_obj.id),
-                            "status": transaction_obj.status,
-                            "amount": float(transaction_obj.amount),
-                            "business_id": str(transaction_obj.from_business.id),
-                            "has_subscription": transaction_obj.business_subscription
-                            is not None,
+                            "wallet_balance": float(business_wallet.balance),
+                            "previous_balance": float(transaction_obj.previous_balance),
                         },
                     )
 
-            except Transaction.DoesNotExist:
-                if payment_logger:
-                    payment_logger.log_error(
-                        error_type="TRANSACTION_NOT_FOUND",
-                        error_message=f"Transaction with ID {order_id} not found",
-                        context={"order_id": order_id},
-                    )
-                webhook_log += f"Transaction not found by order_id {order_id}\n\n"
-                return Response(
-                    {"message": "Transaction not found", "log": webhook_log},
-                    status=status.HTTP_200_OK,  # Always return 200 for webhooks
-                )
-            # Fetch business wallet
-            business_wallet = transaction_obj.from_business.wallets.first()
-            if not business_wallet:
-                if payment_logger:
-                    payment_logger.log_error(
-                        error_type="WALLET_NOT_FOUND",
-                        error_message=f"Wallet not found for business ID {transaction_obj.from_business.id}",
-                        context={"business_id": str(transaction_obj.from_business.id)},
+                # Update transaction status based on Credimax response
+                old_status = transaction_obj.status
+                business_subscription = transaction_obj.business_subscription
+
+                if result == "SUCCESS" and status_code == "CAPTURED":
+                    # For wallet top-up (no subscription), only set SUCCESS on PAYMENT webhook.
+                    # Credimax sends AUTHENTICATION first (3DS) then PAYMENT (capture). If we set
+                    # SUCCESS on AUTHENTICATION, we never credit the wallet (we only credit on
+                    # PAYMENT), and when PAYMENT arrives we skip credit because old_status is
+                    # already SUCCESS. So for wallet top-up, only set SUCCESS when we receive
+                    # PAYMENT; leave PENDING on AUTHENTICATION. For subscriptions we set SUCCESS
+                    # on either webhook (subscription status is updated, no wallet credit).
+                    set_success = (
+                        transaction_obj.status != TransactionStatus.SUCCESS
+                        and (
+                            business_subscription
+                            or transaction_type == WebhookEventType.PAYMENT
+                        )
                     )
-                webhook_log += f"Wallet not found for business ID {transaction_obj.from_business.id}.\n\n"
-                return Response(
-                    {"message": "Wallet not found", "log": webhook_log},
-                    status=status.HTTP_200_OK,  # Always return 200 for webhooks
-                )
-            transaction_obj.previous_balance = business_wallet.balance
+                    if set_success:
+                        transaction_obj.status = TransactionStatus.SUCCESS
+
+                    # Update subscription status if this is a subscription payment
+                    if business_subscription:
+                        old_subscription_status = business_subscription.status
+                        # Only update to ACTIVE if subscription is in PENDING or FAILED state
+                        # Don't override if already ACTIVE (to avoid issues with recurring payments)
+                        if business_subscription.status in [
+                            SubscriptionStatusChoices.PENDING,
+                            SubscriptionStatusChoices.FAILED,
+                        ]:
+                            business_subscription.status = (
+                                SubscriptionStatusChoices.ACTIVE
+                            )
+                            business_subscription.save(update_fields=["status"])
+                            if payment_logger:
+                                payment_logger.log_webhook_processing(
+                                    "SUBSCRIPTION_STATUS_UPDATED",
+                                    {
+                                        "subscription_id": str(
+                                            business_subscription.id
+                                        ),
+                                        "old_status": old_subscription_status,
+                                        "new_status": SubscriptionStatusChoices.ACTIVE,
+                                    },
+                                )
 
-            if payment_logger:
-                payment_logger.log_webhook_processing(
-                    "WALLET_FETCHED",
-                    {
-                        "wallet_balance": float(business_wallet.balance),
-                        "previous_balance": float(transaction_obj.previous_balance),
-                    },
-                )
+                    if payment_logger:
+                        payment_logger.log_transaction_update(
+                            old_status=old_status,
+                            new_status=transaction_obj.status,
+                            reason="Payment successful - captured",
+                            additional_data={
+                                "result": result,
+                                "status_code": status_code,
+                                "transaction_type": transaction_type,
+                                "subscription_updated": business_subscription
+                                is not None,
+                                "status_updated": set_success,
+                            },
+                        )
 
-            # Update transaction status based on Credimax response
-            old_status = transaction_obj.status
-            business_subscription = transaction_obj.business_subscription
-
-            if result == "SUCCESS" and status_code == "CAPTURED":
-                # For wallet top-up (no subscription), only set SUCCESS on PAYMENT webhook.
-                # Credimax sends AUTHENTICATION first (3DS) then PAYMENT (capture). If we set
-                # SUCCESS on AUTHENTICATION, we never credit the wallet (we only credit on
-                # PAYMENT), and when PAYMENT arrives we skip credit because old_status is
-                # already SUCCESS. So for wallet top-up, only set SUCCESS when we receive
-                # PAYMENT; leave PENDING on AUTHENTICATION. For subscriptions we set SUCCESS
-                # on either webhook (subscription status is updated, no wallet credit).
-                set_success = transaction_obj.status != TransactionStatus.SUCCESS and (
-                    business_subscription
-                    or transaction_type == WebhookEventType.PAYMENT
-                )
-                if set_success:
-                    transaction_obj.status = TransactionStatus.SUCCESS
-
-                # Update subscription status if this is a subscription payment
-                if business_subscription:
-                    old_subscription_status = business_subscription.status
-                    # Only update to ACTIVE if subscription is in PENDING or FAILED state
-                    # Don't override if already ACTIVE (to avoid issues with recurring payments)
-                    if business_subscription.status in [
-                        SubscriptionStatusChoices.PENDING,
-                        SubscriptionStatusChoices.FAILED,
-                    ]:
-                        business_subscription.status = SubscriptionStatusChoices.ACTIVE
-                        business_subscription.save(update_fields=["status"])
-                        if payment_logger:
-                            payment_logger.log_webhook_processing(
-                                "SUBSCRIPTION_STATUS_UPDATED",
-                                {
-                                    "subscription_id": str(business_subscription.id),
-                                    "old_status": old_subscription_status,
-                                    "new_status": SubscriptionStatusChoices.ACTIVE,
-                                },
+                    if transaction_type == WebhookEventType.PAYMENT:
+                        # Only update wallet balance if we are the ones who just marked this
+                        # transaction as SUCCESS. If it was already SUCCESS (e.g. updated by
+                        # the periodic check_single_credimax_transaction task or by a
+                        # previous webhook), skip to avoid double-crediting the wallet.
+                        if (
+                            not business_subscription
+                            and old_status != TransactionStatus.SUCCESS
+                        ):
+                            self.update_wallet_balance(
+                                transaction_obj, webhook_log, payment_logger
                             )
+                            # Send invoice email to accounts for successful top-up transactions
+                            if (
+                                transaction_obj.transaction_type
+                                == TransactionType.DEPOSIT
+                                and transaction_obj.status == TransactionStatus.SUCCESS
+                            ):
+                                try:
+                                    from sooq_althahab.billing.transaction.invoice_utils import (
+                                        send_topup_invoice_to_accounts,
+                                    )
 
-                if payment_logger:
-                    payment_logger.log_transaction_update(
-                        old_status=old_status,
-                        new_status=transaction_obj.status,
-                        reason="Payment successful - captured",
-                        additional_data={
-                            "result": result,
-                            "status_code": status_code,
-                            "transaction_type": transaction_type,
-                            "subscription_updated": business_subscription is not None,
-                            "status_updated": set_success,
-                        },
-                    )
-
-                if transaction_type == WebhookEventType.PAYMENT:
-                    # Only update wallet balance if we are the ones who just marked this
-                    # transaction as SUCCESS. If it was already SUCCESS (e.g. updated by
-                    # the periodic check_single_credimax_transaction task or by a
-                    # previous webhook), skip to avoid double-crediting the wallet.
-                    if (
-                        not business_subscription
-                        and old_status != TransactionStatus.SUCCESS
-                    ):
-                        self.update_wallet_balance(
-                            transaction_obj, webhook_log, payment_logger
-                        )
-                        # Send invoice email to accounts for successful top-up transactions
+                                    organization = (
+                                        transaction_obj.from_business.organization_id
+                                    )
+                                    if organization:
+                                        # Only once the credit is committed
+                                        db_transaction.on_commit(
+                                            lambda: send_topup_invoice_to_accounts(
+                                                transaction_obj, organization
+                                            ),
+                                            robust=True,
+                                        )
+                                except Exception as invoice_error:
+                                    logger.error(
+                                        f"Failed to send top-up invoice email for transaction {transaction_obj.id}: {str(invoice_error)}"
+                                    )
+                elif result == "FAILURE":
+                    # Only update transaction to FAILED if it's not already SUCCESS
+                    # If webhook shows failure but transaction was already marked as SUCCESS,
+                    # we should investigate but not override (could be a webhook timing issue)
+                    if transaction_obj.status != TransactionStatus.SUCCESS:
+                        transaction_obj.status = TransactionStatus.FAILED
+
+                    # Update subscription status if this is a subscription payment
+                    if business_subscription:
+                        old_subscription_status = business_subscription.status
+                        # Only update to FAILED if subscription is in PENDING state
+                        # Don't override if already FAILED or ACTIVE (to avoid race conditions)
                         if (
-                            transaction_obj.transaction_type == TransactionType.DEPOSIT
-                            and transaction_obj.status == TransactionStatus.SUCCESS
+                            business_subscription.status
+                            == SubscriptionStatusChoices.PENDING
                         ):
-                            try:
-                                from sooq_althahab.billing.transaction.invoice_utils import (
-                                    send_topup_invoice_to_accounts,
+                            business_subscription.status = (
+                                SubscriptionStatusChoices.FAILED
+                            )
+                            business_subscription.save(update_fields=["status"])
+                            if payment_logger:
+                                payment_logger.log_webhook_processing(
+                                    "SUBSCRIPTION_STATUS_UPDATED",
+                                    {
+                                        "subscription_id": str(
+                                            business_subscription.id
+                                        ),
+                                        "old_status": old_subscription_status,
+                                        "new_status": SubscriptionStatusChoices.FAILED,
+                                    },
                                 )
-
-                                organization = (
-                                    transaction_obj.from_business.organization_id
+                        elif (
+                            business_subscription.status
+                            == SubscriptionStatusChoices.ACTIVE
+                        ):
+                            # Log warning if webhook shows failure but subscription is already active
+                            # This is a valid scenario (duplicate/delayed webhook) that we handle correctly
+                            # by not changing the subscription status. Log as warning, not error.
+                            if payment_logger:
+                                is_duplicate_webhook = (
+                                    transaction_obj.status == TransactionStatus.SUCCESS
                                 )
-                                if organization:
-                                    send_topup_invoice_to_accounts(
-                                        transaction_obj, organization
-                                    )
-                            except Exception as invoice_error:
-                                logger.error(
-                                    f"Failed to send top-up invoice email for transaction {transaction_obj.id}: {str(invoice_error)}"
+                                warning_message = (
+                                    "Webhook shows FAILURE but subscription is already ACTIVE. "
+                                    "This is likely a duplicate or delayed webhook from a previous payment attempt. "
+                                    "Subscription status correctly preserved."
+                                )
+                                if is_duplicate_webhook:
+                                    warning_message += " Transaction was already SUCCESS, confirming duplicate webhook."
+                                payment_logger.log_warning(
+                                    warning_message=warning_message,
+                                    context={
+                                        "subscription_id": str(
+                                            business_subscription.id
+                                        ),
+                                        "transaction_id": str(transaction_obj.id),
+                                        "transaction_status": transaction_obj.status,
+                                        "webhook_result": result,
+                                        "webhook_status": status_code,
+                                        "is_duplicate_webhook": is_duplicate_webhook,
+                                    },
                                 )
-            elif result == "FAILURE":
-                # Only update transaction to FAILED if it's not already SUCCESS
-                # If webhook shows failure but transaction was already marked as SUCCESS,
-                # we should investigate but not override (could be a webhook timing issue)
-                if transaction_obj.status != TransactionStatus.SUCCESS:
-                    transaction_obj.status = TransactionStatus.FAILED
-
-                # Update subscription status if this is a subscription payment
-                if business_subscription:
-                    old_subscription_status = business_subscription.status
-                    # Only update to FAILED if subscription is in PENDING state
-                    # Don't override if already FAILED or ACTIVE (to avoid race conditions)
-                    if (
-                        business_subscription.status
-                        == SubscriptionStatusChoices.PENDING
-                    ):
-                        business_subscription.status = SubscriptionStatusChoices.FAILED
-                        business_subscription.save(update_fields=["status"])
-                        if payment_logger:
-                            payment_logger.log_webhook_processing(
-                                "SUBSCRIPTION_STATUS_UPDATED",
-                                {
-                                    "subscription_id": str(business_subscription.id),
-                                    "old_status": old_subscription_status,
-                                    "new_status": SubscriptionStatusChoices.FAILED,
-                                },
-                            )
-                    elif (
-                        business_subscription.status == SubscriptionStatusChoices.ACTIVE
-                    ):
-                        # Log warning if webhook shows failure but subscription is already active
-                        # This is a valid scenario (duplicate/delayed webhook) that we handle correctly
-                        # by not changing the subscription status. Log as warning, not error.
-                        if payment_logger:
-                            is_duplicate_webhook = (
-                                transaction_obj.status == TransactionStatus.SUCCESS
-                            )
-                            warning_message = (
-                                "Webhook shows FAILURE but subscription is already ACTIVE. "
-                                "This is likely a duplicate or delayed webhook from a previous payment attempt. "
-                                "Subscription status correctly preserved."
-                            )
-                            if is_duplicate_webhook:
-                                warning_message += " Transaction was already SUCCESS, confirming duplicate webhook."
-                            payment_logger.log_warning(
-                                warning_message=warning_message,
-                                context={
-                                    "subscription_id": str(business_subscription.id),
-                                    "transaction_id": str(transaction_obj.id),
-                                    "transaction_status": transaction_obj.status,
-                                    "webhook_result": result,
-                                    "webhook_status": status_code,
-                                    "is_duplicate_webhook": is_duplicate_webhook,
-                                },
-                            )
 
-                gateway_recommendation = response.get("gatewayRecommendation", "")
+                    gateway_recommendation = response.get("gatewayRecommendation", "")
 
-                failure_message = (
-                    "Payment was not completed.\n\n"
-                    f"Reason: {gateway_message}.\n"
-                    f"Recommendation: "
-                    f"{gateway_recommendation.replace('_', ' ').title() if gateway_recommendation else 'Please try again with a different payment method.'}"
-                )
+                    failure_message = (
+                        "Payment was not completed.\n\n"
+                        f"Reason: {gateway_message}.\n"
+                        f"Recommendation: "
+                        f"{gateway_recommendation.replace('_', ' ').title() if gateway_recommendation else 'Please try again with a different payment method.'}"
+                    )
+
+                    if not transaction_obj.remark:
+                        transaction_obj.remark = failure_message
+                    else:
+                        transaction_obj.remark = (
+                            f"{transaction_obj.remark}\n\n{failure_message}"
+                        )
 
-                if not transaction_obj.remark:
-                    transaction_obj.remark = failure_message
+                    if payment_logger:
+                        payment_logger.log_transaction_update(
+                            old_status=old_status,
+                            new_status=TransactionStatus.FAILED,
+                            reason="Payment failed",
+                            additional_data={
+                                "result": result,
+                                "status_code": status_code,
+                                "gateway_code": gateway_code,
+                                "gateway_message": gateway_message,
+                                "gateway_recommendation": gateway_recommendation,
+                            },
+                        )
                 else:
-                    transaction_obj.remark = (
-                        f"{transaction_obj.remark}\n\n{failure_message}"
-                    )
+                    # Not a final outcome: the status is left as it is
+                    if payment_logger:
+                        payment_logger.log_transaction_update(
+                            old_status=old_status,
+                            new_status=transaction_obj.status,
+                            reason="Payment status pending",
+                            additional_data={
+                                "result": result,
+                                "status_code": status_code,
+                            },
+                        )
 
-                if payment_logger:
-                    payment_logger.log_transaction_update(
-                        old_status=old_status,
-                        new_status=TransactionStatus.FAILED,
-                        reason="Payment failed",
-                        additional_data={
-                            "result": result,
-                            "status_code": status_code,
-                            "gateway_code": gateway_code,
-                            "gateway_message": gateway_message,
-                            "gateway_recommendation": gateway_recommendation,
-                        },
+                # Update transaction log_details with essential webhook information
+                existing_notes = transaction_obj.log_details or ""
+                # Only append webhook details if they contain meaningful information
+                if webhook_log.strip():
+                    transaction_obj.log_details = (
+                        f"{existing_notes}\n\n--- Webhook Response ---\n{webhook_log}"
                     )
-            else:
-                transaction_obj.status = TransactionStatus.PENDING
 
-                if payment_logger:
-                    payment_logger.log_transaction_update(
-                        old_status=old_status,
-                        new_status=TransactionStatus.PENDING,
-                        reason="Payment status pending",
-                        additional_data={"result": result, "status_code": status_code},
+                transaction_obj.save()
+                webhook_processed = True
+
+                # Handle the call_type to ensure only valid types are saved
+                if transaction_type not in WebhookEventType.values:
+                    transaction_type = WebhookEventType.OTHERS
+
+                # Log the webhook call in the WebhookCall model (separate from core logic)
+                try:
+                    WebhookCall.objects.create(
+                        transaction=transaction_obj,
+                        transfer_via=TransferVia.CREDIMAX,
+                        event_type=transaction_type,
+                        status=WebhookCallStatus.SUCCESS,
+                        request_body=data,
+                        response_body=data,
+                        response_status_code=status.HTTP_200_OK,
                     )
 
-            # Update transaction log_details with essential webhook information
-            existing_notes = transaction_obj.log_details or ""
-            # Only append webhook details if they contain meaningful information
-            if webhook_log.strip():
-                transaction_obj.log_details = (
-                    f"{existing_notes}\n\n--- Webhook Response ---\n{webhook_log}"
-                )
+                    if payment_logger:
+                        payment_logger.log_webhook_processing(
+                            "WEBHOOK_CALL_LOGGED",
+                            {
+                                "webhook_event_type": transaction_type,
+                                "webhook_status": WebhookCallStatus.SUCCESS,
+                            },
+                        )
 
-            transaction_obj.save()
-            webhook_processed = True
-
-            # Handle the call_type to ensure only valid types are saved
-            if transaction_type not in WebhookEventType.values:
-                transaction_type = WebhookEventType.OTHERS
-
-            # Log the webhook call in the WebhookCall model (separate from core logic)
-            try:
-                WebhookCall.objects.create(
-                    transaction=transaction_obj,
-                    transfer_via=TransferVia.CREDIMAX,
-                    event_type=transaction_type,
-                    status=WebhookCallStatus.SUCCESS,
-                    request_body=request.POST.dict(),
-                    response_body=data,
-                    response_status_code=status.HTTP_200_OK,
-                )
+                except Exception as webhook_log_error:
+                    if payment_logger:
+                        payment_logger.log_error(
+                            error_type="WEBHOOK_CALL_LOGGING_ERROR",
+                            error_message=str(webhook_log_error),
+                            context={"transaction_id": str(transaction_obj.id)},
+                        )
+                    # Don't fail the entire webhook if logging fails
 
                 if payment_logger:
-                    payment_logger.log_webhook_processing(
-                        "WEBHOOK_CALL_LOGGED",
-                        {
-                            "webhook_event_type": transaction_type,
-                            "webhook_status": WebhookCallStatus.SUCCESS,
+                    payment_logger.log_transaction_completion(
+                        final_status=transaction_obj.status,
+                        summary={
+                            "type": "credimax_webhook_processing",
+                            "transaction_id": str(transaction_obj.id),
+                            "business_id": str(transaction_obj.from_business.id),
+                            "amount": float(transaction_obj.amount),
+                            "webhook_result": result,
+                            "webhook_status_code": status_code,
+                            "webhook_processed": webhook_processed,
                         },
                     )
 
-            except Exception as webhook_log_error:
-                if payment_logger:
-                    payment_logger.log_error(
-                        error_type="WEBHOOK_CALL_LOGGING_ERROR",
-                        error_message=str(webhook_log_error),
-                        context={"transaction_id": str(transaction_obj.id)},
-                    )
-                # Don't fail the entire webhook if logging fails
-
-            if payment_logger:
-                payment_logger.log_transaction_completion(
-                    final_status=transaction_obj.status,
-                    summary={
-                        "type": "credimax_webhook_processing",
-                        "transaction_id": str(transaction_obj.id),
-                        "business_id": str(transaction_obj.from_business.id),
-                        "amount": float(transaction_obj.amount),
-                        "webhook_result": result,
-                        "webhook_status_code": status_code,
-                        "webhook_processed": webhook_processed,
-                    },
-                )
-
-            # Always return 200 for webhook endpoints
-            return Response(
-                {"message": "Webhook processed successfully"},
-                status=status.HTTP_200_OK,
-            )
+                return {"message": "Webhook processed successfully"}
 
         except Exception as e:
             if payment_logger:
@@ -817,28 +898,31 @@ class CredimaxWebhookAPIView(APIView):
                     },
                 )
 
-            # Try to update transaction log_details even if processing failed
+            # Try to update transaction log_details even if processing failed.
+            # Only the notes are written: the rolled back status and balance
+            # changes of the in-memory object must not be saved.
             if transaction_obj:
                 try:
                     existing_notes = transaction_obj.log_details or ""
-                    transaction_obj.log_details = (
-                        f"{existing_notes}\n\n--- Webhook Error ---\nError: {str(e)}"
+                    Transaction.objects.filter(pk=transaction_obj.pk).update(
+                        log_details=(
+                            f"{existing_notes}\n\n--- Webhook Error ---\nError: {str(e)}"
+                        )
                     )
-                    transaction_obj.save()
                 except Exception:
                     pass  # Don't fail if we can't update notes
 
-            # Always return 200 for webhook endpoints
-            return Response(
-                {"message": "An error occurred while processing the webhook"},
-                status=status.HTTP_200_OK,  # Always return 200 for webhooks
-            )
+            # Fail the stored event so it is retried and can be replayed
+            raise
 
     def update_wallet_balance(self, transaction_obj, webhook_log, payment_logger=None):
         """Update the wallet balance based on the transaction type."""
         try:
             business_id = transaction_obj.from_business.id
-            business_wallet = Wallet.objects.get(business=business_id)
+            # Locked, so concurrent credits to the wallet do not overwrite each other
+            business_wallet = Wallet.objects.select_for_update().get(
+                business=business_id
+            )
 
             if payment_logger:
                 payment_logger.log_webhook_processing(
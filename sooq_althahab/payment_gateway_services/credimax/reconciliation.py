@@ -0,0 +1,284 @@
+"""
+Credimax reconciliation engine.
+
+Polls the Retrieve Order API for pending Credimax transactions in one run
+instead of queueing a Celery task per transaction:
+
+- the least recently checked pending transactions (``last_checked_at``,
+  never checked first) are checked, up to ``CREDIMAX_RECONCILE_BATCH_SIZE``
+  per run, so orders that stay pending cannot starve newer ones;
+- orders are fetched by ``CREDIMAX_RECONCILE_CONCURRENCY`` threads sharing the
+  pooled "credimax" HTTP transport, started no faster than
+  ``CREDIMAX_RECONCILE_RATE_LIMIT`` calls per second;
+- transactions whose status did not change only get their audit
+  ``WebhookCall`` rows, written with a single ``bulk_create``; changed ones go
+  through ``update_transaction_status_from_credimax_response`` under a row lock;
+- transactions still pending ``CREDIMAX_RECONCILE_EXPIRE_AFTER_HOURS`` after
+  checkout, whose order Credimax does not know (abandoned checkouts) or still
+  reports as pending, are marked FAILED: they will never resolve.
+
+Transactions that error are picked up again by a later run.
+"""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from redis import RedisError
+
+from account.models import Transaction
+from account.models import WebhookCall
+from sooq_althahab.enums.account import TransactionStatus
+from sooq_althahab.enums.account import TransferVia
+from sooq_althahab.http_transport import get_transport
+from sooq_althahab.payment_gateway_services.credimax.tasks import (
+    build_credimax_poll_webhook_call,
+)
+from sooq_althahab.payment_gateway_services.credimax.tasks import (
+    resolve_credimax_transaction_status,
+)
+from sooq_althahab.payment_gateway_services.credimax.tasks import (
+    update_transaction_status_from_credimax_response,
+)
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_LOCK_KEY = "credimax:reconciliation:lock"
+
+
+class RateLimiter:
+    """Spaces call start times so at most ``rate`` calls start per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            slot = max(time.monotonic(), self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def fetch_order(transport, rate_limiter, transaction_id):
+    """
+    Retrieve one Credimax order. Never raises: returns a dict with the HTTP
+    status code (None on network errors), parsed body, error and latency.
+    """
+    rate_limiter.wait()
+    started = time.perf_counter()
+    result = {"transaction_id": transaction_id, "status_code": None, "data": None}
+    try:
+        # Not retried here: the next scheduled run checks the order again.
+        response = transport.get(
+            f"{settings.CREDIMAX_BASE_URL}order/{transaction_id}",
+            retry=False,
+            # Own breaker: failing polls must not block checkout and charges
+            operation="reconcile",
+            auth=(settings.CREDIMAX_API_USERNAME, settings.CREDIMAX_API_PASSWORD),
+            timeout=(
+                settings.CREDIMAX_RECONCILE_CONNECT_TIMEOUT,
+                settings.CREDIMAX_RECONCILE_READ_TIMEOUT,
+            ),
+        )
+        result["status_code"] = response.status_code
+        if response.status_code in (200, 400):
+            result["data"] = response.json()
+    except (requests.RequestException, ValueError) as e:
+        result["error"] = str(e)
+    result["latency"] = time.perf_counter() - started
+    return result
+
+
+def get_pending_transaction_ids(batch_size):
+    """Pending Credimax transactions, least recently checked first."""
+    return list(
+        Transaction.objects.filter(
+            status=TransactionStatus.PENDING,
+            transfer_via=TransferVia.CREDIMAX,
+        )
+        .order_by(F("last_checked_at").asc(nulls_first=True), "created_at")
+        .values_list("id", flat=True)[:batch_size]
+    )
+
+
+def apply_status_change(transaction_id, order_data):
+    """Lock the transaction and apply the gateway status if still pending."""
+    with transaction.atomic():
+        transaction_obj = (
+            Transaction.objects.select_for_update(of=("self",))
+            .select_related("business_subscription", "from_business")
+            .get(id=transaction_id)
+        )
+        if transaction_obj.status != TransactionStatus.PENDING:
+            return False
+        update_transaction_status_from_credimax_response(transaction_obj, order_data)
+    return True
+
+
+def is_expired(transaction_obj):
+    """Whether a pending transaction is past the point it could still resolve."""
+    age = timezone.now() - transaction_obj.created_at
+    return age.total_seconds() >= settings.CREDIMAX_RECONCILE_EXPIRE_AFTER_HOURS * 3600
+
+
+def expire_transaction(transaction_id, reason):
+    """Mark a transaction that will never resolve as FAILED, if still pending."""
+    return apply_status_change(
+        transaction_id,
+        {
+            "result": "ERROR",
+            "error": {"cause": "INVALID_REQUEST", "explanation": reason},
+        },
+    )
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def reconcile_pending_transactions(batch_size=None, concurrency=None, rate=None):
+    """
+    Run one reconciliation pass and return its summary:
+    ``checked``, ``changed``, ``expired``, ``unchanged``, ``errors``,
+    ``p95_latency_ms`` and ``duration_ms``.
+    """
+    batch_size = batch_size or settings.CREDIMAX_RECONCILE_BATCH_SIZE
+    concurrency = concurrency or settings.CREDIMAX_RECONCILE_CONCURRENCY
+    rate = settings.CREDIMAX_RECONCILE_RATE_LIMIT if rate is None else rate
+    started = time.perf_counter()
+
+    transaction_ids = get_pending_transaction_ids(batch_size)
+    summary = {"checked": 0, "changed": 0, "expired": 0, "unchanged": 0, "errors": 0}
+
+    transport = get_transport("credimax")
+    rate_limiter = RateLimiter(rate)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda transaction_id: fetch_order(
+                    transport, rate_limiter, transaction_id
+                ),
+                transaction_ids,
+            )
+        )
+    # Checked ones go to the back of the queue, whatever the outcome
+    Transaction.objects.filter(id__in=transaction_ids).update(
+        last_checked_at=timezone.now()
+    )
+
+    transactions = Transaction.objects.select_related(
+        "business_subscription", "from_business"
+    ).in_bulk([result["transaction_id"] for result in results])
+    audit_calls = []
+
+    for result in results:
+        summary["checked"] += 1
+        transaction_obj = transactions.get(result["transaction_id"])
+        if (
+            transaction_obj is None
+            or transaction_obj.status != TransactionStatus.PENDING
+        ):
+            # Settled by a webhook while the order was being fetched.
+            summary["unchanged"] += 1
+            continue
+
+        if result["status_code"] == 404:
+            # Order not found in Credimax: the checkout may still be under
+            # way, until it is too old to ever be paid.
+            if is_expired(transaction_obj) and expire_transaction(
+                transaction_obj.id,
+                "Order not found at Credimax - checkout abandoned",
+            ):
+                summary["expired"] += 1
+            else:
+                summary["unchanged"] += 1
+            continue
+
+        if result["data"] is None:
+            summary["errors"] += 1
+            logger.error(
+                f"[Credimax-Reconcile] Failed to fetch transaction {transaction_obj.id}: "
+                f"{result.get('error') or result['status_code']}"
+            )
+            continue
+
+        try:
+            new_status, _ = resolve_credimax_transaction_status(
+                transaction_obj, result["data"]
+            )
+            if new_status == transaction_obj.status and is_expired(transaction_obj):
+                if expire_transaction(
+                    transaction_obj.id,
+                    "Order still pending at Credimax - payment never completed",
+                ):
+                    summary["expired"] += 1
+                else:
+                    summary["unchanged"] += 1
+            elif new_status == transaction_obj.status:
+                audit_calls.append(
+                    build_credimax_poll_webhook_call(
+                        transaction_obj, new_status, result["data"]
+                    )
+                )
+                summary["unchanged"] += 1
+            elif apply_status_change(transaction_obj.id, result["data"]):
+                summary["changed"] += 1
+            else:
+                summary["unchanged"] += 1
+        except Exception as e:
+            summary["errors"] += 1
+            logger.exception(
+                f"[Credimax-Reconcile] Error updating transaction {transaction_obj.id}: {e}"
+            )
+
+    WebhookCall.objects.bulk_create(audit_calls, batch_size=500)
+
+    summary["p95_latency_ms"] = round(
+        percentile([result["latency"] for result in results], 95) * 1000, 1
+    )
+    summary["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"[Credimax-Reconcile] Run summary: {summary}")
+    return summary
+
+
+def run_credimax_reconciliation(**kwargs):
+    """
+    Run ``reconcile_pending_transactions`` unless another run is still in
+    progress. Without Redis the run proceeds unlocked.
+    """
+    lock_timeout = settings.CREDIMAX_RECONCILE_LOCK_TIMEOUT
+    try:
+        redis_client = get_redis_connection()
+        if not redis_client.set(RECONCILIATION_LOCK_KEY, "1", nx=True, ex=lock_timeout):
+            logger.info(
+                "[Credimax-Reconcile] Previous run still in progress, skipping."
+            )
+            return {"skipped": True}
+    except RedisError:
+        redis_client = None
+
+    try:
+        return reconcile_pending_transactions(**kwargs)
+    finally:
+        if redis_client is not None:
+            try:
+                redis_client.delete(RECONCILIATION_LOCK_KEY)
+            except RedisError:
+                pass
@@ -2,11 +2,11 @@ import logging
 from decimal import ROUND_HALF_UP
 from decimal import Decimal
 
-import requests
 from django.conf import settings
 from requests.auth import HTTPBasicAuth
 
 from sooq_althahab.enums.sooq_althahab_admin import SubscriptionPaymentTypeChoices
+from sooq_althahab.http_transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -28,13 +28,18 @@ class CredimaxClient:
         return f"{self.BASE_URL}" + "/".join(args)
 
     def _send_request(self, method, url, payload=None):
-        """Helper method to send the HTTP request."""
-        if method.lower() == "post":
-            response = requests.post(url, json=payload, auth=self.auth)
-        elif method.lower() == "put":
-            response = requests.put(url, json=payload, auth=self.auth)
+        """
+        Helper method to send the HTTP request through the shared Credimax
+        transport (pooled connections, timeouts). Only GETs are retried: a
+        retried PUT could repeat a charge whose first response was lost.
+        """
+        transport = get_transport("credimax")
+        if method.lower() in ("post", "put"):
+            response = transport.request(
+                method, url, retry=False, json=payload, auth=self.auth
+            )
         elif method.lower() == "get":
-            response = requests.get(url, auth=self.auth)
+            response = transport.request(method, url, auth=self.auth)
         else:
             raise ValueError(f"Unsupported method {method}")
 
@@ -2298,24 +2298,6 @@ class CustomerInitiatedPaymentSerializer(serializers.Serializer):
                         f"billing_details_id={billing_details.id if billing_details else None}"
                     )
             else:
-                # Add delay before sending receipt email (invoice was already sent during billing details creation)
-                if transaction.status == TransactionStatus.SUCCESS and billing_details:
-                    delay_seconds = (
-                        2  # 2 second delay between invoice and receipt emails
-                    )
-                    payment_logger.log_business_logic(
-                        action="EMAIL_DELAY",
-                        data={
-                            "delay_seconds": delay_seconds,
-                            "reason": "Delay between invoice and receipt emails",
-                        },
-                    )
-
-                    logger.info(
-                        f"Waiting {delay_seconds} seconds before sending receipt email..."
-                    )
-                    time.sleep(delay_seconds)
-
                 payment_logger.log_business_logic(
                     action="SEND_EMAIL_NOTIFICATION",
                     data={
@@ -2727,21 +2709,18 @@ class CustomerInitiatedPaymentSerializer(serializers.Serializer):
                 },
             )
 
-            from sooq_althahab.billing.subscription.services import (
-                send_subscription_invoice,
-            )
+            from sooq_althahab.tasks import send_subscription_billing_mail
 
             try:
-                send_subscription_invoice(
-                    billing_details=billing_details,
-                    business=business,
-                    subscription_plan=business_subscription_plan.subscription_plan,
-                    organization=business.organization_id,
-                    business_subscription_plan=business_subscription_plan,  # Pass BusinessSubscriptionPlan for accurate pricing info
+                # Rendered on the pdf queue once the billing details are committed
+                db_transaction.on_commit(
+                    lambda: send_subscription_billing_mail.delay(
+                        billing_details.id, business_subscription_plan.id
+                    )
                 )
 
                 payment_logger.log_business_logic(
-                    action="INVOICE_EMAIL_SENT",
+                    action="INVOICE_EMAIL_QUEUED",
                     data={
                         "billing_details_id": str(billing_details.id),
                         "status": "success",
@@ -1,14 +1,17 @@
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import timedelta
 from decimal import Decimal
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from django.db.models import F
 from django.db.models import Q
 from django.utils import timezone
+from redis import RedisError
 
 from account.models import Transaction
 from account.models import User
@@ -29,6 +32,9 @@ from sooq_althahab.enums.account import UserRoleBusinessChoices
 from sooq_althahab.enums.account import WebhookCallStatus
 from sooq_althahab.enums.account import WebhookEventType
 from sooq_althahab.enums.investor import PurchaseRequestStatus
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunItemStatus
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunStatus
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunType
 from sooq_althahab.enums.sooq_althahab_admin import MaterialType
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import PaymentStatus
@@ -36,7 +42,10 @@ from sooq_althahab.enums.sooq_althahab_admin import SubscriptionPaymentTypeChoic
 from sooq_althahab.payment_gateway_services.credimax.subscription.credimax_client import (
     CredimaxClient,
 )
+from sooq_althahab.redis_utils import get_redis_connection
 from sooq_althahab.utils import send_notifications
+from sooq_althahab_admin.models import BillingRun
+from sooq_althahab_admin.models import BillingRunItem
 from sooq_althahab_admin.models import BusinessSavedCardToken
 from sooq_althahab_admin.models import BusinessSubscriptionPlan
 
@@ -102,7 +111,6 @@ def process_subscription_fee_recurring_payment(business_id=None):
     Scheduled: Daily at 2:00 AM
     """
     today = timezone.now().date()
-    client = CredimaxClient()
 
     if business_id:
         logger.info(
@@ -110,6 +118,9 @@ def process_subscription_fee_recurring_payment(business_id=None):
         )
     else:
         logger.info(f"[SUBSCRIPTION-FEE-TASK] Starting daily processing for {today}")
+        # Scheduled runs are split into parallel, resumable chunks; expiration
+        # (Step 2 below) runs when the last chunk finishes.
+        return start_billing_run(BillingRunType.SUBSCRIPTION_FEE, today)
 
     # Step 1: Process billing for subscriptions due AFTER next_billing_date has passed
     # IMPORTANT: Billing must happen AFTER next_billing_date passes, then expiration happens.
@@ -126,6 +137,41 @@ def process_subscription_fee_recurring_payment(business_id=None):
     # - Process billing first
     # - Then expiration check runs and expires subscription (if expiry_date < today)
 
+    due_subscriptions = _get_subscription_fee_queryset(today, business_id=business_id)
+
+    logger.info(
+        f"[SUBSCRIPTION-FEE-TASK] Found {due_subscriptions.count()} subscription(s) for business {business_id}"
+    )
+
+    client = CredimaxClient()
+    for subscription in due_subscriptions:
+        with business_billing_lock(subscription.business_id) as acquired:
+            if not acquired:
+                logger.warning(
+                    f"[SUBSCRIPTION-FEE-TASK] Billing already in progress for business "
+                    f"{subscription.business_id}, skipping"
+                )
+                continue
+            try:
+                _process_subscription_fee_item(subscription, client, today)
+            except Exception as e:
+                logger.exception(
+                    f"[SUBSCRIPTION-FEE-TASK] Error processing business {subscription.business_id}: {e}"
+                )
+
+    # Step 2: Check and expire subscriptions that have passed their expiry_date
+    # IMPORTANT: This runs AFTER billing to ensure subscriptions can be billed first.
+    # Business Logic:
+    # - User can use app until expiry_date (e.g., 2025-12-29 23:59:59)
+    # - Task runs on day AFTER expiry_date (e.g., 2025-12-30 at 2:00 AM)
+    # - On 2025-12-30: Billing processes first, then expiration check runs
+    # - Subscriptions with expiry_date < today will be expired (unless billing extended expiry_date)
+    # Check expiration for all subscriptions (when business_id is None) or for specific business
+    _check_and_expire_subscriptions(today, business_id=business_id)
+
+
+def _get_subscription_fee_queryset(today, business_id=None):
+    """Subscriptions due for fixed fee billing on ``today``."""
     # Build query for subscriptions due for billing
     # CRITICAL: Use < (strictly less than) instead of <= to ensure task runs AFTER next_billing_date passes
     # This ensures user has access until the end of next_billing_date, then gets billed and logged out the next day
@@ -197,88 +243,87 @@ def process_subscription_fee_recurring_payment(business_id=None):
                 f"excluding expired subscriptions from billing"
             )
 
-    due_subscriptions = query.select_related(
+    return query.select_related(
         "business",
         "business__organization_id",
         "subscription_plan",
         "business_saved_card_token",
     )
 
-    if business_id:
-        logger.info(
-            f"[SUBSCRIPTION-FEE-TASK] Found {due_subscriptions.count()} subscription(s) for business {business_id}"
-        )
-    else:
-        logger.info(
-            f"[SUBSCRIPTION-FEE-TASK] Found {due_subscriptions.count()} subscriptions due for fixed fee billing"
-        )
 
-    for subscription in due_subscriptions:
-        business = subscription.business
-        subscription_plan = subscription.subscription_plan
-        role = subscription_plan.role if subscription_plan else None
-
-        # CRITICAL: Handle billing when expiry_date has passed (day after expiry_date)
-        # Business Logic: On day after expiry_date, we need to bill first, then expire
-        # - POSTPAID: Always bill if next_billing_date == expiry_date (final billing for period that ended)
-        # - PREPAID: Only bill if auto-renew is enabled (charge for next period)
-        # - If expiry_date < today and it's not a final billing case, skip (already handled)
-        if subscription.expiry_date and subscription.expiry_date < today:
-            # This is the day after expiry_date - process final billing if applicable
-            if (
-                subscription.payment_type == SubscriptionPaymentTypeChoices.POSTPAID
-                and subscription.next_billing_date == subscription.expiry_date
-            ):
-                # POSTPAID final billing: Bill for the period that just ended
-                logger.info(
-                    f"[SUBSCRIPTION-FEE-TASK] Processing final billing for POSTPAID subscription - "
-                    f"business {business.id}, expiry_date: {subscription.expiry_date}, "
-                    f"next_billing_date: {subscription.next_billing_date}, today: {today}. "
-                    f"This is the final billing for the period that ended on {subscription.expiry_date}."
-                )
-                # Continue with billing - this is the final billing
-            elif (
-                subscription.payment_type == SubscriptionPaymentTypeChoices.PREPAID
-                and subscription.is_auto_renew
-                and subscription.next_billing_date == subscription.expiry_date
-            ):
-                # PREPAID with auto-renew: Bill for next period
-                logger.info(
-                    f"[SUBSCRIPTION-FEE-TASK] Processing PREPAID billing with auto-renew - "
-                    f"business {business.id}, expiry_date: {subscription.expiry_date}, "
-                    f"next_billing_date: {subscription.next_billing_date}, today: {today}. "
-                    f"Charging for next period."
-                )
-                # Continue with billing
-            else:
-                # Skip billing - not a final billing case or auto-renew disabled
-                logger.info(
-                    f"[SUBSCRIPTION-FEE-TASK] Skipping billing for business {business.id} - "
-                    f"Subscription expired (expiry_date: {subscription.expiry_date}, today: {today}). "
-                    f"Not a final billing case. Expiration will be processed in next step."
-                )
-                continue
+def _process_subscription_fee_item(subscription, client, today):
+    """
+    Bill one due subscription. Returns False if it was skipped (expired and
+    not a final billing case).
+    """
+    business = subscription.business
+    subscription_plan = subscription.subscription_plan
+    role = subscription_plan.role if subscription_plan else None
 
-        logger.info(
-            f"[SUBSCRIPTION-FEE-TASK] Processing business {business.id} - "
-            f"Role: {role}, Payment Type: {subscription.payment_type}, "
-            f"Subscription Fee: {subscription.subscription_fee}, "
-            f"Expiry Date: {subscription.expiry_date}, "
-            f"Next Billing Date: {subscription.next_billing_date}"
-        )
+    # CRITICAL: Handle billing when expiry_date has passed (day after expiry_date)
+    # Business Logic: On day after expiry_date, we need to bill first, then expire
+    # - POSTPAID: Always bill if next_billing_date == expiry_date (final billing for period that ended)
+    # - PREPAID: Only bill if auto-renew is enabled (charge for next period)
+    # - If expiry_date < today and it's not a final billing case, skip (already handled)
+    if subscription.expiry_date and subscription.expiry_date < today:
+        # This is the day after expiry_date - process final billing if applicable
+        if (
+            subscription.payment_type == SubscriptionPaymentTypeChoices.POSTPAID
+            and subscription.next_billing_date == subscription.expiry_date
+        ):
+            # POSTPAID final billing: Bill for the period that just ended
+            logger.info(
+                f"[SUBSCRIPTION-FEE-TASK] Processing final billing for POSTPAID subscription - "
+                f"business {business.id}, expiry_date: {subscription.expiry_date}, "
+                f"next_billing_date: {subscription.next_billing_date}, today: {today}. "
+                f"This is the final billing for the period that ended on {subscription.expiry_date}."
+            )
+            # Continue with billing - this is the final billing
+        elif (
+            subscription.payment_type == SubscriptionPaymentTypeChoices.PREPAID
+            and subscription.is_auto_renew
+            and subscription.next_billing_date == subscription.expiry_date
+        ):
+            # PREPAID with auto-renew: Bill for next period
+            logger.info(
+                f"[SUBSCRIPTION-FEE-TASK] Processing PREPAID billing with auto-renew - "
+                f"business {business.id}, expiry_date: {subscription.expiry_date}, "
+                f"next_billing_date: {subscription.next_billing_date}, today: {today}. "
+                f"Charging for next period."
+            )
+            # Continue with billing
+        else:
+            # Skip billing - not a final billing case or auto-renew disabled
+            logger.info(
+                f"[SUBSCRIPTION-FEE-TASK] Skipping billing for business {business.id} - "
+                f"Subscription expired (expiry_date: {subscription.expiry_date}, today: {today}). "
+                f"Not a final billing case. Expiration will be processed in next step."
+            )
+            return False
 
-        # Process the subscription billing
-        _process_subscription_billing(subscription, client, today)
+    logger.info(
+        f"[SUBSCRIPTION-FEE-TASK] Processing business {business.id} - "
+        f"Role: {role}, Payment Type: {subscription.payment_type}, "
+        f"Subscription Fee: {subscription.subscription_fee}, "
+        f"Expiry Date: {subscription.expiry_date}, "
+        f"Next Billing Date: {subscription.next_billing_date}"
+    )
 
-    # Step 2: Check and expire subscriptions that have passed their expiry_date
-    # IMPORTANT: This runs AFTER billing to ensure subscriptions can be billed first.
-    # Business Logic:
-    # - User can use app until expiry_date (e.g., 2025-12-29 23:59:59)
-    # - Task runs on day AFTER expiry_date (e.g., 2025-12-30 at 2:00 AM)
-    # - On 2025-12-30: Billing processes first, then expiration check runs
-    # - Subscriptions with expiry_date < today will be expired (unless billing extended expiry_date)
-    # Check expiration for all subscriptions (when business_id is None) or for specific business
-    _check_and_expire_subscriptions(today, business_id=business_id)
+    # A charge made after next_billing_date is for this period: it was made
+    # by an earlier run whose outcome or bookkeeping did not complete, since a
+    # completed charge moves next_billing_date.
+    period_charge = _get_period_charge(
+        subscription, created_at__date__gt=subscription.next_billing_date
+    )
+    if period_charge:
+        raise BillingNeedsReconciliation(
+            f"Transaction {period_charge.id} ({period_charge.status}) already "
+            f"charged the period due {subscription.next_billing_date}"
+        )
+
+    # Process the subscription billing
+    _process_subscription_billing(subscription, client, today)
+    return True
 
 
 # ============================================================================
@@ -329,9 +374,33 @@ def process_pro_rata_recurring_payment(business_id=None):
         logger.info(f"[PRO-RATA-TASK] Processing for specific business: {business_id}")
     else:
         logger.info(f"[PRO-RATA-TASK] Starting yearly processing for {today}")
+        return start_billing_run(BillingRunType.PRO_RATA, today)
+
+    investor_subscriptions = _get_pro_rata_queryset(business_id=business_id)
+
+    logger.info(
+        f"[PRO-RATA-TASK] Found {investor_subscriptions.count()} subscription(s) for business {business_id}"
+    )
 
     client = CredimaxClient()
+    for subscription in investor_subscriptions:
+        with business_billing_lock(subscription.business_id) as acquired:
+            if not acquired:
+                logger.warning(
+                    f"[PRO-RATA-TASK] Billing already in progress for business "
+                    f"{subscription.business_id}, skipping"
+                )
+                continue
+            try:
+                _process_pro_rata_item(subscription, client, today)
+            except Exception as e:
+                logger.exception(
+                    f"[PRO-RATA-TASK] Error processing business {subscription.business_id}: {e}"
+                )
 
+
+def _get_pro_rata_queryset(today=None, business_id=None):
+    """Active investor subscriptions with a pro-rata rate."""
     # Build query for investor subscriptions with pro-rata
     query = BusinessSubscriptionPlan.objects.filter(
         status=SubscriptionStatusChoices.ACTIVE,
@@ -343,44 +412,51 @@ def process_pro_rata_recurring_payment(business_id=None):
     if business_id:
         query = query.filter(business_id=business_id)
 
-    investor_subscriptions = query.select_related(
+    return query.select_related(
         "business",
         "business__organization_id",
         "subscription_plan",
         "business_saved_card_token",
     )
 
-    if business_id:
+
+def _process_pro_rata_item(subscription, client, today):
+    """
+    Recalculate or charge pro rata for one investor subscription. Returns
+    False if the payment type is not supported.
+    """
+    business = subscription.business
+    payment_type = subscription.payment_type
+
+    period_charge = _get_period_charge(
+        subscription, log_details=_get_pro_rata_log_details(today)
+    )
+    if period_charge and period_charge.status == TransactionStatus.SUCCESS:
         logger.info(
-            f"[PRO-RATA-TASK] Found {investor_subscriptions.count()} subscription(s) for business {business_id}"
+            f"[PRO-RATA-TASK] Skipping business {business.id} - "
+            f"Pro rata for {today.year - 1} already charged by {period_charge.id}"
         )
-    else:
-        logger.info(
-            f"[PRO-RATA-TASK] Found {investor_subscriptions.count()} investor subscriptions with pro-rata"
+        return False
+    if period_charge:
+        raise BillingNeedsReconciliation(
+            f"Pro rata charge {period_charge.id} for {today.year - 1} is still pending"
         )
 
-    for subscription in investor_subscriptions:
-        business = subscription.business
-        payment_type = subscription.payment_type
+    logger.info(
+        f"[PRO-RATA-TASK] Processing business {business.id} - Payment Type: {payment_type}"
+    )
 
-        logger.info(
-            f"[PRO-RATA-TASK] Processing business {business.id} - Payment Type: {payment_type}"
+    if payment_type == SubscriptionPaymentTypeChoices.PREPAID:
+        _process_prepaid_pro_rata_recalculation(subscription, client, today)
+    elif payment_type == SubscriptionPaymentTypeChoices.POSTPAID:
+        _process_postpaid_pro_rata_charge(subscription, client, today)
+    else:
+        logger.warning(
+            f"[PRO-RATA-TASK] Skipping business {business.id} - "
+            f"Unsupported payment type: {payment_type}"
         )
-
-        try:
-            if payment_type == SubscriptionPaymentTypeChoices.PREPAID:
-                _process_prepaid_pro_rata_recalculation(subscription, client, today)
-            elif payment_type == SubscriptionPaymentTypeChoices.POSTPAID:
-                _process_postpaid_pro_rata_charge(subscription, client, today)
-            else:
-                logger.warning(
-                    f"[PRO-RATA-TASK] Skipping business {business.id} - "
-                    f"Unsupported payment type: {payment_type}"
-                )
-        except Exception as e:
-            logger.exception(
-                f"[PRO-RATA-TASK] Error processing business {business.id}: {e}"
-            )
+        return False
+    return True
 
 
 # ============================================================================
@@ -464,6 +540,347 @@ def process_commission_recurring_payment():
 # ============================================================================
 
 
+# ============================================================================
+# BILLING RUNS (parallel, resumable execution of the scheduled tasks above)
+# ============================================================================
+# A scheduled run records every due subscription as a BillingRunItem, then
+# splits the pending items into BILLING_RUN_PARALLELISM chunks that are billed
+# by separate Celery tasks. Each item is a checkpoint: running the task again
+# on the same date only dispatches items that are not completed yet, and every
+# item is re-checked against the due query before billing, so a subscription
+# that was billed before a crash is skipped. Runs left RUNNING by a chunk
+# worker that died are closed by ``finalize_stale_billing_runs``.
+#
+# An item is never charged twice: before charging, the subscription is checked
+# for a successful or still pending Credimax charge for the same period
+# (``_get_period_charge``). Items whose charge outcome is unknown (the gateway
+# call raised, or the worker died while billing) are marked
+# NEEDS_RECONCILIATION instead of being retried; their pending transaction is
+# settled by the Credimax reconciliation task. Until an operator resolves such
+# an item in the admin, later runs skip its subscription.
+# ============================================================================
+BILLING_RUN_HANDLERS = {
+    BillingRunType.SUBSCRIPTION_FEE: (
+        _get_subscription_fee_queryset,
+        _process_subscription_fee_item,
+    ),
+    BillingRunType.PRO_RATA: (_get_pro_rata_queryset, _process_pro_rata_item),
+}
+
+# Seconds before an item held by another business lock is tried again.
+BILLING_LOCKED_RETRY_COUNTDOWN = 60
+
+
+class BillingNeedsReconciliation(Exception):
+    """
+    The subscription may already have been charged for the period; it must not
+    be billed again until the charge is reconciled.
+    """
+
+
+def _get_period_charge(subscription, **period_filters):
+    """
+    Successful or still pending Credimax charge of ``subscription`` matching
+    ``period_filters``, or None.
+    """
+    return (
+        Transaction.objects.filter(
+            business_subscription=subscription,
+            transaction_type=TransactionType.PAYMENT,
+            transfer_via=TransferVia.CREDIMAX,
+            status__in=[TransactionStatus.SUCCESS, TransactionStatus.PENDING],
+            **period_filters,
+        )
+        .order_by("-created_at")
+        .first()
+    )
+
+
+@contextmanager
+def business_billing_lock(business_id):
+    """
+    Redis lock so a business is never billed by two workers at once (e.g. a
+    scheduled chunk and a manual retry). Yields False if the lock is held.
+    Without Redis the lock is skipped.
+    """
+    lock_key = f"billing:business:{business_id}"
+    redis_client = None
+    try:
+        redis_client = get_redis_connection()
+        acquired = bool(
+            redis_client.set(
+                lock_key, "1", nx=True, ex=settings.BILLING_BUSINESS_LOCK_TIMEOUT
+            )
+        )
+    except RedisError as e:
+        logger.warning(f"[BILLING-RUN] Redis unavailable, billing without lock: {e}")
+        redis_client = None
+        acquired = True
+
+    try:
+        yield acquired
+    finally:
+        if acquired and redis_client is not None:
+            try:
+                redis_client.delete(lock_key)
+            except RedisError:
+                pass
+
+
+def start_billing_run(run_type, today):
+    """
+    Create (or resume) the billing run for ``run_type`` on ``today`` and
+    dispatch its unfinished items to ``process_billing_run_chunk`` tasks.
+    """
+    billing_run, created = BillingRun.objects.get_or_create(
+        run_type=run_type, run_date=today
+    )
+    if billing_run.status == BillingRunStatus.COMPLETED:
+        logger.info(f"[BILLING-RUN] {billing_run} already completed, nothing to do")
+        return {"billing_run_id": billing_run.id, "dispatched": 0}
+
+    get_queryset, _ = BILLING_RUN_HANDLERS[run_type]
+    subscription_ids = get_queryset(today).values_list("id", flat=True)
+    BillingRunItem.objects.bulk_create(
+        [
+            BillingRunItem(billing_run=billing_run, subscription_id=subscription_id)
+            for subscription_id in subscription_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+    _mark_stale_billing_run_items(billing_run.id)
+
+    item_ids = list(
+        billing_run.items.filter(
+            status__in=[BillingRunItemStatus.PENDING, BillingRunItemStatus.FAILED]
+        ).values_list("id", flat=True)
+    )
+    BillingRun.objects.filter(id=billing_run.id).update(
+        status=BillingRunStatus.RUNNING,
+        total_items=billing_run.items.count(),
+        completed_at=None,
+    )
+    logger.info(
+        f"[BILLING-RUN] {'Started' if created else 'Resuming'} {billing_run} "
+        f"with {len(item_ids)} item(s) to process"
+    )
+
+    if not item_ids:
+        _finalize_billing_run(billing_run.id)
+        return {"billing_run_id": billing_run.id, "dispatched": 0}
+
+    parallelism = max(min(settings.BILLING_RUN_PARALLELISM, len(item_ids)), 1)
+    for index in range(parallelism):
+        process_billing_run_chunk.delay(billing_run.id, item_ids[index::parallelism])
+
+    return {"billing_run_id": billing_run.id, "dispatched": len(item_ids)}
+
+
+def _mark_stale_billing_run_items(billing_run_id):
+    """
+    Items left PROCESSING by a worker that died may have been charged: they
+    are not retried but left for reconciliation.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.BILLING_RUN_ITEM_TIMEOUT)
+    return BillingRunItem.objects.filter(
+        billing_run_id=billing_run_id,
+        status=BillingRunItemStatus.PROCESSING,
+        updated_at__lt=stale_before,
+    ).update(
+        status=BillingRunItemStatus.NEEDS_RECONCILIATION,
+        error_message="Worker stopped while billing, charge outcome unknown",
+        updated_at=timezone.now(),
+    )
+
+
+@shared_task
+def finalize_stale_billing_runs():
+    """
+    Close billing runs left RUNNING because a chunk worker died. Stale
+    PROCESSING items are marked NEEDS_RECONCILIATION; PENDING items of a run
+    with no activity for ``BILLING_RUN_ITEM_TIMEOUT`` (their chunk was lost)
+    are dispatched again.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.BILLING_RUN_ITEM_TIMEOUT)
+    billing_runs = BillingRun.objects.filter(
+        status=BillingRunStatus.RUNNING, created_at__lt=stale_before
+    )
+    for billing_run in billing_runs:
+        marked = _mark_stale_billing_run_items(billing_run.id)
+        if marked:
+            logger.warning(
+                f"[BILLING-RUN] {marked} item(s) of {billing_run} stuck in "
+                "PROCESSING, marked for reconciliation"
+            )
+
+        if not billing_run.items.filter(updated_at__gte=stale_before).exists():
+            item_ids = list(
+                billing_run.items.filter(
+                    status=BillingRunItemStatus.PENDING
+                ).values_list("id", flat=True)
+            )
+            if item_ids:
+                logger.warning(
+                    f"[BILLING-RUN] Re-dispatching {len(item_ids)} pending "
+                    f"item(s) of idle {billing_run}"
+                )
+                process_billing_run_chunk.delay(billing_run.id, item_ids)
+                continue
+
+        _finalize_billing_run(billing_run.id)
+
+
+@shared_task
+def process_billing_run_chunk(billing_run_id, item_ids):
+    """Bill one chunk of a billing run, checkpointing every subscription."""
+    billing_run = BillingRun.objects.get(id=billing_run_id)
+    get_queryset, process_item = BILLING_RUN_HANDLERS[billing_run.run_type]
+    today = billing_run.run_date
+    client = CredimaxClient()
+
+    for item_id in item_ids:
+        # Claim the item; another chunk or rerun may already have it.
+        claimed = BillingRunItem.objects.filter(
+            id=item_id,
+            status__in=[BillingRunItemStatus.PENDING, BillingRunItemStatus.FAILED],
+        ).update(
+            status=BillingRunItemStatus.PROCESSING,
+            attempts=F("attempts") + 1,
+            updated_at=timezone.now(),
+        )
+        if not claimed:
+            continue
+
+        item = BillingRunItem.objects.get(id=item_id)
+        # Re-check that the subscription is still due: a subscription billed
+        # before a crash has moved its next_billing_date and is skipped.
+        subscription = get_queryset(today).filter(id=item.subscription_id).first()
+        if subscription is None:
+            _complete_billing_run_item(item_id, BillingRunItemStatus.SKIPPED)
+            continue
+
+        unresolved = (
+            BillingRunItem.objects.filter(
+                subscription_id=item.subscription_id,
+                status=BillingRunItemStatus.NEEDS_RECONCILIATION,
+            )
+            .exclude(id=item_id)
+            .first()
+        )
+        if unresolved:
+            _complete_billing_run_item(
+                item_id,
+                BillingRunItemStatus.SKIPPED,
+                error_message=f"Billing run item {unresolved.id} needs reconciliation",
+            )
+            continue
+
+        with business_billing_lock(subscription.business_id) as acquired:
+            if not acquired:
+                BillingRunItem.objects.filter(id=item_id).update(
+                    status=BillingRunItemStatus.PENDING
+                )
+                process_billing_run_chunk.apply_async(
+                    (billing_run_id, [item_id]),
+                    countdown=BILLING_LOCKED_RETRY_COUNTDOWN,
+                )
+                continue
+
+            try:
+                processed = process_item(subscription, client, today)
+            except BillingNeedsReconciliation as e:
+                logger.error(
+                    f"[BILLING-RUN] Subscription {subscription.id} in {billing_run} "
+                    f"needs reconciliation: {e}"
+                )
+                _complete_billing_run_item(
+                    item_id,
+                    BillingRunItemStatus.NEEDS_RECONCILIATION,
+                    error_message=str(e),
+                )
+                continue
+            except Exception as e:
+                logger.exception(
+                    f"[BILLING-RUN] Error billing subscription {subscription.id} "
+                    f"in {billing_run}: {e}"
+                )
+                _complete_billing_run_item(
+                    item_id, BillingRunItemStatus.FAILED, error_message=str(e)
+                )
+                continue
+
+        _complete_billing_run_item(
+            item_id,
+            (
+                BillingRunItemStatus.COMPLETED
+                if processed
+                else BillingRunItemStatus.SKIPPED
+            ),
+        )
+
+    _finalize_billing_run(billing_run_id)
+
+
+def _complete_billing_run_item(item_id, status, error_message=None):
+    BillingRunItem.objects.filter(id=item_id).update(
+        status=status,
+        error_message=error_message,
+        completed_at=(
+            timezone.now()
+            if status
+            not in [
+                BillingRunItemStatus.FAILED,
+                BillingRunItemStatus.NEEDS_RECONCILIATION,
+            ]
+            else None
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def _finalize_billing_run(billing_run_id):
+    """
+    Close the run once no item is pending or processing. Only the chunk that
+    closes the run performs the post-billing step (subscription expiration).
+    """
+    items = BillingRunItem.objects.filter(billing_run_id=billing_run_id)
+    if items.filter(
+        status__in=[BillingRunItemStatus.PENDING, BillingRunItemStatus.PROCESSING]
+    ).exists():
+        return
+
+    failed_count = items.filter(
+        status__in=[
+            BillingRunItemStatus.FAILED,
+            BillingRunItemStatus.NEEDS_RECONCILIATION,
+        ]
+    ).count()
+    closed = BillingRun.objects.filter(
+        id=billing_run_id, status=BillingRunStatus.RUNNING
+    ).update(
+        status=(
+            BillingRunStatus.COMPLETED_WITH_FAILURES
+            if failed_count
+            else BillingRunStatus.COMPLETED
+        ),
+        completed_at=timezone.now(),
+    )
+    if not closed:
+        return
+
+    billing_run = BillingRun.objects.get(id=billing_run_id)
+    if billing_run.run_type == BillingRunType.SUBSCRIPTION_FEE:
+        # Step 2 of process_subscription_fee_recurring_payment: expire
+        # subscriptions only after all billing for the day is done.
+        _check_and_expire_subscriptions(billing_run.run_date)
+
+    logger.info(
+        f"[BILLING-RUN] Finished {billing_run}: {billing_run.total_items} item(s), "
+        f"{failed_count} failed or need reconciliation"
+    )
+
+
 def _get_business_display_name(business):
     """
     Get display name for business.
@@ -859,6 +1276,7 @@ def _process_subscription_billing(subscription, client, today):
     api_response = None
     payment_successful = False
     api_payload = None
+    charge_sent = False
     should_send_receipt = False
     should_send_failure_email = False
     failure_reason = None
@@ -987,6 +1405,7 @@ def _process_subscription_billing(subscription, client, today):
             )
 
             # Perform recurring charge
+            charge_sent = True
             try:
                 api_payload, api_response = client.charge_recurring(
                     token=token_obj.token,
@@ -1188,6 +1607,19 @@ def _process_subscription_billing(subscription, client, today):
             except Exception as error_webhook_error:
                 logger.error(f"Failed to record error webhook: {error_webhook_error}")
 
+        # The gateway call raised: the card may have been charged. Keep the
+        # rolled back transaction as PENDING for the reconciliation task and
+        # do not bill this subscription again until it is settled.
+        if charge_sent and api_response is None and transaction_obj:
+            transaction_obj.status = TransactionStatus.PENDING
+            transaction_obj.log_details = (
+                f"{transaction_obj.log_details} - charge outcome unknown: {e}"
+            )
+            transaction_obj.save()
+            raise BillingNeedsReconciliation(
+                f"Charge outcome of transaction {transaction_obj.id} unknown: {e}"
+            ) from e
+
 
 def _process_prepaid_pro_rata_recalculation(subscription, client, today):
     """
@@ -1421,6 +1853,11 @@ def _process_postpaid_pro_rata_charge(subscription, client, today):
         logger.info(f"[PRO-RATA-TASK] No pro rata amount: business {business.id}")
 
 
+def _get_pro_rata_log_details(today):
+    """Log details of the pro rata charge for the year before ``today``."""
+    return f"Pro rata payment for {today.year - 1}"
+
+
 def _process_pro_rata_payment(subscription, amount, client, today):
     """
     Process payment for pro rata amount.
@@ -1485,28 +1922,29 @@ def _process_pro_rata_payment(subscription, amount, client, today):
         logger.error(f"[PRO-RATA-TASK] Failed to send invoice: {invoice_error}")
 
     # Process payment
-    transaction_obj = None
     api_response = None
     payment_successful = False
     api_payload = None
 
+    # Created outside the atomic block below: it is the charge marker of the
+    # year, and stays PENDING for the reconciliation task if the outcome of
+    # the charge is unknown.
+    transaction_obj = Transaction.objects.create(
+        from_business=business,
+        to_business=business,
+        amount=total_amount,
+        vat_rate=organization_vat_rate,
+        vat=vat_amount,
+        transaction_type=TransactionType.PAYMENT,
+        transfer_via=TransferVia.CREDIMAX,
+        status=TransactionStatus.PENDING,
+        log_details=_get_pro_rata_log_details(today),
+        created_by=subscription.created_by,
+        business_subscription=subscription,
+    )
+
     try:
         with transaction.atomic():
-            # Create transaction
-            transaction_obj = Transaction.objects.create(
-                from_business=business,
-                to_business=business,
-                amount=total_amount,
-                vat_rate=organization_vat_rate,
-                vat=vat_amount,
-                transaction_type=TransactionType.PAYMENT,
-                transfer_via=TransferVia.CREDIMAX,
-                status=TransactionStatus.PENDING,
-                log_details=f"Pro rata payment for {today.year - 1}",
-                created_by=subscription.created_by,
-                business_subscription=subscription,
-            )
-
             # Charge payment
             api_payload, api_response = client.charge_recurring(
                 token=token_obj.token,
@@ -1559,6 +1997,10 @@ def _process_pro_rata_payment(subscription, amount, client, today):
         logger.exception(
             f"[PRO-RATA-TASK] Error processing pro rata payment for business {business.id}: {e}"
         )
+        if api_response is None:
+            raise BillingNeedsReconciliation(
+                f"Charge outcome of transaction {transaction_obj.id} unknown: {e}"
+            ) from e
 
 
 def _get_default_card_for_business(business, subscription, client):
@@ -14,9 +14,6 @@ from rest_framework.views import APIView
 from account.models import Transaction
 from account.models import TransactionStatus
 from sooq_althahab.billing.subscription.helpers import calculate_tax_and_total
-from sooq_althahab.billing.subscription.services import (
-    send_subscription_receipt_after_payment,
-)
 from sooq_althahab.enums.account import TransactionStatus as TransactionStatusEnum
 from sooq_althahab.enums.sooq_althahab_admin import PaymentStatus
 from sooq_althahab_admin.models import BillingDetails
@@ -37,10 +34,8 @@ class RetryBillingDetailsAndMailAPIView(APIView):
         """
         Retry billing details creation and send both invoice and receipt emails for a specific subscription and transaction.
 
-        Email sending order:
-        1. Invoice email sent first
-        2. 2-second delay
-        3. Receipt email sent second
+        Both emails are rendered and sent by the send_subscription_billing_mail
+        task on the pdf queue, the invoice first and the receipt after it.
 
         Expected payload:
         {
@@ -56,9 +51,7 @@ class RetryBillingDetailsAndMailAPIView(APIView):
                 "business_name": "Business Name",
                 "subscription_name": "Subscription Plan Name",
                 "total_amount": "120.00",
-                "receipt_email_sent": true,
-                "invoice_email_sent": true,
-                "emails_sent": true,
+                "emails_queued": true,
                 "was_existing": false
             }
         }
@@ -145,8 +138,8 @@ class RetryBillingDetailsAndMailAPIView(APIView):
                     business_subscription_plan, transaction_obj, existing_billing
                 )
 
-                # Send notification emails (both receipt and invoice)
-                email_results = self._send_notification_email(
+                # Queue notification emails (both invoice and receipt)
+                self._queue_notification_emails(
                     business_subscription_plan, transaction_obj, billing_details
                 )
 
@@ -157,29 +150,14 @@ class RetryBillingDetailsAndMailAPIView(APIView):
                 "subscription_name": business_subscription_plan.subscription_name,
                 "total_amount": str(billing_details.total_amount),
                 "payment_status": billing_details.payment_status,
-                "receipt_email_sent": email_results.get("receipt_sent", False),
-                "invoice_email_sent": email_results.get("invoice_sent", False),
-                "emails_sent": email_results.get("success", False),
+                "emails_queued": True,
                 "was_existing": existing_billing is not None,
             }
 
-            # Determine success message based on email results
-            receipt_sent = email_results.get("receipt_sent", False)
-            invoice_sent = email_results.get("invoice_sent", False)
-
-            if receipt_sent and invoice_sent:
-                message = "Successfully created billing details and sent both receipt and invoice emails"
-            elif receipt_sent:
-                message = "Successfully created billing details and sent receipt email (invoice email failed)"
-            elif invoice_sent:
-                message = "Successfully created billing details and sent invoice email (receipt email failed)"
-            else:
-                message = "Successfully created billing details but failed to send both emails"
-
             return Response(
                 {
                     "success": True,
-                    "message": message,
+                    "message": "Successfully created billing details and queued invoice and receipt emails",
                     "data": response_data,
                 },
                 status=status.HTTP_200_OK,
@@ -252,106 +230,21 @@ class RetryBillingDetailsAndMailAPIView(APIView):
             logger.info(f"Created new billing details (ID: {billing_details.id})")
             return billing_details
 
-    def _send_notification_email(
+    def _queue_notification_emails(
         self, business_subscription_plan, transaction_obj, billing_details
     ):
-        """Send both subscription invoice and receipt emails to business owner with PDF attachments.
+        """Queue the subscription invoice and receipt emails once the billing details are committed.
 
-        Sends invoice email first, then waits 2 seconds before sending receipt email.
-        This ensures proper sequencing for subscription billing emails.
+        The PDFs are rendered by the send_subscription_billing_mail task on the
+        pdf queue, which sends the invoice before the receipt.
         """
-        try:
-            business = business_subscription_plan.business
-            organization = business.organization_id
-            subscription_plan = business_subscription_plan.subscription_plan
-
-            # Log email details for debugging
-            logger.info(
-                f"Attempting to send receipt and invoice emails for transaction {transaction_obj.id}"
-            )
-            logger.info(f"Business: {business.name}")
-            logger.info(
-                f"Organization: {organization.name if organization else 'No organization'}"
-            )
-
-            # Try to get business owner email as well
-            try:
-                owner_assignment = business.user_assigned_businesses.filter(
-                    is_owner=True
-                ).first()
-                if owner_assignment:
-                    logger.info(f"Business owner email: {owner_assignment.user.email}")
-                else:
-                    logger.info("No business owner found")
-            except Exception as owner_error:
-                logger.warning(f"Could not get business owner email: {owner_error}")
-
-            # Track email sending results
-            receipt_sent = False
-            invoice_sent = False
-
-            # Send subscription invoice first with PDF attachment
-            try:
-                from sooq_althahab.billing.subscription.services import (
-                    send_subscription_invoice,
-                )
-
-                send_subscription_invoice(
-                    billing_details=billing_details,
-                    business=business,
-                    subscription_plan=subscription_plan,
-                    organization=organization,
-                    business_subscription_plan=business_subscription_plan,  # Pass BusinessSubscriptionPlan for accurate pricing info
-                )
-                invoice_sent = True
-                logger.info(
-                    f"Invoice email sent successfully for transaction {transaction_obj.id}"
-                )
-            except Exception as invoice_error:
-                logger.error(
-                    f"Failed to send invoice email for transaction {transaction_obj.id}: {str(invoice_error)}"
-                )
-
-            # Add delay between invoice and receipt emails
-            import time
-
-            delay_seconds = 2  # 2 second delay between emails
-            logger.info(
-                f"Waiting {delay_seconds} seconds before sending receipt email..."
-            )
-            time.sleep(delay_seconds)
+        from sooq_althahab.tasks import send_subscription_billing_mail
 
-            # Send subscription receipt with PDF attachment after delay
-            try:
-                send_subscription_receipt_after_payment(
-                    billing_details=billing_details,
-                    business=business,
-                    subscription_plan=subscription_plan,
-                    organization=organization,
-                    transaction=transaction_obj,
-                    business_subscription_plan=business_subscription_plan,  # Pass BusinessSubscriptionPlan for accurate pricing info
-                )
-                receipt_sent = True
-                logger.info(
-                    f"Receipt email sent successfully for transaction {transaction_obj.id}"
-                )
-            except Exception as receipt_error:
-                logger.error(
-                    f"Failed to send receipt email for transaction {transaction_obj.id}: {str(receipt_error)}"
-                )
-
-            # Return success if at least one email was sent
-            return {
-                "receipt_sent": receipt_sent,
-                "invoice_sent": invoice_sent,
-                "success": receipt_sent or invoice_sent,
-            }
-
-        except Exception as e:
-            logger.error(
-                f"Failed to send emails for transaction {transaction_obj.id}: {str(e)}"
+        logger.info(
+            f"Queueing invoice and receipt emails for transaction {transaction_obj.id}"
+        )
+        transaction.on_commit(
+            lambda: send_subscription_billing_mail.delay(
+                billing_details.id, business_subscription_plan.id, transaction_obj.id
             )
-            import traceback
-
-            logger.error(f"Email error traceback: {traceback.format_exc()}")
-            return {"receipt_sent": False, "invoice_sent": False, "success": False}
+        )
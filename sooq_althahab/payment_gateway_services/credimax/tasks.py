@@ -16,6 +16,7 @@ from sooq_althahab.enums.account import TransactionStatus
 from sooq_althahab.enums.account import TransferVia
 from sooq_althahab.enums.account import WebhookCallStatus
 from sooq_althahab.enums.account import WebhookEventType
+from sooq_althahab.http_transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -256,50 +257,24 @@ def check_pending_credimax_transactions(self):
     are missed or fail to process.
 
     Handles all pending Credimax transactions (wallet top-ups and subscriptions):
-    - Checks all pending transactions every 5 minutes
-    - Calls Credimax API to get current transaction status
+    - Checks pending transactions every 5 minutes, least recently checked
+      first, in batches of CREDIMAX_RECONCILE_BATCH_SIZE
+    - Calls the Credimax API with bounded concurrency over pooled connections
+      (see reconciliation.py) instead of queueing one task per transaction
     - Updates transaction status based on API response
     - For subscription transactions older than timeout threshold (>30 min) and still pending, marks as FAILED
     - Timeout threshold is configurable via CREDIMAX_STALE_TRANSACTION_TIMEOUT_MINUTES (default: 30 minutes)
+
+    Returns the run summary (checked, changed, unchanged, errors, p95 latency).
     """
+    from sooq_althahab.payment_gateway_services.credimax.reconciliation import (
+        run_credimax_reconciliation,
+    )
+
     try:
         # Close any stale database connections before querying
         close_old_connections()
-
-        # Single query to fetch all pending Credimax transactions
-        pending_transaction_ids = list(
-            Transaction.objects.filter(
-                status=TransactionStatus.PENDING,
-                transfer_via=TransferVia.CREDIMAX,
-            ).values_list("id", flat=True)
-        )
-
-        # Connection is automatically closed after the list() conversion
-        close_old_connections()
-
-        processed_count = 0
-        failed_count = 0
-
-        # Iterate over transaction IDs instead of full objects
-        for transaction_id in pending_transaction_ids:
-            try:
-                # Close connections periodically to prevent connection exhaustion
-                if processed_count % 50 == 0 and processed_count > 0:
-                    close_old_connections()
-
-                check_single_credimax_transaction.delay(transaction_id)
-                processed_count += 1
-            except Exception as e:
-                failed_count += 1
-                logger.error(
-                    f"[Credimax-Task] Failed to queue transaction {transaction_id}: {str(e)}"
-                )
-
-        return {
-            "processed_count": processed_count,
-            "failed_count": failed_count,
-            "message": f"Queued {processed_count} transactions for status check",
-        }
+        return run_credimax_reconciliation()
 
     except OperationalError as e:
         logger.error(f"[Credimax-Task] Database connection error: {e}")
@@ -356,7 +331,9 @@ def check_single_credimax_transaction(self, transaction_id):
         auth = (settings.CREDIMAX_API_USERNAME, settings.CREDIMAX_API_PASSWORD)
 
         # Make the API call to check order status
-        response = requests.get(api_url, auth=auth, timeout=30)
+        response = get_transport("credimax").get(
+            api_url, auth=auth, operation="reconcile"
+        )
 
         logger.info(
             f"[Credimax-Task] API response status: {response.status_code} for transaction {transaction_id}"
@@ -452,6 +429,88 @@ def check_single_credimax_transaction(self, transaction_id):
         raise self.retry(countdown=300, exc=e)
 
 
+def resolve_credimax_transaction_status(transaction, order_data):
+    """
+    Map a Credimax Retrieve Order response to the internal status for
+    ``transaction``, applying the stale subscription timeout.
+    Returns (new_status, error_info).
+    """
+    (
+        status_code,
+        result,
+        error_info,
+        total_authorized,
+        total_captured,
+    ) = extract_credimax_status(order_data)
+
+    # Log the extracted information
+    if error_info:
+        logger.info(
+            f"[Credimax-Task] Processing error response for transaction {transaction.id}: {error_info}"
+        )
+    else:
+        logger.info(
+            f"[Credimax-Task] Processing order status: {status_code}, result: {result}, total_authorized: {total_authorized}, total_captured: {total_captured} for transaction {transaction.id}"
+        )
+
+    new_status = map_credimax_to_internal_status(
+        order_data,
+        status_code,
+        result,
+        error_info,
+        total_authorized,
+        total_captured,
+    )
+
+    # For subscription transactions, if still pending after timeout threshold, mark as failed
+    # This handles abandoned payment sessions that have been pending for too long
+    if transaction.business_subscription and new_status == TransactionStatus.PENDING:
+        transaction_age = timezone.now() - transaction.created_at
+        transaction_age_minutes = transaction_age.total_seconds() / 60
+        stale_timeout_minutes = settings.CREDIMAX_STALE_TRANSACTION_TIMEOUT_MINUTES
+
+        # If transaction is older than timeout threshold (>30 min) and still pending, mark as failed
+        if transaction_age_minutes >= stale_timeout_minutes:
+            new_status = TransactionStatus.FAILED
+            error_info = error_info or {}
+            error_info["explanation"] = (
+                f"Payment session abandoned - no activity after {transaction_age_minutes:.1f} minutes "
+                f"(timeout threshold: {stale_timeout_minutes} minutes)"
+            )
+            logger.warning(
+                f"[Credimax-Task] Marking subscription transaction {transaction.id} as FAILED "
+                f"(pending for {transaction_age_minutes:.1f} minutes, API still returned pending, "
+                f"timeout threshold: {stale_timeout_minutes} minutes)"
+            )
+        # If transaction is < 30 minutes old and still pending, keep it as pending
+        # (payment is still in progress, don't mark as failed yet)
+
+    logger.info(
+        f"[Credimax-Task] Mapped status for transaction {transaction.id}: "
+        f"extracted_status={status_code}, extracted_result={result}, "
+        f"mapped_status={new_status}, current_status={transaction.status}"
+    )
+
+    return new_status, error_info
+
+
+def build_credimax_poll_webhook_call(transaction, new_status, order_data):
+    """Unsaved audit ``WebhookCall`` for a status poll that changed nothing."""
+    return WebhookCall(
+        transaction=transaction,
+        transfer_via=TransferVia.CREDIMAX,
+        event_type=WebhookEventType.PAYMENT,
+        status=(
+            WebhookCallStatus.SUCCESS
+            if new_status == TransactionStatus.SUCCESS
+            else WebhookCallStatus.FAILURE
+        ),
+        request_body={},  # No request body for this type of call
+        response_body=order_data,
+        response_status_code=200,
+    )
+
+
 def update_transaction_status_from_credimax_response(transaction, order_data):
     """
     Update transaction status based on Credimax API response.
@@ -462,63 +521,8 @@ def update_transaction_status_from_credimax_response(transaction, order_data):
     logger.info(f"[Credimax-Task] Order data: {order_data}")
 
     try:
-        (
-            status_code,
-            result,
-            error_info,
-            total_authorized,
-            total_captured,
-        ) = extract_credimax_status(order_data)
-
-        # Log the extracted information
-        if error_info:
-            logger.info(
-                f"[Credimax-Task] Processing error response for transaction {transaction.id}: {error_info}"
-            )
-        else:
-            logger.info(
-                f"[Credimax-Task] Processing order status: {status_code}, result: {result}, total_authorized: {total_authorized}, total_captured: {total_captured} for transaction {transaction.id}"
-            )
-
-        new_status = map_credimax_to_internal_status(
-            order_data,
-            status_code,
-            result,
-            error_info,
-            total_authorized,
-            total_captured,
-        )
-
-        # For subscription transactions, if still pending after timeout threshold, mark as failed
-        # This handles abandoned payment sessions that have been pending for too long
-        if (
-            transaction.business_subscription
-            and new_status == TransactionStatus.PENDING
-        ):
-            transaction_age = timezone.now() - transaction.created_at
-            transaction_age_minutes = transaction_age.total_seconds() / 60
-            stale_timeout_minutes = settings.CREDIMAX_STALE_TRANSACTION_TIMEOUT_MINUTES
-
-            # If transaction is older than timeout threshold (>30 min) and still pending, mark as failed
-            if transaction_age_minutes >= stale_timeout_minutes:
-                new_status = TransactionStatus.FAILED
-                error_info = error_info or {}
-                error_info["explanation"] = (
-                    f"Payment session abandoned - no activity after {transaction_age_minutes:.1f} minutes "
-                    f"(timeout threshold: {stale_timeout_minutes} minutes)"
-                )
-                logger.warning(
-                    f"[Credimax-Task] Marking subscription transaction {transaction.id} as FAILED "
-                    f"(pending for {transaction_age_minutes:.1f} minutes, API still returned pending, "
-                    f"timeout threshold: {stale_timeout_minutes} minutes)"
-                )
-            # If transaction is < 30 minutes old and still pending, keep it as pending
-            # (payment is still in progress, don't mark as failed yet)
-
-        logger.info(
-            f"[Credimax-Task] Mapped status for transaction {transaction.id}: "
-            f"extracted_status={status_code}, extracted_result={result}, "
-            f"mapped_status={new_status}, current_status={transaction.status}"
+        new_status, error_info = resolve_credimax_transaction_status(
+            transaction, order_data
         )
 
         # CRITICAL SAFETY CHECK: Refresh transaction from DB to ensure we have latest status
@@ -592,19 +596,7 @@ def update_transaction_status_from_credimax_response(transaction, order_data):
             )
 
             # Log the webhook call for audit purposes
-            WebhookCall.objects.create(
-                transaction=transaction,
-                transfer_via=TransferVia.CREDIMAX,
-                event_type=WebhookEventType.PAYMENT,
-                status=(
-                    WebhookCallStatus.SUCCESS
-                    if new_status == TransactionStatus.SUCCESS
-                    else WebhookCallStatus.FAILURE
-                ),
-                request_body={},  # No request body for this type of call
-                response_body=order_data,
-                response_status_code=200,
-            )
+            build_credimax_poll_webhook_call(transaction, new_status, order_data).save()
 
     except Exception as e:
         logger.error(
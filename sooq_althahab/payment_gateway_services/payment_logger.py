@@ -1,14 +1,30 @@
+import atexit
 import json
 import logging
 import os
+import queue
 import sys
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from logging.handlers import WatchedFileHandler
 from typing import Any
 from typing import Dict
 from typing import Optional
 
 from django.conf import settings
 
+# All payment loggers share one logger whose only handler is a QueueHandler:
+# the request thread just enqueues the record, and a QueueListener thread
+# writes it to the per business/provider/month file.
+PAYMENT_LOGGER_NAME = "payments"
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
 
 def _slugify(value: Optional[str]) -> str:
     """Lightweight slugifier to keep log paths filesystem-safe."""
@@ -35,10 +51,108 @@ def _strip_business_id(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     return cleaned
 
 
+class PaymentLogFileDispatcher(logging.Handler):
+    """
+    Runs on the listener thread and writes each record to the file named by
+    its ``payment_log_file`` attribute. File handlers are cached per file
+    (one per business, provider and month); the least recently used ones are
+    closed above ``PAYMENT_LOG_MAX_OPEN_FILES``.
+
+    Every web and worker process writes the same files, so they are opened
+    in append mode and never rotated here: size-based rotation from several
+    processes races and loses lines. Rotate them externally (e.g.
+    logrotate); ``WatchedFileHandler`` reopens a file that was moved away.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.file_handlers = OrderedDict()
+        self.fallback_handler = logging.StreamHandler(sys.stderr)
+        self.fallback_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def get_file_handler(self, log_file):
+        handler = self.file_handlers.get(log_file)
+        if handler is not None:
+            self.file_handlers.move_to_end(log_file)
+            return handler
+
+        try:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            handler = WatchedFileHandler(log_file, encoding="utf-8")
+        except (PermissionError, OSError) as e:
+            # If we can't write to log file (permission denied, disk full, etc.),
+            # fall back to stderr instead of losing the record.
+            sys.stderr.write(
+                f"PaymentLogger: Cannot write to log file {log_file} due to: {e}. "
+                f"Falling back to console logging. Please check file permissions.\n"
+            )
+            handler = self.fallback_handler
+        else:
+            handler.setFormatter(logging.Formatter("%(message)s"))
+
+        self.file_handlers[log_file] = handler
+        while len(self.file_handlers) > settings.PAYMENT_LOG_MAX_OPEN_FILES:
+            _, evicted = self.file_handlers.popitem(last=False)
+            if evicted is not self.fallback_handler:
+                evicted.close()
+        return handler
+
+    def emit(self, record):
+        log_file = getattr(record, "payment_log_file", None)
+        handler = self.get_file_handler(log_file) if log_file else self.fallback_handler
+        handler.handle(record)
+
+    def close(self):
+        for handler in self.file_handlers.values():
+            if handler is not self.fallback_handler:
+                handler.close()
+        self.file_handlers.clear()
+        super().close()
+
+
+def _stop_listener():
+    """Flush queued records on interpreter exit."""
+    global _listener, _listener_pid
+
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener, _listener_pid = None, None
+
+
+def _get_payment_logger() -> logging.Logger:
+    """
+    Return the shared payment logger, starting the listener thread on first
+    use in this process (and again in a forked worker, which does not
+    inherit the parent's thread).
+    """
+    global _listener, _listener_pid
+
+    payment_logger = logging.getLogger(PAYMENT_LOGGER_NAME)
+    if _listener_pid == os.getpid():
+        return payment_logger
+
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            log_queue = queue.SimpleQueue()
+            payment_logger.handlers.clear()
+            payment_logger.addHandler(QueueHandler(log_queue))
+            payment_logger.setLevel(logging.INFO)
+            payment_logger.propagate = False
+
+            _listener = QueueListener(log_queue, PaymentLogFileDispatcher())
+            _listener.start()
+            if _listener_pid is None:
+                atexit.register(_stop_listener)
+            _listener_pid = os.getpid()
+    return payment_logger
+
+
 class PaymentLogger:
     """
     Centralized payment logger for tracking all payment gateway transactions.
-    Creates consolidated log files per business, provider, and month for easy monitoring.
+    Writes one JSON line per event to consolidated log files per business,
+    provider, and month. Creating an instance opens no files; writes happen on
+    a background thread.
     """
 
     def __init__(
@@ -61,81 +175,39 @@ class PaymentLogger:
         self.transaction_id = transaction_id
         self.business_slug = _slugify(business_id)
         self.log_datetime = log_datetime or datetime.now()
-        self.logs_dir = self._ensure_logs_directory()
 
-        # Create provider+business specific logger to avoid handler reuse across businesses
-        self.logger = logging.getLogger(f"payment_{self.provider}_{self.business_slug}")
-        self.logger.setLevel(logging.INFO)
-
-        # Clear existing handlers to avoid duplicates
-        self.logger.handlers.clear()
-
-        # Create monthly log file organized by year and business/gateway
+        # Monthly log file organized by year and business/gateway
         # Format: logs/payments/2025/<business>/<gateway>/<month>.log
         month_name = self.log_datetime.strftime("%B").lower()  # e.g., 'october'
-        log_file = os.path.join(self.logs_dir, f"{month_name}.log")
-
-        # Store log file path for reference
-        self.log_file_path = log_file
-
-        try:
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.INFO)
-
-            # Create formatter
-            formatter = logging.Formatter(
-                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            )
-            file_handler.setFormatter(formatter)
-
-            self.logger.addHandler(file_handler)
-        except (PermissionError, OSError) as e:
-            # If we can't write to log file (permission denied, disk full, etc.),
-            # fall back to console handler to prevent application crash
-            # Log the error to console/stderr instead
-            console_handler = logging.StreamHandler(sys.stderr)
-            console_handler.setLevel(logging.WARNING)
-            formatter = logging.Formatter(
-                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            )
-            console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
-            self.logger.warning(
-                f"PaymentLogger: Cannot write to log file {log_file} due to: {e}. "
-                f"Falling back to console logging. Please check file permissions."
-            )
-        except Exception as e:
-            # Catch any other unexpected errors in logger initialization
-            # Use NullHandler to prevent crashes
-            self.logger.addHandler(logging.NullHandler())
-            import sys
-
-            sys.stderr.write(
-                f"PaymentLogger: Unexpected error initializing file handler for {log_file}: {e}\n"
-            )
-
-    def _ensure_logs_directory(self) -> str:
-        """Ensure logs directory exists with year/business/provider subfolders."""
-        current_year = self.log_datetime.strftime("%Y")
-        logs_dir = os.path.join(
+        self.log_file_path = os.path.join(
             settings.BASE_DIR,
             "logs",
             "payments",
-            current_year,
+            self.log_datetime.strftime("%Y"),
             self.business_slug,
             self.provider,
+            f"{month_name}.log",
         )
-        try:
-            os.makedirs(logs_dir, exist_ok=True)
-        except (PermissionError, OSError) as e:
-            # If directory creation fails, return the directory path anyway
-            # File handler creation will handle the error gracefully
-            sys.stderr.write(
-                f"PaymentLogger: Cannot create log directory {logs_dir} due to: {e}\n"
-            )
-            # Return the directory path anyway - file handler creation will handle the error
-        return logs_dir
+        self.logger = _get_payment_logger()
+
+    def _log(self, level: int, event: str, **data):
+        """
+        Queue one JSON line for this logger's file. The line is serialized
+        here so later changes to the caller's dicts cannot alter it.
+        """
+        line = json.dumps(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "level": logging.getLevelName(level),
+                "provider": self.provider,
+                "business": self.business_slug,
+                "transaction_id": self.transaction_id,
+                "event": event,
+                **data,
+            },
+            default=str,
+        )
+        self.logger.log(level, line, extra={"payment_log_file": self.log_file_path})
 
     def log_transaction_start(
         self,
@@ -145,22 +217,13 @@ class PaymentLogger:
         additional_data: Dict[str, Any] = None,
     ):
         """Log the start of a payment transaction."""
-
-        self.logger.info(f"=== PAYMENT TRANSACTION STARTED ===")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Provider: {self.provider}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Transaction Type: {transaction_type}"
-        )
-        self.logger.info(f"[TX_ID: {self.transaction_id or 'N/A'}] Amount: {amount}")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Additional Data: {json.dumps(_strip_business_id(additional_data) or {}, indent=2)}"
+        self._log(
+            logging.INFO,
+            "TRANSACTION_STARTED",
+            transaction_type=transaction_type,
+            amount=amount,
+            additional_data=_strip_business_id(additional_data),
         )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
-        )
-        self.logger.info(f"==========================================")
 
     def log_api_request(
         self,
@@ -170,21 +233,14 @@ class PaymentLogger:
         headers: Dict[str, str] = None,
     ):
         """Log outgoing API requests to payment gateways."""
-        self.logger.info(f"--- API REQUEST ---")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Endpoint: {endpoint}"
-        )
-        self.logger.info(f"[TX_ID: {self.transaction_id or 'N/A'}] Method: {method}")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Headers: {json.dumps(headers or {}, indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Payload: {json.dumps(payload, indent=2)}"
+        self._log(
+            logging.INFO,
+            "API_REQUEST",
+            endpoint=endpoint,
+            method=method,
+            headers=headers or {},
+            payload=payload,
         )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
-        )
-        self.logger.info(f"-------------------")
 
     def log_api_response(
         self,
@@ -193,47 +249,25 @@ class PaymentLogger:
         response_time_ms: float = None,
     ):
         """Log API responses from payment gateways."""
-        self.logger.info(f"--- API RESPONSE ---")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Status Code: {status_code}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Response Time: {response_time_ms}ms"
-            if response_time_ms
-            else f"[TX_ID: {self.transaction_id or 'N/A'}] Response Time: N/A"
+        self._log(
+            logging.INFO,
+            "API_RESPONSE",
+            status_code=status_code,
+            response_time_ms=response_time_ms,
+            response_data=response_data,
         )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Response Data: {json.dumps(response_data, indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
-        )
-        self.logger.info(f"--------------------")
 
     def log_webhook_received(
         self, webhook_data: Dict[str, Any], source: str = "unknown"
     ):
         """Log incoming webhook data."""
-        self.logger.info(f"--- WEBHOOK RECEIVED ---")
-        self.logger.info(f"[TX_ID: {self.transaction_id or 'N/A'}] Source: {source}")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Webhook Data: {json.dumps(webhook_data, indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
+        self._log(
+            logging.INFO, "WEBHOOK_RECEIVED", source=source, webhook_data=webhook_data
         )
-        self.logger.info(f"-----------------------")
 
     def log_webhook_processing(self, step: str, data: Dict[str, Any]):
         """Log webhook processing steps."""
-        self.logger.info(f"--- WEBHOOK PROCESSING: {step} ---")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Step Data: {json.dumps(data, indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
-        )
-        self.logger.info(f"--------------------------------")
+        self._log(logging.INFO, "WEBHOOK_PROCESSING", step=step, data=data)
 
     def log_transaction_update(
         self,
@@ -243,23 +277,14 @@ class PaymentLogger:
         additional_data: Dict[str, Any] = None,
     ):
         """Log transaction status updates."""
-        self.logger.info(f"--- TRANSACTION STATUS UPDATE ---")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Old Status: {old_status}"
+        self._log(
+            logging.INFO,
+            "TRANSACTION_STATUS_UPDATE",
+            old_status=old_status,
+            new_status=new_status,
+            reason=reason or "No reason provided",
+            additional_data=_strip_business_id(additional_data),
         )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] New Status: {new_status}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Reason: {reason or 'No reason provided'}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Additional Data: {json.dumps(_strip_business_id(additional_data) or {}, indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
-        )
-        self.logger.info(f"----------------------------------")
 
     def log_error(
         self,
@@ -269,60 +294,41 @@ class PaymentLogger:
         context: Dict[str, Any] = None,
     ):
         """Log errors and exceptions."""
-        self.logger.error(f"--- ERROR OCCURRED ---")
-        self.logger.error(f"Error Type: {error_type}")
-        self.logger.error(f"Error Message: {error_message}")
-        self.logger.error(f"Exception Details: {exception_details or 'N/A'}")
-        self.logger.error(
-            f"Context: {json.dumps(_strip_business_id(context) or {}, indent=2)}"
+        self._log(
+            logging.ERROR,
+            "ERROR",
+            error_type=error_type,
+            error_message=error_message,
+            exception_details=exception_details,
+            context=_strip_business_id(context),
         )
-        self.logger.error(f"Timestamp: {datetime.now().isoformat()}")
-        self.logger.error(f"Transaction ID: {self.transaction_id}")
-        self.logger.error(f"Provider: {self.provider}")
-        self.logger.error(f"---------------------")
 
     def log_warning(self, warning_message: str, context: Dict[str, Any] = None):
         """Log warnings."""
-        self.logger.warning(f"--- WARNING ---")
-        self.logger.warning(f"Message: {warning_message}")
-        self.logger.warning(
-            f"Context: {json.dumps(_strip_business_id(context) or {}, indent=2)}"
+        self._log(
+            logging.WARNING,
+            "WARNING",
+            message=warning_message,
+            context=_strip_business_id(context),
         )
-        self.logger.warning(f"Timestamp: {datetime.now().isoformat()}")
-        self.logger.warning(f"Transaction ID: {self.transaction_id}")
-        self.logger.warning(f"Provider: {self.provider}")
-        self.logger.warning(f"---------------")
 
     def log_business_logic(self, action: str, data: Dict[str, Any]):
         """Log business logic operations."""
-        self.logger.info(f"--- BUSINESS LOGIC: {action} ---")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Action Data: {json.dumps(_strip_business_id(data), indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
+        self._log(
+            logging.INFO,
+            "BUSINESS_LOGIC",
+            action=action,
+            data=_strip_business_id(data),
         )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Provider: {self.provider}"
-        )
-        self.logger.info(f"------------------------------")
 
     def log_transaction_completion(self, final_status: str, summary: Dict[str, Any]):
         """Log transaction completion."""
-        self.logger.info(f"=== PAYMENT TRANSACTION COMPLETED ===")
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Final Status: {final_status}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Provider: {self.provider}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Summary: {json.dumps(_strip_business_id(summary), indent=2)}"
-        )
-        self.logger.info(
-            f"[TX_ID: {self.transaction_id or 'N/A'}] Timestamp: {datetime.now().isoformat()}"
+        self._log(
+            logging.INFO,
+            "TRANSACTION_COMPLETED",
+            final_status=final_status,
+            summary=_strip_business_id(summary),
         )
-        self.logger.info(f"=====================================")
 
     def get_log_file_path(self) -> str:
         """Get the current log file path."""
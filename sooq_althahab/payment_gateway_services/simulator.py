@@ -0,0 +1,438 @@
+"""
+Local Credimax / Benefit Pay simulator for development and load tests.
+
+Implements the gateway endpoints the platform calls, with state kept in
+memory:
+
+- Credimax: ``session`` (create/update, including hosted checkout), ``token``,
+  ``order/<id>/transaction/<id>`` (PAY/VERIFY), ``order/<id>`` (the order
+  status poller) and ``agreement/<id>``.
+- Benefit Pay: the payment init request. The simulator decrypts ``trandata``
+  with the configured resource key and posts an encrypted notification back
+  to the ``notificationURL`` it contained.
+
+Hosted checkout sessions are "paid" by the simulator after
+``webhook_delay_ms``: the order becomes visible to the poller and a Credimax
+notification is posted to ``credimax_webhook_url`` when one is configured.
+
+Latency, HTTP error rate and decline rate are configurable (see
+``SimulatorConfig.from_env``). Two ways to run it:
+
+- In-process: ``install_in_process()`` mounts a requests adapter on the
+  pooled "credimax" and "benefit" transports, so calls to
+  ``CREDIMAX_BASE_URL`` / ``BENEFIT_PAYMENT_URL`` never leave the process.
+- As a service::
+
+      DJANGO_SETTINGS_MODULE=sooq_althahab.settings \
+          uvicorn sooq_althahab.payment_gateway_services.simulator:app --port 8100
+
+  with ``CREDIMAX_BASE_URL=http://localhost:8100/credimax/`` and
+  ``BENEFIT_PAYMENT_URL=http://localhost:8100/benefit/payment`` set for the
+  application.
+
+Never enable it in production: it approves every payment it does not
+randomly decline.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from sooq_althahab.http_transport import get_transport
+from sooq_althahab.payment_gateway_services.benefit.benefit_client import (
+    BenefitPayClient,
+)
+
+logger = logging.getLogger(__name__)
+
+# The platform's callbacks are sent with a plain session so they are not
+# routed back into the simulator adapter.
+_callback_session = requests.Session()
+
+
+class SimulatorConfig:
+    def __init__(
+        self,
+        latency_ms=50,
+        latency_jitter_ms=20,
+        error_rate=0.0,
+        decline_rate=0.0,
+        webhook_delay_ms=200,
+        credimax_webhook_url=None,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.webhook_delay_ms = webhook_delay_ms
+        self.credimax_webhook_url = credimax_webhook_url
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency_ms=float(os.getenv("PAYMENT_SIMULATOR_LATENCY_MS", "50")),
+            latency_jitter_ms=float(
+                os.getenv("PAYMENT_SIMULATOR_LATENCY_JITTER_MS", "20")
+            ),
+            error_rate=float(os.getenv("PAYMENT_SIMULATOR_ERROR_RATE", "0")),
+            decline_rate=float(os.getenv("PAYMENT_SIMULATOR_DECLINE_RATE", "0")),
+            webhook_delay_ms=float(
+                os.getenv("PAYMENT_SIMULATOR_WEBHOOK_DELAY_MS", "200")
+            ),
+            credimax_webhook_url=os.getenv("PAYMENT_SIMULATOR_CREDIMAX_WEBHOOK_URL"),
+        )
+
+    def get_latency(self):
+        """Simulated gateway latency in seconds."""
+        jitter = random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        return max(self.latency_ms + jitter, 0) / 1000
+
+
+class GatewaySimulator:
+    """Framework-independent request handling shared by both run modes."""
+
+    def __init__(self, config=None):
+        self.config = config or SimulatorConfig.from_env()
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.orders = {}
+        self.agreements = {}
+        self.callbacks_sent = 0
+        self.callback_errors = 0
+
+    def handle(self, gateway, method, path, body):
+        """
+        Handle one gateway call.
+
+        Args:
+            gateway (str): "credimax" or "benefit".
+            method (str): HTTP method.
+            path (str): Path below the gateway base URL, e.g. "order/txn123".
+            body (bytes): Raw request body.
+
+        Returns:
+            tuple: (status code, JSON-serializable response body)
+        """
+        if random.random() < self.config.error_rate:
+            return 503, {"result": "ERROR", "error": {"cause": "SERVER_BUSY"}}
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {"result": "ERROR", "error": {"cause": "INVALID_REQUEST"}}
+
+        if gateway == "benefit":
+            return self.benefit_payment(payload)
+        return self.credimax(method.upper(), path.strip("/").split("/"), payload)
+
+    # Credimax
+
+    def credimax(self, method, parts, payload):
+        resource = parts[0] if parts else ""
+        if resource == "session" and method == "POST":
+            return self.create_session(payload)
+        if resource == "session" and len(parts) == 2 and method == "PUT":
+            return self.update_session(parts[1], payload)
+        if resource == "token" and method == "POST":
+            return 201, {
+                "result": "SUCCESS",
+                "status": "VALID",
+                "token": f"9{random.randint(10**14, 10**15 - 1)}",
+                "sourceOfFunds": {
+                    "type": "CARD",
+                    "provided": {"card": {"number": "512345xxxxxx0008"}},
+                },
+            }
+        if resource == "order" and len(parts) == 4 and method == "PUT":
+            return self.order_transaction(parts[1], parts[3], payload)
+        if resource == "order" and len(parts) == 2 and method == "GET":
+            return self.retrieve_order(parts[1])
+        if resource == "agreement" and len(parts) == 2:
+            with self.lock:
+                agreement = self.agreements.setdefault(parts[1], {"id": parts[1]})
+                if method == "PUT":
+                    agreement.update(payload.get("agreement", {}))
+                    agreement["sourceOfFunds"] = payload.get("sourceOfFunds", {})
+            return 200, {"result": "SUCCESS", "agreement": agreement}
+        return 404, {"result": "ERROR", "error": {"cause": "INVALID_REQUEST"}}
+
+    def create_session(self, payload):
+        session_id = f"SESSION{uuid.uuid4().hex[:24]}"
+        success_indicator = uuid.uuid4().hex[:16]
+        with self.lock:
+            self.sessions[session_id] = payload
+        order = payload.get("order")
+        if payload.get("apiOperation") == "INITIATE_CHECKOUT" and order:
+            # The simulated payer completes the hosted checkout page.
+            self.schedule(self.complete_checkout, order)
+        return 201, {
+            "result": "SUCCESS",
+            "merchant": settings.CREDIMAX_MERCHANT_ID,
+            "session": {"id": session_id, "updateStatus": "SUCCESS", "version": "1"},
+            "successIndicator": success_indicator,
+        }
+
+    def update_session(self, session_id, payload):
+        with self.lock:
+            self.sessions.setdefault(session_id, {}).update(payload)
+        return 200, {"session": {"id": session_id, "updateStatus": "SUCCESS"}}
+
+    def build_order(self, order_id, amount, currency, api_operation):
+        declined = random.random() < self.config.decline_rate
+        transaction_type = "VERIFICATION" if api_operation == "VERIFY" else "PAYMENT"
+        if declined:
+            status, result, gateway_code = "DECLINED", "FAILURE", "DECLINED"
+        elif transaction_type == "VERIFICATION":
+            status, result, gateway_code = "VERIFIED", "SUCCESS", "APPROVED"
+        else:
+            status, result, gateway_code = "CAPTURED", "SUCCESS", "APPROVED"
+        captured = amount if status == "CAPTURED" else "0"
+        return {
+            "id": order_id,
+            "amount": amount,
+            "currency": currency or settings.CREDIMAX_CURRENCY,
+            "status": status,
+            "result": result,
+            "totalAuthorizedAmount": captured,
+            "totalCapturedAmount": captured,
+            "transaction": [
+                {
+                    "result": result,
+                    "order": {"id": order_id, "amount": amount, "status": status},
+                    "response": {
+                        "gatewayCode": gateway_code,
+                        "acquirerMessage": (
+                            "Simulated decline" if declined else "Approved"
+                        ),
+                    },
+                    "transaction": {
+                        "id": uuid.uuid4().hex[:12],
+                        "type": transaction_type,
+                        "amount": amount,
+                    },
+                }
+            ],
+        }
+
+    def order_transaction(self, order_id, transaction_id, payload):
+        order_payload = payload.get("order", {})
+        order = self.build_order(
+            order_id,
+            str(Decimal(order_payload.get("amount") or "0")),
+            order_payload.get("currency"),
+            payload.get("apiOperation"),
+        )
+        with self.lock:
+            self.orders[order_id] = order
+        latest = order["transaction"][-1]
+        return 201, {
+            **latest,
+            "order": {**latest["order"], "currency": order["currency"]},
+        }
+
+    def retrieve_order(self, order_id):
+        with self.lock:
+            order = self.orders.get(order_id)
+        if order is None:
+            return 400, {
+                "result": "ERROR",
+                "error": {
+                    "cause": "INVALID_REQUEST",
+                    "explanation": f"Unable to find order {order_id}",
+                },
+            }
+        return 200, order
+
+    def complete_checkout(self, order_payload):
+        order_id = order_payload["id"]
+        order = self.build_order(
+            order_id,
+            str(order_payload.get("amount") or "0"),
+            order_payload.get("currency"),
+            "PAY",
+        )
+        with self.lock:
+            self.orders[order_id] = order
+        if self.config.credimax_webhook_url:
+            notification = order["transaction"][-1]
+            self.send_callback(
+                self.config.credimax_webhook_url,
+                json=notification,
+                headers={
+                    "X-Notification-Id": uuid.uuid4().hex,
+                    "X-Notification-Attempt": "1",
+                    "X-Notification-Secret": settings.CREDIMAX_WEBHOOK_SECRET or "",
+                },
+            )
+
+    # Benefit Pay
+
+    def benefit_payment(self, payload):
+        try:
+            trandata = payload[0]["trandata"]
+            request_data = json.loads(BenefitPayClient.decrypt(trandata))[0]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return 200, [{"status": "0", "errorText": "Invalid trandata"}]
+
+        payment_id = str(random.randint(10**17, 10**18 - 1))
+        if request_data.get("notificationURL"):
+            self.schedule(self.send_benefit_notification, request_data, payment_id)
+        return 200, [
+            {
+                "status": "1",
+                "result": f"{payment_id}:https://simulator.local/benefit/pay?PaymentID={payment_id}",
+            }
+        ]
+
+    def send_benefit_notification(self, request_data, payment_id):
+        declined = random.random() < self.config.decline_rate
+        notification = [
+            {
+                "paymentId": payment_id,
+                "trackId": request_data.get("trackId"),
+                "amt": request_data.get("amt"),
+                "result": "NOT CAPTURED" if declined else "CAPTURED",
+                "authCode": "" if declined else str(random.randint(100000, 999999)),
+                "ref": uuid.uuid4().hex[:12],
+            }
+        ]
+        self.send_callback(
+            request_data["notificationURL"],
+            data={"trandata": BenefitPayClient.encrypt(json.dumps(notification))},
+        )
+
+    # Callbacks
+
+    def schedule(self, function, *args):
+        timer = threading.Timer(self.config.webhook_delay_ms / 1000, function, args)
+        timer.daemon = True
+        timer.start()
+
+    def send_callback(self, url, **kwargs):
+        try:
+            _callback_session.post(url, timeout=10, **kwargs).raise_for_status()
+            self.callbacks_sent += 1
+        except requests.RequestException as e:
+            self.callback_errors += 1
+            logger.warning(f"[Simulator] Callback to {url} failed: {e}")
+
+
+class SimulatorAdapter(BaseAdapter):
+    """requests adapter that answers gateway calls from a ``GatewaySimulator``."""
+
+    def __init__(self, simulator, gateway, base_url):
+        super().__init__()
+        self.simulator = simulator
+        self.gateway = gateway
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        time.sleep(self.simulator.config.get_latency())
+        path = request.url[len(self.base_url) :].split("?")[0]
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        status_code, data = self.simulator.handle(
+            self.gateway, request.method, path, body
+        )
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = HTTPStatus(status_code).phrase
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response._content = json.dumps(data).encode()
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install_in_process(simulator=None):
+    """
+    Route this process's Credimax and Benefit Pay calls to a simulator.
+
+    Returns:
+        GatewaySimulator: The simulator answering the calls.
+    """
+    simulator = simulator or GatewaySimulator()
+    routes = {
+        "credimax": settings.CREDIMAX_BASE_URL,
+        "benefit": settings.BENEFIT_PAYMENT_URL,
+    }
+    for gateway, base_url in routes.items():
+        if not base_url:
+            continue
+        get_transport(gateway).session.mount(
+            base_url, SimulatorAdapter(simulator, gateway, base_url)
+        )
+    return simulator
+
+
+class SimulatorASGIApp:
+    """
+    Minimal ASGI app serving ``/credimax/<path>`` and ``/benefit/payment``.
+    """
+
+    def __init__(self, simulator=None):
+        self._simulator = simulator
+
+    @property
+    def simulator(self):
+        if self._simulator is None:
+            self._simulator = GatewaySimulator()
+        return self._simulator
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        gateway, _, path = urlsplit(scope["path"]).path.strip("/").partition("/")
+        await asyncio.sleep(self.simulator.config.get_latency())
+        if gateway in ("credimax", "benefit"):
+            status_code, data = await asyncio.to_thread(
+                self.simulator.handle, gateway, scope["method"], path, body
+            )
+        else:
+            status_code, data = 404, {"result": "ERROR"}
+
+        content = json.dumps(data).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(content)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+
+app = SimulatorASGIApp()
@@ -0,0 +1,232 @@
+"""
+Cached presigned URLs for S3 object references.
+
+Serializers present every image, attachment, signature and logo through
+``get_presigned_url_from_s3``, which ran a botocore signing operation and a
+MIME type lookup per object on every response. This module keeps the signed
+URL of each object key:
+
+- in a per-process LRU of ``PRESIGNED_URL_LOCAL_CACHE_SIZE`` keys;
+- in Redis (``s3:presigned:<key>``), shared by every web worker, so the same
+  object gets the same URL from any process and browsers can cache it;
+
+for ``PRESIGNED_URL_CACHE_TTL`` seconds, capped at half of
+``S3_FILE_EXPIRATION_DURATION`` so a cached URL is always valid for at least
+half of its lifetime.
+
+``sign_s3_urls`` resolves a list of keys with one Redis round trip.
+``PresignedUrlListSerializer`` uses it to sign the object keys of a whole
+page (``Meta.presigned_url_fields``) before the rows are serialized, and
+shares them through the serializer context. Redis errors fall back to
+signing in process.
+"""
+
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models.manager import BaseManager
+from rest_framework.serializers import ListSerializer
+
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+PRESIGNED_URL_KEY_PREFIX = "s3:presigned:"
+
+_local_cache = OrderedDict()
+_local_cache_lock = threading.Lock()
+
+
+def get_cache_ttl():
+    return min(
+        settings.PRESIGNED_URL_CACHE_TTL, settings.S3_FILE_EXPIRATION_DURATION // 2
+    )
+
+
+@lru_cache(maxsize=256)
+def _guess_file_type(extension):
+    file_type, _ = mimetypes.guess_type(f"file{extension}")
+    return file_type or "application/octet-stream"
+
+
+def _sign(object_name):
+    """Sign ``object_name`` in this process. Returns the URL data and expiry."""
+    from sooq_althahab.utils import s3
+
+    url = s3.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": object_name},
+        ExpiresIn=settings.S3_FILE_EXPIRATION_DURATION,
+    )
+    # Infer file type based on filename extension
+    file_type = _guess_file_type(os.path.splitext(object_name)[1].lower())
+    return {"url": url, "file_type": file_type}, time.time() + get_cache_ttl()
+
+
+def _get_local(object_names):
+    now = time.time()
+    found = {}
+    with _local_cache_lock:
+        for object_name in object_names:
+            cached = _local_cache.get(object_name)
+            if cached is None:
+                continue
+            if cached[0] <= now:
+                del _local_cache[object_name]
+                continue
+            _local_cache.move_to_end(object_name)
+            found[object_name] = cached[1]
+    return found
+
+
+def _set_local(entries):
+    """Keep ``{object_name: (url data, expires_at)}`` in the process LRU."""
+    with _local_cache_lock:
+        for object_name, (data, expires_at) in entries.items():
+            _local_cache[object_name] = (expires_at, data)
+            _local_cache.move_to_end(object_name)
+        while len(_local_cache) > settings.PRESIGNED_URL_LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+
+
+def _get_shared(object_names):
+    """Entries of ``object_names`` found in Redis, as ``(data, expires_at)``."""
+    try:
+        values = get_redis_connection().mget(
+            [f"{PRESIGNED_URL_KEY_PREFIX}{name}" for name in object_names]
+        )
+    except Exception as e:
+        logger.warning(f"[Presigned URLs] Redis cache unavailable: {e}")
+        return {}
+
+    found = {}
+    now = time.time()
+    for object_name, value in zip(object_names, values):
+        if value is None:
+            continue
+        entry = json.loads(value)
+        if entry["expires_at"] > now:
+            found[object_name] = (entry["data"], entry["expires_at"])
+    return found
+
+
+def _set_shared(entries):
+    try:
+        pipeline = get_redis_connection().pipeline(transaction=False)
+        for object_name, (data, expires_at) in entries.items():
+            pipeline.set(
+                f"{PRESIGNED_URL_KEY_PREFIX}{object_name}",
+                json.dumps({"data": data, "expires_at": expires_at}),
+                ex=max(int(expires_at - time.time()), 1),
+            )
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"[Presigned URLs] Could not cache URLs: {e}")
+
+
+def sign_s3_urls(object_names):
+    """
+    Presigned URLs of ``object_names``, from the process cache, then Redis,
+    then signed here.
+
+    Returns:
+        dict: ``{object_name: {"url": ..., "file_type": ...}}`` for every
+        object that could be signed; empty names are skipped.
+    """
+    object_names = list(dict.fromkeys(name for name in object_names if name))
+    if not object_names:
+        return {}
+
+    urls = _get_local(object_names)
+    missing = [name for name in object_names if name not in urls]
+    if not missing:
+        return urls
+
+    shared = _get_shared(missing)
+    signed = {}
+    for object_name in missing:
+        if object_name in shared:
+            continue
+        try:
+            signed[object_name] = _sign(object_name)
+        except Exception:
+            logger.error(f"Error generating presigned URL for object {object_name}")
+
+    if signed:
+        _set_shared(signed)
+    entries = {**shared, **signed}
+    _set_local(entries)
+    urls.update({name: data for name, (data, _) in entries.items()})
+    return urls
+
+
+def get_presigned_url(object_name):
+    """The presigned URL data of one object, or None."""
+    if not object_name:
+        return None
+    return sign_s3_urls([object_name]).get(object_name)
+
+
+def _collect_values(value, object_names):
+    if isinstance(value, str) and value:
+        object_names.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_values(item, object_names)
+
+
+def _collect_object_names(instance, path, object_names):
+    """
+    Add the object keys found at ``path`` ("logo", "business.logo",
+    "images.image") to ``object_names``; a JSON field ("images.derivatives")
+    adds every key it holds. Only relations already loaded
+    (``select_related``/``prefetch_related``) are followed, so collecting never
+    queries the database.
+    """
+    name, _, rest = path.partition(".")
+    if not rest:
+        _collect_values(getattr(instance, name, None), object_names)
+        return
+
+    prefetched = getattr(instance, "_prefetched_objects_cache", {})
+    state = getattr(instance, "_state", None)
+    if name in prefetched:
+        related = prefetched[name]
+    elif state is not None and name in state.fields_cache:
+        related = [state.fields_cache[name]]
+    else:
+        return
+    for item in related:
+        if item is not None:
+            _collect_object_names(item, rest, object_names)
+
+
+class PresignedUrlListSerializer(ListSerializer):
+    """
+    List serializer that signs the object keys of every row up front.
+
+    Set it as ``Meta.list_serializer_class`` and name the key paths in
+    ``Meta.presigned_url_fields``. The URLs are signed in one batch, kept in
+    ``context["presigned_urls"]`` and in the process cache, so the row
+    serializers' ``get_presigned_url_from_s3`` calls do not sign again.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        paths = getattr(self.child.Meta, "presigned_url_fields", ())
+        if items and paths:
+            object_names = []
+            for item in items:
+                for path in paths:
+                    _collect_object_names(item, path, object_names)
+            urls = sign_s3_urls(object_names)
+            if isinstance(getattr(self.root, "_context", None), dict):
+                self.root._context.setdefault("presigned_urls", {}).update(urls)
+        return super().to_representation(items)
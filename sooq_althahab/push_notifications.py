@@ -0,0 +1,132 @@
+"""
+FCM push delivery in multicast batches.
+
+Device tokens are de-duplicated and split into batches of up to
+``FCM_MULTICAST_BATCH_SIZE`` (FCM's limit is 500). Each batch is one
+``send_each_for_multicast`` call, which already sends its messages
+concurrently with one thread per token, so batches are sent one after
+another: a dispatch never runs more than ``FCM_MULTICAST_BATCH_SIZE``
+threads. Tokens are pruned only when FCM reports them as unregistered or
+belonging to another sender, not on transient errors.
+"""
+
+import logging
+
+from django.conf import settings
+from firebase_admin import exceptions
+from firebase_admin import messaging
+
+from account.models import FCMToken
+
+logger = logging.getLogger(__name__)
+
+FCM_MAX_MULTICAST_TOKENS = 500
+
+
+def build_multicast_message(tokens, title, body, data=None, web_push_config=None):
+    """Multicast message with the app's Android channel and iOS sound/badge."""
+    return messaging.MulticastMessage(
+        tokens=tokens,
+        notification=messaging.Notification(title=title, body=body),
+        webpush=web_push_config,
+        android=messaging.AndroidConfig(
+            notification=messaging.AndroidNotification(
+                channel_id="default"  # Setting the channel_id for Android notifications
+            )
+        ),
+        apns=messaging.APNSConfig(
+            headers={"apns-priority": "10"},
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(
+                    sound="notification_sound.wav",  # iOS sound file
+                    alert=messaging.ApsAlert(title=title, body=body),
+                    badge=1,
+                    content_available=True,
+                )
+            ),
+        ),
+        data=data,
+    )
+
+
+def is_invalid_token_error(error):
+    """Whether a per-token send error means the token will never work again."""
+    if isinstance(
+        error, (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+    ):
+        return True
+    # A malformed token is reported as INVALID_ARGUMENT, like a bad payload;
+    # only the former mentions the registration token.
+    return isinstance(error, exceptions.InvalidArgumentError) and (
+        "registration token" in str(error).lower()
+    )
+
+
+def send_push_batch(tokens, title, body, data=None, web_push_config=None):
+    """
+    Send one multicast batch.
+
+    Returns:
+        tuple: (success_count, failure_count, invalid_tokens)
+    """
+    try:
+        response = messaging.send_each_for_multicast(
+            build_multicast_message(tokens, title, body, data, web_push_config)
+        )
+    except Exception as e:
+        logger.error(f"[FCM] Batch of {len(tokens)} tokens failed: {e}")
+        return 0, len(tokens), []
+
+    invalid_tokens = [
+        token
+        for token, result in zip(tokens, response.responses)
+        if not result.success and is_invalid_token_error(result.exception)
+    ]
+    return response.success_count, response.failure_count, invalid_tokens
+
+
+def dispatch_push_notification(
+    device_tokens, title, body, data=None, web_push_config=None
+):
+    """
+    Push a notification to ``device_tokens`` in multicast batches and delete
+    the tokens FCM rejected as invalid.
+
+    Returns:
+        dict: Delivery totals (tokens, batches, success, failure, pruned).
+    """
+    tokens = list(dict.fromkeys(token for token in device_tokens if token))
+    batch_size = min(settings.FCM_MULTICAST_BATCH_SIZE, FCM_MAX_MULTICAST_TOKENS)
+    batches = [
+        tokens[start : start + batch_size]
+        for start in range(0, len(tokens), batch_size)
+    ]
+    stats = {
+        "tokens": len(tokens),
+        "batches": len(batches),
+        "success": 0,
+        "failure": 0,
+        "pruned": 0,
+    }
+    if not batches:
+        return stats
+
+    invalid_tokens = []
+    for index, batch in enumerate(batches):
+        success_count, failure_count, batch_invalid = send_push_batch(
+            batch, title, body, data, web_push_config
+        )
+        logger.info(
+            f"[FCM] Batch {index + 1}/{len(batches)}: {success_count} sent, "
+            f"{failure_count} failed, {len(batch_invalid)} invalid tokens."
+        )
+        stats["success"] += success_count
+        stats["failure"] += failure_count
+        invalid_tokens.extend(batch_invalid)
+
+    if invalid_tokens:
+        stats["pruned"], _ = FCMToken.objects.filter(
+            fcm_token__in=invalid_tokens
+        ).delete()
+        logger.info(f"[FCM] Deleted {stats['pruned']} invalid FCM tokens.")
+    return stats
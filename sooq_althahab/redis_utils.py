@@ -0,0 +1,25 @@
+from django.conf import settings
+from redis import ConnectionPool
+from redis import StrictRedis
+
+_connection_pool = None
+
+
+def get_redis_connection():
+    """
+    Return a Redis client backed by a process-wide connection pool.
+
+    Request-path callers (idempotency keys, counters, caches) share the pool
+    instead of opening a new TCP connection per call.
+    """
+    global _connection_pool
+
+    if _connection_pool is None:
+        _connection_pool = ConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB or 0,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return StrictRedis(connection_pool=_connection_pool)
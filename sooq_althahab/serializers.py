@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from sooq_althahab.uploads import UPLOAD_TARGETS
+
+
+class UploadCreateSerializer(serializers.Serializer):
+    """Declares a file to upload directly to S3."""
+
+    target = serializers.ChoiceField(choices=list(UPLOAD_TARGETS))
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+    parent_id = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    doc_type = serializers.CharField(max_length=25, required=False, allow_blank=True)
+
+
+class UploadPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1)
+    etag = serializers.CharField(max_length=100)
+
+
+class UploadCompleteSerializer(serializers.Serializer):
+    """The uploaded parts, with the ETag S3 returned for each."""
+
+    parts = UploadPartSerializer(many=True, allow_empty=False)
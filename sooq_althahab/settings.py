@@ -245,6 +245,13 @@ EMAIL_PORT = os.getenv("EMAIL_PORT")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL")
+# SMTP socket timeout, seconds a worker keeps its pooled SMTP connection
+# before reopening it, and emails sent per ``send_mail_batch`` task.
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "30"))
+EMAIL_CONNECTION_MAX_AGE = int(os.getenv("EMAIL_CONNECTION_MAX_AGE", "240"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+# Seconds an organization's inline email logo is cached in Redis.
+EMAIL_LOGO_CACHE_TTL = int(os.getenv("EMAIL_LOGO_CACHE_TTL", str(60 * 60 * 6)))
 
 # Organization Email Configuration
 ORGANIZATION_BILLING_EMAIL = os.getenv("ORGANIZATION_BILLING_EMAIL")
@@ -263,6 +270,24 @@ init_sentry()
 REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
 REDIS_PORT = os.getenv("REDIS_PORT", 6379)
 REDIS_DB = os.getenv("REDIS_DB")
+# Seconds before a request-path Redis call gives up (callers fall back).
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+
+# Outbound HTTP transport (sooq_althahab/http_transport.py) defaults: timeouts
+# in seconds, retries for idempotent calls, base backoff for jittered retries,
+# connection pool sizes, and the circuit breaker failure threshold and window
+# and how long it stays open before letting a probe request through.
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3")
+)
+CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", "300"))
+CIRCUIT_BREAKER_OPEN_DURATION = int(os.getenv("CIRCUIT_BREAKER_OPEN_DURATION", "30"))
 
 
 # Set up Channels Redis as the layer backend
@@ -284,6 +309,8 @@ CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
 CELERY_TASK_QUEUES = [
     Queue("default"),  # for email, notifications tasks
     Queue("metals_live_price"),  # for fetch_live_metal_prices
+    Queue("webhooks"),  # for process_webhook_event
+    Queue("pdf"),  # for render_pdf_job and emailed receipts
 ]
 
 CELERY_TASK_DEFAULT_QUEUE = "default"
@@ -291,9 +318,13 @@ CELERY_TASK_DEFAULT_QUEUE = "default"
 CELERY_TASK_ROUTES = {
     "sooq_althahab.tasks.fetch_live_metal_prices": {"queue": "metals_live_price"},
     "sooq_althahab.tasks.send_mail": {"queue": "default"},
+    "sooq_althahab.tasks.send_mail_batch": {"queue": "default"},
     "sooq_althahab.tasks.send_notification": {"queue": "default"},
+    "sooq_althahab.tasks.fan_out_notification_chunk": {"queue": "default"},
     "sooq_althahab.tasks.send_purchase_request_email": {"queue": "default"},
-    "sooq_althahab.tasks.send_receipt_to_mail": {"queue": "default"},
+    "sooq_althahab.tasks.send_receipt_to_mail": {"queue": "pdf"},
+    "sooq_althahab.tasks.render_pdf_job": {"queue": "pdf"},
+    "sooq_althahab.tasks.send_subscription_billing_mail": {"queue": "pdf"},
     "sooq_althahab.payment_gateway_services.credimax.subscription.tasks.process_subscription_fee_recurring_payment": {
         "queue": "default"
     },
@@ -303,10 +334,25 @@ CELERY_TASK_ROUTES = {
     "sooq_althahab.payment_gateway_services.credimax.subscription.tasks.process_commission_recurring_payment": {
         "queue": "default"
     },
+    "sooq_althahab.payment_gateway_services.credimax.subscription.tasks.process_billing_run_chunk": {
+        "queue": "default"
+    },
+    "sooq_althahab.payment_gateway_services.credimax.subscription.tasks.finalize_stale_billing_runs": {
+        "queue": "default"
+    },
     "sooq_althahab.tasks.close_replacement_musharakah_contract_request": {
         "queue": "default"
     },
     "sooq_althahab.tasks.send_termination_reciept_mail": {"queue": "default"},
+    "sooq_althahab.tasks.export_admin_report": {"queue": "default"},
+    "sooq_althahab.tasks.send_wallet_transaction_status_updates": {"queue": "default"},
+    "sooq_althahab.tasks.process_webhook_event": {"queue": "webhooks"},
+    "sooq_althahab.tasks.requeue_webhook_events": {"queue": "default"},
+    "sooq_althahab.tasks.reconcile_unread_notification_counts": {"queue": "default"},
+    "sooq_althahab.tasks.flush_admin_notifications": {"queue": "default"},
+    "sooq_althahab.tasks.send_admin_notification_digests": {"queue": "default"},
+    "sooq_althahab.tasks.abort_stale_uploads": {"queue": "default"},
+    "sooq_althahab.tasks.generate_image_derivatives": {"queue": "default"},
 }
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
@@ -350,6 +396,12 @@ CELERY_BEAT_SCHEDULE = {
     #     "schedule": crontab(day_of_month=1, month_of_year=1, hour=2, minute=0),  # January 1st at 2:00 AM
     #     "options": {"queue": "default"},
     # },
+    # Close billing runs left RUNNING by a chunk worker that died
+    "finalize_stale_billing_runs": {
+        "task": "sooq_althahab.payment_gateway_services.credimax.subscription.tasks.finalize_stale_billing_runs",
+        "schedule": crontab(minute=45),  # Every hour at minute 45
+        "options": {"queue": "default"},
+    },
     # Task to manage subscription expiration notifications (notifies users before expiry)
     "manage_subscription_expiration_notifications": {
         "task": "sooq_althahab.tasks.manage_subscription_expiration_notifications",
@@ -374,6 +426,38 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=0, hour=0),  # Every day at 12.00 AM midnight
         "options": {"queue": "default"},
     },
+    # Abort direct-to-S3 multipart uploads that were never completed
+    "abort_stale_uploads": {
+        "task": "sooq_althahab.tasks.abort_stale_uploads",
+        "schedule": crontab(minute=15),  # Every hour at minute 15
+        "options": {"queue": "default"},
+    },
+    # Drop database-fallback idempotency keys past their replay window
+    "purge_expired_idempotency_keys": {
+        "task": "sooq_althahab.tasks.purge_expired_idempotency_keys",
+        "schedule": crontab(minute=30, hour=3),  # Every day at 3:30 AM
+        "options": {"queue": "default"},
+    },
+    # Re-queue stored webhook events whose enqueue or worker was lost
+    "requeue_webhook_events": {
+        "task": "sooq_althahab.tasks.requeue_webhook_events",
+        "schedule": crontab(minute="*/5"),  # Every 5 minutes
+        "options": {"queue": "default"},
+    },
+    # Correct Redis unread notification counters that drifted from the DB
+    "reconcile_unread_notification_counts": {
+        "task": "sooq_althahab.tasks.reconcile_unread_notification_counts",
+        "schedule": crontab(minute=15),  # Every hour
+        "options": {"queue": "default"},
+    },
+    # Daily digest of admin notification types configured for digest mode
+    "send_admin_notification_digests": {
+        "task": "sooq_althahab.tasks.send_admin_notification_digests",
+        "schedule": crontab(
+            hour=int(os.getenv("ADMIN_NOTIFICATION_DIGEST_HOUR", "6")), minute=0
+        ),
+        "options": {"queue": "default"},
+    },
 }
 # Gold API configurations
 GOLD_API_BASE_URL = os.getenv("GOLD_API_BASE_URL")
@@ -399,6 +483,35 @@ SHUFTI_CLIENT_ID = os.getenv("SHUFTI_CLIENT_ID")
 SHUFTI_SECRET_KEY = os.getenv("SHUFTI_SECRET_KEY")
 
 S3_FILE_EXPIRATION_DURATION = 3600  # Expiration time for AWS s3 presigned url (seconds)
+# Seconds a presigned URL is reused (capped at half its lifetime) and keys
+# kept per process; URLs are shared between processes through Redis.
+PRESIGNED_URL_CACHE_TTL = int(os.getenv("PRESIGNED_URL_CACHE_TTL", "1500"))
+PRESIGNED_URL_LOCAL_CACHE_SIZE = int(
+    os.getenv("PRESIGNED_URL_LOCAL_CACHE_SIZE", "4096")
+)
+# Seconds an organization's invoice header/footer fields and presigned logo
+# URL are reused across renders (capped at half the presigned URL lifetime).
+BILLING_FRAGMENT_CACHE_TTL = int(os.getenv("BILLING_FRAGMENT_CACHE_TTL", "600"))
+# Long-lived WeasyPrint processes per web process (0 renders inline) and
+# seconds a request waits for its PDF.
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_TIMEOUT = int(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+# Stored receipt/invoice PDFs: storage ("s3", or "local" under MEDIA_ROOT),
+# key prefix, version to bump when output changes without a template change
+# (e.g. a WeasyPrint upgrade), and whether downloads redirect to S3.
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "1") == "1"
+PDF_CACHE_STORAGE = os.getenv(
+    "PDF_CACHE_STORAGE", "s3" if AWS_STORAGE_BUCKET_NAME else "local"
+)
+PDF_CACHE_PREFIX = os.getenv("PDF_CACHE_PREFIX", "pdf-cache")
+PDF_CACHE_VERSION = os.getenv("PDF_CACHE_VERSION", "1")
+PDF_CACHE_REDIRECT = os.getenv("PDF_CACHE_REDIRECT", "0") == "1"
+# Download PDFs rendered on the "pdf" queue: seconds a job's status is kept,
+# unfinished jobs allowed per user, and the task's soft/hard time limits.
+PDF_JOB_TTL = int(os.getenv("PDF_JOB_TTL", "3600"))
+PDF_JOB_MAX_ACTIVE_PER_USER = int(os.getenv("PDF_JOB_MAX_ACTIVE_PER_USER", "3"))
+PDF_JOB_SOFT_TIME_LIMIT = int(os.getenv("PDF_JOB_SOFT_TIME_LIMIT", "90"))
+PDF_JOB_TIME_LIMIT = int(os.getenv("PDF_JOB_TIME_LIMIT", "120"))
 
 # Firebase configurations
 FIREBASE_APP = (
@@ -494,6 +607,85 @@ CREDIMAX_CHECKOUT_TIMEOUT_PERIOD_IN_SECONDS = os.getenv(
 CREDIMAX_STALE_TRANSACTION_TIMEOUT_MINUTES = int(
     os.getenv("CREDIMAX_STALE_TRANSACTION_TIMEOUT_MINUTES", "30")
 )
+
+# Reconciliation of pending Credimax transactions (check_pending_credimax_transactions):
+# transactions checked per run (least recently checked first), parallel API calls over one
+# connection pool, maximum API calls started per second, HTTP timeouts in
+# seconds, how long a run may hold the overlap lock, and hours after which a
+# transaction whose order is unknown to or still pending at Credimax is
+# marked FAILED.
+CREDIMAX_RECONCILE_BATCH_SIZE = int(os.getenv("CREDIMAX_RECONCILE_BATCH_SIZE", "500"))
+CREDIMAX_RECONCILE_CONCURRENCY = int(os.getenv("CREDIMAX_RECONCILE_CONCURRENCY", "8"))
+CREDIMAX_RECONCILE_RATE_LIMIT = float(os.getenv("CREDIMAX_RECONCILE_RATE_LIMIT", "20"))
+CREDIMAX_RECONCILE_CONNECT_TIMEOUT = float(
+    os.getenv("CREDIMAX_RECONCILE_CONNECT_TIMEOUT", "5")
+)
+CREDIMAX_RECONCILE_READ_TIMEOUT = float(
+    os.getenv("CREDIMAX_RECONCILE_READ_TIMEOUT", "15")
+)
+CREDIMAX_RECONCILE_LOCK_TIMEOUT = int(
+    os.getenv("CREDIMAX_RECONCILE_LOCK_TIMEOUT", "240")
+)
+CREDIMAX_RECONCILE_EXPIRE_AFTER_HOURS = int(
+    os.getenv("CREDIMAX_RECONCILE_EXPIRE_AFTER_HOURS", "24")
+)
+
+# Recurring billing runs: number of parallel chunk tasks per run, seconds after
+# which an item stuck in PROCESSING (worker died) is marked NEEDS_RECONCILIATION
+# and never charged again by a run, and the per-business billing lock timeout
+# in seconds.
+BILLING_RUN_PARALLELISM = int(os.getenv("BILLING_RUN_PARALLELISM", "4"))
+BILLING_RUN_ITEM_TIMEOUT = int(os.getenv("BILLING_RUN_ITEM_TIMEOUT", "3600"))
+BILLING_BUSINESS_LOCK_TIMEOUT = int(os.getenv("BILLING_BUSINESS_LOCK_TIMEOUT", "900"))
+
+# Webhook ingestion: retries of a failing event on the webhooks queue, seconds
+# after which an event stuck in PROCESSING is picked up again, and the shared
+# secret Credimax sends in X-Notification-Secret (not checked when unset).
+WEBHOOK_EVENT_MAX_RETRIES = int(os.getenv("WEBHOOK_EVENT_MAX_RETRIES", "5"))
+WEBHOOK_EVENT_PROCESSING_TIMEOUT = int(
+    os.getenv("WEBHOOK_EVENT_PROCESSING_TIMEOUT", "600")
+)
+CREDIMAX_WEBHOOK_SECRET = os.getenv("CREDIMAX_WEBHOOK_SECRET")
+
+# Notification fan-out: users per chunk. Audiences larger than one chunk are
+# delivered by background tasks, one per chunk.
+NOTIFICATION_FANOUT_CHUNK_SIZE = int(os.getenv("NOTIFICATION_FANOUT_CHUNK_SIZE", "500"))
+
+# Seconds a Redis unread notification counter lives without being reseeded
+# (it is recomputed from the database when missing).
+NOTIFICATION_UNREAD_COUNT_TTL = int(
+    os.getenv("NOTIFICATION_UNREAD_COUNT_TTL", str(60 * 60 * 24))
+)
+
+# Admin notification coalescing: seconds during which repeated events of the
+# same type for an organization are merged into one notification (0 sends
+# each event immediately), and comma-separated NotificationTypes that are
+# only sent as a daily digest at ADMIN_NOTIFICATION_DIGEST_HOUR.
+ADMIN_NOTIFICATION_COALESCE_WINDOW = int(
+    os.getenv("ADMIN_NOTIFICATION_COALESCE_WINDOW", "30")
+)
+ADMIN_NOTIFICATION_DIGEST_TYPES = [
+    notification_type.strip()
+    for notification_type in os.getenv("ADMIN_NOTIFICATION_DIGEST_TYPES", "").split(",")
+    if notification_type.strip()
+]
+
+# WebSocket notification replay: broadcasts kept per notification group for
+# clients reconnecting with a resume token, and seconds an idle group's
+# stream is kept.
+NOTIFICATION_STREAM_MAXLEN = int(os.getenv("NOTIFICATION_STREAM_MAXLEN", "200"))
+NOTIFICATION_STREAM_TTL = int(os.getenv("NOTIFICATION_STREAM_TTL", str(60 * 60 * 24)))
+
+# FCM push delivery: tokens per multicast call (at most 500). The Firebase SDK
+# sends a call's messages with one thread per token, so this is also the
+# number of threads a dispatch uses.
+FCM_MULTICAST_BATCH_SIZE = int(os.getenv("FCM_MULTICAST_BATCH_SIZE", "500"))
+
+# Payment gateway log files (logs/payments/<year>/<business>/<provider>/<month>.log):
+# how many files the background writer keeps open at once. The files are
+# shared by all processes and rotated externally (e.g. logrotate).
+PAYMENT_LOG_MAX_OPEN_FILES = int(os.getenv("PAYMENT_LOG_MAX_OPEN_FILES", "64"))
+
 CREDIMAX_HOSTED_CHECKOUT_VERSION = os.getenv(
     "CREDIMAX_HOSTED_CHECKOUT_VERSION", "1.0.0"
 )
@@ -505,8 +697,12 @@ if PAYMENT_ENV != "prod":
 else:
     MERCHANT_ID = CREDIMAX_MERCHANT_ID
 
-# Base URL for Credimax API
-CREDIMAX_BASE_URL = f"https://credimax.gateway.mastercard.com/api/rest/version/{CREDIMAX_VERSION}/merchant/{CREDIMAX_MERCHANT_ID}/"
+# Base URL for Credimax API (override to point at the local payment gateway
+# simulator, e.g. http://localhost:8100/credimax/)
+CREDIMAX_BASE_URL = (
+    os.getenv("CREDIMAX_BASE_URL")
+    or f"https://credimax.gateway.mastercard.com/api/rest/version/{CREDIMAX_VERSION}/merchant/{CREDIMAX_MERCHANT_ID}/"
+)
 
 # -------------------------------
 # Benefit Pay Configurations
@@ -536,10 +732,45 @@ BENEFIT_ERROR_RETURN_URL = os.getenv(
     "BENEFIT_ERROR_RETURN_URL", "sooq://payment-failure"
 )
 
+# Number of receipt sequence values each database session leases at once
+# (PostgreSQL sequence CACHE). Keep 1 for consecutive receipt numbers: nextval
+# takes no lock either way, and values leased by a session are lost when it is
+# recycled (CONN_MAX_AGE), leaving gaps and interleaving numbers across
+# processes.
+RECEIPT_SEQUENCE_CACHE_SIZE = int(os.getenv("RECEIPT_SEQUENCE_CACHE_SIZE", "1"))
+
+# Admin CSV/XLSX exports: rows fetched per server-side cursor round trip,
+# row count above which the export is generated by Celery and emailed as an S3
+# link, and the lifetime (seconds) of that link.
+ADMIN_EXPORT_CHUNK_SIZE = int(os.getenv("ADMIN_EXPORT_CHUNK_SIZE", "2000"))
+ADMIN_EXPORT_SYNC_ROW_LIMIT = int(os.getenv("ADMIN_EXPORT_SYNC_ROW_LIMIT", "50000"))
+ADMIN_EXPORT_LINK_EXPIRATION = int(os.getenv("ADMIN_EXPORT_LINK_EXPIRATION", "86400"))
+
+# Maximum number of wallet top-ups/withdrawals per bulk approve/reject request.
+WALLET_BULK_APPROVAL_MAX_ITEMS = int(os.getenv("WALLET_BULK_APPROVAL_MAX_ITEMS", "500"))
+
+# Idempotency-Key handling for payment and wallet mutations: how long (seconds)
+# the first response is replayed for, and how long a request holds the
+# in-flight lock before a retry may take over.
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "60"))
+
 # AWS S3 presigned URL expiration time for File PUT operation in seconds.
 S3_PRESIGNED_PUT_URL_EXPIRATION_DURATION = os.getenv(
     "S3_PRESIGNED_PUT_URL_EXPIRATION_DURATION", 120
 )
+# Direct-to-S3 multipart uploads: largest accepted file and part size (bytes),
+# lifetime of the part URLs and of an upload session (seconds).
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(100 * 1024 * 1024)))
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_URL_EXPIRATION = int(os.getenv("UPLOAD_URL_EXPIRATION", "3600"))
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))
+# Resized copies of product and marketplace images: encoder quality (1-100)
+# and the largest original (in pixels) that is decoded.
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv("IMAGE_DERIVATIVE_QUALITY", "80"))
+IMAGE_DERIVATIVE_MAX_PIXELS = int(
+    os.getenv("IMAGE_DERIVATIVE_MAX_PIXELS", str(50 * 1000 * 1000))
+)
 
 
 LOGGING = {
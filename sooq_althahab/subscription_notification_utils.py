@@ -12,6 +12,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.utils import timezone
 
+from sooq_althahab.email_dispatch import queue_mail_batch
 from sooq_althahab.enums.account import SubscriptionStatusChoices
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import SubscriptionPaymentTypeChoices
@@ -84,6 +85,8 @@ def send_expiration_notifications(
         f"Found {expiring_subscriptions.count()} subscriptions expiring on {expiring_date}"
     )
 
+    # Emails are collected and sent in batches over one SMTP connection
+    outbox = []
     for subscription in expiring_subscriptions:
         try:
             business_owner = get_business_owner(subscription.business)
@@ -116,7 +119,7 @@ def send_expiration_notifications(
 
             # Send email notification
             send_expiration_email_notification(
-                business_owner, subscription, days_until_expiry
+                business_owner, subscription, days_until_expiry, outbox=outbox
             )
 
             stats["notifications_sent"] += 1
@@ -130,6 +133,8 @@ def send_expiration_notifications(
                 f"Failed to send expiration notification for {subscription.business.name}: {e}"
             )
 
+    queue_mail_batch(outbox)
+
 
 def handle_expiring_subscriptions_today(today, stats):
     """
@@ -163,6 +168,7 @@ def handle_expiring_subscriptions_today(today, stats):
 
     logger.info(f"Found {expiring_today.count()} subscriptions expiring today")
 
+    outbox = []
     for subscription in expiring_today:
         try:
             business_owner = get_business_owner(subscription.business)
@@ -186,7 +192,7 @@ def handle_expiring_subscriptions_today(today, stats):
                 title = "Subscription Expires Today"
                 # Send email with "expires today" message (not "has expired")
                 send_expiration_email_notification(
-                    business_owner, subscription, 0, is_expired=False
+                    business_owner, subscription, 0, is_expired=False, outbox=outbox
                 )
             else:
                 # Subscription already expired
@@ -197,7 +203,7 @@ def handle_expiring_subscriptions_today(today, stats):
                 title = "Subscription Expired"
                 # Send email with "has expired" message
                 send_expiration_email_notification(
-                    business_owner, subscription, 0, is_expired=True
+                    business_owner, subscription, 0, is_expired=True, outbox=outbox
                 )
 
             # Send FCM notification (in-app notification)
@@ -225,6 +231,8 @@ def handle_expiring_subscriptions_today(today, stats):
                 f"Failed to send notification for expiring subscription {subscription.business.name}: {e}"
             )
 
+    queue_mail_batch(outbox)
+
 
 def handle_grace_period_subscriptions(today, stats):
     """
@@ -256,6 +264,7 @@ def handle_grace_period_subscriptions(today, stats):
         f"Found {len(grace_period_subscriptions)} subscriptions past grace period"
     )
 
+    outbox = []
     for subscription in grace_period_subscriptions:
         try:
             business_owner = get_business_owner(subscription.business)
@@ -282,7 +291,7 @@ def handle_grace_period_subscriptions(today, stats):
 
             # Send email notification
             send_expiration_email_notification(
-                business_owner, subscription, 0, is_expired=True
+                business_owner, subscription, 0, is_expired=True, outbox=outbox
             )
 
             stats["notifications_sent"] += 1
@@ -296,9 +305,11 @@ def handle_grace_period_subscriptions(today, stats):
                 f"Failed to expire subscription after grace period for {subscription.business.name}: {e}"
             )
 
+    queue_mail_batch(outbox)
+
 
 def send_expiration_email_notification(
-    user, subscription, days_until_expiry, is_expired=False
+    user, subscription, days_until_expiry, is_expired=False, outbox=None
 ):
     """
     Send email notification for subscription expiration.
@@ -308,6 +319,8 @@ def send_expiration_email_notification(
         subscription: BusinessSubscriptionPlan instance
         days_until_expiry: Number of days until expiry (0 means expires today)
         is_expired: Whether the subscription has already expired
+        outbox: Optional list the email is appended to instead of being
+            queued, for sending with ``queue_mail_batch``
     """
     try:
         plan_name = get_plan_name(subscription)
@@ -336,13 +349,17 @@ def send_expiration_email_notification(
                 "business_name": subscription.business.name,
             }
 
-        send_mail.delay(
-            subject=subject,
-            template_name=template_name,
-            context=context,
-            to_emails=[user.email],
-            language_code="en",
-        )
+        mail = {
+            "subject": subject,
+            "template_name": template_name,
+            "context": context,
+            "to_emails": [user.email],
+            "language_code": "en",
+        }
+        if outbox is not None:
+            outbox.append(mail)
+        else:
+            send_mail.delay(**mail)
 
         logger.info(f"Sent expiration email to {user.email}")
 
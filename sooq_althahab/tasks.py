@@ -1,36 +1,31 @@
+import io
 import json
 import logging
-import mimetypes
-import os
-import time
+import tempfile
+import uuid
 from calendar import monthrange
 from concurrent.futures import ThreadPoolExecutor
 from concurrent.futures import as_completed
 from datetime import timedelta
-from email.mime.image import MIMEImage
 
 import requests
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.core.mail import EmailMultiAlternatives
 from django.db import close_old_connections
 from django.db.models import DateTimeField
 from django.db.models import ExpressionWrapper
 from django.db.models import F
 from django.db.models import Func
-from django.http import HttpResponse
-from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils import translation
-from django.utils.html import strip_tags
 from firebase_admin import messaging
 from redis import RedisError
 from redis import StrictRedis
-from weasyprint import HTML
 
-from account.models import FCMToken
+from account.models import IdempotencyKey
 from account.models import Organization
 from account.models import Transaction
 from account.models import User
@@ -39,15 +34,30 @@ from account.utils import get_business_display_name
 from investor.serializers import TransactionResponseSerializer
 from jeweler.models import MusharakahContractRequest
 from jeweler.utils import send_termination_reciept_email
+from sooq_althahab.billing.pdf_jobs import run_pdf_job
+from sooq_althahab.billing.rendering import get_organization_fragments
 from sooq_althahab.billing.subscription.pdf_utils import render_subscription_invoice_pdf
 from sooq_althahab.billing.subscription.services import send_subscription_invoice
+from sooq_althahab.billing.subscription.services import (
+    send_subscription_receipt_after_payment,
+)
 from sooq_althahab.billing.transaction.helpers import generate_tax_invoice_context
-from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
 from sooq_althahab.billing.transaction.helpers import get_user_contact_details
+from sooq_althahab.email_dispatch import send_mail_batch_now
+from sooq_althahab.email_dispatch import send_mail_now
+from sooq_althahab.enums.account import TransactionStatus
+from sooq_althahab.enums.account import TransactionType
 from sooq_althahab.enums.account import UserRoleChoices
+from sooq_althahab.enums.account import WebhookEventStatus
 from sooq_althahab.enums.jeweler import MusharakahContractStatus
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import PoolStatus
+from sooq_althahab.http_transport import get_transport
+from sooq_althahab.image_derivatives import generate_derivatives
+from sooq_althahab.notification_coalescing import flush_coalesced_group
+from sooq_althahab.notification_coalescing import send_digests
+from sooq_althahab.notification_counters import reconcile_unread_counts
+from sooq_althahab.notification_fanout import deliver_notification_chunk
 from sooq_althahab.payment_gateway_services.credimax.subscription.tasks import (
     process_commission_recurring_payment,
 )
@@ -57,9 +67,22 @@ from sooq_althahab.payment_gateway_services.credimax.subscription.tasks import (
 from sooq_althahab.payment_gateway_services.credimax.subscription.tasks import (
     process_subscription_fee_recurring_payment,
 )
-from sooq_althahab.utils import get_presigned_url_from_s3
+from sooq_althahab.push_notifications import dispatch_push_notification
+from sooq_althahab.uploads import abort_stale_multipart_uploads
+from sooq_althahab.utils import s3
 from sooq_althahab.utils import send_notification_to_group
-from sooq_althahab.utils import send_notifications_to_organization_admins
+from sooq_althahab.utils import send_notifications
+from sooq_althahab.utils import send_notifications_to_organization_admins_with_org
+from sooq_althahab.webhook_events import enqueue_webhook_event
+from sooq_althahab.webhook_events import get_claimable_events
+from sooq_althahab.webhook_events import process_stored_webhook_event
+from sooq_althahab_admin.exports import EXPORT_FILE_FORMATS
+from sooq_althahab_admin.exports import EXPORTS
+from sooq_althahab_admin.exports import build_export_queryset
+from sooq_althahab_admin.exports import get_export_filename
+from sooq_althahab_admin.exports import write_export_file
+from sooq_althahab_admin.models import BillingDetails
+from sooq_althahab_admin.models import BusinessSubscriptionPlan
 from sooq_althahab_admin.models import GlobalMetal
 from sooq_althahab_admin.models import MetalPriceHistory
 from sooq_althahab_admin.models import Notification
@@ -91,173 +114,26 @@ def release_lock(redis_client, lock_key):
     redis_client.delete(lock_key)
 
 
-def check_circuit_breaker(redis_client, api_url, failure_window_seconds=300):
-    """
-    Check if the API endpoint should be skipped due to recent failures (circuit breaker).
-    Returns True if the endpoint should be skipped, False otherwise.
-
-    Args:
-        redis_client: Redis client instance
-        api_url: The API URL to check
-        failure_window_seconds: Time window in seconds to track failures (default 5 minutes)
-
-    Returns:
-        True if circuit is open (skip request), False if circuit is closed (allow request)
-    """
-    try:
-        circuit_key = f"circuit_breaker:goldapi:{api_url}"
-        failure_count = redis_client.get(circuit_key)
-
-        if failure_count:
-            # Handle both bytes and string responses from Redis
-            try:
-                count = (
-                    int(failure_count)
-                    if isinstance(failure_count, (int, str))
-                    else int(failure_count.decode("utf-8"))
-                )
-            except (ValueError, AttributeError):
-                # If conversion fails, assume circuit is closed
-                return False
-
-            # If we have 3+ consecutive failures in the window, open the circuit
-            if count >= 3:
-                return True
-
-        return False
-    except Exception as e:
-        # If Redis fails, log but don't block the request
-        logger.debug(f"Error checking circuit breaker: {e}")
-        return False
-
-
-def record_circuit_breaker_failure(redis_client, api_url, failure_window_seconds=300):
+def fetch_gold_price_with_retry(api_url, headers):
     """
-    Record a failure for circuit breaker tracking.
+    Fetch gold price through the shared "goldapi" HTTP transport.
 
-    Args:
-        redis_client: Redis client instance
-        api_url: The API URL that failed
-        failure_window_seconds: Time window in seconds to track failures
+    The transport provides what used to be implemented here:
+    - Aggressive timeouts (10s read) to fail fast
+    - Retries with jittered exponential backoff on timeouts, 429 and 503
+    - Circuit breaker: skips the host after 3+ failures in the last 5 minutes
+    Failures are logged at warning level (no Sentry errors for expected failures).
     """
     try:
-        circuit_key = f"circuit_breaker:goldapi:{api_url}"
-        redis_client.incr(circuit_key)
-        redis_client.expire(circuit_key, failure_window_seconds)
-    except Exception as e:
-        logger.debug(f"Error recording circuit breaker failure: {e}")
-
-
-def reset_circuit_breaker(redis_client, api_url):
-    """
-    Reset the circuit breaker on successful request.
-
-    Args:
-        redis_client: Redis client instance
-        api_url: The API URL that succeeded
-    """
-    try:
-        circuit_key = f"circuit_breaker:goldapi:{api_url}"
-        redis_client.delete(circuit_key)
-    except Exception as e:
-        logger.debug(f"Error resetting circuit breaker: {e}")
-
+        response = get_transport("goldapi").get(api_url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Failed to fetch gold price: {api_url} - {e}")
+        return None
 
-def fetch_gold_price_with_retry(
-    session, api_url, headers, redis_client=None, retries=3, initial_delay=1, timeout=10
-):
-    """
-    Fetch gold price with retries on various error conditions.
-    Implements exponential backoff to prevent excessive requests and handles:
-    - Timeout errors (with aggressive timeout)
-    - 503 Service Unavailable errors
-    - 429 Rate limit errors
-    - Other HTTP errors
-
-    Circuit Breaker: Skips requests if endpoint has 3+ failures in the last 5 minutes.
-
-    Optimizations:
-    - Reduced timeout from 30s to 10s to fail fast
-    - Reduced initial delay from 3s to 1s for faster recovery
-    - Shorter retry cycles to prevent task backlog
-    - Circuit breaker to prevent hammering failing endpoints
-    - Warning-level logging for expected failures (no Sentry errors)
-    """
-    # Check circuit breaker first (if Redis client provided)
-    if redis_client:
-        if check_circuit_breaker(redis_client, api_url):
-            logger.warning(f"Circuit breaker OPEN: Skipping {api_url}")
-            return None
-
-    # Copy initial_delay to a local variable so we can modify it for exponential backoff
-    # without changing the original parameter. This preserves the parameter for reference
-    # and allows delay to increase (1s → 2s → 4s) with each retry attempt.
-    delay = initial_delay
-
-    for attempt in range(retries):
-        try:
-            response = session.get(api_url, headers=headers, timeout=timeout)
-
-            # Handle rate limiting
-            if response.status_code == 429:
-                if attempt < retries - 1:  # Don't wait if this is the last attempt
-                    time.sleep(delay)
-                    delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    logger.warning(
-                        f"Rate limit exceeded after {retries} attempts: {api_url}"
-                    )
-                    if redis_client:
-                        record_circuit_breaker_failure(redis_client, api_url)
-                    return None
-
-            # Handle service unavailable
-            if response.status_code == 503:
-                if attempt < retries - 1:  # Don't wait if this is the last attempt
-                    time.sleep(delay)
-                    delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    logger.warning(
-                        f"Service unavailable after {retries} attempts: {api_url}"
-                    )
-                    if redis_client:
-                        record_circuit_breaker_failure(redis_client, api_url)
-                    return None
 
-            response.raise_for_status()
-
-            # Success - reset circuit breaker if it exists
-            if redis_client:
-                reset_circuit_breaker(redis_client, api_url)
-
-            return response.json()
-
-        except requests.exceptions.Timeout:
-            if attempt < retries - 1:  # Don't wait if this is the last attempt
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-            else:
-                logger.warning(f"All {retries} retry attempts timed out: {api_url}")
-                if redis_client:
-                    record_circuit_breaker_failure(redis_client, api_url)
-                return None
-
-        except requests.exceptions.RequestException as e:
-            if attempt < retries - 1:  # Don't wait if this is the last attempt
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-            else:
-                logger.warning(f"All {retries} retry attempts failed: {api_url} - {e}")
-                if redis_client:
-                    record_circuit_breaker_failure(redis_client, api_url)
-                return None
-
-    return None
-
-
-def fetch_metal_price_data(metal, base_url, currency, headers, redis_client=None):
+def fetch_metal_price_data(metal, base_url, currency, headers):
     """
     Fetch a single metal price from the external API.
 
@@ -266,14 +142,10 @@ def fetch_metal_price_data(metal, base_url, currency, headers, redis_client=None
         base_url: Base URL for the gold API
         currency: Currency code (e.g., 'USD')
         headers: HTTP headers for the request
-        redis_client: Optional Redis client for circuit breaker functionality
     """
-    session = requests.Session()
     try:
         url = f"{base_url}/{metal.symbol}/{currency}"
-        response = fetch_gold_price_with_retry(
-            session, url, headers, redis_client=redis_client
-        )
+        response = fetch_gold_price_with_retry(url, headers)
 
         if not response:
             return None, metal, False
@@ -316,11 +188,6 @@ def fetch_metal_price_data(metal, base_url, currency, headers, redis_client=None
     except Exception as e:
         logger.warning(f"Error fetching price for {metal.name}: {e}")
         return None, metal, False
-    finally:
-        try:
-            session.close()
-        except Exception:
-            pass
 
 
 @shared_task(bind=True, max_retries=0, time_limit=120, soft_time_limit=90)
@@ -350,7 +217,7 @@ def fetch_live_metal_prices(self):
             "This indicates a Redis server/infrastructure issue. "
             "Check: Redis service running, network connectivity, firewall rules, Redis config."
         )
-        # Continue without Redis - circuit breaker and pub/sub will be disabled
+        # Continue without Redis - the lock and pub/sub will be disabled
         # but the task can still fetch prices (just won't publish to Redis)
         redis_client = None
 
@@ -402,7 +269,6 @@ def fetch_live_metal_prices(self):
                     base_url,
                     currency,
                     headers,
-                    redis_client,  # Pass Redis client for circuit breaker
                 ): metal
                 for metal in metals
             }
@@ -521,89 +387,19 @@ def send_mail(
     # Close any stale database connections before starting
     close_old_connections()
 
-    # Ensure to_emails is a list
-    to_emails = to_emails if isinstance(to_emails, list) else [to_emails]
-    # Use custom from_email if provided, otherwise use default
-    from_email = from_email or settings.EMAIL_HOST_USER
-    # Ensure bcc_emails is a list if provided
-    bcc_emails = (
-        bcc_emails
-        if isinstance(bcc_emails, list)
-        else ([bcc_emails] if bcc_emails else None)
-    )
-
-    # Activate translation
-    translation.activate(language_code)
-
-    # Render the HTML email template with context
-    html_message = render_to_string(template_name, context)
-    # Strip HTML tags to create a plain text version
-    plain_message = strip_tags(html_message)
-
     try:
-        # Create the email message
-        email = EmailMultiAlternatives(
+        # Sent over this worker's pooled SMTP connection
+        send_mail_now(
             subject=subject,
-            body=plain_message,
+            template_name=template_name,
+            context=context,
+            to_emails=to_emails,
+            language_code=language_code,
+            attachments=attachments,
+            organization_code=organization_code,
             from_email=from_email,
-            to=to_emails,
-            bcc=bcc_emails,
+            bcc_emails=bcc_emails,
         )
-
-        image_attached = False
-
-        # Attach organization logo from S3
-        if organization_code:
-            try:
-                org = Organization.objects.filter(code=organization_code).first()
-                if org and org.logo:
-                    logo_url_data = get_presigned_url_from_s3(org.logo)
-                    if logo_url_data and logo_url_data.get("url"):
-                        try:
-                            response = requests.get(logo_url_data["url"])
-                            if response.status_code == 200:
-                                mime_type, _ = mimetypes.guess_type(
-                                    logo_url_data["url"]
-                                )
-                                subtype = (
-                                    mime_type.split("/")[1] if mime_type else "png"
-                                )
-                                image = MIMEImage(response.content, _subtype=subtype)
-                                image.add_header("Content-ID", "<sqagoldenlogo>")
-                                image.add_header("Content-Disposition", "inline")
-                                image.add_header("Content-Transfer-Encoding", "base64")
-                                email.attach(image)
-                                image_attached = True
-                        except Exception:
-                            pass  # Silently fail and fallback to static
-            finally:
-                # Close connections after database query
-                close_old_connections()
-
-        # Fallback to static image
-        if not image_attached:
-            static_logo_path = os.path.join(
-                settings.BASE_DIR, "static", "images", "sqa_golden_logo.png"
-            )
-            if os.path.exists(static_logo_path):
-                with open(static_logo_path, "rb") as img_file:
-                    image = MIMEImage(img_file.read())
-                    image.add_header("Content-ID", "<sqagoldenlogo>")
-                    image.add_header("Content-Disposition", "inline")
-                    image.add_header("Content-Transfer-Encoding", "base64")
-                    email.attach(image)
-
-        # Attach HTML alternative
-        email.attach_alternative(html_message, "text/html")
-
-        # Optional attachments
-        if attachments:
-            for filename, file_content, mime_type in attachments:
-                email.attach(filename, file_content, mime_type)
-
-        # Send email
-        email.send()
-
     except Exception as e:
         logger.exception(f"Error sending email to {to_emails}: {str(e)}")
     finally:
@@ -611,6 +407,19 @@ def send_mail(
         close_old_connections()
 
 
+@shared_task
+def send_mail_batch(mails):
+    """
+    Send a list of emails, each a dict of ``send_mail`` arguments, over one
+    SMTP connection. Queue it with ``email_dispatch.queue_mail_batch``.
+    """
+    close_old_connections()
+    try:
+        return send_mail_batch_now(mails)
+    finally:
+        close_old_connections()
+
+
 @shared_task
 def send_notification(
     device_tokens,
@@ -619,63 +428,88 @@ def send_notification(
     data=None,
     web_push_config: messaging.WebpushConfig = None,
 ):
-    """Send FCM notification to a specific user."""
+    """Send an FCM notification to the given device tokens in multicast batches."""
     # Check if the firebase app is enabled.
     if not settings.FIREBASE_APP:
         logger.warning("Firebase app is not enabled.")
         return
-    # Send push notifications to all users using firebase cloud messaging.
-    successful_tokens = []
-    failed_tokens = {}
-    for token in device_tokens:
-        shortened_token = token
-        try:
-            message = messaging.Message(
-                notification=messaging.Notification(title=title, body=body),
-                token=token,
-                webpush=web_push_config,
-                android=messaging.AndroidConfig(
-                    notification=messaging.AndroidNotification(
-                        channel_id="default"  # Setting the channel_id for Android notifications
-                    )
-                ),
-                apns=messaging.APNSConfig(
-                    headers={"apns-priority": "10"},
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            sound="notification_sound.wav",  # iOS sound file
-                            alert=messaging.ApsAlert(title=title, body=body),
-                            badge=1,
-                            content_available=True,
-                        )
-                    ),
-                ),
-                data=data,
-            )
-            messaging.send(message)
-            successful_tokens.append(shortened_token)
-        # Firebase raised an exception incase it fails to send the notification, so catch the error that is raised for token.
-        except Exception as e:
-            failed_tokens[shortened_token] = str(e)
+    try:
+        stats = dispatch_push_notification(
+            device_tokens, title, body, data, web_push_config
+        )
+    finally:
+        close_old_connections()
 
     logger.info(
-        f"Successfully sent out notifications to {len(successful_tokens)} devices: {successful_tokens}"
+        f"Sent notifications to {stats['success']} of {stats['tokens']} devices "
+        f"in {stats['batches']} batches ({stats['failure']} failed, "
+        f"{stats['pruned']} invalid tokens deleted)."
     )
-    if failed_tokens:
-        FCMToken.objects.filter(fcm_token__in=failed_tokens.keys()).delete()
-        logger.info(f"Deleted {len(failed_tokens)} invalid FCM tokens.")
+    return stats
+
+
+@shared_task
+def fan_out_notification_chunk(
+    user_ids, title, message, notification_type, content_type_id, object_id
+):
+    """Deliver one chunk of a large notification fan-out."""
+    try:
+        deliver_notification_chunk(
+            user_ids, title, message, notification_type, content_type_id, object_id
+        )
+    finally:
+        close_old_connections()
+
+
+@shared_task
+def reconcile_unread_notification_counts():
+    """Correct Redis unread notification counters that drifted from the DB."""
+    try:
+        corrected = reconcile_unread_counts()
+    except RedisError as e:
+        logger.error(f"Unread counter reconciliation failed: {e}")
+        return
+    finally:
+        close_old_connections()
+    logger.info(f"Reconciled unread notification counters: {corrected} corrected.")
+
+
+@shared_task
+def flush_admin_notifications(group_key):
+    """Deliver the admin notifications buffered during a coalescing window."""
+    try:
+        flushed = flush_coalesced_group(group_key)
+    finally:
+        close_old_connections()
+    if flushed:
+        logger.info(f"Coalesced {flushed} admin notifications for {group_key}.")
 
 
 @shared_task
-def generate_pdf_response(template_name, context, filename="document.pdf"):
-    """Generates a PDF file from a template and context and returns it as a download response."""
+def send_admin_notification_digests():
+    """Deliver the daily digest of admin notifications held back for it."""
+    try:
+        delivered = send_digests()
+    except RedisError as e:
+        logger.error(f"Admin notification digest failed: {e}")
+        return
+    finally:
+        close_old_connections()
+    logger.info(f"Sent {delivered} admin notification digests.")
 
-    html_string = render_to_string(template_name, context)
-    pdf_file = HTML(string=html_string).write_pdf()
 
-    response = HttpResponse(pdf_file, content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+@shared_task(
+    time_limit=settings.PDF_JOB_TIME_LIMIT,
+    soft_time_limit=settings.PDF_JOB_SOFT_TIME_LIMIT,
+)
+def render_pdf_job(job_id):
+    """Render a downloadable PDF submitted through ``submit_pdf_job``."""
+    try:
+        run_pdf_job(job_id)
+    except RedisError as e:
+        logger.error(f"PDF job {job_id} could not be tracked: {e}")
+    finally:
+        close_old_connections()
 
 
 @shared_task
@@ -692,16 +526,17 @@ def send_notification_to_admin_for_no_investor_in_musharakah_contract_request():
     musharakah_contract_requests = MusharakahContractRequest.objects.filter(
         created_at=cutoff,
         investor__isnull=True,
-    )
+    ).select_related("organization_id")
+    content_type = ContentType.objects.get_for_model(MusharakahContractRequest)
     for musharakah_contract_request in musharakah_contract_requests:
         title = f"Action Required: Investor Not Assigned to Contract Request"
         message = f"The Musharakah Contract Request with ID {musharakah_contract_request.id} remains without an investor assignment."
-        send_notifications_to_organization_admins(
-            musharakah_contract_request.organization_id.code,
+        send_notifications_to_organization_admins_with_org(
+            musharakah_contract_request.organization_id,
             title,
             message,
             NotificationTypes.NO_INVESTOR_ASSIGNED_TO_MUSHARAKAH_CONTRACT_REQUEST,
-            ContentType.objects.get_for_model(MusharakahContractRequest),
+            content_type,
             musharakah_contract_request.id,
             UserRoleChoices.TAQABETH_ENFORCER,
         )
@@ -725,19 +560,23 @@ def send_notification_to_admin_for_close_pool():
             )
         )
         .filter(close_date__lte=now)  # Pool duration expired
+        .select_related("organization_id")
     )
 
+    # Closures of one organization's pools are coalesced into one admin
+    # notification per coalescing window.
+    content_type = ContentType.objects.get_for_model(Pool)
     for pool in pools:
         pool.status = PoolStatus.CLOSED
         pool.save()
         title = f"Pool has been closed successfully."
         message = f"The pool with ID {pool.id} has been closed successfully."
-        send_notifications_to_organization_admins(
-            pool.organization_id.code,
+        send_notifications_to_organization_admins_with_org(
+            pool.organization_id,
             title,
             message,
             NotificationTypes.POOL_CLOSED_DATE_UPDATED,
-            ContentType.objects.get_for_model(Pool),
+            content_type,
             pool.id,
             UserRoleChoices.TAQABETH_ENFORCER,
         )
@@ -781,12 +620,14 @@ def send_purchase_request_email(
         # Prepare context for the email and PDF attachment
         serialized_transaction = TransactionResponseSerializer(transaction).data
         context = generate_tax_invoice_context(serialized_transaction, organization)
-        context["organization_logo_url"] = get_organization_logo_url(organization)
+        context["organization_logo_url"] = get_organization_fragments(organization)[
+            "organization_logo_url"
+        ]
         template_name = "invoice/tax-invoice.html"
         filename = "Tax-Invoice.pdf"
 
-        # Generate PDF for tax invoice
-        pdf_io = render_subscription_invoice_pdf(template_name, context)
+        # Generate PDF for tax invoice, stored for later receipt downloads
+        pdf_io = render_subscription_invoice_pdf(template_name, context, cache=True)
         attachment = [(filename, pdf_io.read(), "application/pdf")]
 
         # Prepare email context
@@ -817,12 +658,20 @@ def send_purchase_request_email(
 
 @shared_task
 def send_receipt_to_mail(
-    recipient_email, email_context, pdf_context, template_name, filename
+    recipient_email,
+    email_context,
+    pdf_context,
+    template_name,
+    filename,
+    cache_pdf=False,
 ):
-    pdf_io = render_subscription_invoice_pdf(template_name, pdf_context)
+    pdf_io = render_subscription_invoice_pdf(
+        template_name, pdf_context, cache=cache_pdf
+    )
     attachment = [(filename, pdf_io.read(), "application/pdf")]
 
-    send_mail.delay(
+    # Sent from this task instead of queueing send_mail with the PDF
+    send_mail(
         subject="Transaction Details",
         template_name="templates/transaction-details.html",
         context=email_context,
@@ -833,6 +682,40 @@ def send_receipt_to_mail(
     )
 
 
+@shared_task
+def send_subscription_billing_mail(
+    billing_details_id, business_subscription_plan_id, transaction_id=None
+):
+    """
+    Render and send the subscription invoice and, given ``transaction_id``,
+    the payment receipt after it. Runs on the pdf queue so request threads
+    never render invoice PDFs.
+    """
+    billing_details = BillingDetails.objects.get(id=billing_details_id)
+    business_subscription_plan = BusinessSubscriptionPlan.objects.select_related(
+        "business__organization_id", "subscription_plan"
+    ).get(id=business_subscription_plan_id)
+    business = business_subscription_plan.business
+    organization = business.organization_id
+
+    send_subscription_invoice(
+        billing_details=billing_details,
+        business=business,
+        subscription_plan=business_subscription_plan.subscription_plan,
+        organization=organization,
+        business_subscription_plan=business_subscription_plan,
+    )
+    if transaction_id:
+        send_subscription_receipt_after_payment(
+            billing_details=billing_details,
+            business=business,
+            subscription_plan=business_subscription_plan.subscription_plan,
+            organization=organization,
+            transaction=Transaction.objects.get(id=transaction_id),
+            business_subscription_plan=business_subscription_plan,
+        )
+
+
 @shared_task
 def close_replacement_musharakah_contract_request():
     """
@@ -1011,11 +894,9 @@ def send_termination_reciept_mail(
     from account.models import Transaction
     from investor.serializers import TransactionResponseSerializer
     from jeweler.models import MusharakahContractTerminationRequest
-    from sooq_althahab.billing.subscription.helpers import prepare_organization_details
     from sooq_althahab.billing.subscription.pdf_utils import (
         render_subscription_invoice_pdf,
     )
-    from sooq_althahab.billing.transaction.helpers import get_organization_logo_url
 
     # Fetch model instances inside the task
     user = User.objects.get(pk=user_id)
@@ -1033,7 +914,9 @@ def send_termination_reciept_mail(
         date = transaction.created_at.strftime("%d %B %Y")
 
     transaction_serializer = TransactionResponseSerializer(transaction).data
-    organization_details = prepare_organization_details(organization)
+    fragments = get_organization_fragments(organization)
+    organization_details = fragments["organization_details"]
+    organization_logo_url = fragments["organization_logo_url"]
 
     # Safe display name
     business_name = business.name or ""
@@ -1052,7 +935,7 @@ def send_termination_reciept_mail(
         "transaction_id": transaction.receipt_number,
         "date": date,
         "amount": transaction.amount,
-        "organization_logo_url": get_organization_logo_url(organization),
+        "organization_logo_url": organization_logo_url,
     }
 
     # Get business owner email safely
@@ -1066,7 +949,7 @@ def send_termination_reciept_mail(
         "business_user": {"email": business_user_email},
         "organization_details": organization_details,
         "transaction": transaction_serializer,
-        "organization_logo_url": get_organization_logo_url(organization),
+        "organization_logo_url": organization_logo_url,
         "termination_request": musharakah_contract_termination_request,
         "sub_total_amount": sub_total,
         "title": title,
@@ -1155,3 +1038,231 @@ def manage_subscription_expiration_notifications():
         f"Subscriptions expired: {stats['subscriptions_expired']}, "
         f"Errors: {stats['errors']}"
     )
+
+
+@shared_task
+def export_admin_report(
+    export_type, file_format, query_params, organization_id, user_id
+):
+    """
+    Generate a large admin export in the background, upload it to S3 and email
+    the requesting admin a presigned download link.
+    """
+    close_old_connections()
+
+    user = (
+        User.objects.filter(pk=user_id)
+        .select_related("user_preference", "organization_id")
+        .first()
+    )
+    if not user:
+        logger.warning(f"Export requested by unknown user {user_id}.")
+        return
+
+    queryset = build_export_queryset(export_type, organization_id, query_params)
+    columns = EXPORTS[export_type]["columns"]
+    filename = get_export_filename(export_type, file_format)
+    object_key = f"exports/{organization_id}/{uuid.uuid4().hex}/{filename}"
+
+    try:
+        with tempfile.TemporaryFile() as temp_file:
+            if file_format == "csv":
+                text_file = io.TextIOWrapper(temp_file, encoding="utf-8", newline="")
+                write_export_file(queryset, columns, file_format, text_file)
+                text_file.flush()
+                text_file.detach()
+            else:
+                write_export_file(queryset, columns, file_format, temp_file)
+
+            temp_file.seek(0)
+            s3.upload_fileobj(
+                temp_file,
+                settings.AWS_STORAGE_BUCKET_NAME,
+                object_key,
+                ExtraArgs={"ContentType": EXPORT_FILE_FORMATS[file_format]},
+            )
+
+        download_url = s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": object_key},
+            ExpiresIn=settings.ADMIN_EXPORT_LINK_EXPIRATION,
+        )
+    except Exception as e:
+        logger.exception(f"Error generating {export_type} export: {str(e)}")
+        return
+    finally:
+        close_old_connections()
+
+    language_code = getattr(
+        getattr(user, "user_preference", None), "language_code", "en"
+    )
+    send_mail.delay(
+        "Your export is ready",
+        "templates/export-ready.html",
+        {
+            "fullname": user.fullname,
+            "download_url": download_url,
+            "filename": filename,
+            "expires_in_hours": settings.ADMIN_EXPORT_LINK_EXPIRATION // 3600,
+        },
+        [user.email],
+        language_code,
+        organization_code=user.organization_id.code,
+    )
+
+
+# (transaction_type, status) -> (title, message template, notification type)
+WALLET_TRANSACTION_STATUS_NOTIFICATIONS = {
+    (TransactionType.WITHDRAWAL, TransactionStatus.APPROVED): (
+        "Withdraw request has been approved.",
+        "Withdraw request of BHD {amount} has been approved.",
+        NotificationTypes.WITHDRAW_REQUEST_APPROVED,
+    ),
+    (TransactionType.WITHDRAWAL, TransactionStatus.REJECTED): (
+        "Withdraw request has been rejected.",
+        "Withdraw request of BHD {amount} has been rejected.",
+        NotificationTypes.WITHDRAW_REQUEST_REJECTED,
+    ),
+    (TransactionType.DEPOSIT, TransactionStatus.APPROVED): (
+        "Deposit request has been approved.",
+        "Deposit request of BHD {amount} has been approved.",
+        NotificationTypes.DEPOSIT_REQUEST_APPROVED,
+    ),
+    (TransactionType.DEPOSIT, TransactionStatus.REJECTED): (
+        "Deposit request has been rejected.",
+        "Deposit request of BHD {amount} has been rejected.",
+        NotificationTypes.DEPOSIT_REQUEST_REJECTED,
+    ),
+}
+
+
+@shared_task
+def send_wallet_transaction_status_updates(transaction_ids):
+    """
+    Send the notifications and accounting receipts for wallet top-ups and
+    withdrawals approved or rejected through the bulk admin API.
+    """
+    from sooq_althahab.billing.transaction.invoice_utils import (
+        send_topup_invoice_to_accounts,
+    )
+    from sooq_althahab.billing.transaction.invoice_utils import (
+        send_withdrawal_invoice_to_accounts,
+    )
+
+    close_old_connections()
+    content_type = ContentType.objects.get_for_model(Transaction)
+    transactions = Transaction.global_objects.filter(
+        pk__in=transaction_ids
+    ).select_related(
+        "from_business",
+        "from_business__organization_id",
+        "to_business",
+        "purchase_request",
+        "created_by",
+    )
+
+    try:
+        for transaction in transactions:
+            try:
+                notification = WALLET_TRANSACTION_STATUS_NOTIFICATIONS.get(
+                    (transaction.transaction_type, transaction.status)
+                )
+                if notification:
+                    title, message, notification_type = notification
+                    users_in_business = User.objects.filter(
+                        user_assigned_businesses__business=transaction.from_business,
+                        user_preference__notifications_enabled=True,
+                    )
+                    send_notifications(
+                        users_in_business,
+                        title,
+                        message.format(amount=transaction.amount),
+                        notification_type,
+                        content_type,
+                        transaction.pk,
+                    )
+
+                organization = transaction.from_business.organization_id
+                if transaction.status != TransactionStatus.APPROVED or not organization:
+                    continue
+                if transaction.transaction_type == TransactionType.DEPOSIT:
+                    send_topup_invoice_to_accounts(transaction, organization)
+                elif transaction.transaction_type == TransactionType.WITHDRAWAL:
+                    send_withdrawal_invoice_to_accounts(transaction, organization)
+            except Exception as e:
+                logger.exception(
+                    f"Error sending status updates for transaction {transaction.pk}: {str(e)}"
+                )
+    finally:
+        close_old_connections()
+
+
+@shared_task
+def purge_expired_idempotency_keys():
+    """Delete database-fallback idempotency keys older than the replay window."""
+    expired_before = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=expired_before).delete()
+    logger.info(f"Purged {deleted} expired idempotency keys.")
+
+
+@shared_task
+def abort_stale_uploads():
+    """Abort direct-to-S3 multipart uploads that were started but never completed."""
+    try:
+        aborted = abort_stale_multipart_uploads()
+    except Exception as e:
+        logger.error(f"Aborting stale uploads failed: {e}")
+        return
+    logger.info(f"Aborted {aborted} stale multipart uploads.")
+
+
+@shared_task(bind=True, max_retries=3)
+def generate_image_derivatives(self, model_label, pk):
+    """
+    Resize a product or marketplace image into its thumb/card/full WebP and
+    JPEG derivatives. Storage errors are retried; files that cannot be decoded
+    are left without derivatives.
+    """
+    close_old_connections()
+    try:
+        generate_derivatives(model_label, pk)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"[Image derivatives] {model_label} {pk} failed: {e}")
+        raise self.retry(countdown=30 * 2**self.request.retries, exc=e)
+    except Exception as e:
+        logger.error(f"[Image derivatives] Cannot resize {model_label} {pk}: {e}")
+
+
+@shared_task(bind=True, max_retries=settings.WEBHOOK_EVENT_MAX_RETRIES)
+def process_webhook_event(self, event_id):
+    """
+    Process a stored gateway/KYC webhook event. Failed events are retried with
+    exponential backoff, then left FAILED for ``replay_webhook_events``.
+    """
+    close_old_connections()
+    try:
+        process_stored_webhook_event(event_id)
+    except Exception as e:
+        logger.exception(f"[Webhook] Processing event {event_id} failed: {e}")
+        raise self.retry(countdown=30 * 2**self.request.retries, exc=e)
+
+
+@shared_task
+def requeue_webhook_events():
+    """
+    Queue stored webhook events that were never processed: lost enqueues
+    (RECEIVED for over a minute) and events whose worker died (PROCESSING past
+    ``WEBHOOK_EVENT_PROCESSING_TIMEOUT``).
+    """
+    received_before = timezone.now() - timedelta(minutes=1)
+    event_ids = list(
+        get_claimable_events()
+        .exclude(status=WebhookEventStatus.FAILED)
+        .filter(created_at__lt=received_before)
+        .order_by("created_at")
+        .values_list("id", flat=True)[:500]
+    )
+    for event_id in event_ids:
+        enqueue_webhook_event(event_id)
+    if event_ids:
+        logger.info(f"[Webhook] Re-queued {len(event_ids)} webhook events.")
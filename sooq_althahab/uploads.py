@@ -0,0 +1,414 @@
+"""
+Direct-to-S3 multipart uploads for attachments and documents.
+
+``generate-s3-presigned-url`` signs a single PUT for any bucket and key the
+client names, with no check of what was uploaded. Uploads now go through
+upload sessions:
+
+1. ``POST uploads/`` declares the target, file name, content type and size.
+   The server starts an S3 multipart upload under
+   ``uploads/<target>/<user_id>/<uuid>/`` and returns a presigned URL per
+   part of ``UPLOAD_PART_SIZE`` bytes. The client PUTs the parts straight to
+   S3; nothing passes through the web workers. Browsers read each part's
+   ``ETag`` response header, so the bucket's CORS rules must expose it.
+2. ``POST uploads/<upload_id>/complete/`` with the parts' ETags assembles
+   the object, checks its size against the declared one and its first bytes
+   against the declared type, and attaches the key to the target model when
+   a ``parent_id`` was given. Rejected objects are deleted. Without a
+   parent the key is returned for the create endpoints, as before.
+3. ``DELETE uploads/<upload_id>/`` aborts it.
+
+Sessions are Redis hashes (``upload:<upload_id>``) kept for
+``UPLOAD_SESSION_TTL`` seconds; ``abort_stale_multipart_uploads`` aborts the
+S3 uploads that were never completed.
+"""
+
+import logging
+import math
+import os
+import re
+import uuid
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.utils import timezone
+
+from sooq_althahab.enums.account import DocumentType
+from sooq_althahab.image_derivatives import queue_image_derivatives
+from sooq_althahab.redis_utils import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_KEY_PREFIX = "uploads"
+UPLOAD_SESSION_KEY_PREFIX = "upload:"
+# S3 rejects parts below 5 MiB (except the last) and more than 10000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+IMAGE_CONTENT_TYPES = ["image/jpeg", "image/png", "image/webp", "image/heic"]
+DOCUMENT_CONTENT_TYPES = IMAGE_CONTENT_TYPES + ["application/pdf"]
+
+# Leading bytes of each accepted content type, as (offset, signature)
+FILE_SIGNATURES = {
+    "image/jpeg": [(0, b"\xff\xd8\xff")],
+    "image/png": [(0, b"\x89PNG\r\n\x1a\n")],
+    "image/webp": [(8, b"WEBP")],
+    "image/heic": [(4, b"ftypheic"), (4, b"ftypheix"), (4, b"ftypmif1")],
+    "application/pdf": [(0, b"%PDF-")],
+}
+
+SAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class UploadError(Exception):
+    """An upload request that cannot be served; ``message_key`` is in MESSAGES."""
+
+    def __init__(self, message_key):
+        super().__init__(message_key)
+        self.message_key = message_key
+
+
+def _current_business(request):
+    from sooq_althahab.querysets.purchase_request import get_business_from_user_token
+
+    return get_business_from_user_token(request, "business")
+
+
+def _get_precious_item(request, parent_id):
+    from seller.models import PreciousItem
+
+    return PreciousItem.objects.filter(
+        pk=parent_id, business=_current_business(request)
+    ).first()
+
+
+def _get_jewelry_product(request, parent_id):
+    from jeweler.models import JewelryProduct
+
+    return JewelryProduct.objects.filter(
+        pk=parent_id, jewelry_design__business=_current_business(request)
+    ).first()
+
+
+def _get_transaction(request, parent_id):
+    from account.models import Transaction
+
+    return Transaction.objects.filter(pk=parent_id, created_by=request.user).first()
+
+
+def _get_contact_support_request(request, parent_id):
+    from account.models import ContactSupportRequest
+
+    return ContactSupportRequest.objects.filter(pk=parent_id, user=request.user).first()
+
+
+def _get_business(request, parent_id):
+    business = _current_business(request)
+    return business if business and str(business.pk) == str(parent_id) else None
+
+
+def _attach_precious_item_image(parent, key, doc_type=None):
+    from seller.models import PreciousItemImage
+
+    image = PreciousItemImage.objects.create(precious_item=parent, image=key)
+    queue_image_derivatives([image])
+    return image
+
+
+def _attach_jewelry_product_attachment(parent, key, doc_type=None):
+    from jeweler.models import JewelryProductAttachment
+
+    attachment = JewelryProductAttachment.objects.create(
+        jewelry_product=parent, file=key
+    )
+    queue_image_derivatives([attachment])
+    return attachment
+
+
+def _attach_transaction_attachment(parent, key, doc_type=None):
+    from account.models import TransactionAttachment
+
+    return TransactionAttachment.objects.create(transaction=parent, attachment=key)
+
+
+def _attach_contact_support_attachment(parent, key, doc_type=None):
+    from account.models import ContactSupportRequestAttachments
+
+    return ContactSupportRequestAttachments.objects.create(
+        contact_support=parent, attachment=key
+    )
+
+
+def _attach_business_document(parent, key, doc_type=None):
+    from account.models import BusinessAccountDocument
+
+    # One document per type: a new upload replaces the previous file
+    document, _ = BusinessAccountDocument.objects.update_or_create(
+        business=parent, doc_type=doc_type, defaults={"image": key}
+    )
+    return document
+
+
+# Target name -> accepted content types, the lookup of the parent the
+# requesting user may attach to, and how the key is attached.
+UPLOAD_TARGETS = {
+    "precious-item-image": {
+        "content_types": IMAGE_CONTENT_TYPES,
+        "get_parent": _get_precious_item,
+        "attach": _attach_precious_item_image,
+    },
+    "jewelry-product-attachment": {
+        "content_types": DOCUMENT_CONTENT_TYPES,
+        "get_parent": _get_jewelry_product,
+        "attach": _attach_jewelry_product_attachment,
+    },
+    "transaction-attachment": {
+        "content_types": DOCUMENT_CONTENT_TYPES,
+        "get_parent": _get_transaction,
+        "attach": _attach_transaction_attachment,
+    },
+    "contact-support-attachment": {
+        "content_types": DOCUMENT_CONTENT_TYPES,
+        "get_parent": _get_contact_support_request,
+        "attach": _attach_contact_support_attachment,
+    },
+    "business-document": {
+        "content_types": DOCUMENT_CONTENT_TYPES,
+        "get_parent": _get_business,
+        "attach": _attach_business_document,
+        "requires_doc_type": True,
+    },
+}
+
+
+def _session_key(upload_id):
+    return f"{UPLOAD_SESSION_KEY_PREFIX}{upload_id}"
+
+
+def get_part_size(size):
+    """``UPLOAD_PART_SIZE``, raised when needed to stay within S3's part limit."""
+    part_size = max(settings.UPLOAD_PART_SIZE, MIN_PART_SIZE)
+    return max(part_size, math.ceil(size / MAX_PARTS))
+
+
+def _presign_parts(key, upload_id, part_count):
+    from sooq_althahab.utils import s3
+
+    return [
+        {
+            "part_number": part_number,
+            "url": s3.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+                    "Key": key,
+                    "UploadId": upload_id,
+                    "PartNumber": part_number,
+                },
+                ExpiresIn=settings.UPLOAD_URL_EXPIRATION,
+            ),
+        }
+        for part_number in range(1, part_count + 1)
+    ]
+
+
+def create_upload(
+    request, target, filename, content_type, size, parent_id=None, doc_type=None
+):
+    """
+    Start a multipart upload for the requesting user.
+
+    Returns:
+        dict: ``upload_id``, ``key``, ``part_size`` and the presigned ``parts``.
+
+    Raises:
+        UploadError: Unknown target, type or parent, or a file too large.
+    """
+    from sooq_althahab.utils import s3
+
+    upload_target = UPLOAD_TARGETS.get(target)
+    if upload_target is None:
+        raise UploadError("upload_target_invalid")
+    if content_type not in upload_target["content_types"]:
+        raise UploadError("upload_content_type_invalid")
+    if size <= 0 or size > settings.UPLOAD_MAX_FILE_SIZE:
+        raise UploadError("upload_size_invalid")
+    if (
+        upload_target.get("requires_doc_type")
+        and parent_id
+        and doc_type not in DocumentType.values
+    ):
+        raise UploadError("upload_doc_type_required")
+    if parent_id and upload_target["get_parent"](request, parent_id) is None:
+        raise UploadError("upload_parent_not_found")
+
+    name, extension = os.path.splitext(os.path.basename(filename))
+    safe_name = SAFE_FILENAME_RE.sub("_", name)[:100] or "file"
+    key = (
+        f"{UPLOAD_KEY_PREFIX}/{target}/{request.user.pk}/{uuid.uuid4().hex}/"
+        f"{safe_name}{extension.lower()[:10]}"
+    )
+    upload_id = s3.create_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, ContentType=content_type
+    )["UploadId"]
+
+    part_size = get_part_size(size)
+    part_count = math.ceil(size / part_size)
+    pipeline = get_redis_connection().pipeline()
+    pipeline.hset(
+        _session_key(upload_id),
+        mapping={
+            "user_id": str(request.user.pk),
+            "target": target,
+            "key": key,
+            "content_type": content_type,
+            "size": size,
+            "part_count": part_count,
+            "parent_id": parent_id or "",
+            "doc_type": doc_type or "",
+        },
+    )
+    pipeline.expire(_session_key(upload_id), settings.UPLOAD_SESSION_TTL)
+    pipeline.execute()
+
+    return {
+        "upload_id": upload_id,
+        "key": key,
+        "part_size": part_size,
+        "parts": _presign_parts(key, upload_id, part_count),
+        "expires_in": settings.UPLOAD_URL_EXPIRATION,
+    }
+
+
+def get_upload_session(request, upload_id):
+    """The requesting user's upload session, or None."""
+    session = get_redis_connection().hgetall(_session_key(upload_id))
+    session = {key.decode(): value.decode() for key, value in session.items()}
+    if not session or session["user_id"] != str(request.user.pk):
+        return None
+    return session
+
+
+def _matches_signature(content_type, head):
+    return any(
+        head[offset : offset + len(signature)] == signature
+        for offset, signature in FILE_SIGNATURES.get(content_type, [])
+    )
+
+
+def _validate_object(session):
+    """Check the assembled object's size and leading bytes against the session."""
+    from sooq_althahab.utils import s3
+
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    size = s3.head_object(Bucket=bucket, Key=session["key"])["ContentLength"]
+    if size != int(session["size"]) or size > settings.UPLOAD_MAX_FILE_SIZE:
+        raise UploadError("upload_size_mismatch")
+    head = s3.get_object(Bucket=bucket, Key=session["key"], Range="bytes=0-31")[
+        "Body"
+    ].read()
+    if not _matches_signature(session["content_type"], head):
+        raise UploadError("upload_content_type_mismatch")
+
+
+def complete_upload(request, upload_id, session, parts):
+    """
+    Assemble the uploaded ``parts`` (``part_number``/``etag`` dicts), validate
+    the object and attach it to the session's parent, if any.
+
+    Returns:
+        dict: ``key``, ``url`` and the ``id`` of the attached row (or None).
+
+    Raises:
+        UploadError: Missing parts, or an object of the wrong size or type
+        (which is deleted).
+    """
+    from sooq_althahab.utils import get_presigned_url_from_s3
+    from sooq_althahab.utils import s3
+
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    key = session["key"]
+    part_numbers = sorted(part["part_number"] for part in parts)
+    if part_numbers != list(range(1, int(session["part_count"]) + 1)):
+        raise UploadError("upload_parts_incomplete")
+
+    try:
+        s3.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                    for part in sorted(parts, key=lambda part: part["part_number"])
+                ]
+            },
+        )
+    except ClientError as e:
+        # Wrong or missing ETags; the client may retry with the right ones
+        logger.warning(f"[Uploads] Could not complete {key}: {e}")
+        raise UploadError("upload_parts_incomplete")
+    get_redis_connection().delete(_session_key(upload_id))
+
+    try:
+        _validate_object(session)
+    except UploadError:
+        s3.delete_object(Bucket=bucket, Key=key)
+        raise
+
+    attached = None
+    if session["parent_id"]:
+        upload_target = UPLOAD_TARGETS[session["target"]]
+        parent = upload_target["get_parent"](request, session["parent_id"])
+        if parent is None:
+            s3.delete_object(Bucket=bucket, Key=key)
+            raise UploadError("upload_parent_not_found")
+        attached = upload_target["attach"](
+            parent, key, doc_type=session["doc_type"] or None
+        )
+
+    return {
+        "key": key,
+        "url": get_presigned_url_from_s3(key),
+        "id": attached.pk if attached else None,
+    }
+
+
+def abort_upload(upload_id, session):
+    from sooq_althahab.utils import s3
+
+    get_redis_connection().delete(_session_key(upload_id))
+    s3.abort_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=session["key"],
+        UploadId=upload_id,
+    )
+
+
+def abort_stale_multipart_uploads():
+    """
+    Abort multipart uploads under ``uploads/`` started more than
+    ``UPLOAD_SESSION_TTL`` seconds ago. S3 bills their parts until then.
+
+    Returns:
+        int: Number of uploads aborted.
+    """
+    from sooq_althahab.utils import s3
+
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    aborted = 0
+    paginator = s3.get_paginator("list_multipart_uploads")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{UPLOAD_KEY_PREFIX}/"):
+        for upload in page.get("Uploads", []):
+            if upload["Initiated"] > cutoff:
+                continue
+            try:
+                s3.abort_multipart_upload(
+                    Bucket=bucket, Key=upload["Key"], UploadId=upload["UploadId"]
+                )
+                aborted += 1
+            except Exception as e:
+                logger.warning(f"[Uploads] Could not abort {upload['Key']}: {e}")
+    return aborted
@@ -53,7 +53,12 @@ from sooq_althahab.payment_gateway_services.credimax.subscription.views.update_b
 )
 from sooq_althahab.utils import build_error_response
 from sooq_althahab.views import GeneratePresignedS3URLAPIView
+from sooq_althahab.views import PdfJobDetailAPIView
+from sooq_althahab.views import PdfJobDownloadAPIView
 from sooq_althahab.views import PreciousMetalPriceListAPIView
+from sooq_althahab.views import UploadCompleteAPIView
+from sooq_althahab.views import UploadCreateAPIView
+from sooq_althahab.views import UploadDetailAPIView
 
 from .webhook import ShuftiWebhookView
 
@@ -287,6 +292,29 @@ urlpatterns = [
         wallet.TransactionReceiptEmailView.as_view(),
         name="transaction-receipt-email",
     ),
+    # Status and download of a PDF generated in the background
+    path(
+        "api/v1/documents/jobs/<str:job_id>/",
+        PdfJobDetailAPIView.as_view(),
+        name="pdf-job-detail",
+    ),
+    path(
+        "api/v1/documents/jobs/<str:job_id>/download/",
+        PdfJobDownloadAPIView.as_view(),
+        name="pdf-job-download",
+    ),
+    # Direct-to-S3 multipart uploads
+    path("api/v1/uploads/", UploadCreateAPIView.as_view(), name="upload-create"),
+    path(
+        "api/v1/uploads/<str:upload_id>/",
+        UploadDetailAPIView.as_view(),
+        name="upload-detail",
+    ),
+    path(
+        "api/v1/uploads/<str:upload_id>/complete/",
+        UploadCompleteAPIView.as_view(),
+        name="upload-complete",
+    ),
 ]
 
 if settings.DEBUG:
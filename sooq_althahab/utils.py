@@ -1,24 +1,35 @@
+import json
 import logging
-import mimetypes
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from datetime import datetime
 
 import boto3
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.conf import settings
+from django.db import connections
+from django.db.models import Q
 from django.http import Http404
 from django.http import JsonResponse
 from django.utils.encoding import force_str
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import exception_handler
 from rest_framework.viewsets import ModelViewSet
 
+from account.models import FCMToken
 from account.models import Organization
-from account.models import User
-from seller.utils import get_fcm_tokens_for_users
-from sooq_althahab.enums.account import UserRoleChoices
-from sooq_althahab_admin.models import Notification
+from sooq_althahab.notification_coalescing import get_organization_admin_users
+from sooq_althahab.notification_coalescing import notify_organization_admins
+from sooq_althahab.notification_fanout import fan_out_notification
+from sooq_althahab.notification_fanout import get_user_ids
+from sooq_althahab.notification_fanout import send_unread_counts
+from sooq_althahab.notification_stream import record_group_message
+from sooq_althahab.presigned_urls import get_presigned_url
 
 from .messages import MESSAGES
 
@@ -67,6 +78,134 @@ class CommonPagination(PageNumberPagination):
     page_size_query_param = "page_size"
 
 
+class KeysetPagination(CommonPagination):
+    """
+    Cursor (keyset) pagination on ``(created_at, id)``.
+
+    Requests without a ``cursor`` parameter keep the page-number behaviour of
+    ``CommonPagination``. Sending ``?cursor=`` (empty for the first page) and
+    then the returned ``next_cursor`` seeks on the composite index instead of
+    scanning with OFFSET, so deep pages cost the same as the first one.
+
+    In cursor mode the total is controlled with ``?count=`` which accepts
+    ``none`` (default), ``estimate`` (planner estimate) or ``exact``.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering_field = "created_at"
+    default_count_mode = "none"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.use_keyset = self.cursor_query_param in request.query_params
+        self.descending = self._is_descending(queryset)
+        self.next_position = None
+
+        if not self.use_keyset:
+            page = super().paginate_queryset(queryset, request, view)
+            if page and self.page.has_next():
+                self.next_position = self._get_position(page[-1])
+            return page
+
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.count = self._get_count(
+            queryset,
+            request.query_params.get(self.count_query_param, self.default_count_mode),
+        )
+
+        prefix = "-" if self.descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.ordering_field}", f"{prefix}pk")
+        if position:
+            created_at, pk = position
+            lookup = "lt" if self.descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.ordering_field}__{lookup}": created_at})
+                | Q(**{self.ordering_field: created_at, f"pk__{lookup}": pk})
+            )
+
+        results = list(queryset[: page_size + 1])
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_position = self._get_position(results[-1])
+        return results
+
+    def get_paginated_response(self, data):
+        next_cursor = (
+            self.encode_cursor(self.next_position) if self.next_position else None
+        )
+        if not self.use_keyset:
+            response = super().get_paginated_response(data)
+            response.data["next_cursor"] = next_cursor
+            return response
+
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param,
+                next_cursor,
+            )
+        return Response(
+            {
+                "count": self.count,
+                "next": next_link,
+                "previous": None,
+                "next_cursor": next_cursor,
+                "results": data,
+            }
+        )
+
+    def _is_descending(self, queryset):
+        order_by = queryset.query.order_by
+        return not (order_by and order_by[0] == self.ordering_field)
+
+    def _get_position(self, instance):
+        return getattr(instance, self.ordering_field), instance.pk
+
+    def _get_count(self, queryset, mode):
+        if mode == "exact":
+            return queryset.count()
+        if mode == "estimate":
+            return estimate_queryset_count(queryset)
+        return None
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        payload = json.dumps({"t": created_at.isoformat(), "id": str(pk)})
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+            return datetime.fromisoformat(payload["t"]), payload["id"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(MESSAGES["invalid_cursor"])
+
+
+def estimate_queryset_count(queryset):
+    """
+    Return the PostgreSQL planner's row estimate for ``queryset``.
+
+    Costs a single EXPLAIN instead of a full COUNT(*); falls back to an exact
+    count on other database backends.
+    """
+    db_connection = connections[queryset.db]
+    if db_connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with db_connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
 class CustomModelViewSet(ModelViewSet):
     def get_object(self):
         try:
@@ -183,27 +322,21 @@ def handle_validation_error(validation_error):
     )
 
 
-def get_presigned_url_from_s3(object_name):
-    """Generate a presigned URL for an S3 object with inferred file type."""
+def get_presigned_url_from_s3(object_name, context=None):
+    """
+    Generate a presigned URL for an S3 object with inferred file type.
+
+    URLs are cached per object (see ``sooq_althahab.presigned_urls``). Pass
+    the serializer context to use the URLs its list serializer signed in one
+    batch.
+    """
     if not object_name:
         return None
 
-    try:
-        url = s3.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": object_name},
-            ExpiresIn=settings.S3_FILE_EXPIRATION_DURATION,
-        )
-
-        # Infer file type based on filename extension
-        file_type, _ = mimetypes.guess_type(object_name)
-        file_type = file_type or "application/octet-stream"
-
-        return {"url": url, "file_type": file_type}
-
-    except Exception:
-        logger.error(f"Error generating presigned URL for object {object_name}")
-        return None
+    presigned_urls = (context or {}).get("presigned_urls") or {}
+    url_data = presigned_urls.get(object_name) or get_presigned_url(object_name)
+    # Cached entries are shared, so callers get their own copy
+    return dict(url_data) if url_data else None
 
 
 def send_notification_to_group(org_code, data={}, message=""):
@@ -214,29 +347,23 @@ def send_notification_to_group(org_code, data={}, message=""):
         message (str): The message content to send.
     """
     channel_layer = get_channel_layer()
+    group_name = f"notifications_{org_code}"  # e.g. 'notifications_org_code'
+    event = {"type": "notification_message", "data": data, "message": message}
+
+    # Keep the message for clients that reconnect with its resume token
+    event["resume_token"] = record_group_message(group_name, event)
 
     # Send a message to the group
-    async_to_sync(channel_layer.group_send)(
-        f"notifications_{org_code}",  # The group name (e.g., 'notifications_org_code')
-        {"type": "notification_message", "data": data, "message": message},
-    )
+    async_to_sync(channel_layer.group_send)(group_name, event)
 
 
 def send_notification_count_to_users(users):
     """
-    Utility function to send notifications to a WebSocket group.
+    Push the unread notification count to each user's WebSocket group.
     Args:
-        org_id (str): The group name to which the message will be sent.
-        message (str): The message content to send.
+        users: Users, user ids or a user queryset.
     """
-    channel_layer = get_channel_layer()
-    for user in users:
-        count = Notification.objects.filter(user=user, is_read=False).count()
-        # Send a message to the group
-        async_to_sync(channel_layer.group_send)(
-            f"notifications_{user.pk}",  # The group name (e.g., 'notifications_user_id')
-            {"type": "notification_count", "count": count},
-        )
+    send_unread_counts(get_user_ids(users))
 
 
 def send_notifications_to_organization_admins(
@@ -276,57 +403,22 @@ def send_notifications_to_organization_admins_with_org(
 
     This version accepts an organization object directly to avoid N+1 queries.
     Use this when you already have the organization object loaded.
-    """
 
-    # Start with the base role: ADMIN
-    role = [UserRoleChoices.ADMIN]
-
-    # If sub_admin is provided, extend the roles list accordingly
-    if sub_admin and sub_admin == UserRoleChoices.TAQABETH_ENFORCER:
-        role.append(UserRoleChoices.TAQABETH_ENFORCER)
-    elif sub_admin and sub_admin == UserRoleChoices.JEWELLERY_INSPECTOR:
-        role.append(UserRoleChoices.JEWELLERY_INSPECTOR)
-    elif sub_admin and sub_admin == UserRoleChoices.JEWELLERY_BUYER:
-        role.append(UserRoleChoices.JEWELLERY_BUYER)
-
-    # Fetch users who belong to the given organization
-    # and match any of the specified roles (ADMIN + optional sub-admin roles)
-    admin_users = User.objects.filter(
-        organization_id=organization,
-        user_roles__role__in=role,
-    )
-
-    # Create notification objects for each matched user
-    notifications = [
-        Notification(
-            user=user,
-            title=title,
-            message=body,
-            notification_type=notification_type,
-            content_type=content_type,
-            object_id=object_id,
-        )
-        for user in admin_users
-    ]
-
-    # Bulk insert all notifications into the database for efficiency
-    # Use ignore_conflicts=True to handle potential duplicate IDs from concurrent operations
-    Notification.objects.bulk_create(notifications, ignore_conflicts=True)
-
-    # Trigger sending of real-time notifications (e.g., via WebSocket, push, etc.)
-    send_notification_to_group(
-        organization.code,
-        data={
-            "title": title,
-            "body": body,
-            "object_id": object_id,
-            "notification_type": notification_type,
-        },
-        message="Success",
+    Bursts of the same notification type are coalesced, and digest types are
+    delivered once a day (see ``notification_coalescing``).
+    """
+    notify_organization_admins(
+        organization,
+        title,
+        body,
+        notification_type,
+        getattr(content_type, "pk", content_type),
+        object_id,
+        sub_admin,
     )
 
-    # Return the list of admin users who received notifications
-    return admin_users
+    # Return the admin users who receive the notification
+    return get_organization_admin_users(organization, sub_admin)
 
 
 def send_notifications(
@@ -340,39 +432,28 @@ def send_notifications(
     """
     Sends notifications to specified users.
 
-    This method retrieves the FCM tokens for the given users and sends push notifications asynchronously.
-    Additionally, it creates in-app notification records for each user.
+    Creates in-app notification records for each user, pushes their unread
+    counts and sends push notifications asynchronously. Large audiences are
+    delivered in chunks by background tasks (see ``notification_fanout``).
     """
-    from sooq_althahab.tasks import send_notification
-
-    tokens = get_fcm_tokens_for_users(list(users))
-
-    if not tokens:
+    user_ids = get_user_ids(users)
+
+    # Nothing is sent when none of the users has a registered device.
+    if (
+        not FCMToken.objects.filter(user_id__in=user_ids, fcm_token__isnull=False)
+        .exclude(fcm_token="")
+        .exists()
+    ):
         return
 
-    notifications = [
-        Notification(
-            user=user,
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            content_type=content_type,
-            object_id=object_id,
-        )
-        for user in users
-    ]
-    # Bulk insert all notifications, ignoring conflicts from concurrent operations
-    Notification.objects.bulk_create(notifications, ignore_conflicts=True)
-
-    # Serialize just **one** notification (since all are identical)
-    notification_data = {
-        "notification_type": notification_type,
-        "id": str(object_id),
-    }
-
-    # Send a bulk push notification asynchronously
-    send_notification_count_to_users(users)
-    send_notification.delay(tokens, title, message, notification_data)
+    fan_out_notification(
+        user_ids,
+        title,
+        message,
+        notification_type,
+        getattr(content_type, "pk", content_type),
+        object_id,
+    )
 
 
 def validate_card_expiry_date(expiry_month, expiry_year):
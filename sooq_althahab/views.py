@@ -1,5 +1,8 @@
+import logging
 from datetime import timedelta
 
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
 from django.conf import settings
 from django.db.models import F
 from django.db.models import Max
@@ -8,20 +11,38 @@ from django.db.models import Window
 from django.db.models.functions import ExtractWeekDay
 from django.db.models.functions import RowNumber
 from django.db.models.functions import TruncDate
+from django.http import HttpResponse
+from django.http import HttpResponseRedirect
 from django.utils import timezone
+from redis import RedisError
 from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
 from account.message import MESSAGES
+from sooq_althahab.billing.pdf_jobs import READY
+from sooq_althahab.billing.pdf_jobs import get_job_download_url
+from sooq_althahab.billing.pdf_jobs import get_pdf_job
+from sooq_althahab.billing.pdf_jobs import load_job_pdf
+from sooq_althahab.billing.pdf_jobs import serialize_pdf_job
 from sooq_althahab.messages import MESSAGES as SOOQ_ALTHAHAB_MESSAGES
+from sooq_althahab.serializers import UploadCompleteSerializer
+from sooq_althahab.serializers import UploadCreateSerializer
+from sooq_althahab.uploads import UploadError
+from sooq_althahab.uploads import abort_upload
+from sooq_althahab.uploads import complete_upload
+from sooq_althahab.uploads import create_upload
+from sooq_althahab.uploads import get_upload_session
 from sooq_althahab.utils import generic_response
+from sooq_althahab.utils import handle_serializer_errors
 from sooq_althahab_admin.models import MetalPriceHistory
 from sooq_althahab_admin.serializers import MetalPriceHistoryChartSerializer
 
 from .utils import s3
 
+logger = logging.getLogger(__name__)
+
 
 class GeneratePresignedS3URLAPIView(APIView):
     """
@@ -219,3 +240,180 @@ class PreciousMetalPriceListAPIView(ListAPIView):
             message=SOOQ_ALTHAHAB_MESSAGES["precious_metal_price_history_retrieved"],
             status_code=status.HTTP_200_OK,
         )
+
+
+def _get_own_pdf_job(request, job_id):
+    """The job when it exists and belongs to the requesting user, else None."""
+    job = get_pdf_job(job_id)
+    if not job or job["user_id"] != str(request.user.pk):
+        return None
+    return job
+
+
+class PdfJobDetailAPIView(APIView):
+    """
+    Status of a PDF submitted by a download endpoint: PENDING, RUNNING,
+    READY (with ``download_url``) or FAILED.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = _get_own_pdf_job(request, job_id)
+        if not job:
+            return generic_response(
+                error_message=SOOQ_ALTHAHAB_MESSAGES["pdf_job_not_found"],
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        return generic_response(
+            data=serialize_pdf_job(request, job_id, job),
+            message=SOOQ_ALTHAHAB_MESSAGES["pdf_job_retrieved"],
+        )
+
+
+class PdfJobDownloadAPIView(APIView):
+    """Download a READY PDF: a redirect to S3, or the file from local storage."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = _get_own_pdf_job(request, job_id)
+        if not job:
+            return generic_response(
+                error_message=SOOQ_ALTHAHAB_MESSAGES["pdf_job_not_found"],
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        if job["status"] != READY:
+            return generic_response(
+                error_message=SOOQ_ALTHAHAB_MESSAGES["pdf_job_not_ready"],
+                status_code=status.HTTP_409_CONFLICT,
+            )
+
+        download_url = get_job_download_url(job)
+        if download_url:
+            return HttpResponseRedirect(download_url)
+        pdf = load_job_pdf(job)
+        if pdf is None:
+            return generic_response(
+                error_message=SOOQ_ALTHAHAB_MESSAGES["pdf_job_not_found"],
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        return HttpResponse(
+            pdf,
+            content_type="application/pdf",
+            headers={
+                "Content-Disposition": f'attachment; filename="{job["filename"]}"'
+            },
+        )
+
+
+# Storage or session store failures while handling an upload
+UPLOAD_SERVICE_ERRORS = (RedisError, ClientError, BotoCoreError)
+
+
+def _upload_error_response(error):
+    return generic_response(
+        error_message=SOOQ_ALTHAHAB_MESSAGES[error.message_key],
+        status_code=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _upload_unavailable_response(error):
+    logger.error(f"[Uploads] Storage unavailable: {error}")
+    return generic_response(
+        error_message=SOOQ_ALTHAHAB_MESSAGES["upload_unavailable"],
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+class UploadCreateAPIView(APIView):
+    """
+    Start a direct-to-S3 multipart upload.
+
+    Body: ``target``, ``filename``, ``content_type``, ``size`` and optionally
+    ``parent_id`` (plus ``doc_type`` for business documents) to attach the
+    file on completion. Returns the ``upload_id``, object ``key`` and one
+    presigned PUT URL per part; each part's ``ETag`` response header is
+    needed to complete the upload.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return handle_serializer_errors(serializer)
+        data = serializer.validated_data
+
+        try:
+            upload = create_upload(
+                request,
+                data["target"],
+                data["filename"],
+                data["content_type"],
+                data["size"],
+                parent_id=data.get("parent_id") or None,
+                doc_type=data.get("doc_type") or None,
+            )
+        except UploadError as e:
+            return _upload_error_response(e)
+        except UPLOAD_SERVICE_ERRORS as e:
+            return _upload_unavailable_response(e)
+        return generic_response(
+            data=upload,
+            message=SOOQ_ALTHAHAB_MESSAGES["upload_created"],
+            status_code=status.HTTP_201_CREATED,
+        )
+
+
+class UploadDetailAPIView(APIView):
+    """Cancel an upload that has not been completed."""
+
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request, upload_id):
+        try:
+            session = get_upload_session(request, upload_id)
+            if not session:
+                return generic_response(
+                    error_message=SOOQ_ALTHAHAB_MESSAGES["upload_not_found"],
+                    status_code=status.HTTP_404_NOT_FOUND,
+                )
+            abort_upload(upload_id, session)
+        except UPLOAD_SERVICE_ERRORS as e:
+            return _upload_unavailable_response(e)
+        return generic_response(message=SOOQ_ALTHAHAB_MESSAGES["upload_aborted"])
+
+
+class UploadCompleteAPIView(APIView):
+    """
+    Complete an upload from its parts' ETags. The file's size and type are
+    checked before it is attached to the record given at creation.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        serializer = UploadCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return handle_serializer_errors(serializer)
+
+        try:
+            session = get_upload_session(request, upload_id)
+            if not session:
+                return generic_response(
+                    error_message=SOOQ_ALTHAHAB_MESSAGES["upload_not_found"],
+                    status_code=status.HTTP_404_NOT_FOUND,
+                )
+            uploaded = complete_upload(
+                request, upload_id, session, serializer.validated_data["parts"]
+            )
+        except UploadError as e:
+            return _upload_error_response(e)
+        except UPLOAD_SERVICE_ERRORS as e:
+            return _upload_unavailable_response(e)
+        return generic_response(
+            data=uploaded,
+            message=SOOQ_ALTHAHAB_MESSAGES["upload_completed"],
+            status_code=status.HTTP_201_CREATED,
+        )
@@ -2,6 +2,7 @@ import hashlib
 import logging
 
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -9,6 +10,8 @@ from rest_framework.views import APIView
 from account.models import BusinessAccount
 from account.models import User
 from account.models import UserAssignedBusiness
+from sooq_althahab.enums.account import WebhookProvider
+from sooq_althahab.webhook_events import record_webhook_event
 
 logger = logging.getLogger(__name__)
 
@@ -26,18 +29,45 @@ SHUFTI_WEBHOOK_RESPONSE_KEYS = {
 
 class ShuftiWebhookView(APIView):
     def post(self, request, *args, **kwargs):
+        """
+        Store a Shufti callback and acknowledge it. User verification fields are
+        updated on the webhooks queue (``process_webhook``).
+        """
         # Decode the request body
         request_body = request.body.decode()
         data = request.data
 
+        # Verification results must carry a valid signature; status-only and
+        # declined callbacks are stored without one, as before.
+        if (
+            data.get("verification_result")
+            and not data.get("declined_reason")
+            and not self.is_signature_valid(
+                request_body, request.headers.get("Signature")
+            )
+        ):
+            return Response(status=204)
+
+        # Both make up the event id; without them unrelated callbacks would
+        # be dropped as duplicates of each other
+        reference = data.get("reference")
+        event = data.get("event")
+        if not reference or not event:
+            logger.error(f"Shufti callback without reference or event: {data}")
+            return Response(status=400)
+
+        record_webhook_event(WebhookProvider.SHUFTI, f"{reference}:{event}", data)
+        return Response(status=204)
+
+    def process_webhook(self, data):
+        """Update the user's verification fields from a stored Shufti callback."""
         # Retrieve the user object
         user = self.get_user(data)
         if not user:
-            return Response(status=404)
+            return
 
         # Extract verification result
         verification_result = data.get("verification_result")
-        signature = request.headers.get("Signature")
         event = data.get("event")
         declined_reason = data.get("declined_reason")
         reference = data.get("reference")
@@ -50,11 +80,7 @@ class ShuftiWebhookView(APIView):
             user.reference_id = reference
             user.verification_url = verification_url
             user.save()
-            return Response(status=204)
-
-        # Validate the signature
-        if not self.is_signature_valid(request_body, signature):
-            return Response(status=204)
+            return
 
         # Update user fields based on verification result
 
@@ -70,25 +96,26 @@ class ShuftiWebhookView(APIView):
         # Delete all users and business with the same email and phone number as the current user, if both are verified
         try:
             if user.email_verified and user.phone_number:
-                draft_users = User.global_objects.filter(
-                    Q(email=user.email)
-                    & (Q(email_verified=False) | Q(phone_verified=False))
-                )
+                # A savepoint, so a failed delete does not abort the event's
+                # transaction
+                with transaction.atomic():
+                    draft_users = User.global_objects.filter(
+                        Q(email=user.email)
+                        & (Q(email_verified=False) | Q(phone_verified=False))
+                    )
 
-                draft_users_business = BusinessAccount.global_objects.filter(
-                    user_assigned_businesses__user__in=draft_users
-                ).distinct()
+                    draft_users_business = BusinessAccount.global_objects.filter(
+                        user_assigned_businesses__user__in=draft_users
+                    ).distinct()
 
-                draft_users_business.delete()
-                draft_users.delete()
+                    draft_users_business.delete()
+                    draft_users.delete()
 
         except Exception as e:
             logger.error(
                 f"Failed to delete users with email: {user.email} and phone number: {user.phone_number}."
             )
 
-        return Response(status=204)
-
     def is_signature_valid(self, request_body, signature):
         # Generate hashed secret key
         hashed_secret_key = hashlib.sha256(
@@ -0,0 +1,131 @@
+"""
+Accept-fast webhook ingestion.
+
+The Credimax, Benefit Pay and Shufti webhook endpoints only verify the
+notification, store it as a ``WebhookEvent`` and acknowledge it. Transaction
+and wallet updates, ``WebhookCall`` logging and emails run afterwards in the
+``process_webhook_event`` task on the dedicated ``webhooks`` queue, so the
+gateway's response time no longer depends on that work.
+
+- Redeliveries are dropped by the unique (provider, event_id) pair.
+- An event is claimed with a conditional update before it is processed, so
+  two workers never run the same event.
+- The handler and the PROCESSED update run in one database transaction, so a
+  handler that fails partway leaves no partial changes behind. Handlers send
+  emails and other external side effects on commit.
+- Events whose enqueue was lost, or whose worker died, are re-queued by
+  ``requeue_webhook_events``.
+- ``manage.py replay_webhook_events`` re-runs stored events.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from account.models import WebhookEvent
+from sooq_althahab.enums.account import WebhookEventStatus
+from sooq_althahab.enums.account import WebhookProvider
+
+logger = logging.getLogger(__name__)
+
+# Views implementing ``process_webhook(payload)`` for each provider.
+WEBHOOK_EVENT_HANDLERS = {
+    WebhookProvider.CREDIMAX: "sooq_althahab.payment_gateway_services.credimax.hosted_checkout.checkout.CredimaxWebhookAPIView",
+    WebhookProvider.BENEFIT_PAY: "sooq_althahab.payment_gateway_services.benefit.benefit.BenefitNotificationView",
+    WebhookProvider.SHUFTI: "sooq_althahab.webhook.ShuftiWebhookView",
+}
+
+
+def enqueue_webhook_event(event_id):
+    """Queue an event for processing. A broker failure leaves it RECEIVED."""
+    from sooq_althahab.tasks import process_webhook_event
+
+    try:
+        process_webhook_event.delay(event_id)
+    except Exception as e:
+        logger.error(f"[Webhook] Failed to enqueue event {event_id}: {e}")
+
+
+def record_webhook_event(provider, event_id, payload, headers=None):
+    """
+    Store a verified notification and queue it once the insert commits.
+
+    Returns:
+        tuple: (WebhookEvent, created). ``created`` is False for a redelivery
+        of an event that is already stored.
+    """
+    event, created = WebhookEvent.objects.get_or_create(
+        provider=provider,
+        event_id=event_id[:255],
+        defaults={"payload": payload, "headers": headers},
+    )
+    if created:
+        transaction.on_commit(lambda: enqueue_webhook_event(event.id))
+    else:
+        logger.info(
+            f"[Webhook] Duplicate {provider} event {event_id} ignored "
+            f"(status {event.status})."
+        )
+    return event, created
+
+
+def get_claimable_events():
+    """Events that may be (re)processed: new, failed, or stuck in PROCESSING."""
+    stale_before = timezone.now() - timedelta(
+        seconds=settings.WEBHOOK_EVENT_PROCESSING_TIMEOUT
+    )
+    return WebhookEvent.objects.filter(
+        Q(status__in=[WebhookEventStatus.RECEIVED, WebhookEventStatus.FAILED])
+        | Q(status=WebhookEventStatus.PROCESSING, updated_at__lt=stale_before)
+    )
+
+
+def process_stored_webhook_event(event_id):
+    """
+    Claim and process one stored event.
+
+    Returns:
+        bool: False if the event was already processed or is being processed
+        by another worker.
+
+    Raises:
+        Exception: The handler failed; the event is left FAILED with the error.
+    """
+    now = timezone.now()
+    claimed = (
+        get_claimable_events()
+        .filter(id=event_id)
+        .update(
+            status=WebhookEventStatus.PROCESSING,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    )
+    if not claimed:
+        return False
+
+    event = WebhookEvent.objects.get(id=event_id)
+    view_class = import_string(WEBHOOK_EVENT_HANDLERS[event.provider])
+    try:
+        with transaction.atomic():
+            view_class().process_webhook(event.payload)
+            WebhookEvent.objects.filter(id=event_id).update(
+                status=WebhookEventStatus.PROCESSED,
+                last_error=None,
+                processed_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+    except Exception as e:
+        WebhookEvent.objects.filter(id=event_id).update(
+            status=WebhookEventStatus.FAILED,
+            last_error=str(e),
+            updated_at=timezone.now(),
+        )
+        raise
+    return True
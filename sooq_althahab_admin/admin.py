@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.utils import timezone
 
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunItemStatus
 from sooq_althahab_admin.models import BillingDetails
+from sooq_althahab_admin.models import BillingRun
+from sooq_althahab_admin.models import BillingRunItem
 from sooq_althahab_admin.models import BusinessSavedCardToken
 from sooq_althahab_admin.models import BusinessSubscriptionPlan
 from sooq_althahab_admin.models import GlobalMetal
@@ -381,3 +385,86 @@ class BusinessSavedCardTokenAdmin(admin.ModelAdmin):
         )
 
     cleanup_orphaned_tokens.short_description = "Clean up orphaned card tokens"
+
+
+class BillingRunItemInline(admin.TabularInline):
+    model = BillingRunItem
+    fields = ("subscription", "status", "attempts", "error_message", "completed_at")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(BillingRun)
+class BillingRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "run_type",
+        "run_date",
+        "status",
+        "total_items",
+        "created_at",
+        "completed_at",
+    )
+    list_filter = ("run_type", "status", "run_date")
+    ordering = ("-created_at",)
+    inlines = [BillingRunItemInline]
+
+
+@admin.register(BillingRunItem)
+class BillingRunItemAdmin(admin.ModelAdmin):
+    """
+    Items marked NEEDS_RECONCILIATION may have been charged. Once the charge
+    is checked with Credimax, mark them as charged, or release them so the
+    next run bills them again.
+    """
+
+    list_display = (
+        "id",
+        "billing_run",
+        "subscription",
+        "status",
+        "attempts",
+        "error_message",
+        "updated_at",
+    )
+    list_filter = ("status", "billing_run__run_type")
+    search_fields = ("subscription__business__name", "subscription__id")
+    readonly_fields = (
+        "billing_run",
+        "subscription",
+        "status",
+        "attempts",
+        "error_message",
+        "completed_at",
+    )
+    ordering = ("-updated_at",)
+    actions = ["mark_charged", "release_for_billing"]
+
+    def mark_charged(self, request, queryset):
+        """The charge went through: close the items without billing again."""
+        updated = queryset.filter(
+            status=BillingRunItemStatus.NEEDS_RECONCILIATION
+        ).update(
+            status=BillingRunItemStatus.COMPLETED,
+            completed_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        self.message_user(
+            request, f"Marked {updated} item(s) as charged.", level="SUCCESS"
+        )
+
+    mark_charged.short_description = "Mark as charged (verified with Credimax)"
+
+    def release_for_billing(self, request, queryset):
+        """The charge did not go through: let the next run bill the items."""
+        updated = queryset.filter(
+            status=BillingRunItemStatus.NEEDS_RECONCILIATION
+        ).update(status=BillingRunItemStatus.FAILED, updated_at=timezone.now())
+        self.message_user(
+            request, f"Released {updated} item(s) for billing.", level="SUCCESS"
+        )
+
+    release_for_billing.short_description = (
+        "Release for billing (not charged, verified with Credimax)"
+    )
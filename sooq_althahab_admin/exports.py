@@ -0,0 +1,207 @@
+"""
+Streaming CSV/XLSX exports for the admin transaction and purchase request lists.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) and written straight to the response or to a temporary
+file, so memory stays constant however many rows are exported. Exports above
+``ADMIN_EXPORT_SYNC_ROW_LIMIT`` rows are handed to the ``export_admin_report``
+Celery task, which uploads the file to S3 and emails a download link.
+"""
+
+import csv
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.http import FileResponse
+from django.http import QueryDict
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters.utils import translate_validation
+from openpyxl import Workbook
+
+from account.models import Transaction
+from seller.filters import PurchaseRequestFilter
+from sooq_althahab.querysets.purchase_request import base_purchase_request_queryset
+from sooq_althahab_admin.filters import TransactionFilter
+
+CSV_CONTENT_TYPE = "text/csv"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_FILE_FORMATS = {"csv": CSV_CONTENT_TYPE, "xlsx": XLSX_CONTENT_TYPE}
+
+TRANSACTION_EXPORT_COLUMNS = [
+    ("Receipt Number", "receipt_number"),
+    ("Reference Number", "reference_number"),
+    ("Created At", "created_at"),
+    ("Transaction Type", "transaction_type"),
+    ("Status", "status"),
+    ("Transfer Via", "transfer_via"),
+    ("From Business", "from_business__name"),
+    ("To Business", "to_business__name"),
+    ("Amount", "amount"),
+    ("Platform Fee", "platform_fee"),
+    ("VAT", "vat"),
+    ("Taxes", "taxes"),
+    ("Service Fee", "service_fee"),
+    ("Additional Fee", "additional_fee"),
+    ("Currency", "currency"),
+    ("Created By", "created_by__email"),
+]
+
+PURCHASE_REQUEST_EXPORT_COLUMNS = [
+    ("Invoice Number", "invoice_number"),
+    ("Created At", "created_at"),
+    ("Request Type", "request_type"),
+    ("Status", "status"),
+    ("Business", "business__name"),
+    ("Precious Item", "precious_item__name"),
+    ("Requested Quantity", "requested_quantity"),
+    ("Price Locked", "price_locked"),
+    ("Premium", "premium"),
+    ("Order Cost", "order_cost"),
+    ("VAT", "vat"),
+    ("Taxes", "taxes"),
+    ("Platform Fee", "platform_fee"),
+    ("Total Cost", "total_cost"),
+    ("Approved At", "approved_at"),
+    ("Completed At", "completed_at"),
+]
+
+
+def get_transaction_export_queryset(organization_id):
+    """Same base queryset as ``TransactionListAdminAPIView``."""
+    return Transaction.global_objects.filter(
+        created_by__organization_id=organization_id,
+        business_subscription__isnull=True,
+    ).order_by("-created_at")
+
+
+def get_purchase_request_export_queryset(organization_id):
+    """Same base queryset as ``PurchaseRequestListAPIView``."""
+    return base_purchase_request_queryset().filter(organization_id=organization_id)
+
+
+EXPORTS = {
+    "transactions": {
+        "queryset": get_transaction_export_queryset,
+        "filterset_class": TransactionFilter,
+        "columns": TRANSACTION_EXPORT_COLUMNS,
+    },
+    "purchase-requests": {
+        "queryset": get_purchase_request_export_queryset,
+        "filterset_class": PurchaseRequestFilter,
+        "columns": PURCHASE_REQUEST_EXPORT_COLUMNS,
+    },
+}
+
+
+def build_export_queryset(export_type, organization_id, query_params, request=None):
+    """
+    Apply the list endpoint's filterset to the export base queryset. Invalid
+    filter values raise a ValidationError with the filterset errors.
+    """
+    export = EXPORTS[export_type]
+    if not isinstance(query_params, QueryDict):
+        data = QueryDict(mutable=True)
+        for key, values in query_params.items():
+            data.setlist(key, values if isinstance(values, list) else [values])
+        query_params = data
+
+    filterset = export["filterset_class"](
+        query_params,
+        queryset=export["queryset"](organization_id),
+        request=request,
+    )
+    if not filterset.is_valid():
+        # Same 400 response as the list endpoint's DjangoFilterBackend
+        raise translate_validation(filterset.errors)
+    return filterset.qs
+
+
+def iter_export_rows(queryset, columns, chunk_size=None):
+    """Yield export rows as tuples using a server-side cursor."""
+    chunk_size = chunk_size or settings.ADMIN_EXPORT_CHUNK_SIZE
+    paths = [path for _, path in columns]
+    rows = queryset.prefetch_related(None).values_list(*paths)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield tuple(_format_value(value) for value in row)
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        # Spreadsheets cannot store timezone-aware datetimes
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv_response(queryset, columns, filename):
+    """Return a ``StreamingHttpResponse`` that renders rows as they are read."""
+    writer = csv.writer(_Echo())
+
+    def generate():
+        yield writer.writerow([header for header, _ in columns])
+        for row in iter_export_rows(queryset, columns):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type=CSV_CONTENT_TYPE)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_export_file(queryset, columns, file_format, file_obj):
+    """Write the export to ``file_obj`` (CSV text or write-only XLSX workbook)."""
+    if file_format == "csv":
+        writer = csv.writer(file_obj)
+        writer.writerow([header for header, _ in columns])
+        for row in iter_export_rows(queryset, columns):
+            writer.writerow(row)
+        return
+
+    # Write-only mode streams rows to a temporary XML part instead of
+    # keeping every cell in memory.
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append([header for header, _ in columns])
+    for row in iter_export_rows(queryset, columns):
+        worksheet.append(row)
+    workbook.save(file_obj)
+
+
+def xlsx_file_response(queryset, columns, filename):
+    """Build the workbook in a temporary file and stream it back in chunks."""
+    temp_file = tempfile.TemporaryFile()
+    write_export_file(queryset, columns, "xlsx", temp_file)
+    temp_file.seek(0)
+    return FileResponse(
+        temp_file,
+        as_attachment=True,
+        filename=filename,
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def get_export_filename(export_type, file_format):
+    return (
+        f"{export_type}-{timezone.localtime().strftime('%Y%m%d%H%M%S')}.{file_format}"
+    )
+
+
+def query_params_to_dict(query_params):
+    """Serialize a ``QueryDict`` for a Celery task (lists keep multi-values)."""
+    return {key: query_params.getlist(key) for key in query_params.keys()}
+
+
+def exclude_pagination_params(query_params):
+    """Drop parameters that only make sense for paginated list responses."""
+    ignored = {"page", "page_size", "cursor", "count", "file_format", "async"}
+    data = query_params.copy()
+    for key in ignored:
+        data.pop(key, None)
+    return data
@@ -35,6 +35,7 @@ from sooq_althahab.enums.jeweler import RequestStatus
 from sooq_althahab.enums.jeweler import StockLocation
 from sooq_althahab.enums.jeweler import StockStatus
 from sooq_althahab.enums.sooq_althahab_admin import MaterialType
+from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import PoolStatus
 from sooq_althahab_admin.models import BusinessSubscriptionPlan
 from sooq_althahab_admin.models import JewelryProductColor
@@ -42,6 +43,7 @@ from sooq_althahab_admin.models import JewelryProductType
 from sooq_althahab_admin.models import MaterialItem
 from sooq_althahab_admin.models import MetalCaratType
 from sooq_althahab_admin.models import MusharakahDurationChoices
+from sooq_althahab_admin.models import Notification
 from sooq_althahab_admin.models import Pool
 from sooq_althahab_admin.models import StoneClarity
 from sooq_althahab_admin.models import StoneCutShape
@@ -852,3 +854,16 @@ class JewelryProfitDistributionFilter(django_filters.FilterSet):
     def filter_recipient_business_name(self, queryset, name, value):
         """Filter by recipient business name."""
         return queryset.filter(recipient_business__name__icontains=value)
+
+
+class NotificationFilter(django_filters.FilterSet):
+    """Inbox filters, each served by one of the Notification indexes."""
+
+    is_read = django_filters.BooleanFilter(field_name="is_read")
+    notification_type = django_filters.ChoiceFilter(
+        field_name="notification_type", choices=NotificationTypes.choices
+    )
+
+    class Meta:
+        model = Notification
+        fields = ["is_read", "notification_type"]
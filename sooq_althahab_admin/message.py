@@ -45,11 +45,19 @@ MESSAGES = {
     "invalid_rate": _("Rate must be greater than zero."),
     "organization_currency_update": _("Organization currency updated successfully."),
     "transaction_not_found": _("Transaction not found."),
+    "transaction_not_pending": _(
+        "Only pending transactions can be approved or rejected."
+    ),
+    "bulk_transactions_processed": _("Transactions processed successfully."),
     "transactions_fetched": _("Transactions fetched successfully."),
     "subscription_transactions_fetched": _(
         "Subscription transactions fetched successfully."
     ),
     "transaction_retrieved": _("Transaction details retrieved successfully."),
+    "invalid_export_file_format": _("Invalid export file format. Use csv or xlsx."),
+    "export_queued": _(
+        "Your export is being prepared. A download link will be emailed to you shortly."
+    ),
     "restrict_to_update_transaction": _(
         "Unable to update transaction: associated user account has been deleted."
     ),
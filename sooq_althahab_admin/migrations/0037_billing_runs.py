@@ -0,0 +1,128 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:03
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "sooq_althahab_admin",
+            "0036_remove_businesssubscriptionplan_cancel_at_end_of_billing_cycle",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillingRun",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.CharField(
+                        editable=False,
+                        max_length=25,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "run_type",
+                    models.CharField(
+                        choices=[
+                            ("SUBSCRIPTION_FEE", "Subscription Fee"),
+                            ("PRO_RATA", "Pro Rata"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("run_date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("COMPLETED", "Completed"),
+                            ("COMPLETED_WITH_FAILURES", "Completed With Failures"),
+                        ],
+                        default="RUNNING",
+                        max_length=30,
+                    ),
+                ),
+                ("total_items", models.PositiveIntegerField(default=0)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Billing Run",
+                "verbose_name_plural": "Billing Runs",
+                "db_table": "billing_runs",
+                "ordering": ["-created_at"],
+                "unique_together": {("run_type", "run_date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="BillingRunItem",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.CharField(
+                        editable=False,
+                        max_length=25,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSING", "Processing"),
+                            ("COMPLETED", "Completed"),
+                            ("SKIPPED", "Skipped"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "billing_run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="sooq_althahab_admin.billingrun",
+                    ),
+                ),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="billing_run_items",
+                        to="sooq_althahab_admin.businesssubscriptionplan",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Billing Run Item",
+                "verbose_name_plural": "Billing Run Items",
+                "db_table": "billing_run_items",
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["billing_run", "status"], name="bri_run_status_idx"
+                    )
+                ],
+                "unique_together": {("billing_run", "subscription")},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:18
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("sooq_althahab_admin", "0037_billing_runs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["user", "is_read"], name="notif_user_read_idx"),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:20
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("sooq_althahab_admin", "0038_notification_unread_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notif_user_read_idx",
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="notif_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "is_read", "-created_at", "-id"],
+                name="notif_user_read_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "notification_type", "-created_at", "-id"],
+                name="notif_user_type_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:06
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sooq_althahab_admin", "0039_notification_inbox_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="billingrunitem",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("PROCESSING", "Processing"),
+                    ("COMPLETED", "Completed"),
+                    ("SKIPPED", "Skipped"),
+                    ("FAILED", "Failed"),
+                    ("NEEDS_RECONCILIATION", "Needs Reconciliation"),
+                ],
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+    ]
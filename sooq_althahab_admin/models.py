@@ -9,11 +9,13 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MaxValueValidator
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db import transaction
 from django.db.models import DecimalField
 from django.db.models import ExpressionWrapper
 from django.db.models import F
 from django.db.models import Sum
 from django.utils import timezone
+from django_softdelete.managers import SoftDeleteManager
 from django_softdelete.models import SoftDeleteModel
 
 from account.abstract import RiskLevelMixin
@@ -30,6 +32,9 @@ from sooq_althahab.enums.account import SubscriptionStatusChoices
 from sooq_althahab.enums.account import UserRoleBusinessChoices
 from sooq_althahab.enums.account import UserType
 from sooq_althahab.enums.jeweler import RequestStatus
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunItemStatus
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunStatus
+from sooq_althahab.enums.sooq_althahab_admin import BillingRunType
 from sooq_althahab.enums.sooq_althahab_admin import FundStatus
 from sooq_althahab.enums.sooq_althahab_admin import MaterialType
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
@@ -85,6 +90,21 @@ class MaterialItem(CustomIDMixin, UserTimeStampedModelMixin, OwnershipMixin):
         ordering = ["-created_at"]
 
 
+class NotificationManager(SoftDeleteManager):
+    """Keeps the recipients' Redis unread counters in step with bulk inserts."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from sooq_althahab.notification_counters import increment_unread_counts
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        user_ids = [obj.user_id for obj in objs if not obj.is_read]
+        if user_ids:
+            transaction.on_commit(
+                lambda: increment_unread_counts(user_ids), using=self.db
+            )
+        return objs
+
+
 class Notification(SoftDeleteModel, CustomIDMixin, TimeStampedModelMixin):
     """
     Django model class representing the notification details for a user.
@@ -126,11 +146,28 @@ class Notification(SoftDeleteModel, CustomIDMixin, TimeStampedModelMixin):
     object_id = models.CharField(max_length=18, null=True, blank=True)
     content_object = GenericForeignKey("content_type", "object_id")
 
+    objects = NotificationManager()
+
     class Meta:
         db_table = "notifications"
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
         ordering = ["-created_at"]
+        indexes = [
+            # Inbox pages, optionally filtered to unread or to one type, are
+            # keyset scans on (created_at, id) within the user's rows.
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="notif_user_created_idx"
+            ),
+            models.Index(
+                fields=["user", "is_read", "-created_at", "-id"],
+                name="notif_user_read_created_idx",
+            ),
+            models.Index(
+                fields=["user", "notification_type", "-created_at", "-id"],
+                name="notif_user_type_created_idx",
+            ),
+        ]
 
     def __str__(self):
         """
@@ -1278,6 +1315,64 @@ class SubscriptionBillingHistory(CustomIDMixin, UserTimeStampedModelMixin):
         ordering = ["-billing_date"]
 
 
+class BillingRun(CustomIDMixin, TimeStampedModelMixin):
+    """
+    One scheduled recurring billing run. Running the task again on the same
+    date resumes this run instead of starting over.
+    """
+
+    run_type = models.CharField(max_length=20, choices=BillingRunType.choices)
+    run_date = models.DateField()
+    status = models.CharField(
+        max_length=30,
+        choices=BillingRunStatus.choices,
+        default=BillingRunStatus.RUNNING,
+    )
+    total_items = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "billing_runs"
+        verbose_name = "Billing Run"
+        verbose_name_plural = "Billing Runs"
+        unique_together = ("run_type", "run_date")
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.run_type} - {self.run_date}"
+
+
+class BillingRunItem(CustomIDMixin, TimeStampedModelMixin):
+    """Per-subscription checkpoint of a billing run."""
+
+    billing_run = models.ForeignKey(
+        BillingRun, related_name="items", on_delete=models.CASCADE
+    )
+    subscription = models.ForeignKey(
+        BusinessSubscriptionPlan,
+        related_name="billing_run_items",
+        on_delete=models.CASCADE,
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=BillingRunItemStatus.choices,
+        default=BillingRunItemStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "billing_run_items"
+        verbose_name = "Billing Run Item"
+        verbose_name_plural = "Billing Run Items"
+        unique_together = ("billing_run", "subscription")
+        indexes = [
+            models.Index(fields=["billing_run", "status"], name="bri_run_status_idx")
+        ]
+        ordering = ["created_at"]
+
+
 class MusharakahDurationChoices(CustomIDMixin, TimeStampedModelMixin, OwnershipMixin):
     name = models.CharField(max_length=50, unique=True)  # e.g., "3 Months"
     days = models.PositiveIntegerField()  # e.g., 90
@@ -1452,11 +1547,10 @@ class BillingDetails(
         Format: INV+USERINITIALS+MMYY+SEQUENCE (monthly basis)
         Example: INVJOH0625001
         """
-        from django.db import transaction
         from django.utils.timezone import now
 
-        from account.models import ReceiptSequence
         from account.models import UserAssignedBusiness
+        from account.sequences import next_receipt_sequence
 
         current_time = now()
         mm_yy = current_time.strftime("%m%y")
@@ -1482,17 +1576,10 @@ class BillingDetails(
             else:
                 business_initials = "USR"
 
-        # Use ReceiptSequence for atomic sequence tracking (same as PurchaseRequest)
-        with transaction.atomic():
-            sequence_obj, _ = ReceiptSequence.objects.select_for_update().get_or_create(
-                mm_yy=mm_yy,
-                transaction_code=transaction_code,
-                defaults={"last_sequence": 0},
-            )
-            sequence_obj.last_sequence += 1
-            sequence_obj.save()
+        # Shares the INV counter with PurchaseRequest invoices
+        sequence = next_receipt_sequence(mm_yy, transaction_code)
 
-        return f"{transaction_code}{business_initials}{mm_yy}{sequence_obj.last_sequence:03d}"
+        return f"{transaction_code}{business_initials}{mm_yy}{sequence:03d}"
 
 
 class AppVersion(CustomIDMixin, TimeStampedModelMixin):
@@ -1,7 +1,6 @@
 from datetime import timedelta
 from decimal import Decimal
 
-import requests
 from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
@@ -81,6 +80,10 @@ from sooq_althahab.enums.sooq_althahab_admin import MaterialType
 from sooq_althahab.enums.sooq_althahab_admin import NotificationTypes
 from sooq_althahab.enums.sooq_althahab_admin import Status
 from sooq_althahab.enums.sooq_althahab_admin import TransactionRequest
+from sooq_althahab.http_transport import get_transport
+from sooq_althahab.image_derivatives import get_derivative_urls
+from sooq_althahab.image_derivatives import queue_image_derivatives
+from sooq_althahab.presigned_urls import PresignedUrlListSerializer
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
 from sooq_althahab.utils import get_presigned_url_from_s3
 from sooq_althahab_admin.models import BillingDetails
@@ -426,6 +429,9 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         exclude = ["password"]
+        # Signed for the whole page at once
+        list_serializer_class = PresignedUrlListSerializer
+        presigned_url_fields = ["profile_image"]
 
     def get_addresses(self, obj):
         from account.serializers import AddressSerializer
@@ -514,7 +520,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_profile_image(self, obj):
         """Generate a pre-signed URL for the given image"""
-        return get_presigned_url_from_s3(obj.profile_image)
+        return get_presigned_url_from_s3(obj.profile_image, self.context)
 
 
 class GlobalMetalSerializer(serializers.ModelSerializer):
@@ -563,7 +569,7 @@ class MaterialItemDetailSerializer(MaterialItemSerializer):
     def get_image(self, obj):
         """Generate a presigned URL for the image field in the model using the PresignedUrlSerializer."""
         object_name = obj.image
-        return get_presigned_url_from_s3(object_name)
+        return get_presigned_url_from_s3(object_name, self.context)
 
 
 class MetalPriceHistorySerializer(serializers.ModelSerializer):
@@ -989,6 +995,127 @@ class TransactionUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
+class BulkTransactionStatusUpdateSerializer(serializers.Serializer):
+    """
+    Approve or reject many pending wallet top-ups/withdrawals at once.
+
+    All affected wallets are locked in primary-key order and every balance
+    change is applied inside a single database transaction. ``save()`` returns
+    one result per requested transaction id.
+    """
+
+    transaction_ids = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=settings.WALLET_BULK_APPROVAL_MAX_ITEMS,
+    )
+    status = serializers.ChoiceField(choices=TransactionRequest.choices)
+    remark = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        status = validated_data["status"]
+        remark = validated_data.get("remark")
+        transaction_ids = list(dict.fromkeys(validated_data["transaction_ids"]))
+        errors = {pk: str(MESSAGES["transaction_not_found"]) for pk in transaction_ids}
+        updated = []
+
+        with transaction.atomic():
+            transactions = list(
+                Transaction.global_objects.select_for_update(of=("self",))
+                .filter(
+                    pk__in=transaction_ids,
+                    created_by__organization_id=user.organization_id,
+                    transaction_type__in=[
+                        TransactionType.DEPOSIT,
+                        TransactionType.WITHDRAWAL,
+                    ],
+                )
+                .order_by("created_at", "pk")
+            )
+
+            business_ids = {
+                business_id
+                for instance in transactions
+                for business_id in (instance.from_business_id, instance.to_business_id)
+            }
+            restricted_business_ids = set(
+                UserAssignedBusiness.objects.filter(
+                    business_id__in=business_ids,
+                    is_owner=True,
+                    user__deleted_at__isnull=False,
+                ).values_list("business_id", flat=True)
+            )
+
+            # Lock wallets in a deterministic order to avoid deadlocks with
+            # concurrent single approvals and other bulk runs.
+            wallets = {
+                wallet.business_id: wallet
+                for wallet in Wallet.objects.select_for_update()
+                .filter(business_id__in={t.from_business_id for t in transactions})
+                .order_by("pk")
+            }
+
+            for instance in transactions:
+                if instance.status != TransactionStatus.PENDING:
+                    errors[instance.pk] = str(MESSAGES["transaction_not_pending"])
+                    continue
+                if {
+                    instance.from_business_id,
+                    instance.to_business_id,
+                } & restricted_business_ids:
+                    errors[instance.pk] = str(
+                        MESSAGES["restrict_to_update_transaction"]
+                    )
+                    continue
+                wallet = wallets.get(instance.from_business_id)
+                if not wallet:
+                    errors[instance.pk] = str(
+                        ACCOUNT_MESSAGES["business_account_not_found"]
+                    )
+                    continue
+
+                instance.previous_balance = wallet.balance
+                if status == TransactionRequest.APPROVED:
+                    instance.status = TransactionStatus.APPROVED
+                    if instance.transaction_type == TransactionType.DEPOSIT:
+                        wallet.balance += instance.amount
+                    else:
+                        wallet.balance -= instance.amount
+                else:
+                    instance.status = TransactionStatus.REJECTED
+                instance.current_balance = wallet.balance
+                instance.remark = remark
+
+                errors.pop(instance.pk)
+                updated.append(instance)
+
+            if updated:
+                Transaction.global_objects.bulk_update(
+                    updated,
+                    ["status", "remark", "previous_balance", "current_balance"],
+                )
+                changed_business_ids = {t.from_business_id for t in updated}
+                changed_wallets = [
+                    wallet
+                    for wallet in wallets.values()
+                    if wallet.business_id in changed_business_ids
+                ]
+                now = timezone.now()
+                for wallet in changed_wallets:
+                    wallet.updated_at = now
+                Wallet.objects.bulk_update(changed_wallets, ["balance", "updated_at"])
+
+        results = [
+            {"id": instance.pk, "success": True, "status": instance.status}
+            for instance in updated
+        ]
+        results += [
+            {"id": pk, "success": False, "error": error} for pk, error in errors.items()
+        ]
+        return results
+
+
 class OrganizationBankAccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrganizationBankAccount
@@ -2168,7 +2295,6 @@ class MusharakahContractRequestStatusUpdateSerializer(serializers.ModelSerialize
             )
             carat_type = asset.purchase_request.precious_item.carat_type
             weight = asset.purchase_request.precious_item.precious_metal.weight
-            session = requests.Session()
             headers = {
                 "x-access-token": settings.GOLD_API_ACCESS_KEY,
                 "Content-Type": "application/json",
@@ -2176,7 +2302,9 @@ class MusharakahContractRequestStatusUpdateSerializer(serializers.ModelSerialize
             base_url = settings.GOLD_API_BASE_URL
             currency = settings.CURRENCY
 
-            response = session.get(f"{base_url}/{symbol}/{currency}", headers=headers)
+            response = get_transport("goldapi").get(
+                f"{base_url}/{symbol}/{currency}", headers=headers
+            )
             response_data = response.json()
 
             price_per_gram = Decimal(
@@ -3546,15 +3674,20 @@ class JewelryProductMarketplaceImageSerializer(serializers.ModelSerializer):
     """Serializer for marketplace product images."""
 
     image = serializers.SerializerMethodField()
+    derivatives = serializers.SerializerMethodField()
 
     class Meta:
         model = JewelryProductMarketplaceImage
-        fields = ["id", "image", "created_at"]
+        fields = ["id", "image", "derivatives", "created_at"]
 
     def get_image(self, obj):
         """Generate a presigned URL for the image field using the PresignedUrlSerializer."""
         image = obj.image
-        return get_presigned_url_from_s3(image)
+        return get_presigned_url_from_s3(image, self.context)
+
+    def get_derivatives(self, obj):
+        """Presigned URLs of the resized copies, by size and format."""
+        return get_derivative_urls(obj.derivatives, self.context)
 
 
 class JewelryProductMarketplaceSerializer(serializers.ModelSerializer):
@@ -3578,6 +3711,12 @@ class JewelryProductMarketplaceSerializer(serializers.ModelSerializer):
             "unpublished_at",
             "marketplace_images",
         ]
+        # Signed for the whole page at once
+        list_serializer_class = PresignedUrlListSerializer
+        presigned_url_fields = [
+            "marketplace_images.image",
+            "marketplace_images.derivatives",
+        ]
 
 
 class JewelryProductMarketplaceCreateSerializer(serializers.ModelSerializer):
@@ -3654,11 +3793,14 @@ class JewelryProductMarketplaceCreateSerializer(serializers.ModelSerializer):
             )
 
             # Create image entries
-            for image_path in images:
+            marketplace_images = [
                 JewelryProductMarketplaceImage.objects.create(
                     marketplace=marketplace_entry,
                     image=image_path,
                 )
+                for image_path in images
+            ]
+            queue_image_derivatives(marketplace_images)
 
             # Update stock to mark as published and update marketplace quantity
             if jewelry_stock and published_quantity > 0:
@@ -109,6 +109,7 @@ from sooq_althahab_admin.views import PoolRetrieveUpdateAPIView
 from sooq_althahab_admin.views import PreciousItemAttributesAPIView
 from sooq_althahab_admin.views import PreciousItemUnitAPIView
 from sooq_althahab_admin.views import PreciousItemUnitUpdateView
+from sooq_althahab_admin.views import PurchaseRequestExportAPIView
 from sooq_althahab_admin.views import PurchaseRequestListAPIView
 from sooq_althahab_admin.views import PurchaseRequestRetrieveAPIView
 from sooq_althahab_admin.views import StoneClarityListCreateAPIView
@@ -121,11 +122,13 @@ from sooq_althahab_admin.views import SubscriptionPlanRetrieveUpdateDeleteAPIVie
 from sooq_althahab_admin.views import SubscriptionTransactionListAdminAPIView
 from sooq_althahab_admin.views import SubscriptionTransactionRetrieveAdminAPIView
 from sooq_althahab_admin.views import ToggleSubscriptionPlanStatusAPIView
+from sooq_althahab_admin.views import TransactionExportAdminAPIView
 from sooq_althahab_admin.views import TransactionListAdminAPIView
 from sooq_althahab_admin.views import TransactionRetrieveAdminAPIView
 from sooq_althahab_admin.views import UserListAPIView
 from sooq_althahab_admin.views import UserRetrieveAPIView
 from sooq_althahab_admin.views import UserSuspensionStatusUpdateAPIView
+from sooq_althahab_admin.views import WalletTransactionsBulkApproveRejectAPIView
 from sooq_althahab_admin.views import WalletTransactionsStatusApproveRejectUpdateAPIView
 
 router = DefaultRouter()
@@ -181,6 +184,11 @@ urlpatterns = [
         PurchaseRequestListAPIView.as_view(),
         name="precious-item-requests",
     ),
+    path(
+        "requests/precious-item/export/",
+        PurchaseRequestExportAPIView.as_view(),
+        name="precious-item-requests-export",
+    ),
     path(
         "organization/",
         OrganizationRetrieveUpdateViewSet.as_view(),
@@ -206,6 +214,11 @@ urlpatterns = [
         TransactionListAdminAPIView.as_view(),
         name="transactions-list",
     ),
+    path(
+        "transactions/export/",
+        TransactionExportAdminAPIView.as_view(),
+        name="transactions-export",
+    ),
     path(
         "transaction/<str:pk>/",
         TransactionRetrieveAdminAPIView.as_view(),
@@ -241,6 +254,11 @@ urlpatterns = [
         OrganizationRiskLevelRetrieveUpdateAPIView.as_view(),
         name="organization-risk-level-retrieve-update",
     ),
+    path(
+        "wallet/transactions/approve-reject/",
+        WalletTransactionsBulkApproveRejectAPIView.as_view(),
+        name="wallet-transactions-bulk-approve-reject",
+    ),
     path(
         "wallet/transactions/<str:pk>/approve-reject/",
         WalletTransactionsStatusApproveRejectUpdateAPIView.as_view(),
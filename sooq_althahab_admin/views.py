@@ -153,13 +153,25 @@ from sooq_althahab.enums.sooq_althahab_admin import StoneOrigin
 from sooq_althahab.helper import PermissionManager
 from sooq_althahab.querysets.purchase_request import base_purchase_request_queryset
 from sooq_althahab.querysets.purchase_request import get_business_from_user_token
+from sooq_althahab.tasks import export_admin_report
 from sooq_althahab.tasks import send_mail
 from sooq_althahab.tasks import send_notification
+from sooq_althahab.tasks import send_wallet_transaction_status_updates
 from sooq_althahab.utils import CommonPagination
+from sooq_althahab.utils import KeysetPagination
+from sooq_althahab.utils import estimate_queryset_count
 from sooq_althahab.utils import generic_response
 from sooq_althahab.utils import handle_serializer_errors
 from sooq_althahab.utils import send_notification_count_to_users
 from sooq_althahab.utils import send_notifications
+from sooq_althahab_admin.exports import EXPORT_FILE_FORMATS
+from sooq_althahab_admin.exports import EXPORTS
+from sooq_althahab_admin.exports import build_export_queryset
+from sooq_althahab_admin.exports import exclude_pagination_params
+from sooq_althahab_admin.exports import get_export_filename
+from sooq_althahab_admin.exports import query_params_to_dict
+from sooq_althahab_admin.exports import stream_csv_response
+from sooq_althahab_admin.exports import xlsx_file_response
 from sooq_althahab_admin.filters import BusinessFilter
 from sooq_althahab_admin.filters import InvestorBusinessFilter
 from sooq_althahab_admin.filters import JewelryProductColorFilter
@@ -191,6 +203,7 @@ from sooq_althahab_admin.models import PoolContribution
 from sooq_althahab_admin.models import StoneClarity
 from sooq_althahab_admin.models import StoneCutShape
 from sooq_althahab_admin.models import SubscriptionPlan
+from sooq_althahab_admin.serializers import BulkTransactionStatusUpdateSerializer
 from sooq_althahab_admin.serializers import BusinessSubscriptionPlanSerializer
 from sooq_althahab_admin.serializers import MaterialItemDetailSerializer
 from sooq_althahab_admin.serializers import SubscriptionTransactionDetailSerializer
@@ -1425,7 +1438,7 @@ class TransactionListAdminAPIView(BaseBusinessListAPIView, ListAPIView):
 
     serializer_class = TransactionResponseSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CommonPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = TransactionFilter
 
@@ -1454,6 +1467,76 @@ class TransactionListAdminAPIView(BaseBusinessListAPIView, ListAPIView):
         )
 
 
+class BaseAdminExportAPIView(APIView):
+    """
+    Streams the filtered admin list as CSV or XLSX.
+
+    Accepts the same filter parameters as the corresponding list endpoint plus
+    ``file_format`` (``csv`` or ``xlsx``) and ``async``. Exports larger than
+    ``ADMIN_EXPORT_SYNC_ROW_LIMIT`` rows, or requested with ``async=true``, are
+    generated by Celery and emailed to the admin as an S3 download link.
+    """
+
+    permission_classes = [IsAuthenticated]
+    export_type = None
+
+    def export(self, request):
+        file_format = request.query_params.get("file_format", "csv").lower()
+        if file_format not in EXPORT_FILE_FORMATS:
+            return generic_response(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                error_message=MESSAGES["invalid_export_file_format"],
+            )
+
+        organization_id = request.user.organization_id.pk
+        query_params = exclude_pagination_params(request.query_params)
+        queryset = build_export_queryset(
+            self.export_type, organization_id, query_params, request
+        )
+
+        run_async = request.query_params.get("async", "").lower() in ("1", "true")
+        if run_async or (
+            estimate_queryset_count(queryset) > settings.ADMIN_EXPORT_SYNC_ROW_LIMIT
+        ):
+            export_admin_report.delay(
+                self.export_type,
+                file_format,
+                query_params_to_dict(query_params),
+                organization_id,
+                request.user.pk,
+            )
+            return generic_response(
+                status_code=status.HTTP_202_ACCEPTED,
+                message=MESSAGES["export_queued"],
+            )
+
+        columns = EXPORTS[self.export_type]["columns"]
+        filename = get_export_filename(self.export_type, file_format)
+        if file_format == "csv":
+            return stream_csv_response(queryset, columns, filename)
+        return xlsx_file_response(queryset, columns, filename)
+
+
+class TransactionExportAdminAPIView(BaseAdminExportAPIView):
+    """Admin API to export transactions (same filters as the transaction list)."""
+
+    export_type = "transactions"
+
+    @PermissionManager(TRANSACTION_VIEW_PERMISSION)
+    def get(self, request, *args, **kwargs):
+        return self.export(request)
+
+
+class PurchaseRequestExportAPIView(BaseAdminExportAPIView):
+    """Admin API to export purchase requests (same filters as the request list)."""
+
+    export_type = "purchase-requests"
+
+    @PermissionManager(ADMIN_PURCHASE_REQUEST_VIEW_PERMISSION)
+    def get(self, request, *args, **kwargs):
+        return self.export(request)
+
+
 class TransactionRetrieveAdminAPIView(RetrieveAPIView):
     """Admin API to retrieve a specific transaction within the request user's organization."""
 
@@ -1679,6 +1762,42 @@ class WalletTransactionsStatusApproveRejectUpdateAPIView(UpdateAPIView):
         send_notification.delay(tokens, title, message, notification_data)
 
 
+class WalletTransactionsBulkApproveRejectAPIView(APIView):
+    """
+    API to approve or reject many pending wallet top-ups/withdrawals at once.
+
+    Balance changes are committed in one database transaction; receipts,
+    emails and notifications are sent afterwards by a background task.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(request_body=BulkTransactionStatusUpdateSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = BulkTransactionStatusUpdateSerializer(
+            data=request.data, context={"request": request}
+        )
+        if not serializer.is_valid():
+            return handle_serializer_errors(serializer)
+
+        results = serializer.save()
+        updated_ids = [result["id"] for result in results if result["success"]]
+        if updated_ids:
+            transaction.on_commit(
+                lambda: send_wallet_transaction_status_updates.delay(updated_ids)
+            )
+
+        return generic_response(
+            message=MESSAGES["bulk_transactions_processed"],
+            status_code=status.HTTP_200_OK,
+            data={
+                "processed": len(updated_ids),
+                "failed": len(results) - len(updated_ids),
+                "results": results,
+            },
+        )
+
+
 ########################################################################################
 #################################### Common APIs #######################################
 ########################################################################################
@@ -2596,20 +2715,25 @@ class PoolContributionUpdateAPIView(UpdateAPIView):
             )
 
             # Get all users assigned to investor businesses with notifications enabled
-            investor_users = User.objects.filter(
-                user_assigned_businesses__business__in=investor_businesses,
-                user_preference__notifications_enabled=True,
-            ).distinct()
+            investor_user_ids = list(
+                User.objects.filter(
+                    user_assigned_businesses__business__in=investor_businesses,
+                    user_preference__notifications_enabled=True,
+                )
+                .values_list("pk", flat=True)
+                .distinct()
+            )
 
-            if not investor_users.exists():
+            if not investor_user_ids:
                 return
 
             # Format remaining weight for display
             remaining_weight_str = f"{remaining_weight:.2f}".rstrip("0").rstrip(".")
 
-            # Send notification to all investors
+            # Send notification to all investors (chunked background fan-out
+            # for large organizations)
             send_notifications(
-                investor_users,
+                investor_user_ids,
                 f"Pool Opportunity Available - {pool.name}",
                 f"Pool '{pool.name}' has {remaining_weight_str}g remaining. Contribute now to complete the pool!",
                 notification_type=NotificationTypes.POOL_OPPORTUNITY_AVAILABLE,